@@ -4,63 +4,201 @@ Bedrock-AgentCore Browser Live Viewer with proper display sizing support and DCV
 """
 
 import os
+import html
 import time
 import threading
 import webbrowser
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 from rich.console import Console
 
 from bedrock_agentcore.tools.browser_client import BrowserClient
 
+try:
+    from .static_assets import StaticAssets, add_asset_route
+except ImportError:
+    from static_assets import StaticAssets, add_asset_route
+
 console = Console()
 
+# Lifetime of generated live view URLs. A cached URL is handed out while it has at
+# least LIVE_VIEW_URL_REFRESH_MARGIN seconds left, so a viewer always gets time to connect.
+LIVE_VIEW_URL_EXPIRES = int(os.environ.get('LIVE_VIEW_URL_EXPIRES', '300'))
+LIVE_VIEW_URL_REFRESH_MARGIN = 60
+# How often the background refresher looks for URLs close to expiry
+LIVE_VIEW_URL_REFRESH_INTERVAL = 10
+
+
+class LiveViewUrlCache:
+    """Presigned live view URL of one browser session, reused until it is close to expiry."""
+    
+    def __init__(self, browser_client: BrowserClient, expires: int = LIVE_VIEW_URL_EXPIRES,
+                 refresh_margin: int = LIVE_VIEW_URL_REFRESH_MARGIN):
+        self.browser_client = browser_client
+        self.expires = expires
+        self.refresh_margin = refresh_margin
+        self.last_requested = 0.0
+        self._url = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+    
+    def _generate(self):
+        url = self.browser_client.generate_live_view_url(expires=self.expires)
+        self._url, self._expires_at = url, time.time() + self.expires
+    
+    def get(self) -> Tuple[str, float]:
+        """Return (url, expires_at), signing a new URL only if the cached one is about to expire."""
+        with self._lock:
+            self.last_requested = time.time()
+            if self._url is None or self._expires_at - self.last_requested < self.refresh_margin:
+                self._generate()
+            return self._url, self._expires_at
+    
+    def refresh_if_due(self, now: float) -> bool:
+        """Re-sign ahead of expiry for a session viewed recently, so page loads do not wait on it."""
+        with self._lock:
+            if self._url is None or now - self.last_requested > self.expires:
+                return False
+            if self._expires_at - now >= 2 * self.refresh_margin:
+                return False
+            self._generate()
+            return True
+
+
+class ViewedSession:
+    """A browser session served by the viewer, with its URL cache and control state."""
+    
+    def __init__(self, browser_client: BrowserClient):
+        self.browser_client = browser_client
+        self.session_id = browser_client.session_id
+        self.live_view_url = LiveViewUrlCache(browser_client)
+        self.has_control = False
+        self.control_lock = threading.Lock()
+    
+    def info(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "identifier": self.browser_client.identifier,
+            "region": self.browser_client.region,
+            "has_control": self.has_control,
+            "url": f"/sessions/{self.session_id}"
+        }
+
+
 class BrowserViewerServer:
-    """Server for viewing Bedrock-AgentCore Browser sessions with configurable display size."""
+    """
+    Server for viewing Bedrock-AgentCore Browser sessions with configurable display size.
+    
+    One server can show many sessions: each is at /sessions/{session_id}, and
+    sessions are added with add_session(). The page is a static shell that
+    fetches its session's live view URL from /api/sessions/{session_id}/live-view-url.
+    """
+    
+    _dcv_sdk_checked = False
     
-    def __init__(self, browser_client: BrowserClient, port: int = 8000):
-        """Initialize the viewer server."""
+    def __init__(self, browser_client: Optional[BrowserClient] = None, port: int = 8000):
+        """Initialize the viewer server, optionally with a first browser session."""
         self.browser_client = browser_client
         self.port = port
         self.app = FastAPI(title="Bedrock-AgentCore Browser Viewer")
         self.server_thread = None
+        self.refresh_thread = None
         self.is_running = False
-        self.has_control = False  # Add control state tracking
+        self.sessions: Dict[str, ViewedSession] = {}
+        self._sessions_lock = threading.Lock()
+        self._stop_refresh = threading.Event()
         
         # Setup directory structure
         self.package_dir = Path(__file__).parent
         self.static_dir = self.package_dir / "static"
-        self.js_dir = self.static_dir / "js"
-        self.css_dir = self.static_dir / "css"
         self.dcv_dir = self.static_dir / "dcvjs"
         
-        # Create all directories
-        for directory in [self.static_dir, self.js_dir, self.css_dir, self.dcv_dir]:
-            directory.mkdir(parents=True, exist_ok=True)
-        
-        # Create the JS and CSS files
+        # Build the JS and CSS files; they are only written when their content changed
+        self.assets = StaticAssets(self.static_dir)
         self._create_static_files()
         
-        # Check for DCV SDK
-        self._check_dcv_sdk()
+        # Check for DCV SDK, once per process
+        if not BrowserViewerServer._dcv_sdk_checked:
+            self._check_dcv_sdk()
+            BrowserViewerServer._dcv_sdk_checked = True
         
         # Mount static files
         self.app.mount("/static", StaticFiles(directory=str(self.static_dir)), name="static")
+        add_asset_route(self.app, self.assets)
+        
+        # The page is the same for every session, so it is built once
+        self.viewer_html = self._generate_html()
         
         # Setup routes
         self._setup_routes()
+        
+        if browser_client is not None:
+            self.add_session(browser_client)
+    
+    @property
+    def has_control(self) -> bool:
+        """Control state of the first session, for single-session use."""
+        session = self._default_session(required=False)
+        return session.has_control if session else False
+    
+    def add_session(self, browser_client: BrowserClient) -> str:
+        """Serve a started browser session at /sessions/{session_id}; returns the session ID."""
+        if not browser_client.session_id:
+            raise ValueError("The browser session must be started before it is added to the viewer")
+        session = ViewedSession(browser_client)
+        with self._sessions_lock:
+            self.sessions[session.session_id] = session
+            if self.browser_client is None:
+                self.browser_client = browser_client
+        console.print(f"[cyan]Viewing session {session.session_id} at /sessions/{session.session_id}[/cyan]")
+        return session.session_id
+    
+    def remove_session(self, session_id: str) -> None:
+        """Stop serving a session, e.g. after its browser was stopped."""
+        with self._sessions_lock:
+            session = self.sessions.pop(session_id, None)
+            if session is not None and session.browser_client is self.browser_client:
+                remaining = next(iter(self.sessions.values()), None)
+                self.browser_client = remaining.browser_client if remaining else None
+    
+    def _get_session(self, session_id: str) -> ViewedSession:
+        with self._sessions_lock:
+            session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail=f"Unknown browser session: {session_id}")
+        return session
+    
+    def _default_session(self, required: bool = True) -> Optional[ViewedSession]:
+        """The first session added, used by the single-session routes."""
+        with self._sessions_lock:
+            session = next(iter(self.sessions.values()), None)
+        if session is None and required:
+            raise HTTPException(status_code=400, detail="No active browser session")
+        return session
+    
+    def _refresh_live_view_urls(self):
+        """Keep the URLs of sessions being watched signed ahead of their expiry."""
+        while not self._stop_refresh.wait(LIVE_VIEW_URL_REFRESH_INTERVAL):
+            with self._sessions_lock:
+                sessions = list(self.sessions.values())
+            now = time.time()
+            for session in sessions:
+                try:
+                    session.live_view_url.refresh_if_due(now)
+                except Exception as e:
+                    console.print(f"[yellow]Could not refresh live view URL for {session.session_id}: {e}[/yellow]")
     
     def _create_static_files(self):
         """Create the JavaScript and CSS files included with the SDK."""
         
         # Create bedrock-agentcore-browser-viewer.js with enhanced debugging
         js_content = '''// Bedrock-AgentCore Browser Viewer Module with Enhanced Debugging
-import dcv from "../dcvjs/dcv.js";
+import dcv from "/static/dcvjs/dcv.js";
 export class BedrockAgentCoreLiveViewer {
     constructor(presignedUrl, containerId = 'dcv-display') {
         this.displayLayoutRequested = false;
@@ -211,9 +349,7 @@ export class BedrockAgentCoreLiveViewer {
     }
 }'''
         
-        js_file = self.js_dir / "bedrock-agentcore-browser-viewer.js"
-        with open(js_file, 'w') as f:
-            f.write(js_content)
+        self.assets.add("bedrock-agentcore-browser-viewer.js", js_content)
         
         # Create viewer.css with added control button styles
         css_content = '''/* Bedrock-AgentCore Browser Viewer Styles */
@@ -377,9 +513,7 @@ button.active {
     overflow: auto;
 }'''
         
-        css_file = self.css_dir / "viewer.css"
-        with open(css_file, 'w') as f:
-            f.write(css_content)
+        self.assets.add("viewer.css", css_content)
     
     def _check_dcv_sdk(self):
         """Check if DCV SDK is present."""
@@ -419,92 +553,128 @@ button.active {
                 console.print(f"[green]✅ DCV SDK found ({file_size:,} bytes)[/green]")
     
     def _setup_routes(self):
-        """Setup FastAPI routes."""
+        """
+        Setup FastAPI routes.
+        
+        Routes that call the browser service are plain functions, which FastAPI runs
+        in its thread pool, so a slow call for one session does not hold up the others.
+        """
         
         @self.app.get("/", response_class=HTMLResponse)
-        async def root():
-            """Serve the main viewer page."""
-            if not self.browser_client.session_id:
-                raise HTTPException(status_code=400, detail="No active browser session")
-            
+        def root():
+            """Open the only session, or list the sessions to choose from."""
+            with self._sessions_lock:
+                sessions = list(self.sessions.values())
+            if len(sessions) == 1:
+                return RedirectResponse(url=f"/sessions/{sessions[0].session_id}")
+            return HTMLResponse(content=self._generate_index_html(sessions))
+        
+        @self.app.get("/sessions/{session_id}", response_class=HTMLResponse)
+        def session_page(session_id: str):
+            """Serve the viewer page; it reads the session ID from its own path."""
+            self._get_session(session_id)
+            return HTMLResponse(content=self.viewer_html, headers={"Cache-Control": "no-cache"})
+        
+        @self.app.get("/api/sessions")
+        def list_sessions():
+            """List the sessions this server shows."""
+            with self._sessions_lock:
+                return {"sessions": [session.info() for session in self.sessions.values()]}
+        
+        @self.app.get("/api/sessions/{session_id}/live-view-url")
+        def live_view_url(session_id: str):
+            """Return the session's presigned live view URL, from the cache unless it is about to expire."""
+            session = self._get_session(session_id)
             try:
-                presigned_url = self.browser_client.generate_live_view_url(expires=300)
-                
-                # Debug logging
-                console.print(f"\n[cyan]Generated presigned URL:[/cyan]")
-                console.print(f"[dim]{presigned_url}[/dim]\n")
-                
-                html = self._generate_html(presigned_url)
-                return HTMLResponse(content=html)
+                url, expires_at = session.live_view_url.get()
             except Exception as e:
-                console.print(f"[red]Error generating viewer: {str(e)}[/red]")
+                console.print(f"[red]Error generating live view URL for {session_id}: {str(e)}[/red]")
                 raise HTTPException(status_code=500, detail=str(e))
+            return JSONResponse(
+                {"url": url, "expires_at": expires_at},
+                headers={"Cache-Control": "no-store"}
+            )
+        
+        def set_control(session: ViewedSession, take: bool):
+            with session.control_lock:
+                try:
+                    if take:
+                        session.browser_client.take_control()
+                    else:
+                        session.browser_client.release_control()
+                    session.has_control = take
+                except Exception as e:
+                    action = "take" if take else "release"
+                    console.print(f"[red]❌ Failed to {action} control of {session.session_id}: {e}[/red]")
+                    return JSONResponse(
+                        {"status": "error", "message": str(e), "has_control": session.has_control},
+                        status_code=500
+                    )
+            if take:
+                console.print(f"[green]✅ Took control of browser session {session.session_id}[/green]")
+                return JSONResponse({"status": "success", "message": "Control taken", "has_control": True})
+            console.print(f"[yellow]✅ Released control of browser session {session.session_id}[/yellow]")
+            return JSONResponse({"status": "success", "message": "Control released", "has_control": False})
+        
+        @self.app.post("/api/sessions/{session_id}/take-control")
+        def take_session_control(session_id: str):
+            """Take control of a browser session."""
+            return set_control(self._get_session(session_id), True)
         
-        # ADD TAKE CONTROL ROUTE
+        @self.app.post("/api/sessions/{session_id}/release-control")
+        def release_session_control(session_id: str):
+            """Release control of a browser session."""
+            return set_control(self._get_session(session_id), False)
+        
+        @self.app.get("/api/sessions/{session_id}/session-info")
+        def session_info(session_id: str):
+            """Get session information."""
+            return self._session_info(self._get_session(session_id))
+        
+        # Single-session routes, acting on the first session added
         @self.app.post("/api/take-control")
-        async def take_control():
+        def take_control():
             """Take control of the browser session."""
-            try:
-                self.browser_client.take_control()
-                self.has_control = True
-                console.print("[green]✅ Took control of browser session[/green]")
-                return JSONResponse({"status": "success", "message": "Control taken", "has_control": True})
-            except Exception as e:
-                console.print(f"[red]❌ Failed to take control: {e}[/red]")
-                return JSONResponse(
-                    {"status": "error", "message": str(e), "has_control": self.has_control},
-                    status_code=500
-                )
+            return set_control(self._default_session(), True)
         
-        # ADD RELEASE CONTROL ROUTE
         @self.app.post("/api/release-control")
-        async def release_control():
+        def release_control():
             """Release control of the browser session."""
-            try:
-                self.browser_client.release_control()
-                self.has_control = False
-                console.print("[yellow]✅ Released control of browser session[/yellow]")
-                return JSONResponse({"status": "success", "message": "Control released", "has_control": False})
-            except Exception as e:
-                console.print(f"[red]❌ Failed to release control: {e}[/red]")
-                return JSONResponse(
-                    {"status": "error", "message": str(e), "has_control": self.has_control},
-                    status_code=500
-                )
+            return set_control(self._default_session(), False)
         
         @self.app.get("/api/session-info")
-        async def session_info():
+        def default_session_info():
             """Get session information."""
-            return {
-                "session_id": self.browser_client.session_id,
-                "identifier": self.browser_client.identifier,
-                "region": self.browser_client.region,
-                "stage": os.environ.get("BEDROCK_AGENTCORE_STAGE", "gamma"),
-                "display_sizes": [
-                    {"width": 1280, "height": 720, "label": "HD"},
-                    {"width": 1600, "height": 900, "label": "HD+"},
-                    {"width": 1920, "height": 1080, "label": "Full HD"},
-                    {"width": 2560, "height": 1440, "label": "2K"}
-                ]
-            }
+            return self._session_info(self._default_session())
         
         @self.app.get("/api/debug-info")
-        async def debug_info():
+        def debug_info():
             """Get debug information."""
+            with self._sessions_lock:
+                sessions = [session.info() for session in self.sessions.values()]
             return {
                 "dcv_files": self._check_dcv_files(),
-                "session": {
-                    "id": self.browser_client.session_id,
-                    "identifier": self.browser_client.identifier,
-                    "region": self.browser_client.region,
-                    "stage": os.environ.get("BEDROCK_AGENTCORE_STAGE", "gamma")
-                },
+                "sessions": sessions,
+                "stage": os.environ.get("BEDROCK_AGENTCORE_STAGE", "gamma"),
                 "server": {
                     "static_dir": str(self.static_dir),
                     "dcv_dir": str(self.dcv_dir)
                 }
             }
     
+    def _session_info(self, session: ViewedSession) -> dict:
+        info = session.info()
+        info.update({
+            "stage": os.environ.get("BEDROCK_AGENTCORE_STAGE", "gamma"),
+            "display_sizes": [
+                {"width": 1280, "height": 720, "label": "HD"},
+                {"width": 1600, "height": 900, "label": "HD+"},
+                {"width": 1920, "height": 1080, "label": "Full HD"},
+                {"width": 2560, "height": 1440, "label": "2K"}
+            ]
+        })
+        return info
+    
     def _check_dcv_files(self):
         """Check which DCV files are present."""
         dcv_files = {}
@@ -530,20 +700,20 @@ button.active {
         
         return dcv_files
     
-    def _generate_html(self, presigned_url: str) -> str:
-        """Generate the viewer HTML with enhanced debugging."""
-        return f'''<!DOCTYPE html>
+    def _generate_html(self) -> str:
+        """Generate the viewer HTML shell with enhanced debugging; it is the same for every session."""
+        return '''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Bedrock-AgentCore Browser Viewer</title>
-    <link rel="stylesheet" href="/static/css/viewer.css">
+    <link rel="stylesheet" href="''' + self.assets.urls['viewer.css'] + '''">
 </head>
 <body>
     <div class="container">
         <div class="header">
-            <h2>Bedrock-AgentCore Browser Viewer - Session: {self.browser_client.session_id}</h2>
+            <h2>Bedrock-AgentCore Browser Viewer - Session: <span id="session-id"></span></h2>
         </div>
         
         <div class="viewer-wrapper">
@@ -588,114 +758,125 @@ button.active {
     
     <!-- Main viewer logic -->
     <script type="module">
-        import {{ BedrockAgentCoreLiveViewer }} from '/static/js/bedrock-agentcore-browser-viewer.js';
+        import { BedrockAgentCoreLiveViewer } from "''' + self.assets.urls['bedrock-agentcore-browser-viewer.js'] + '''";
         
         // Debug logging
         const debugInfo = document.getElementById('debug-info');
-        function log(message) {{
+        function log(message) {
             console.log(message);
             debugInfo.innerHTML += message + '<br>';
             debugInfo.scrollTop = debugInfo.scrollHeight;
-        }}
+        }
         
         // Global viewer instance
         let viewer = null;
         
-        // Display the presigned URL for debugging
-        log('[Main] Presigned URL: ' + '{presigned_url}'.substring(0, 100) + '...');
+        // The session ID is the last part of the page path: /sessions/{session_id}
+        const sessionId = decodeURIComponent(window.location.pathname.split('/').pop());
+        const apiBase = '/api/sessions/' + encodeURIComponent(sessionId);
+        document.getElementById('session-id').textContent = sessionId;
+        document.title = 'Bedrock-AgentCore Browser Viewer - ' + sessionId;
         
         // Check DCV SDK
-        if (typeof dcv !== 'undefined') {{
+        if (typeof dcv !== 'undefined') {
             log('[Main] DCV SDK loaded successfully');
             log('[Main] DCV methods: ' + Object.keys(dcv).join(', '));
             
             // Configure DCV
-            if (dcv.setWorkerPath) {{
+            if (dcv.setWorkerPath) {
                 dcv.setWorkerPath('/static/dcvjs/dcv/');
                 log('[Main] Set DCV worker path');
-            }}
-        }} else {{
+            }
+        } else {
             log('[Main] ERROR: DCV SDK not found!');
-        }}
+        }
         
         // ADD CONTROL FUNCTIONS
-        window.takeControl = async function() {{
-            try {{
+        window.takeControl = async function() {
+            try {
                 updateStatus('Taking control...');
-                const response = await fetch('/api/take-control', {{ method: 'POST' }});
+                const response = await fetch(apiBase + '/take-control', { method: 'POST' });
                 const data = await response.json();
                 
-                if (data.status === 'success') {{
+                if (data.status === 'success') {
                     document.getElementById('take-control').style.display = 'none';
                     document.getElementById('release-control').style.display = 'inline-block';
                     document.getElementById('control-indicator').textContent = '🎮 You Have Control';
                     updateStatus('You have control');
                     log('[Main] Control taken successfully');
-                }} else {{
+                } else {
                     updateStatus('Failed to take control: ' + data.message);
                     log('[Main] ERROR: ' + data.message);
-                }}
-            }} catch (error) {{
+                }
+            } catch (error) {
                 updateStatus('Error: ' + error.message);
                 log('[Main] ERROR taking control: ' + error.message);
-            }}
-        }};
+            }
+        };
         
-        window.releaseControl = async function() {{
-            try {{
+        window.releaseControl = async function() {
+            try {
                 updateStatus('Releasing control...');
-                const response = await fetch('/api/release-control', {{ method: 'POST' }});
+                const response = await fetch(apiBase + '/release-control', { method: 'POST' });
                 const data = await response.json();
                 
-                if (data.status === 'success') {{
+                if (data.status === 'success') {
                     document.getElementById('take-control').style.display = 'inline-block';
                     document.getElementById('release-control').style.display = 'none';
                     document.getElementById('control-indicator').textContent = 'Automation Active';
                     updateStatus('Control released');
                     log('[Main] Control released successfully');
-                }} else {{
+                } else {
                     updateStatus('Failed to release control: ' + data.message);
                     log('[Main] ERROR: ' + data.message);
-                }}
-            }} catch (error) {{
+                }
+            } catch (error) {
                 updateStatus('Error: ' + error.message);
                 log('[Main] ERROR releasing control: ' + error.message);
-            }}
-        }};
+            }
+        };
         
         // Size control function
-        window.setSize = function(width, height) {{
-            if (viewer) {{
+        window.setSize = function(width, height) {
+            if (viewer) {
                 viewer.setDisplaySize(width, height);
                 
-                document.querySelectorAll('.size-selector button').forEach(btn => {{
+                document.querySelectorAll('.size-selector button').forEach(btn => {
                     btn.classList.remove('active');
-                }});
+                });
                 event.target.classList.add('active');
                 
-                updateStatus(`Display size: ${{width}}×${{height}}`);
-            }}
-        }};
+                updateStatus(`Display size: ${width}×${height}`);
+            }
+        };
         
-        function updateStatus(message) {{
+        function updateStatus(message) {
             document.getElementById('status').textContent = message;
             log('[Main] Status: ' + message);
-        }}
+        }
         
-        async function initialize() {{
-            try {{
+        async function initialize() {
+            try {
                 updateStatus('Initializing DCV viewer...');
                 
                 // Fetch debug info
-                try {{
+                try {
                     const debugResponse = await fetch('/api/debug-info');
                     const debugData = await debugResponse.json();
                     log('[Main] Debug info: ' + JSON.stringify(debugData, null, 2));
-                }} catch (e) {{
+                } catch (e) {
                     log('[Main] Could not fetch debug info: ' + e.message);
-                }}
+                }
+                
+                // Signed URLs are cached by the server until shortly before they expire
+                const urlResponse = await fetch(apiBase + '/live-view-url');
+                const urlData = await urlResponse.json();
+                if (!urlResponse.ok) {
+                    throw new Error(urlData.detail || 'Could not get live view URL');
+                }
+                log('[Main] Presigned URL: ' + urlData.url.substring(0, 100) + '...');
                 
-                viewer = new BedrockAgentCoreLiveViewer('{presigned_url}', 'dcv-display');
+                viewer = new BedrockAgentCoreLiveViewer(urlData.url, 'dcv-display');
                 viewer.setDisplaySize(1600, 900);
                 
                 updateStatus('Connecting to browser session...');
@@ -703,13 +884,13 @@ button.active {
                 
                 updateStatus('Connected - Display: 1600×900');
                 
-            }} catch (error) {{
+            } catch (error) {
                 console.error('Failed to initialize viewer:', error);
                 updateStatus('Error: ' + error.message);
                 log('[Main] ERROR: ' + error.message);
                 log('[Main] Stack: ' + (error.stack || 'No stack trace'));
                 
-                if (error.message && error.message.includes('DCV SDK not loaded')) {{
+                if (error.message && error.message.includes('DCV SDK not loaded')) {
                     document.getElementById('dcv-display').innerHTML = `
                         <div class="error-display">
                             <h3>DCV SDK Not Found</h3>
@@ -718,17 +899,46 @@ button.active {
                             <p>Check the console and debug panel for more information.</p>
                         </div>
                     `;
-                }}
-            }}
-        }}
+                }
+            }
+        }
         
         // Start initialization when page loads
-        document.addEventListener('DOMContentLoaded', () => {{
+        document.addEventListener('DOMContentLoaded', () => {
             log('[Main] DOM loaded, starting initialization...');
             initialize();
-        }});
+        });
     </script>
 </body>
+</html>'''
+    
+    def _generate_index_html(self, sessions) -> str:
+        """Generate the page listing the sessions this server shows."""
+        if sessions:
+            items = '\n'.join(
+                f'            <li><a href="/sessions/{html.escape(session.session_id)}">{html.escape(session.session_id)}</a>'
+                f' <span class="control-indicator">{html.escape(str(session.browser_client.identifier))}</span></li>'
+                for session in sessions
+            )
+            body = f'        <ul>\n{items}\n        </ul>'
+        else:
+            body = '        <p class="control-indicator">No browser sessions yet.</p>'
+        return f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Bedrock-AgentCore Browser Viewer</title>
+    <link rel="stylesheet" href="{self.assets.urls['viewer.css']}">
+</head>
+<body>
+    <div class="header">
+        <h2>Bedrock-AgentCore Browser Viewer - {len(sessions)} sessions</h2>
+    </div>
+    <div class="controls">
+{body}
+    </div>
+</body>
 </html>'''
     
     def start(self, open_browser: bool = True) -> str:
@@ -738,6 +948,8 @@ button.active {
         
         self.server_thread = threading.Thread(target=run_server, daemon=True)
         self.server_thread.start()
+        self.refresh_thread = threading.Thread(target=self._refresh_live_view_urls, daemon=True)
+        self.refresh_thread.start()
         self.is_running = True
         
         time.sleep(1)
@@ -751,3 +963,8 @@ button.active {
             webbrowser.open(viewer_url)
         
         return viewer_url
+    
+    def stop(self) -> None:
+        """Stop refreshing live view URLs; the server thread ends with the process."""
+        self._stop_refresh.set()
+        self.is_running = False
@@ -1,12 +1,22 @@
 """
 Dynamic Research Agent with Bedrock-AgentCore Code Interpreter
 With simplified architecture and robust error handling
+
+The independent analysis sub-tasks run at the same time, each in its own Code
+Interpreter session, and their results are merged before the report is written.
 """
 
 import asyncio
+import hashlib
 import json
+import operator
 import os
-from typing import Dict, List, TypedDict, Optional, Any, Annotated
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, TypedDict, Optional, Any, Annotated
 from datetime import datetime
 
 from langgraph.graph import StateGraph, END
@@ -17,26 +27,145 @@ from rich.console import Console
 from rich.panel import Panel
 from rich.markdown import Markdown
 from rich.syntax import Syntax
+from rich.table import Table
 
 console = Console()
 
+# Independent analysis sub-tasks, run in parallel after process_data. Each writes its
+# results to data/<name>.json and its charts to visualizations/<name>_*.
+ANALYSIS_TASKS = {
+    "trend_analysis": "Trend analysis over time for satisfaction metrics",
+    "correlation_analysis": "Correlation analysis between satisfaction and repeat purchases",
+    "customer_segmentation": "Customer segmentation based on behavior patterns",
+    "feature_importance": "Feature importance analysis for factors driving repeat purchases",
+}
+
+
+# Code that ran successfully is kept here and reused for the same task on data with the same schema
+RESEARCH_CODE_CACHE_DIR = os.environ.get('RESEARCH_CODE_CACHE_DIR', str(Path.home() / '.cache' / 'bedrock_agentcore_research'))
+# Customers in the synthetic dataset; each has about 2.25 purchases, so 4,500,000 gives ~10M rows
+RESEARCH_SYNTHETIC_CUSTOMERS = int(os.environ.get('RESEARCH_SYNTHETIC_CUSTOMERS', '1000'))
+# Longest string and list kept when previous results are passed to the LLM as context
+CONTEXT_MAX_CHARS = 500
+CONTEXT_MAX_ITEMS = 20
+
+# Columns and types of the CSV files in the sandbox, printed as JSON
+DATA_SCHEMA_CODE = """
+import glob
+import json
+import pandas as pd
+schema = {}
+for path in sorted(glob.glob('data/*.csv')):
+    try:
+        schema[path] = {column: str(dtype) for column, dtype in pd.read_csv(path, nrows=1000).dtypes.items()}
+    except Exception as e:
+        schema[path] = {'error': str(e)}
+print(json.dumps(schema))
+"""
+
+
+class GeneratedCodeCache:
+    """
+    On-disk cache of LLM-generated code that ran successfully, keyed by the task and
+    a fingerprint of the data schema, so repeated research runs skip code generation.
+    """
+    
+    def __init__(self, cache_dir: str = RESEARCH_CODE_CACHE_DIR):
+        self.path = Path(cache_dir) / "generated_code.json"
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        try:
+            self._entries = json.loads(self.path.read_text())
+        except (OSError, json.JSONDecodeError):
+            self._entries = {}
+    
+    @staticmethod
+    def key(task_description: str, schema: Dict) -> str:
+        normalized_task = re.sub(r"\s+", " ", task_description).strip().lower()
+        fingerprint = json.dumps(schema, sort_keys=True)
+        return hashlib.sha256(f"{normalized_task}\n{fingerprint}".encode()).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry["code"]
+    
+    def put(self, key: str, task_description: str, code: str):
+        with self._lock:
+            self._entries[key] = {"task": task_description, "code": code, "created": datetime.now().isoformat()}
+            self._save()
+    
+    def discard(self, key: str):
+        """Drop cached code that failed; its lookup counts as a miss, as the code is generated again"""
+        with self._lock:
+            self.hits -= 1
+            self.misses += 1
+            if self._entries.pop(key, None) is not None:
+                self._save()
+    
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        temp_path.write_text(json.dumps(self._entries, indent=2))
+        os.replace(temp_path, self.path)
+
+
+def compact_context(value: Any) -> Any:
+    """Shorten long strings and lists in the context passed to the LLM, such as previous outputs"""
+    if isinstance(value, dict):
+        return {key: compact_context(item) for key, item in value.items()}
+    if isinstance(value, list):
+        items = [compact_context(item) for item in value[:CONTEXT_MAX_ITEMS]]
+        if len(value) > CONTEXT_MAX_ITEMS:
+            items.append(f"... {len(value) - CONTEXT_MAX_ITEMS} more")
+        return items
+    if isinstance(value, str) and len(value) > CONTEXT_MAX_CHARS:
+        return f"{value[:CONTEXT_MAX_CHARS]}... ({len(value) - CONTEXT_MAX_CHARS} more characters)"
+    return value
+
+
+def merge_dicts(left: Dict, right: Dict) -> Dict:
+    """Reducer merging nested dicts, so parallel nodes can each add their own keys"""
+    merged = dict(left or {})
+    for key, value in (right or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_dicts(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
 # Define the agent state
 class AgentState(TypedDict):
-    """State for the research agent with proper annotations"""
+    """
+    State for the research agent with proper annotations
+
+    Nodes return only the keys they change. research_data, completed_tasks, errors and
+    node_timings have reducers, so the updates of nodes running in parallel are merged.
+    """
     messages: Annotated[List, "append"]  # Annotated to handle append operations
     research_query: str
     code_session_id: Optional[str]
-    research_data: Dict[str, any]
-    completed_tasks: List[str]
-    errors: List[str]
+    research_data: Annotated[Dict[str, Any], merge_dicts]
+    completed_tasks: Annotated[List[str], operator.add]
+    errors: Annotated[List[str], operator.add]
+    node_timings: Annotated[Dict[str, float], merge_dicts]
 
 
 class ResearchAgent:
     """Streamlined research agent"""
     
-    def __init__(self, region: str = "us-west-2", model: str = "anthropic.claude-3-5-sonnet-20240620-v1:0"):
+    def __init__(self, region: str = "us-west-2", model: str = "anthropic.claude-3-5-sonnet-20240620-v1:0",
+                 use_code_cache: bool = True, synthetic_customers: int = RESEARCH_SYNTHETIC_CUSTOMERS):
         self.region = region
         self.model = model
+        self.synthetic_customers = synthetic_customers
+        self.code_cache = GeneratedCodeCache() if use_code_cache else None
         self.llm = ChatBedrockConverse(
             model=model,
             region_name=region
@@ -48,9 +177,21 @@ class ResearchAgent:
         self.code_client = CodeInterpreter(region)
         self.code_session_id = self.code_client.start()
         console.print(f"✅ Code Interpreter session: {self.code_session_id}")
+        # Serializes calls to the main session while parallel nodes are running
+        self._code_lock = threading.Lock()
         
         # Set up working environment
-        self._setup_working_environment()
+        console.print(self._setup_working_environment(self.code_client))
+        
+        # Start one session per analysis sub-task in the background; they are
+        # first needed after process_data, so they start while the earlier steps run
+        self._executor = ThreadPoolExecutor(max_workers=len(ANALYSIS_TASKS))
+        self.analysis_contexts: Dict[str, Future] = {
+            name: self._executor.submit(self._start_analysis_context) for name in ANALYSIS_TASKS
+        }
+        # Code that built each data file in the main session, in the order it ran;
+        # prepare_analysis runs it again in the analysis sessions
+        self._data_code: Dict[str, str] = {}
     
     def __enter__(self):
         return self
@@ -60,10 +201,31 @@ class ResearchAgent:
     
     def cleanup(self):
         console.print("\n[yellow]Cleaning up...[/yellow]")
+        for future in self.analysis_contexts.values():
+            try:
+                future.result().stop()
+            except Exception:
+                pass
+        self._executor.shutdown(wait=False)
         if self.code_client:
             self.code_client.stop()
     
-    def _setup_working_environment(self):
+    def _start_analysis_context(self) -> CodeInterpreter:
+        """Start a Code Interpreter session for an analysis sub-task"""
+        code_client = CodeInterpreter(self.region)
+        code_client.start()
+        self._setup_working_environment(code_client)
+        return code_client
+    
+    def _analysis_context(self, name: str) -> Optional[CodeInterpreter]:
+        """Session of an analysis sub-task, or None if it could not be started"""
+        try:
+            return self.analysis_contexts[name].result()
+        except Exception as e:
+            console.print(f"[yellow]Could not start a session for {name}, using the main session: {e}[/yellow]")
+            return None
+    
+    def _setup_working_environment(self, code_client: CodeInterpreter) -> str:
         """Set up the working environment in the code interpreter with detailed feedback"""
         setup_code = """
 import os
@@ -104,18 +266,70 @@ for root, dirs, files in os.walk('.'):
     for file in files:
         print(f"{indent}    {file}")
 """
-        result = self.code_client.invoke("executeCode", {
+        result = code_client.invoke("executeCode", {
             "code": setup_code,
             "language": "python",
             "clearContext": False
         })
-        console.print(self._extract_output(result))
+        return self._extract_output(result)
     
-    def _refresh_file_list(self):
+    def _refresh_file_list(self, code_client: Optional[CodeInterpreter] = None):
         """Get updated list of files in the sandbox"""
-        result = self.code_client.invoke("listFiles", {"path": ""})
+        result = (code_client or self.code_client).invoke("listFiles", {"path": ""})
         return self._extract_output(result).strip().split('\n') if self._extract_output(result).strip() else []
     
+    def _read_files(self, code_client: CodeInterpreter, patterns: List[str]) -> Optional[Dict[str, str]]:
+        """
+        Read the files matching glob patterns from a session, base64 encoded by path
+        
+        The files are sent through stdout, so this is only meant for small files such
+        as results and plots. Returns None if they could not be read.
+        """
+        read_code = f"""
+import base64
+import glob
+import json
+files = {{}}
+for pattern in {patterns!r}:
+    for path in glob.glob(pattern):
+        with open(path, 'rb') as f:
+            files[path] = base64.b64encode(f.read()).decode()
+print(json.dumps(files))
+"""
+        result = code_client.invoke("executeCode", {
+            "code": read_code,
+            "language": "python",
+            "clearContext": False
+        })
+        output = self._extract_output(result).strip()
+        if result.get("isError", False) or not output:
+            return None
+        try:
+            return json.loads(output.splitlines()[0])
+        except json.JSONDecodeError:
+            return None
+    
+    def _write_files(self, code_client: CodeInterpreter, files: Dict[str, str]) -> bool:
+        """Write base64 encoded files, as returned by _read_files, into a session; False if that failed"""
+        if not files:
+            return True
+        write_code = f"""
+import base64
+import os
+files = {json.dumps(files)}
+for path, content in files.items():
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(base64.b64decode(content))
+print(f"Copied {{len(files)}} files")
+"""
+        result = code_client.invoke("executeCode", {
+            "code": write_code,
+            "language": "python",
+            "clearContext": False
+        })
+        return not result.get("isError", False) and f"Copied {len(files)} files" in self._extract_output(result)
+    
     def _extract_output(self, result: Dict) -> str:
         """Extract output from code execution result"""
         if "structuredContent" in result:
@@ -148,16 +362,32 @@ for root, dirs, files in os.walk('.'):
         # If no code block is found, return the whole text
         return text.strip()
     
-    def execute_llm_generated_code(self, task_description: str, context: Dict = None) -> Dict[str, Any]:
-        """Have LLM generate and execute code for the task"""
-        console.print(f"\n[bold blue]🤖 LLM generating code for:[/bold blue] {task_description}")
-        
-        # Build prompt with context
+    def _data_schema(self, code_client: CodeInterpreter) -> Dict[str, Dict[str, str]]:
+        """Columns and types of the CSV files in a session's data/ directory"""
+        result = code_client.invoke("executeCode", {
+            "code": DATA_SCHEMA_CODE,
+            "language": "python",
+            "clearContext": False
+        })
+        output = self._extract_output(result).strip()
+        if result.get("isError", False) or not output:
+            return {}
+        try:
+            return json.loads(output.splitlines()[0])
+        except json.JSONDecodeError:
+            return {}
+    
+    def _generate_code(self, task_description: str, context: Optional[Dict], schema: Dict) -> str:
+        """Have the LLM generate code for the task"""
+        # Build prompt with the data schema and a compacted context
         prompt = f"""You are working in a Python code interpreter sandbox. 
 Task: {task_description}
 
+Data files in the sandbox, with their columns and types:
+{json.dumps(schema, indent=2) if schema else 'No data files yet'}
+
 Available context:
-{json.dumps(context, indent=2) if context else 'No previous context'}
+{json.dumps(compact_context(context), indent=2, default=str) if context else 'No previous context'}
 
 Generate Python code to accomplish this task. Be specific and include:
 - All necessary imports (pandas, numpy, matplotlib, seaborn, scikit-learn, etc. are available)
@@ -173,18 +403,49 @@ Return ONLY the Python code, no explanations."""
         
         # Get code from LLM
         response = self.llm.invoke([HumanMessage(content=prompt)])
-        generated_code = self._extract_code_block(response.content)
-        
+        return self._extract_code_block(response.content)
+    
+    def _run_code(self, code: str, code_client: CodeInterpreter) -> Dict:
         # Display the code preview
-        code_preview = generated_code[:300] + "..." if len(generated_code) > 300 else generated_code
+        code_preview = code[:300] + "..." if len(code) > 300 else code
         console.print(Syntax(code_preview, "python"))
         
-        # Execute the code
-        result = self.code_client.invoke("executeCode", {
-            "code": generated_code,
+        return code_client.invoke("executeCode", {
+            "code": code,
             "language": "python",
             "clearContext": False
         })
+    
+    def execute_llm_generated_code(self, task_description: str, context: Dict = None,
+                                   code_client: Optional[CodeInterpreter] = None) -> Dict[str, Any]:
+        """
+        Have LLM generate and execute code for the task, in the main session unless code_client is given
+        
+        Code that ran successfully is cached by task and data schema; when the same task
+        comes up for data with the same columns, the cached code runs without asking the LLM.
+        """
+        code_client = code_client or self.code_client
+        
+        schema = self._data_schema(code_client)
+        cache_key = GeneratedCodeCache.key(task_description, schema)
+        cached_code = self.code_cache.get(cache_key) if self.code_cache else None
+        
+        result = None
+        code = cached_code
+        if cached_code:
+            console.print(f"\n[bold green]♻️  Reusing cached code for:[/bold green] {task_description}")
+            result = self._run_code(cached_code, code_client)
+            if result.get("isError", False):
+                console.print("[yellow]Cached code failed, generating new code[/yellow]")
+                self.code_cache.discard(cache_key)
+                result = None
+        
+        if result is None:
+            console.print(f"\n[bold blue]🤖 LLM generating code for:[/bold blue] {task_description}")
+            code = self._generate_code(task_description, context, schema)
+            result = self._run_code(code, code_client)
+            if self.code_cache and not result.get("isError", False):
+                self.code_cache.put(cache_key, task_description, code)
         
         # Extract output
         output = self._extract_output(result)
@@ -197,35 +458,62 @@ Return ONLY the Python code, no explanations."""
             console.print(f"[green]✅ Code executed successfully[/green]")
         
         # Get updated file list
-        files = self._refresh_file_list()
+        files = self._refresh_file_list(code_client)
         
         return {
             "output": output,
             "error": has_error,
-            "files": files
+            "files": files,
+            "code": code
         }
     
     def create_workflow(self) -> StateGraph:
-        """Create a simple linear workflow that attempts all steps"""
+        """
+        Create a workflow that attempts all steps
+        
+        The steps run in order, except the analysis sub-tasks: prepare_analysis fans
+        out to all of them at once and analyze_data waits for all of them.
+        """
         workflow = StateGraph(AgentState)
         
         # Add nodes
-        workflow.add_node("understand_query", self.understand_query)
-        workflow.add_node("collect_data", self.collect_data)
-        workflow.add_node("process_data", self.process_data)
-        workflow.add_node("analyze_data", self.analyze_data)
-        workflow.add_node("generate_insights", self.generate_insights)
-        
-        # Set linear flow - attempt all steps
+        workflow.add_node("understand_query", self._timed("understand_query", self.understand_query))
+        workflow.add_node("collect_data", self._timed("collect_data", self.collect_data))
+        workflow.add_node("process_data", self._timed("process_data", self.process_data))
+        workflow.add_node("prepare_analysis", self._timed("prepare_analysis", self.prepare_analysis))
+        for name in ANALYSIS_TASKS:
+            workflow.add_node(name, self._timed(name, self._analysis_task_node(name)))
+        workflow.add_node("analyze_data", self._timed("analyze_data", self.analyze_data))
+        workflow.add_node("generate_insights", self._timed("generate_insights", self.generate_insights))
+        
+        # Attempt all steps, with the analysis sub-tasks in parallel
         workflow.set_entry_point("understand_query")
         workflow.add_edge("understand_query", "collect_data")
         workflow.add_edge("collect_data", "process_data")
-        workflow.add_edge("process_data", "analyze_data")
+        workflow.add_edge("process_data", "prepare_analysis")
+        for name in ANALYSIS_TASKS:
+            workflow.add_edge("prepare_analysis", name)
+        workflow.add_edge(list(ANALYSIS_TASKS), "analyze_data")
         workflow.add_edge("analyze_data", "generate_insights")
         workflow.add_edge("generate_insights", END)
         
         return workflow.compile()
     
+    def _timed(self, name: str, node: Callable[[AgentState], Dict]) -> Callable[[AgentState], Dict]:
+        """Wrap a node to record how long it took in node_timings"""
+        def run(state: AgentState) -> Dict:
+            start = time.perf_counter()
+            update = node(state)
+            elapsed = time.perf_counter() - start
+            console.print(f"[dim]⏱  {name} took {elapsed:.1f}s[/dim]")
+            return {**update, "node_timings": {name: elapsed}}
+        return run
+    
+    def _analysis_task_node(self, name: str) -> Callable[[AgentState], Dict]:
+        def run(state: AgentState) -> Dict:
+            return self.run_analysis_task(name, state)
+        return run
+    
     def understand_query(self, state: AgentState) -> AgentState:
         """Understand what the user wants to research"""
         console.print(f"\n[bold magenta]🎯 Understanding research query:[/bold magenta] {state['research_query']}")
@@ -268,91 +556,106 @@ Respond in JSON format with the following structure:
                 console.print(f"[cyan]• {key}:[/cyan] {preview}")
         
         return {
-            **state,
             "research_data": {"query_understanding": json_understanding},
-            "completed_tasks": ["understand_query"],
-            "errors": []
+            "completed_tasks": ["understand_query"]
         }
     
     def collect_data(self, state: AgentState) -> AgentState:
         """Collect data based on the research query"""
         console.print("\n[bold magenta]📊 Collecting data...[/bold magenta]")
         
-        # Always create synthetic data directly
-        synthetic_data_code = """
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-import random
+        # Always create synthetic data directly. It is generated with whole-array
+        # NumPy operations, so millions of rows take seconds
+        synthetic_data_code = f"n_customers = {self.synthetic_customers}\n" + """
 import os
+import time
+import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
 
 # Ensure directory exists
 os.makedirs('data', exist_ok=True)
 os.makedirs('visualizations', exist_ok=True)
 
-# Set random seed
-np.random.seed(42)
+started = time.time()
+rng = np.random.default_rng(42)
 
 # Customer IDs
-n_customers = 1000
-customer_ids = [f'CUST{i:05d}' for i in range(n_customers)]
+customer_ids = np.char.add('CUST', np.char.zfill(np.arange(n_customers).astype(str), 5))
+
+# Multiple purchases per customer: one row per purchase, with the customer's index
+purchase_counts = rng.poisson(3, n_customers)
+customer_codes = np.repeat(np.arange(n_customers), purchase_counts)
 
 # Date range - last 2 years
-end_date = datetime.now()
-start_date = end_date - timedelta(days=730)
-dates = [start_date + timedelta(days=x) for x in range((end_date - start_date).days + 1)]
-
-# Create purchase data - multiple purchases per customer
-purchases = []
-for cust_id in customer_ids:
-    # Random number of purchases (0 to 15)
-    n_purchases = np.random.poisson(3)  
-    for _ in range(n_purchases):
-        purchase_date = np.random.choice(dates)
-        # Higher probability of purchases in recent months
-        days_ago = (end_date - purchase_date).days
-        if days_ago > 365 and random.random() < 0.5:
-            continue  # Skip some older purchases
-            
-        purchases.append({
-            'customer_id': cust_id,
-            'purchase_date': purchase_date,
-            'product_category': np.random.choice(['Electronics', 'Clothing', 'Home', 'Books', 'Beauty', 'Food', 'Sports']),
-            'amount': round(np.random.gamma(shape=2, scale=25), 2),
-            'satisfaction_score': np.random.choice(range(1, 11), p=[0.01, 0.02, 0.03, 0.05, 0.09, 0.15, 0.25, 0.2, 0.1, 0.1]),
-            'delivery_days': np.random.choice(range(1, 10)),
-            'is_return': np.random.choice([0, 1], p=[0.95, 0.05])
-        })
+n_days = 731
+days_ago = rng.integers(0, n_days, len(customer_codes))
+# Higher probability of purchases in recent months: skip half of the older purchases
+keep = (days_ago <= 365) | (rng.random(len(customer_codes)) >= 0.5)
+customer_codes, days_ago = customer_codes[keep], days_ago[keep]
+n_rows = len(customer_codes)
+purchase_dates = np.datetime64('now', 's') - days_ago.astype('timedelta64[D]')
+
+categories = ['Electronics', 'Clothing', 'Home', 'Books', 'Beauty', 'Food', 'Sports']
+df = pd.DataFrame({
+    'customer_id': pd.Categorical.from_codes(customer_codes, customer_ids),
+    'purchase_date': purchase_dates,
+    'product_category': pd.Categorical.from_codes(rng.integers(0, len(categories), n_rows), categories),
+    'amount': np.round(rng.gamma(shape=2, scale=25, size=n_rows), 2),
+    'satisfaction_score': rng.choice(np.arange(1, 11), n_rows, p=[0.01, 0.02, 0.03, 0.05, 0.09, 0.15, 0.25, 0.2, 0.1, 0.1]),
+    'delivery_days': rng.integers(1, 10, n_rows),
+    'is_return': (rng.random(n_rows) < 0.05).astype(int)
+})
 
-# Convert to DataFrame
-df = pd.DataFrame(purchases)
+# A purchase is a repeat purchase when it is not the customer's first by date:
+# sort by customer, then date, and mark every row after the first of its customer
+order = np.argsort(customer_codes * n_days + (n_days - 1 - days_ago), kind='stable')
+sorted_codes = customer_codes[order]
+first_purchase = np.ones(n_rows, dtype=bool)
+first_purchase[1:] = sorted_codes[1:] != sorted_codes[:-1]
+is_repeat_purchase = np.empty(n_rows, dtype=int)
+is_repeat_purchase[order] = ~first_purchase
+df['is_repeat_purchase'] = is_repeat_purchase
 
-# Add more features
-df['is_repeat_purchase'] = df.groupby('customer_id')['purchase_date'].rank(method='first') > 1
-df['is_repeat_purchase'] = df['is_repeat_purchase'].astype(int)
+# Calculate customer lifetime value, summing per customer index
+purchase_count = np.bincount(customer_codes, minlength=n_customers)
+total_spent = np.bincount(customer_codes, weights=df['amount'].to_numpy(), minlength=n_customers)
+total_satisfaction = np.bincount(customer_codes, weights=df['satisfaction_score'].to_numpy(), minlength=n_customers)
+buyers = purchase_count > 0
+customer_stats = pd.DataFrame({
+    'customer_id': customer_ids[buyers],
+    'total_spent': np.round(total_spent[buyers], 2),
+    'avg_satisfaction': total_satisfaction[buyers] / purchase_count[buyers],
+    'purchase_count': purchase_count[buyers]
+})
+generated = time.time()
 
-# Calculate customer lifetime value
-customer_stats = df.groupby('customer_id').agg(
-    total_spent=('amount', 'sum'),
-    avg_satisfaction=('satisfaction_score', 'mean'),
-    purchase_count=('purchase_date', 'count')
-).reset_index()
+def save_csv(frame, path):
+    # pyarrow writes large CSV files several times faster than pandas
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+        pa_csv.write_csv(pa.Table.from_pandas(frame, preserve_index=False), path,
+                         pa_csv.WriteOptions(quoting_style='needed'))
+    except Exception:
+        frame.to_csv(path, index=False)
 
 # Save data files
-df.to_csv('data/research_data.csv', index=False)
-customer_stats.to_csv('data/customer_stats.csv', index=False)
+save_csv(df, 'data/research_data.csv')
+save_csv(customer_stats, 'data/customer_stats.csv')
+saved = time.time()
 
-# Create a simple visualization
+# Create a simple visualization; scores are 1-10, so counting them is enough at any size
+score_counts = df['satisfaction_score'].value_counts().sort_index()
 plt.figure(figsize=(10, 6))
-sns.histplot(df['satisfaction_score'], kde=True, bins=10)
+plt.bar(score_counts.index, score_counts.values)
 plt.title('Distribution of Customer Satisfaction Scores')
 plt.xlabel('Satisfaction Score')
 plt.ylabel('Count')
 plt.savefig('visualizations/satisfaction_distribution.png', dpi=300)
 
 print(f"Created dataset with {len(df)} purchases from {n_customers} customers")
+print(f"Generated in {generated - started:.1f}s, saved in {saved - generated:.1f}s")
 print(f"Data saved to data/research_data.csv")
 print(f"Customer stats saved to data/customer_stats.csv")
 print(f"Basic visualization saved to visualizations/satisfaction_distribution.png")
@@ -373,17 +676,15 @@ print(df.describe())
         console.print(output)
         
         # Check if we have errors
-        errors = state["errors"]
+        errors = []
         if result.get("isError", False):
             errors.append("Error generating synthetic data")
+        else:
+            self._data_code['data/research_data.csv'] = synthetic_data_code
         
         return {
-            **state,
-            "research_data": {
-                **state["research_data"],
-                "data_collection_output": output
-            },
-            "completed_tasks": state["completed_tasks"] + ["collect_data"],
+            "research_data": {"data_collection_output": output},
+            "completed_tasks": ["collect_data"],
             "errors": errors
         }
     
@@ -405,62 +706,162 @@ print(df.describe())
         )
         
         # Check if we have errors
-        errors = state["errors"]
+        errors = []
         if result["error"]:
             errors.append("Error processing data")
+        else:
+            self._data_code['data/processed_data.csv'] = result["code"]
         
         return {
-            **state,
             "research_data": {
-                **state["research_data"],
                 "processing_output": result["output"],
                 "available_files": result["files"]
             },
-            "completed_tasks": state["completed_tasks"] + ["process_data"],
+            "completed_tasks": ["process_data"],
             "errors": errors
         }
     
-    def analyze_data(self, state: AgentState) -> AgentState:
-        """Perform analysis on the processed data"""
-        console.print("\n[bold magenta]📈 Analyzing data...[/bold magenta]")
+    def _prepare_analysis_context(self, name: str, data_file: str) -> bool:
+        """Build data_file in the session of an analysis sub-task; False if it is not there afterwards"""
+        code_client = self._analysis_context(name)
+        if code_client is None or data_file not in self._data_code:
+            return False
+        
+        # Run the code that built the data in the main session, up to data_file,
+        # so the data does not have to be sent between sessions
+        for path, code in self._data_code.items():
+            result = code_client.invoke("executeCode", {
+                "code": code,
+                "language": "python",
+                "clearContext": False
+            })
+            if result.get("isError", False):
+                console.print(f"[yellow]Could not build {path} for {name}:[/yellow]\n{self._extract_output(result)}")
+                return False
+            if path == data_file:
+                break
+        
+        result = code_client.invoke("executeCode", {
+            "code": f"open({data_file!r}).close()",
+            "language": "python",
+            "clearContext": False
+        })
+        return not result.get("isError", False)
+    
+    def prepare_analysis(self, state: AgentState) -> AgentState:
+        """Build the data to analyze in the session of each analysis sub-task"""
+        console.print("\n[bold magenta]📦 Preparing parallel analysis...[/bold magenta]")
         
         # Find the best data file to use
         available_files = state["research_data"].get("available_files", [])
         data_file = 'data/processed_data.csv' if 'data/processed_data.csv' in available_files else 'data/research_data.csv'
         
-        # Get understanding to guide analysis
-        understanding = state["research_data"].get("query_understanding", {})
+        ready = list(self._executor.map(lambda name: self._prepare_analysis_context(name, data_file), ANALYSIS_TASKS))
+        prepared = [name for name, ok in zip(ANALYSIS_TASKS, ready) if ok]
+        failed = [name for name, ok in zip(ANALYSIS_TASKS, ready) if not ok]
+        console.print(f"[green]Prepared {data_file} in {len(prepared)} of {len(ANALYSIS_TASKS)} analysis sessions[/green]")
         
-        # LLM generates analysis code based on the research query
-        result = self.execute_llm_generated_code(
-            f"Load {data_file} and perform comprehensive analysis for: {state['research_query']}. "
-            "Your analysis should include: "
-            "1. Trend analysis over time for satisfaction metrics "
-            "2. Correlation analysis between satisfaction and repeat purchases "
-            "3. Customer segmentation based on behavior patterns "
-            "4. Feature importance for factors driving repeat purchases "
-            "5. Create visualizations saved to the visualizations/ directory "
-            "6. Save analysis results as data/analysis_results.json",
-            context={
-                "query": state["research_query"],
-                "understanding": understanding,
-                "available_files": state["research_data"].get("available_files", [])
-            }
+        # Sub-tasks whose session has no data run in the main session instead
+        errors = []
+        if not prepared:
+            errors.append(f"Could not prepare {data_file} in any analysis session, the analysis runs in the main session")
+        elif failed:
+            errors.append(f"Could not prepare {data_file} for {', '.join(failed)}, running it in the main session")
+        
+        return {
+            "research_data": {"analysis_data_file": data_file, "analysis_sessions": prepared},
+            "completed_tasks": ["prepare_analysis"],
+            "errors": errors
+        }
+    
+    def run_analysis_task(self, name: str, state: AgentState) -> AgentState:
+        """Run one analysis sub-task in its own session and copy its outputs to the main session"""
+        console.print(f"\n[bold magenta]📈 Running {name}...[/bold magenta]")
+        
+        data_file = state["research_data"]["analysis_data_file"]
+        task_description = (
+            f"Load {data_file} and perform this analysis for: {state['research_query']}. "
+            f"{ANALYSIS_TASKS[name]}. "
+            f"Create visualizations saved to the visualizations/ directory with file names starting with '{name}_'. "
+            f"Save the results as data/{name}.json"
         )
+        context = {
+            "query": state["research_query"],
+            "understanding": state["research_data"].get("query_understanding", {}),
+            "available_files": [data_file]
+        }
         
-        # Check if we have errors
-        errors = state["errors"]
+        # Sessions without the data (see prepare_analysis) fall back to the main session
+        if name not in state["research_data"].get("analysis_sessions", []):
+            with self._code_lock:
+                result = self.execute_llm_generated_code(task_description, context)
+            copy_error = None
+        else:
+            code_client = self._analysis_context(name)
+            result = self.execute_llm_generated_code(task_description, context, code_client)
+            outputs = self._read_files(code_client, [f"data/{name}.json", f"visualizations/{name}_*"])
+            copied = outputs is not None
+            if copied:
+                with self._code_lock:
+                    copied = self._write_files(self.code_client, outputs)
+            if not copied:
+                copy_error = f"Could not copy the results of {name} to the main session"
+            elif f"data/{name}.json" not in outputs:
+                copy_error = f"{name} did not save data/{name}.json"
+            else:
+                copy_error = None
+        
+        errors = []
         if result["error"]:
-            errors.append("Error analyzing data")
+            errors.append(f"Error in {name}")
+        elif copy_error:
+            errors.append(copy_error)
         
         return {
-            **state,
+            "research_data": {"analysis": {name: result["output"]}},
+            "completed_tasks": [name],
+            "errors": errors
+        }
+    
+    def analyze_data(self, state: AgentState) -> AgentState:
+        """Merge the results of the analysis sub-tasks into data/analysis_results.json"""
+        console.print("\n[bold magenta]📈 Merging analysis results...[/bold magenta]")
+        
+        merge_code = f"task_names = {list(ANALYSIS_TASKS)!r}" + """
+import json
+import os
+results = {}
+for name in task_names:
+    path = f'data/{name}.json'
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                results[name] = json.load(f)
+        except json.JSONDecodeError as e:
+            results[name] = {'error': f'Could not parse {path}: {e}'}
+with open('data/analysis_results.json', 'w') as f:
+    json.dump(results, f, indent=2, default=str)
+print(f"Merged {len(results)} of {len(task_names)} analysis results into data/analysis_results.json")
+"""
+        result = self.code_client.invoke("executeCode", {
+            "code": merge_code,
+            "language": "python",
+            "clearContext": False
+        })
+        console.print(self._extract_output(result))
+        
+        # Check if we have errors
+        errors = []
+        if result.get("isError", False):
+            errors.append("Error merging analysis results")
+        
+        analysis = state["research_data"].get("analysis", {})
+        return {
             "research_data": {
-                **state["research_data"],
-                "analysis_output": result["output"],
-                "available_files": result["files"]
+                "analysis_output": "\n\n".join(f"{name}:\n{output}" for name, output in analysis.items()),
+                "available_files": self._refresh_file_list()
             },
-            "completed_tasks": state["completed_tasks"] + ["analyze_data"],
+            "completed_tasks": ["analyze_data"],
             "errors": errors
         }
     
@@ -535,13 +936,9 @@ Format as a complete professional markdown document with proper headings, bullet
         
         # Return updated state with the report
         return {
-            **state,
             "messages": state["messages"] + [AIMessage(content=report_content)],
-            "research_data": {
-                **state["research_data"],
-                "final_report": report_content
-            },
-            "completed_tasks": state["completed_tasks"] + ["generate_insights"]
+            "research_data": {"final_report": report_content},
+            "completed_tasks": ["generate_insights"]
         }
 
 
@@ -563,10 +960,13 @@ async def run_research(query: str):
             "code_session_id": agent.code_session_id,
             "research_data": {},
             "completed_tasks": [],
-            "errors": []
+            "errors": [],
+            "node_timings": {}
         }
         
+        start = time.perf_counter()
         final_state = await workflow.ainvoke(initial_state)
+        elapsed = time.perf_counter() - start
         
         # List all files created
         console.print("\n[bold]Files created during research:[/bold]")
@@ -586,6 +986,17 @@ async def run_research(query: str):
         console.print(f"\n[bold green]✅ Research completed with {len(final_state['completed_tasks'])} tasks![/bold green]")
         console.print(f"Completed: {', '.join(final_state['completed_tasks'])}")
         
+        # Per-node timings; the analysis sub-tasks overlap, so the total is less than their sum
+        timings = Table(title="Node timings")
+        timings.add_column("Node")
+        timings.add_column("Seconds", justify="right")
+        for node, seconds in final_state["node_timings"].items():
+            timings.add_row(node, f"{seconds:.1f}")
+        console.print(timings)
+        console.print(f"Total: {elapsed:.1f}s (sum of node times: {sum(final_state['node_timings'].values()):.1f}s)")
+        if agent.code_cache:
+            console.print(f"Generated code cache: {agent.code_cache.hits} reused, {agent.code_cache.misses} generated")
+        
         if final_state.get("errors"):
             console.print(f"[red]⚠️ {len(final_state['errors'])} errors encountered[/red]")
             for error in final_state["errors"]:
@@ -18,12 +18,19 @@ from rich.console import Console
 
 from bedrock_agentcore.tools.browser_client import BrowserClient
 
+try:
+    from ..static_assets import StaticAssets, add_asset_route
+except ImportError:
+    from static_assets import StaticAssets, add_asset_route
+
 console = Console()
 
 
 class BrowserViewerServer:
     """Server for viewing Bedrock-agentcore Browser sessions with configurable display size."""
 
+    _dcv_sdk_checked = False
+
     def __init__(self, browser_client: BrowserClient, port: int = 8000):
         """Initialize the viewer server."""
         self.browser_client = browser_client
@@ -36,24 +43,22 @@ class BrowserViewerServer:
         # Setup directory structure
         self.package_dir = Path(__file__).parent
         self.static_dir = self.package_dir.parent / "static"
-        self.js_dir = self.static_dir / "js"
-        self.css_dir = self.static_dir / "css"
         self.dcv_dir = self.static_dir / "dcvjs"
 
-        # Create all directories
-        for directory in [self.static_dir, self.js_dir, self.css_dir, self.dcv_dir]:
-            directory.mkdir(parents=True, exist_ok=True)
-
-        # Create the JS and CSS files
+        # Build the JS and CSS files; they are only written when their content changed
+        self.assets = StaticAssets(self.static_dir)
         self._create_static_files()
 
-        # Check for DCV SDK
-        self._check_dcv_sdk()
+        # Check for DCV SDK, once per process
+        if not BrowserViewerServer._dcv_sdk_checked:
+            self._check_dcv_sdk()
+            BrowserViewerServer._dcv_sdk_checked = True
 
         # Mount static files
         self.app.mount(
             "/static", StaticFiles(directory=str(self.static_dir)), name="static"
         )
+        add_asset_route(self.app, self.assets)
 
         # Setup routes
         self._setup_routes()
@@ -63,7 +68,7 @@ class BrowserViewerServer:
 
         # Create bedrock-agentcore-browser-viewer.js with enhanced debugging
         js_content = """// Bedrock-agentcore Browser Viewer Module with Enhanced Debugging
-import dcv from "../../dcvjs/dcv.js";
+import dcv from "/static/dcvjs/dcv.js";
 export class BedrockAgentcoreLiveViewer {
     constructor(presignedUrl, containerId = 'dcv-display') {
         this.displayLayoutRequested = false;
@@ -214,9 +219,7 @@ export class BedrockAgentcoreLiveViewer {
     }
 }"""
 
-        js_file = self.js_dir / "bedrock-agentcore-browser-viewer-replay.js"
-        with open(js_file, "w") as f:
-            f.write(js_content)
+        self.assets.add("bedrock-agentcore-browser-viewer-replay.js", js_content)
 
         # Create viewer.css with added control button styles
         css_content = """/* Bedrock-agentcore Browser Viewer Styles */
@@ -380,9 +383,7 @@ button.active {
     overflow: auto;
 }"""
 
-        css_file = self.css_dir / "viewer.css"
-        with open(css_file, "w") as f:
-            f.write(css_content)
+        self.assets.add("viewer-replay.css", css_content)
 
     def _check_dcv_sdk(self):
         """Check if DCV SDK is present."""
@@ -575,7 +576,7 @@ button.active {
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Bedrock-agentcore Browser Viewer</title>
-    <link rel="stylesheet" href="/static/css/viewer.css">
+    <link rel="stylesheet" href="{self.assets.urls['viewer-replay.css']}">
 </head>
 <body>"""
 
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Compacted archive format for Bedrock Agentcore browser recordings
+
+Merges a recording's gzip NDJSON batch files into a single archive file,
+recording.rra, next to them. Events are stored column-wise in frames of a few
+thousand events (timestamps as deltas, event types, event data), and string
+values that repeat across the recording, such as tag names, attribute values,
+class names and text, are replaced by references into a string table shared by
+all frames. Frames and the string table are compressed with zstd when the
+optional zstandard package is installed, or gzip otherwise. An index at the end
+of the file locates every frame, so the replay viewer reads the archive
+directly and decodes one frame at a time.
+
+File layout:
+    MAGIC | frame ... | string table frame | index (JSON) | footer
+where the footer is the index offset and length (big-endian uint64) and MAGIC.
+
+Usage:
+    python replay_archive.py --recordings-dir ./recordings [--recording RECORDING_ID]
+    python replay_archive.py --bucket BUCKET --prefix PREFIX [--recording RECORDING_ID] [--delete-batches]
+"""
+
+import os
+import gzip
+import json
+import struct
+import argparse
+from collections import Counter
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from .replay_index import INDEX_FILE_NAME, index_recording
+except ImportError:
+    from replay_index import INDEX_FILE_NAME, index_recording
+
+ARCHIVE_FILE_NAME = 'recording.rra'
+ARCHIVE_MAGIC = b'RRWA'
+ARCHIVE_VERSION = 1
+FOOTER = struct.Struct('>QQ4s')
+# Events per frame: the unit the viewer decompresses, and where seeking starts
+ARCHIVE_FRAME_EVENTS = int(os.environ.get('REPLAY_ARCHIVE_FRAME_EVENTS', '2000'))
+
+# Strings shorter than this are left inline; a reference costs a few bytes too
+STRING_MIN_LENGTH = 8
+# Marks a string table reference (marker + table position) or, doubled, a
+# string that itself starts with the marker; a Unicode private use character
+STRING_REF = '\ue000'
+
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 9
+
+
+def default_codec():
+    return 'zstd' if zstandard is not None else 'gzip'
+
+
+def compress(data, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, GZIP_LEVEL)
+
+
+def decompress(data, codec):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("This recording archive is zstd-compressed; install the zstandard package to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def count_strings(value, counts):
+    """Count the string values (not keys) in a JSON value"""
+    if isinstance(value, str):
+        if len(value) >= STRING_MIN_LENGTH:
+            counts[value] += 1
+    elif isinstance(value, dict):
+        for item in value.values():
+            count_strings(item, counts)
+    elif isinstance(value, list):
+        for item in value:
+            count_strings(item, counts)
+
+
+def build_string_table(counts):
+    """Strings that occur more than once, most frequent first so they get the shortest references"""
+    return [string for string, count in counts.most_common() if count > 1]
+
+
+def encode_value(value, references):
+    if isinstance(value, str):
+        reference = references.get(value)
+        if reference is not None:
+            return reference
+        return STRING_REF + value if value.startswith(STRING_REF) else value
+    if isinstance(value, dict):
+        return {key: encode_value(item, references) for key, item in value.items()}
+    if isinstance(value, list):
+        return [encode_value(item, references) for item in value]
+    return value
+
+
+def decode_value(value, strings):
+    if isinstance(value, str):
+        if not value.startswith(STRING_REF):
+            return value
+        rest = value[1:]
+        return rest if rest.startswith(STRING_REF) else strings[int(rest)]
+    if isinstance(value, dict):
+        return {key: decode_value(item, strings) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_value(item, strings) for item in value]
+    return value
+
+
+def encode_frame(events, references):
+    """Lay out events as columns: timestamp deltas, types, data and any other fields"""
+    timestamps = []
+    previous = 0
+    extras = {}
+    for position, event in enumerate(events):
+        timestamps.append(event['timestamp'] - previous)
+        previous = event['timestamp']
+        extra = {key: value for key, value in event.items() if key not in ('type', 'data', 'timestamp')}
+        if extra:
+            extras[str(position)] = encode_value(extra, references)
+    frame = {
+        't': timestamps,
+        'k': [event['type'] for event in events],
+        'd': [encode_value(event.get('data'), references) for event in events]
+    }
+    if extras:
+        frame['x'] = extras
+    return json.dumps(frame, ensure_ascii=False, separators=(',', ':')).encode('utf-8', 'surrogatepass')
+
+
+def decode_frame(data, strings):
+    """Return the events of an encoded frame"""
+    frame = json.loads(data.decode('utf-8', 'surrogatepass'))
+    extras = frame.get('x', {})
+    events = []
+    timestamp = 0
+    for position, (delta, event_type, event_data) in enumerate(zip(frame['t'], frame['k'], frame['d'])):
+        timestamp += delta
+        event = {'type': event_type, 'data': decode_value(event_data, strings), 'timestamp': timestamp}
+        extra = extras.get(str(position))
+        if extra:
+            event.update(decode_value(extra, strings))
+        events.append(event)
+    return events
+
+
+def write_archive(batches, metadata, source_batches, frame_events=ARCHIVE_FRAME_EVENTS, codec=None):
+    """
+    Encode a recording as an archive
+
+    Args:
+        batches: Callable returning (batch_name, items) pairs in playback order,
+            where items yields (event, raw_line); called twice, once to build
+            the string table and once to write the frames
+        metadata (dict): The recording's metadata, kept in the archive index
+        source_batches (list): Names of the batch files the archive replaces
+        frame_events (int): Events per frame
+        codec (str, optional): 'zstd' or 'gzip'; zstd if zstandard is installed
+
+    Returns:
+        bytes: The archive
+    """
+    codec = codec or default_codec()
+    counts = Counter()
+    for _, items in batches():
+        for event, _ in items:
+            count_strings(event, counts)
+    strings = build_string_table(counts)
+    del counts
+    references = {string: f"{STRING_REF}{position}" for position, string in enumerate(strings)}
+
+    parts = [ARCHIVE_MAGIC]
+    offset = len(ARCHIVE_MAGIC)
+    frames = []
+    pending = []
+    event_count = 0
+
+    def flush():
+        nonlocal offset
+        data = compress(encode_frame(pending, references), codec)
+        frames.append({
+            'name': f"frame-{len(frames)}",
+            'offset': offset,
+            'length': len(data),
+            'events': len(pending),
+            'startTime': pending[0]['timestamp'],
+            'endTime': pending[-1]['timestamp']
+        })
+        parts.append(data)
+        offset += len(data)
+        pending.clear()
+
+    for _, items in batches():
+        for event, _ in items:
+            pending.append(event)
+            event_count += 1
+            if len(pending) >= frame_events:
+                flush()
+    if pending:
+        flush()
+
+    string_table = compress(json.dumps(strings, ensure_ascii=False).encode('utf-8', 'surrogatepass'), codec)
+    parts.append(string_table)
+    index = {
+        'version': ARCHIVE_VERSION,
+        'codec': codec,
+        'metadata': metadata,
+        'sourceBatches': list(source_batches),
+        'eventCount': event_count,
+        'strings': {'offset': offset, 'length': len(string_table), 'count': len(strings)},
+        'frames': frames
+    }
+    offset += len(string_table)
+    index_data = json.dumps(index).encode('utf-8')
+    parts.append(index_data)
+    parts.append(FOOTER.pack(offset, len(index_data), ARCHIVE_MAGIC))
+    return b''.join(parts)
+
+
+class RecordingArchive:
+    """
+    Reads an archive file. Only the index is read when it is opened; the string
+    table is loaded on first use and frames are decompressed as they are iterated.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+                raise ValueError(f"{path} is not a recording archive")
+            f.seek(-FOOTER.size, os.SEEK_END)
+            index_offset, index_length, magic = FOOTER.unpack(f.read(FOOTER.size))
+            if magic != ARCHIVE_MAGIC:
+                raise ValueError(f"{path} is truncated")
+            f.seek(index_offset)
+            self.index = json.loads(f.read(index_length))
+        if self.index.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported recording archive version: {self.index.get('version')}")
+        self.codec = self.index['codec']
+        self.metadata = self.index.get('metadata', {})
+        self.frames = self.index['frames']
+        self.frame_names = [frame['name'] for frame in self.frames]
+        self._strings = None
+
+    def _read(self, f, offset, length):
+        f.seek(offset)
+        return decompress(f.read(length), self.codec)
+
+    def strings(self):
+        if self._strings is None:
+            table = self.index['strings']
+            with open(self.path, 'rb') as f:
+                data = self._read(f, table['offset'], table['length'])
+            self._strings = json.loads(data.decode('utf-8', 'surrogatepass'))
+        return self._strings
+
+    def read_frame(self, position):
+        """Return the events of one frame"""
+        frame = self.frames[position]
+        with open(self.path, 'rb') as f:
+            data = self._read(f, frame['offset'], frame['length'])
+        return decode_frame(data, self.strings())
+
+    def iter_frames(self, start):
+        """Yield (frame_name, items) from frame start on, like BatchedRecording.iter_batches"""
+        def read_items(position):
+            for event in self.read_frame(position):
+                yield event, json.dumps(event)
+
+        for position in range(start, len(self.frames)):
+            yield self.frames[position]['name'], read_items(position)
+
+
+def read_archive_index(data):
+    """Return the index of an archive held in memory"""
+    index_offset, index_length, magic = FOOTER.unpack(data[-FOOTER.size:])
+    if not data.startswith(ARCHIVE_MAGIC) or magic != ARCHIVE_MAGIC:
+        raise ValueError("Not a recording archive")
+    return json.loads(data[index_offset:index_offset + index_length])
+
+
+def compact_recording(data_source, recording_id, frame_events=ARCHIVE_FRAME_EVENTS, codec=None, delete_batches=False):
+    """
+    Write a recording's archive, re-index it if it had a replay index, and
+    optionally delete the batch files it replaces
+
+    A recording that already has an archive is read through it, so the new
+    archive holds the old one's events plus any batch files written since.
+
+    Returns:
+        dict: Sizes and counts of the compaction, or None if the recording does not
+        exist or has no events
+    """
+    opened = data_source.open_batches(recording_id)
+    if opened is None or not opened.batch_names:
+        return None
+
+    previous = opened.read_file(ARCHIVE_FILE_NAME)
+    previous_index = read_archive_index(previous) if previous else {'sourceBatches': [], 'frames': []}
+    frame_names = {frame['name'] for frame in previous_index['frames']}
+    batch_names = [name for name in opened.batch_names if name not in frame_names]
+
+    archive = write_archive(
+        lambda: opened.iter_batches(0),
+        opened.metadata,
+        previous_index['sourceBatches'] + batch_names,
+        frame_events,
+        codec
+    )
+    # Batch files are in the local cache by now, so this does not download them again
+    source_bytes = sum(len(opened.read_file(name) or b'') for name in batch_names) + len(previous or b'')
+    data_source.write_recording_file(recording_id, ARCHIVE_FILE_NAME, archive)
+    archive_index = read_archive_index(archive)
+
+    # The replay index names batches and positions in them, so rebuild it on the frames
+    reindexed = opened.read_file(INDEX_FILE_NAME) is not None
+    if reindexed:
+        index_recording(data_source, recording_id)
+
+    reread = data_source.open_batches(recording_id)
+    event_count = sum(1 for _, items in reread.iter_batches(0) for _ in items)
+    if event_count != archive_index['eventCount']:
+        raise IOError(f"Archive of {recording_id} reads back {event_count} of {archive_index['eventCount']} events")
+
+    if delete_batches:
+        # Includes batch files an earlier archive already covered
+        for name in archive_index['sourceBatches']:
+            data_source.delete_recording_file(recording_id, name)
+
+    return {
+        'codec': archive_index['codec'],
+        'events': event_count,
+        'batches': len(batch_names),
+        'frames': len(archive_index['frames']),
+        'strings': archive_index['strings']['count'],
+        'sourceBytes': source_bytes,
+        'archiveBytes': len(archive),
+        'reindexed': reindexed
+    }
+
+
+def main():
+    # Imported here because the viewer imports this module
+    try:
+        from .session_replay_viewer import LocalDataSource, S3DataSource, console
+    except ImportError:
+        from session_replay_viewer import LocalDataSource, S3DataSource, console
+
+    parser = argparse.ArgumentParser(description="Compact Bedrock Agentcore browser recordings into archives")
+    parser.add_argument('--recordings-dir', help='Local recordings directory')
+    parser.add_argument('--bucket', help='S3 bucket containing recordings')
+    parser.add_argument('--prefix', default='', help='S3 prefix where recordings are stored')
+    parser.add_argument('--recording', help='Compact only this recording (default: all recordings)')
+    parser.add_argument(
+        '--frame-events',
+        type=int,
+        default=ARCHIVE_FRAME_EVENTS,
+        help=f'Events per archive frame (default: {ARCHIVE_FRAME_EVENTS})'
+    )
+    parser.add_argument(
+        '--codec',
+        choices=('zstd', 'gzip'),
+        default=default_codec(),
+        help=f'Frame compression (default: {default_codec()})'
+    )
+    parser.add_argument(
+        '--delete-batches',
+        action='store_true',
+        help='Delete the batch files once the archive has been written and read back'
+    )
+    args = parser.parse_args()
+
+    if args.codec == 'zstd' and zstandard is None:
+        parser.error('--codec zstd requires the zstandard package')
+    if args.bucket:
+        data_source = S3DataSource(args.bucket, args.prefix)
+    elif args.recordings_dir:
+        data_source = LocalDataSource(args.recordings_dir)
+    else:
+        parser.error('Specify --recordings-dir or --bucket')
+
+    try:
+        recording_ids = [args.recording] if args.recording else [
+            recording['id'] for recording in data_source.list_recordings()
+        ]
+        total_source = total_archive = 0
+        for recording_id in recording_ids:
+            stats = compact_recording(data_source, recording_id, args.frame_events, args.codec, args.delete_batches)
+            if stats is None:
+                console.print(f"[yellow]Recording not found or empty: {recording_id}[/yellow]")
+                continue
+            total_source += stats['sourceBytes']
+            total_archive += stats['archiveBytes']
+            ratio = stats['sourceBytes'] / stats['archiveBytes'] if stats['archiveBytes'] else 0
+            console.print(
+                f"[green]✓ {recording_id}: {stats['events']} events in {stats['batches']} batches "
+                f"({stats['sourceBytes'] / 1024:.1f} KB) -> {stats['frames']} {stats['codec']} frames, "
+                f"{stats['strings']} shared strings ({stats['archiveBytes'] / 1024:.1f} KB, {ratio:.1f}x)[/green]"
+            )
+        if total_archive:
+            console.print(
+                f"Total: {total_source / 1024:.1f} KB -> {total_archive / 1024:.1f} KB "
+                f"({total_source / total_archive:.1f}x)"
+            )
+    finally:
+        if hasattr(data_source, 'cleanup'):
+            data_source.cleanup()
+
+
+if __name__ == '__main__':
+    main()
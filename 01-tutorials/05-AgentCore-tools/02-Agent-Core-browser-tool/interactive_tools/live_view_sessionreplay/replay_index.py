@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Keyframe index for Bedrock Agentcore browser recordings
+
+Indexes the full snapshots (rrweb type 2 events) of a recording and synthesizes
+checkpoints between them, so the replay viewer can start playback at any time
+by loading the nearest checkpoint plus the events after it, instead of applying
+every incremental event from the first full snapshot.
+
+The index is written next to the batch files as replay-index.json, synthesized
+checkpoints under checkpoints/.
+
+Usage:
+    python replay_index.py --recordings-dir ./recordings [--recording RECORDING_ID]
+    python replay_index.py --bucket BUCKET --prefix PREFIX [--recording RECORDING_ID]
+"""
+
+import os
+import copy
+import gzip
+import json
+import argparse
+from collections import OrderedDict
+from itertools import chain
+
+INDEX_FILE_NAME = 'replay-index.json'
+INDEX_VERSION = 1
+CHECKPOINT_PREFIX = 'checkpoints/'
+# Minimum time between checkpoints; recorded full snapshots count as checkpoints
+CHECKPOINT_INTERVAL_MS = int(os.environ.get('REPLAY_CHECKPOINT_INTERVAL_MS', '30000'))
+
+# rrweb event types
+EVENT_FULL_SNAPSHOT = 2
+EVENT_INCREMENTAL_SNAPSHOT = 3
+EVENT_META = 4
+
+# rrweb incremental snapshot sources
+SOURCE_MUTATION = 0
+SOURCE_SCROLL = 3
+SOURCE_VIEWPORT_RESIZE = 4
+SOURCE_INPUT = 5
+# Style sheet rules, canvas, fonts, style declarations and adopted style sheets change
+# the page in ways DomMirror does not follow. After one of these no checkpoint is
+# synthesized until the next recorded full snapshot.
+UNTRACKED_SOURCES = (8, 9, 10, 13, 15)
+
+
+def merge_style(style_text, changes):
+    """Apply an rrweb style attribute diff ({property: value, [value, priority] or False})"""
+    declarations = OrderedDict()
+    for declaration in style_text.split(';'):
+        if ':' in declaration:
+            name, value = declaration.split(':', 1)
+            declarations[name.strip()] = value.strip()
+    for name, value in changes.items():
+        if value is False:
+            declarations.pop(name, None)
+        elif isinstance(value, list):
+            declarations[name] = f"{value[0]} !{value[1]}" if len(value) > 1 and value[1] else value[0]
+        else:
+            declarations[name] = value
+    return ' '.join(f"{name}: {value};" for name, value in declarations.items())
+
+
+class DomMirror:
+    """
+    Serialized DOM of a recording kept up to date by applying rrweb events, from
+    which a full snapshot can be produced at any point. ``tracked`` is False when
+    the mirror may differ from the page (before the first full snapshot, after an
+    untracked change or a mutation that could not be applied).
+    """
+
+    def __init__(self):
+        self.root = None
+        self.nodes = {}
+        self.parents = {}
+        self.meta = None
+        self.scroll = {'top': 0, 'left': 0}
+        self.tracked = False
+
+    def _register(self, node, parent_id):
+        stack = [(node, parent_id)]
+        while stack:
+            current, current_parent = stack.pop()
+            self.nodes[current['id']] = current
+            self.parents[current['id']] = current_parent
+            for child in current.get('childNodes', ()):
+                stack.append((child, current['id']))
+
+    def _unregister(self, node):
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            self.nodes.pop(current['id'], None)
+            self.parents.pop(current['id'], None)
+            stack.extend(current.get('childNodes', ()))
+
+    def _detach(self, node_id):
+        node = self.nodes.get(node_id)
+        if node is None:
+            return
+        parent = self.nodes.get(self.parents.get(node_id))
+        if parent is not None:
+            parent['childNodes'] = [child for child in parent.get('childNodes', []) if child['id'] != node_id]
+        self._unregister(node)
+
+    def apply(self, event):
+        event_type = event.get('type')
+        if event_type == EVENT_META:
+            self.meta = copy.deepcopy(event)
+        elif event_type == EVENT_FULL_SNAPSHOT:
+            data = event['data']
+            self.root = copy.deepcopy(data['node'])
+            self.nodes = {}
+            self.parents = {}
+            self._register(self.root, None)
+            offset = data.get('initialOffset') or {}
+            self.scroll = {'top': offset.get('top', 0), 'left': offset.get('left', 0)}
+            self.tracked = True
+        elif event_type == EVENT_INCREMENTAL_SNAPSHOT and self.tracked:
+            data = event.get('data') or {}
+            source = data.get('source')
+            try:
+                if source == SOURCE_MUTATION:
+                    self._apply_mutation(data)
+                elif source == SOURCE_SCROLL and data.get('id') == self.root['id']:
+                    self.scroll = {'top': data.get('y', 0), 'left': data.get('x', 0)}
+                elif source == SOURCE_VIEWPORT_RESIZE and self.meta is not None:
+                    self.meta['data']['width'] = data.get('width')
+                    self.meta['data']['height'] = data.get('height')
+                elif source == SOURCE_INPUT:
+                    self._apply_input(data)
+                elif source in UNTRACKED_SOURCES:
+                    self.tracked = False
+            except (KeyError, TypeError, ValueError):
+                self.tracked = False
+
+    def _apply_mutation(self, data):
+        for removal in data.get('removes', []):
+            self._detach(removal['id'])
+
+        # Adds can refer to parents and siblings added later in the same mutation
+        pending = data.get('adds', [])
+        while pending:
+            remaining = []
+            for addition in pending:
+                parent = self.nodes.get(addition['parentId'])
+                next_id = addition.get('nextId')
+                if parent is None or (next_id is not None and next_id not in self.nodes):
+                    remaining.append(addition)
+                    continue
+                node = copy.deepcopy(addition['node'])
+                self._detach(node['id'])
+                children = parent.setdefault('childNodes', [])
+                child_ids = [child['id'] for child in children]
+                previous_id = addition.get('previousId')
+                if next_id is not None and next_id in child_ids:
+                    position = child_ids.index(next_id)
+                elif previous_id is not None and previous_id in child_ids:
+                    position = child_ids.index(previous_id) + 1
+                else:
+                    position = len(children)
+                children.insert(position, node)
+                self._register(node, parent['id'])
+            if len(remaining) == len(pending):
+                raise ValueError(f"{len(remaining)} added nodes have no parent or sibling in the mirror")
+            pending = remaining
+
+        for text in data.get('texts', []):
+            node = self.nodes.get(text['id'])
+            if node is not None:
+                node['textContent'] = text['value']
+
+        for change in data.get('attributes', []):
+            node = self.nodes.get(change['id'])
+            if node is None:
+                continue
+            attributes = node.setdefault('attributes', {})
+            for name, value in change['attributes'].items():
+                if value is None:
+                    attributes.pop(name, None)
+                elif name == 'style' and isinstance(value, dict):
+                    attributes['style'] = merge_style(attributes.get('style', ''), value)
+                else:
+                    attributes[name] = value
+
+    def _apply_input(self, data):
+        node = self.nodes.get(data['id'])
+        if node is None:
+            return
+        attributes = node.setdefault('attributes', {})
+        if data.get('isChecked') is not None and attributes.get('type') in ('checkbox', 'radio'):
+            if data['isChecked']:
+                attributes['checked'] = True
+            else:
+                attributes.pop('checked', None)
+        elif 'text' in data:
+            attributes['value'] = data['text']
+
+    def checkpoint(self, timestamp):
+        """Return a Meta and a FullSnapshot event reproducing the current page at timestamp"""
+        meta_data = copy.deepcopy(self.meta['data']) if self.meta else {'href': '', 'width': 1280, 'height': 720}
+        return [
+            {'type': EVENT_META, 'data': meta_data, 'timestamp': timestamp},
+            {
+                'type': EVENT_FULL_SNAPSHOT,
+                'data': {'node': self.root, 'initialOffset': dict(self.scroll)},
+                'timestamp': timestamp
+            }
+        ]
+
+
+def build_index(batches, write_checkpoint, interval_ms=CHECKPOINT_INTERVAL_MS):
+    """
+    Index a recording's checkpoints in one pass over its events
+
+    Args:
+        batches: (batch_name, items) pairs in playback order, where items yields
+            (event, raw_line) as read from the batch file
+        write_checkpoint: Called as write_checkpoint(name, events) to store a
+            synthesized checkpoint
+        interval_ms (int): Minimum time between checkpoints
+
+    Returns:
+        dict: The index. Each checkpoint names the batch and the position of the
+        event in it where playback resumes, and the checkpoint file for
+        synthesized checkpoints (None for recorded full snapshots).
+    """
+    mirror = DomMirror()
+    batch_names = []
+    checkpoints = []
+    start_time = None
+    end_time = None
+    event_count = 0
+    last_checkpoint_time = None
+    # A recorded full snapshot is preceded by a Meta event, where playback must resume
+    meta_position = None
+
+    for batch_name, items in batches:
+        batch_names.append(batch_name)
+        for position, (event, _) in enumerate(items):
+            timestamp = event['timestamp']
+            start_time = timestamp if start_time is None else start_time
+            end_time = timestamp
+            event_count += 1
+            event_type = event['type']
+
+            if event_type == EVENT_FULL_SNAPSHOT:
+                batch, resume_position = meta_position or (batch_name, position)
+                checkpoints.append({'timestamp': timestamp, 'batch': batch, 'position': resume_position, 'file': None})
+                last_checkpoint_time = timestamp
+            elif (event_type != EVENT_META and mirror.tracked
+                    and timestamp - last_checkpoint_time >= interval_ms):
+                name = f"{CHECKPOINT_PREFIX}checkpoint-{len(checkpoints)}.ndjson.gz"
+                write_checkpoint(name, mirror.checkpoint(timestamp))
+                checkpoints.append({'timestamp': timestamp, 'batch': batch_name, 'position': position, 'file': name})
+                last_checkpoint_time = timestamp
+
+            meta_position = (batch_name, position) if event_type == EVENT_META else None
+            mirror.apply(event)
+
+    return {
+        'version': INDEX_VERSION,
+        'startTime': start_time,
+        'endTime': end_time,
+        'eventCount': event_count,
+        'intervalMs': interval_ms,
+        'batches': batch_names,
+        'checkpoints': checkpoints
+    }
+
+
+def find_checkpoint(index, batch_names, timestamp):
+    """
+    Return the last checkpoint at or before timestamp, or None if the index does
+    not match the recording (batch files are only ever appended)
+    """
+    if not index or index.get('version') != INDEX_VERSION:
+        return None
+    if index['batches'] != batch_names[:len(index['batches'])]:
+        return None
+    found = None
+    for checkpoint in index['checkpoints']:
+        if checkpoint['timestamp'] > timestamp:
+            break
+        found = checkpoint
+    return found
+
+
+def seek_events(items, target):
+    """
+    Skip to the last recorded full snapshot at or before target without an index.
+    Events are still read from the start but only sent from that snapshot on.
+    """
+    items = iter(items)
+    buffered = []
+    for item in items:
+        event = item[0]
+        if event['timestamp'] > target:
+            yield from buffered
+            yield item
+            yield from items
+            return
+        if event['type'] == EVENT_FULL_SNAPSHOT:
+            meta = buffered[-1:] if buffered and buffered[-1][0]['type'] == EVENT_META else []
+            buffered = meta + [item]
+        elif event['type'] == EVENT_META or buffered:
+            buffered.append(item)
+    yield from buffered
+
+
+def skip_items(batches, skip):
+    """Flatten (batch_name, items) pairs, dropping the first skip events of the first batch"""
+    for batch_name, items in batches:
+        for item in items:
+            if skip:
+                skip -= 1
+                continue
+            yield item
+
+
+def seek_recording(index, offset_ms, batch_names, iter_batches, read_checkpoint):
+    """
+    Return (items, seek) for playback from offset_ms after the first event
+
+    iter_batches(start) yields (batch_name, items) for batch_names[start:], and
+    read_checkpoint(name) returns the items of a synthesized checkpoint. seek
+    describes where playback resumes: 'target' is the absolute timestamp the
+    viewer should jump to and 'checkpoint' the timestamp the events start at.
+    """
+    if index and index.get('startTime') is not None:
+        target = index['startTime'] + offset_ms
+        checkpoint = find_checkpoint(index, batch_names, target)
+        if checkpoint is not None:
+            start = batch_names.index(checkpoint['batch'])
+            items = skip_items(iter_batches(start), checkpoint['position'])
+            if checkpoint['file']:
+                items = chain(read_checkpoint(checkpoint['file']), items)
+            return items, {
+                'offset': offset_ms,
+                'target': target,
+                'checkpoint': checkpoint['timestamp'],
+                'synthetic': bool(checkpoint['file'])
+            }
+
+    items = skip_items(iter_batches(0), 0)
+    first = next(items, None)
+    if first is None:
+        return iter(()), None
+    target = first[0]['timestamp'] + offset_ms
+    return seek_events(chain([first], items), target), {'offset': offset_ms, 'target': target, 'checkpoint': None}
+
+
+def encode_events(events):
+    """Encode events as a gzipped NDJSON file, the format of batch and checkpoint files"""
+    return gzip.compress(''.join(json.dumps(event) + '\n' for event in events).encode('utf-8'))
+
+
+def index_recording(data_source, recording_id, interval_ms=CHECKPOINT_INTERVAL_MS):
+    """Build and store the index and checkpoints of one recording; returns the index or None"""
+    opened = data_source.open_batches(recording_id)
+    if opened is None:
+        return None
+
+    def write_checkpoint(name, events):
+        data_source.write_recording_file(recording_id, name, encode_events(events))
+
+    index = build_index(opened.iter_batches(0), write_checkpoint, interval_ms)
+    data_source.write_recording_file(recording_id, INDEX_FILE_NAME, json.dumps(index).encode('utf-8'))
+    return index
+
+
+def main():
+    # Imported here because the viewer imports this module
+    try:
+        from .session_replay_viewer import LocalDataSource, S3DataSource, console
+    except ImportError:
+        from session_replay_viewer import LocalDataSource, S3DataSource, console
+
+    parser = argparse.ArgumentParser(description="Build seek indexes for Bedrock Agentcore browser recordings")
+    parser.add_argument('--recordings-dir', help='Local recordings directory')
+    parser.add_argument('--bucket', help='S3 bucket containing recordings')
+    parser.add_argument('--prefix', default='', help='S3 prefix where recordings are stored')
+    parser.add_argument('--recording', help='Index only this recording (default: all recordings)')
+    parser.add_argument(
+        '--interval',
+        type=float,
+        default=CHECKPOINT_INTERVAL_MS / 1000,
+        help=f'Seconds between checkpoints (default: {CHECKPOINT_INTERVAL_MS / 1000:g})'
+    )
+    args = parser.parse_args()
+
+    if args.bucket:
+        data_source = S3DataSource(args.bucket, args.prefix)
+    elif args.recordings_dir:
+        data_source = LocalDataSource(args.recordings_dir)
+    else:
+        parser.error('Specify --recordings-dir or --bucket')
+
+    try:
+        recording_ids = [args.recording] if args.recording else [
+            recording['id'] for recording in data_source.list_recordings()
+        ]
+        for recording_id in recording_ids:
+            index = index_recording(data_source, recording_id, int(args.interval * 1000))
+            if index is None:
+                console.print(f"[yellow]Recording not found: {recording_id}[/yellow]")
+                continue
+            synthetic = sum(1 for checkpoint in index['checkpoints'] if checkpoint['file'])
+            console.print(
+                f"[green]✓ {recording_id}: {index['eventCount']} events, "
+                f"{len(index['checkpoints'])} checkpoints ({synthetic} synthesized)[/green]"
+            )
+    finally:
+        if hasattr(data_source, 'cleanup'):
+            data_source.cleanup()
+
+
+if __name__ == '__main__':
+    main()
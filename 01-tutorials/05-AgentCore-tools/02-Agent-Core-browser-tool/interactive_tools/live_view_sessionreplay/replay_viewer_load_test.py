@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Load test for the Session Replay Viewer
+
+Runs several concurrent viewers against a replay viewer server. Each viewer keeps
+one keep-alive connection and repeatedly loads the page, the recordings list, a
+range of a static file, a streamed recording and a downloaded recording. Reports
+latency per request type, so a slow recording showing up in every other request's
+latency points at requests being served one at a time.
+
+Without --url a server is started on a synthetic local recording, optionally
+with an artificial delay when a recording is opened to stand in for S3.
+
+Usage:
+    python replay_viewer_load_test.py [--viewers 8] [--rounds 5] [--delay 1.0]
+    python replay_viewer_load_test.py --url http://localhost:8080 --recording RECORDING_ID
+"""
+
+import time
+import json
+import argparse
+import tempfile
+import threading
+import http.client
+from pathlib import Path
+from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer
+
+from rich.console import Console
+from rich.table import Table
+
+from replay_index import encode_events
+from session_replay_viewer import LocalDataSource, SessionReplayHandler
+
+console = Console()
+
+
+class DelayedLocalDataSource(LocalDataSource):
+    """Local recordings that take `delay` seconds to open, like a cold S3 download"""
+
+    def __init__(self, recordings_dir, delay):
+        super().__init__(recordings_dir)
+        self.delay = delay
+
+    def open_batches(self, recording_id):
+        time.sleep(self.delay)
+        return super().open_batches(recording_id)
+
+
+def create_recording(recordings_dir, event_count, batch_size=500):
+    """Write a synthetic recording of event_count events and return its id"""
+    recording_id = f"rrweb-{int(time.time() * 1000)}-loadtest"
+    recording_dir = Path(recordings_dir) / recording_id
+    recording_dir.mkdir(parents=True)
+    document = {
+        'type': 0, 'id': 1, 'childNodes': [
+            {'type': 2, 'id': 2, 'tagName': 'html', 'attributes': {}, 'childNodes': [
+                {'type': 2, 'id': 3, 'tagName': 'body', 'attributes': {}, 'childNodes': []}
+            ]}
+        ]
+    }
+    events = [
+        {'type': 4, 'data': {'href': 'https://example.com', 'width': 1280, 'height': 720}, 'timestamp': 0},
+        {'type': 2, 'data': {'node': document, 'initialOffset': {'top': 0, 'left': 0}}, 'timestamp': 1},
+    ]
+    for i in range(event_count - len(events)):
+        events.append({
+            'type': 3,
+            'data': {'source': 1, 'positions': [{'x': i % 1280, 'y': i % 720, 'id': 3, 'timeOffset': 0}]},
+            'timestamp': 2 + i * 20
+        })
+    for batch, start in enumerate(range(0, len(events), batch_size)):
+        (recording_dir / f"batch-{batch}.ndjson.gz").write_bytes(encode_events(events[start:start + batch_size]))
+    (recording_dir / 'metadata.json').write_text(json.dumps({'totalEvents': len(events), 'duration': events[-1]['timestamp']}))
+    return recording_id
+
+
+def start_server(data_source, viewer_path):
+    def handler_factory(*args, **kwargs):
+        return SessionReplayHandler(data_source, viewer_path, *args, **kwargs)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler_factory)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_viewer(host, port, recording_id, rounds, results, lock):
+    """One viewer: every request of every round on a single keep-alive connection"""
+    requests = [
+        ('page', '/', {}),
+        ('recordings', '/api/recordings?limit=50', {'Accept-Encoding': 'gzip'}),
+        ('static range', '/index.html', {'Range': 'bytes=0-1023'}),
+        ('stream', f"/api/stream/{recording_id}", {'Accept-Encoding': 'gzip'}),
+        ('download', f"/api/download/{recording_id}", {'Accept-Encoding': 'gzip'}),
+    ]
+    connection = http.client.HTTPConnection(host, port, timeout=120)
+    connections = 1
+    try:
+        for _ in range(rounds):
+            for name, path, headers in requests:
+                start = time.perf_counter()
+                try:
+                    connection.request('GET', path, headers=headers)
+                    response = connection.getresponse()
+                    body = response.read()
+                    ok = response.status in (200, 206)
+                    if response.will_close:
+                        connection.close()
+                        connection = http.client.HTTPConnection(host, port, timeout=120)
+                        connections += 1
+                except (OSError, http.client.HTTPException):
+                    ok, body = False, b''
+                    connection.close()
+                    connection = http.client.HTTPConnection(host, port, timeout=120)
+                    connections += 1
+                elapsed = time.perf_counter() - start
+                with lock:
+                    entry = results.setdefault(name, {'times': [], 'errors': 0, 'bytes': 0})
+                    entry['times'].append(elapsed)
+                    entry['bytes'] += len(body)
+                    if not ok:
+                        entry['errors'] += 1
+    finally:
+        connection.close()
+        with lock:
+            results.setdefault('_connections', []).append(connections)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Session Replay Viewer with concurrent viewers")
+    parser.add_argument('--url', help='Viewer URL (default: start a server on a synthetic recording)')
+    parser.add_argument('--recording', help='Recording id to stream (required with --url)')
+    parser.add_argument('--viewers', type=int, default=8, help='Concurrent viewers (default: 8)')
+    parser.add_argument('--rounds', type=int, default=5, help='Rounds of requests per viewer (default: 5)')
+    parser.add_argument('--events', type=int, default=20000, help='Events in the synthetic recording (default: 20000)')
+    parser.add_argument('--delay', type=float, default=1.0,
+                        help='Seconds to open the synthetic recording (default: 1.0)')
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        if not args.recording:
+            parser.error('--recording is required with --url')
+        parsed = urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+        recording_id = args.recording
+    else:
+        workdir = Path(tempfile.mkdtemp(prefix='replay_load_test_'))
+        recording_id = create_recording(workdir / 'recordings', args.events)
+        data_source = DelayedLocalDataSource(workdir / 'recordings', args.delay)
+        server = start_server(data_source, Path(__file__).resolve().parent.parent / 'static' / 'replay-viewer')
+        host, port = server.server_address
+
+    console.print(f"[cyan]{args.viewers} viewers x {args.rounds} rounds against http://{host}:{port}[/cyan]")
+    results = {}
+    lock = threading.Lock()
+    viewers = [
+        threading.Thread(target=run_viewer, args=(host, port, recording_id, args.rounds, results, lock))
+        for _ in range(args.viewers)
+    ]
+    start = time.perf_counter()
+    for viewer in viewers:
+        viewer.start()
+    for viewer in viewers:
+        viewer.join()
+    elapsed = time.perf_counter() - start
+
+    connections = results.pop('_connections', [])
+    table = Table(title=f"Replay viewer load test ({elapsed:.1f}s total)")
+    for column in ('Request', 'Count', 'Errors', 'p50 (ms)', 'p95 (ms)', 'Max (ms)', 'Avg KB'):
+        table.add_column(column, justify='left' if column == 'Request' else 'right')
+    for name, entry in results.items():
+        times = entry['times']
+        table.add_row(
+            name,
+            str(len(times)),
+            str(entry['errors']),
+            f"{percentile(times, 0.5) * 1000:.0f}",
+            f"{percentile(times, 0.95) * 1000:.0f}",
+            f"{max(times) * 1000:.0f}",
+            f"{entry['bytes'] / len(times) / 1024:.1f}"
+        )
+    console.print(table)
+    console.print(f"Connections opened: {sum(connections)} for {args.viewers} viewers")
+
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -10,16 +10,20 @@ import os
 import sys
 import json
 import time
-import tempfile
 import threading
 import webbrowser
 import socket
 import signal
-import shutil
 import gzip
+import hashlib
+import re
+import weakref
+import zlib
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
 import mimetypes
 from datetime import datetime
 
@@ -27,14 +31,255 @@ import boto3
 from botocore.exceptions import ClientError, NoCredentialsError
 from rich.console import Console
 from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from .replay_index import INDEX_FILE_NAME, seek_recording, skip_items
+    from .replay_archive import ARCHIVE_FILE_NAME, RecordingArchive
+except ImportError:
+    from replay_index import INDEX_FILE_NAME, seek_recording, skip_items
+    from replay_archive import ARCHIVE_FILE_NAME, RecordingArchive
 
 console = Console()
 
+# Size of the first streamed chunk; later chunks double up to STREAM_CHUNK_BYTES so
+# the player gets its first events quickly without many tiny writes afterwards
+STREAM_FIRST_CHUNK_BYTES = 8 * 1024
+STREAM_CHUNK_BYTES = 256 * 1024
+# JSON responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = 1024
+STATIC_COPY_BYTES = 64 * 1024
+
+# Concurrent S3 requests per data source; objects larger than RANGE_PART_BYTES
+# are fetched as parallel ranged GETs
+DOWNLOAD_WORKERS = int(os.environ.get('REPLAY_DOWNLOAD_WORKERS', '8'))
+RANGE_PART_BYTES = 8 * 1024 * 1024
+REPLAY_CACHE_DIR = os.environ.get('REPLAY_CACHE_DIR', str(Path.home() / '.cache' / 'bedrock_agentcore_replay'))
+REPLAY_CACHE_MAX_BYTES = int(os.environ.get('REPLAY_CACHE_MAX_MB', '1024')) * 1024 * 1024
+
+# The recording catalog is kept in the cache directory, and with share_catalog also in
+# the bucket under the recordings prefix. A listing is reused for CATALOG_REFRESH_SECONDS; directories without metadata.json (recordings
+# still being written) are probed again after CATALOG_PENDING_RECHECK_SECONDS.
+CATALOG_MANIFEST_NAME = '_replay_catalog.json'
+CATALOG_VERSION = 1
+CATALOG_REFRESH_SECONDS = int(os.environ.get('REPLAY_CATALOG_REFRESH_SECONDS', '30'))
+CATALOG_PENDING_RECHECK_SECONDS = 300
+
+# /api/recordings pagination and sort fields
+RECORDINGS_PAGE_SIZE = 100
+RECORDINGS_MAX_PAGE_SIZE = 1000
+RECORDING_SORT_FIELDS = ('timestamp', 'duration', 'events', 'id')
+
+
+# A recording opened batch by batch: iter_batches(start) yields (batch_name, items)
+# for batch_names[start:], read_file(name) returns the bytes of another file in the
+# recording directory (e.g. the replay index) or None
+BatchedRecording = namedtuple('BatchedRecording', ['metadata', 'batch_names', 'iter_batches', 'read_file'])
+
+
+def batch_sort_key(key):
+    """Sort batch files by their numeric parts so batch-10 comes after batch-9"""
+    name = key.split('/')[-1]
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def is_batch_file(key):
+    name = key.split('/')[-1]
+    return name.startswith('batch-') and (name.endswith('.ndjson.gz') or name.endswith('.jsonl.gz'))
+
+
+def open_archive(path, metadata, batch_names, iter_batches, read_file, on_close=None):
+    """
+    Return a BatchedRecording reading a recording's archive (see replay_archive.py)
+    followed by any batch files written after it, or None if the archive cannot be
+    used. iter_batches(start) reads batch_names[start:] from the batch files.
+    on_close is called once the archive file is no longer read.
+    """
+    try:
+        archive = RecordingArchive(path)
+    except (OSError, ValueError) as e:
+        console.print(f"[yellow]Warning: Ignoring recording archive {path}: {e}[/yellow]")
+        if on_close:
+            on_close()
+        return None
+    if on_close:
+        # Frames are read from the file for as long as the archive object is alive
+        weakref.finalize(archive, on_close)
+    archived = set(archive.index['sourceBatches'])
+    newer = [name for name in batch_names if name not in archived]
+    if newer and batch_names[len(batch_names) - len(newer):] != newer:
+        console.print(f"[dim]Recording archive {path} does not match the batch files, reading the batch files[/dim]")
+        return None
+    first_newer = len(batch_names) - len(newer)
+    frame_count = len(archive.frame_names)
+    
+    def iter_all(start):
+        yield from archive.iter_frames(min(start, frame_count))
+        if newer:
+            yield from iter_batches(first_newer + max(start - frame_count, 0))
+    
+    return BatchedRecording(metadata or archive.metadata, archive.frame_names + newer, iter_all, read_file)
+
+
+def iter_ndjson_events(lines, source_name):
+    """
+    Yield (event, raw_line) for every valid rrweb event in decompressed NDJSON lines.
+    The raw line is kept so streaming can forward it without re-serializing.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            console.print(f"[yellow]Warning: Invalid JSON in {source_name}: {line[:50]}...[/yellow]")
+            continue
+        # Validate event structure for rrweb
+        if isinstance(event, dict) and 'type' in event and 'timestamp' in event:
+            yield event, line
+        else:
+            console.print(f"[yellow]Skipping invalid event in {source_name}: missing required fields[/yellow]")
+
+
+def parse_start_time(value, default):
+    """Epoch milliseconds from a metadata startTime given as ISO 8601 text or a number"""
+    if value is None:
+        return default
+    try:
+        if isinstance(value, str) and not value.isdigit():
+            return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp() * 1000)
+        return int(value)
+    except (TypeError, ValueError) as e:
+        console.print(f"[yellow]Warning: Could not parse startTime {value!r}: {e}[/yellow]")
+        return default
+
+
+def query_recordings(recordings, query):
+    """
+    Filter, sort and paginate a recordings list with the /api/recordings query
+    parameters: q (text in the recording or session id), since/until (epoch ms),
+    sort (one of RECORDING_SORT_FIELDS), order (asc/desc), offset and limit.
+    Raises ValueError for invalid parameters.
+    """
+    def param(name, default):
+        values = query.get(name)
+        return values[0] if values and values[0] != '' else default
+    
+    text = param('q', '').lower()
+    since = int(param('since', 0))
+    until = int(param('until', 0))
+    sort = param('sort', 'timestamp')
+    if sort not in RECORDING_SORT_FIELDS:
+        raise ValueError(f"Invalid sort field: {sort}. Valid fields are: {', '.join(RECORDING_SORT_FIELDS)}")
+    order = param('order', 'desc')
+    if order not in ('asc', 'desc'):
+        raise ValueError(f"Invalid order: {order}. Use 'asc' or 'desc'")
+    offset = max(int(param('offset', 0)), 0)
+    limit = min(max(int(param('limit', RECORDINGS_PAGE_SIZE)), 1), RECORDINGS_MAX_PAGE_SIZE)
+    
+    matched = []
+    for recording in recordings:
+        timestamp = int(recording.get('timestamp') or 0)
+        if text and text not in recording['id'].lower() and text not in str(recording.get('sessionId', '')).lower():
+            continue
+        if (since and timestamp < since) or (until and timestamp > until):
+            continue
+        matched.append(recording)
+    
+    if sort == 'id':
+        matched.sort(key=lambda recording: recording['id'], reverse=order == 'desc')
+    else:
+        matched.sort(key=lambda recording: float(recording.get(sort) or 0), reverse=order == 'desc')
+    
+    return {
+        'recordings': matched[offset:offset + limit],
+        'total': len(matched),
+        'offset': offset,
+        'limit': limit
+    }
+
+
+class StreamCompressor:
+    """Incremental gzip or brotli encoder whose output is flushed after every chunk"""
+    
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor()
+        elif encoding == 'gzip':
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        else:
+            self._compressor = None
+    
+    def compress(self, data):
+        if self._compressor is None:
+            return data
+        if self.encoding == 'br':
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    def finish(self):
+        if self._compressor is None:
+            return b''
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def placeholder_events():
+    """Minimal set of rrweb events so the viewer still works for an empty recording"""
+    timestamp = int(time.time() * 1000)
+    return [
+        {
+            "type": 2,  # Meta event
+            "timestamp": timestamp,
+            "data": {"href": "https://example.com", "width": 1280, "height": 720}
+        },
+        {
+            "type": 4,  # DOM snapshot
+            "timestamp": timestamp + 100,
+            "data": {
+                "node": {
+                    "type": 1,
+                    "childNodes": [
+                        {
+                            "type": 2,
+                            "tagName": "html",
+                            "attributes": {},
+                            "childNodes": [
+                                {
+                                    "type": 2,
+                                    "tagName": "body",
+                                    "attributes": {},
+                                    "childNodes": [
+                                        {
+                                            "type": 3,
+                                            "textContent": "No recording data found - placeholder content"
+                                        }
+                                    ]
+                                }
+                            ]
+                        }
+                    ]
+                }
+            }
+        }
+    ]
+
 
 class SessionReplayHandler(BaseHTTPRequestHandler):
     """HTTP request handler for session replay viewer"""
     
+    # HTTP/1.1 keeps connections alive, so every response needs a Content-Length
+    # or chunked encoding. Idle connections are closed after timeout seconds.
+    protocol_version = 'HTTP/1.1'
+    timeout = 60
+    
     def __init__(self, data_source, viewer_path, *args, **kwargs):
         self.data_source = data_source
         self.viewer_path = viewer_path
@@ -53,6 +298,10 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
                 self.serve_file('index.html')
             elif path == '/api/recordings':
                 self.serve_recordings_list()
+            elif path.startswith('/api/stream/'):
+                recording_id = path.split('/')[-1]
+                offset = parse_qs(urlparse(self.path).query).get('offset')
+                self.stream_recording(recording_id, int(offset[0]) if offset else None)
             elif path.startswith('/api/download/'):
                 recording_id = path.split('/')[-1]
                 self.download_and_serve_recording(recording_id)
@@ -64,8 +313,12 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
             self.send_error(500, str(e))
     
     def serve_file(self, file_path):
-        """Serve static files"""
-        full_path = self.viewer_path / file_path
+        """Serve static files, honouring single byte-range requests"""
+        viewer_root = self.viewer_path.resolve()
+        full_path = (viewer_root / file_path).resolve()
+        if full_path != viewer_root and viewer_root not in full_path.parents:
+            self.send_error(404, f"File not found: {file_path}")
+            return
         
         if not full_path.exists():
             # Create index.html on the fly
@@ -79,15 +332,44 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
         if content_type is None:
             content_type = 'application/octet-stream'
         
-        with open(full_path, 'rb') as f:
-            content = f.read()
+        size = full_path.stat().st_size
+        start, end = 0, size - 1
+        status = 200
+        range_match = re.fullmatch(r'bytes=(\d*)-(\d*)', self.headers.get('Range', '').strip())
+        if range_match and (range_match.group(1) or range_match.group(2)):
+            if range_match.group(1):
+                start = int(range_match.group(1))
+                if range_match.group(2):
+                    end = min(int(range_match.group(2)), size - 1)
+            else:
+                # Suffix range: the last N bytes
+                start = max(size - int(range_match.group(2)), 0)
+            if start > end:
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{size}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            status = 206
         
-        self.send_response(200)
+        self.send_response(status)
         self.send_header('Content-Type', content_type)
-        self.send_header('Content-Length', str(len(content)))
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
-        self.wfile.write(content)
+        
+        with open(full_path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = f.read(min(STATIC_COPY_BYTES, remaining))
+                if not data:
+                    break
+                self.wfile.write(data)
+                remaining -= len(data)
     
     def _create_index_html(self, path):
         """Create the viewer HTML interface"""
@@ -148,6 +430,30 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
             font-weight: 500;
         }
         
+        .recording-search {
+            padding: 10px 15px;
+            border-bottom: 1px solid #e0e0e0;
+        }
+        
+        .recording-search input {
+            width: 100%;
+            padding: 6px 8px;
+            border: 1px solid #ced4da;
+            border-radius: 4px;
+            font-size: 13px;
+        }
+        
+        .load-more {
+            display: block;
+            width: 100%;
+            padding: 8px;
+            margin: 10px 0;
+            background: white;
+            border: 1px solid #dee2e6;
+            border-radius: 6px;
+            cursor: pointer;
+        }
+        
         .recordings-list {
             flex: 1;
             overflow-y: auto;
@@ -239,6 +545,31 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
             100% { transform: rotate(360deg); }
         }
         
+        .stream-bar {
+            display: flex;
+            align-items: center;
+            justify-content: space-between;
+            padding: 6px 20px;
+            min-height: 28px;
+        }
+        
+        .stream-status {
+            font-size: 12px;
+            color: #6c757d;
+        }
+        
+        .seek-bar {
+            font-size: 12px;
+            color: #6c757d;
+        }
+        
+        .seek-bar input {
+            width: 70px;
+            padding: 2px 6px;
+            border: 1px solid #ced4da;
+            border-radius: 4px;
+        }
+        
         .error {
             color: #dc3545;
             padding: 20px;
@@ -260,6 +591,9 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
                 Available Recordings
                 <span id="recordingCount" style="float: right; opacity: 0.7;"></span>
             </div>
+            <div class="recording-search">
+                <input type="search" id="recordingSearch" placeholder="Filter by session ID" oninput="onSearchInput()">
+            </div>
             <div class="recordings-list" id="recordingsList">
                 <div class="empty-state">
                     <div class="loading"></div>
@@ -277,6 +611,14 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
                     </div>
                 </div>
             </div>
+            <div class="stream-bar">
+                <div class="stream-status" id="streamStatus"></div>
+                <div class="seek-bar">
+                    Start at
+                    <input type="text" id="seekTime" placeholder="mm:ss">
+                    <button onclick="seekRecording()">Go</button>
+                </div>
+            </div>
         </div>
     </div>
     
@@ -288,9 +630,21 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
         let currentPlayer = null;
         let recordings = [];
         
-        async function loadRecordings() {
+        // Recordings are fetched a page at a time, filtered and sorted by the server
+        const PAGE_SIZE = 100;
+        let recordingsTotal = 0;
+        let searchTimer = null;
+        
+        async function loadRecordings(append) {
+            const query = document.getElementById('recordingSearch').value.trim();
+            // A refresh reloads as many recordings as are currently shown
+            const offset = append === true ? recordings.length : 0;
+            const limit = append === true ? PAGE_SIZE : Math.max(PAGE_SIZE, recordings.length);
+            const url = '/api/recordings?offset=' + offset + '&limit=' + limit +
+                (query ? '&q=' + encodeURIComponent(query) : '');
+            
             try {
-                const response = await fetch('/api/recordings');
+                const response = await fetch(url);
                 const data = await response.json();
                 
                 // Check if response has error
@@ -303,7 +657,9 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
                 }
                 
                 // Make sure recordings is an array
-                recordings = Array.isArray(data) ? data : (data.recordings || []);
+                const page = Array.isArray(data) ? data : (data.recordings || []);
+                recordings = append === true ? recordings.concat(page) : page;
+                recordingsTotal = typeof data.total === 'number' ? data.total : recordings.length;
                 
                 const listEl = document.getElementById('recordingsList');
                 const countEl = document.getElementById('recordingCount');
@@ -315,7 +671,7 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
                 }
                 
                 // CHANGED: Use string concatenation instead of template literals
-                countEl.textContent = '(' + recordings.length + ')';
+                countEl.textContent = '(' + recordingsTotal + ')';
                 
                 // CHANGED: Create HTML using map with string concatenation
                 listEl.innerHTML = recordings.map(function(recording, index) {
@@ -326,7 +682,9 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
                             recording.events + ' events • ' + formatDuration(recording.duration) +
                         '</div>' +
                     '</div>';
-                }).join('');
+                }).join('') + (recordings.length < recordingsTotal ?
+                    '<button class="load-more" onclick="loadRecordings(true)">Load more (' +
+                        (recordingsTotal - recordings.length) + ' remaining)</button>' : '');
                 
             } catch (e) {
                 console.error('Failed to load recordings:', e);
@@ -336,6 +694,14 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
             }
         }
         
+        function onSearchInput() {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(function() {
+                recordings = [];
+                loadRecordings(false);
+            }, 300);
+        }
+        
         function formatDuration(ms) {
             const seconds = Math.floor(ms / 1000);
             const minutes = Math.floor(seconds / 60);
@@ -351,8 +717,185 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
             }
         }
         
-        async function loadRecording(index) {
+        // Playback starts once a full snapshot and this many events have arrived
+        const MIN_EVENTS_TO_START = 50;
+        let currentStream = null;
+        
+        function setStreamStatus(text) {
+            document.getElementById('streamStatus').textContent = text;
+        }
+        
+        function createPlayer(playerEl, events) {
+            // CHANGED: Use string concatenation for logging
+            console.log('Starting playback with ' + events.length + ' events. First event type: ' + events[0].type);
+            
+            playerEl.innerHTML = '';
+            
+            if (typeof rrwebPlayer !== 'function') {
+                throw new Error('rrwebPlayer not found - make sure the library is loaded');
+            }
+            
+            const width = Math.min(playerEl.offsetWidth, 1200);
+            const height = Math.min(playerEl.offsetHeight, 800);
+            
+            // CHANGED: Use string concatenation
+            console.log('Creating player with dimensions ' + width + 'x' + height);
+            
+            currentPlayer = new rrwebPlayer({
+                target: playerEl,
+                props: {
+                    events: events,
+                    width: width,
+                    height: height,
+                    autoPlay: true,
+                    showController: true
+                }
+            });
+            
+            console.log('Player created:', currentPlayer);
+        }
+        
+        // Reads the NDJSON stream and starts the player as soon as enough events have
+        // arrived; later events are appended to the running player. Returns false if
+        // the server does not support streaming so the caller can fall back.
+        async function streamRecording(recording, playerEl, stream, offsetMs) {
+            const url = '/api/stream/' + recording.id + (offsetMs ? '?offset=' + offsetMs : '');
+            const response = await fetch(url, { signal: stream.signal });
+            const contentType = response.headers.get('Content-Type') || '';
+            if (!response.ok || !response.body || contentType.indexOf('ndjson') === -1) {
+                return false;
+            }
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let pending = [];
+            let total = 0;
+            let hasFullSnapshot = false;
+            // When seeking, the stream starts at a checkpoint before seek.target
+            let seek = null;
+            let lastTimestamp = 0;
+            
+            function handleLine(line) {
+                if (!line.trim()) {
+                    return;
+                }
+                const item = JSON.parse(line);
+                if (item.metadata !== undefined) {
+                    seek = (item.metadata && item.metadata.replaySeek) || null;
+                    return;
+                }
+                if (item.error) {
+                    throw new Error(item.error);
+                }
+                total++;
+                lastTimestamp = item.timestamp;
+                if (item.type === 2) {
+                    hasFullSnapshot = true;
+                }
+                if (currentPlayer) {
+                    currentPlayer.addEvent(item);
+                } else {
+                    pending.push(item);
+                }
+            }
+            
+            function maybeStart(done) {
+                if (currentPlayer || pending.length < 2) {
+                    return;
+                }
+                if (!done && !(hasFullSnapshot && pending.length >= MIN_EVENTS_TO_START)) {
+                    return;
+                }
+                if (!done && seek && lastTimestamp < seek.target) {
+                    return;
+                }
+                const firstTimestamp = pending[0].timestamp;
+                createPlayer(playerEl, pending);
+                pending = [];
+                if (seek && seek.target > firstTimestamp) {
+                    currentPlayer.goto(seek.target - firstTimestamp, true);
+                }
+            }
+            
+            while (true) {
+                const { value, done } = await reader.read();
+                if (stream.aborted) {
+                    return true;
+                }
+                if (value) {
+                    buffer += decoder.decode(value, { stream: true });
+                    const lines = buffer.split('\n');
+                    buffer = lines.pop();
+                    lines.forEach(handleLine);
+                    maybeStart(false);
+                    setStreamStatus('Streaming recording... ' + total + ' events loaded');
+                }
+                if (done) {
+                    break;
+                }
+            }
+            buffer += decoder.decode();
+            handleLine(buffer);
+            maybeStart(true);
+            
+            if (!currentPlayer) {
+                throw new Error('Recording contains no events');
+            }
+            setStreamStatus(total + ' events loaded');
+            return true;
+        }
+        
+        async function downloadRecording(recording, playerEl) {
+            // CHANGED: Use string concatenation
+            const response = await fetch('/api/download/' + recording.id);
+            const result = await response.json();
+            
+            if (!result.success || !result.data) {
+                throw new Error(result.error || 'Failed to download recording');
+            }
+            
+            const { events } = result.data;
+            
+            if (!events || events.length === 0) {
+                throw new Error('Recording contains no events');
+            }
+            
+            createPlayer(playerEl, events);
+            setStreamStatus(events.length + ' events loaded');
+        }
+        
+        let currentIndex = null;
+        
+        function parseSeekTime(text) {
+            // Accepts seconds or mm:ss / hh:mm:ss
+            const parts = text.trim().split(':');
+            let seconds = 0;
+            for (let i = 0; i < parts.length; i++) {
+                const value = parseFloat(parts[i]);
+                if (isNaN(value)) {
+                    return null;
+                }
+                seconds = seconds * 60 + value;
+            }
+            return Math.round(seconds * 1000);
+        }
+        
+        function seekRecording() {
+            if (currentIndex === null) {
+                return;
+            }
+            const offsetMs = parseSeekTime(document.getElementById('seekTime').value);
+            if (offsetMs === null) {
+                setStreamStatus('Enter a start time as seconds or mm:ss');
+                return;
+            }
+            loadRecording(currentIndex, offsetMs);
+        }
+        
+        async function loadRecording(index, offsetMs) {
             const recording = recordings[index];
+            currentIndex = index;
             
             document.querySelectorAll('.recording-item').forEach(el => {
                 el.classList.remove('active');
@@ -362,6 +905,16 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
             
             const playerEl = document.getElementById('player');
             playerEl.innerHTML = '<div class="empty-state"><div class="loading"></div>Downloading recording...</div>';
+            setStreamStatus('');
+            
+            // Stop reading the previously selected recording
+            if (currentStream) {
+                currentStream.aborted = true;
+                currentStream.controller.abort();
+            }
+            const controller = new AbortController();
+            const stream = { controller: controller, signal: controller.signal, aborted: false };
+            currentStream = stream;
             
             try {
                 // Safely dispose of the existing player first
@@ -378,49 +931,15 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
                     currentPlayer = null;
                 }
                 
-                // CHANGED: Use string concatenation
-                const response = await fetch('/api/download/' + recording.id);
-                const result = await response.json();
-                
-                if (!result.success || !result.data) {
-                    throw new Error(result.error || 'Failed to download recording');
-                }
-                
-                const { events } = result.data;
-                
-                if (!events || events.length === 0) {
-                    throw new Error('Recording contains no events');
+                const streamed = await streamRecording(recording, playerEl, stream, offsetMs);
+                if (!streamed && !stream.aborted) {
+                    await downloadRecording(recording, playerEl);
                 }
                 
-                // CHANGED: Use string concatenation for logging
-                console.log('Loaded ' + events.length + ' events. First event type: ' + events[0].type);
-                
-                playerEl.innerHTML = '';
-                
-                if (typeof rrwebPlayer !== 'function') {
-                    throw new Error('rrwebPlayer not found - make sure the library is loaded');
-                }
-                
-                const width = Math.min(playerEl.offsetWidth, 1200);
-                const height = Math.min(playerEl.offsetHeight, 800);
-                
-                // CHANGED: Use string concatenation
-                console.log('Creating player with dimensions ' + width + 'x' + height);
-                
-                currentPlayer = new rrwebPlayer({
-                    target: playerEl,
-                    props: {
-                        events: events,
-                        width: width,
-                        height: height,
-                        autoPlay: true,
-                        showController: true
-                    }
-                });
-                
-                console.log('Player created:', currentPlayer);
-                
             } catch (e) {
+                if (stream.aborted) {
+                    return;
+                }
                 console.error('Failed to load recording:', e);
                 // CHANGED: Use string concatenation
                 playerEl.innerHTML = '<div class="error">Error: ' + e.message + '</div>';
@@ -468,76 +987,148 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
         print("======= END DEBUGGING =======\n")
     
     def serve_recordings_list(self):
-        """Return list of recordings with proper headers"""
+        """
+        Return a page of recordings as {"recordings", "total", "offset", "limit"};
+        see query_recordings for the query parameters. refresh=1 re-reads the catalog.
+        """
         try:
+            query = parse_qs(urlparse(self.path).query)
+            catalog = getattr(self.data_source, 'catalog', None)
+            if catalog is not None and query.get('refresh', ['0'])[0] not in ('0', ''):
+                catalog.invalidate()
             recordings = self.data_source.list_recordings()
-            response = json.dumps(recordings)
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Content-Length', str(len(response)))
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', '*')
-            self.end_headers()
-            
-            self.wfile.write(response.encode('utf-8'))
-            
+            response = query_recordings(recordings, query)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e), "recordings": []})
+            return
         except Exception as e:
             console.print(f"[red]Error in serve_recordings_list: {e}[/red]")
-            
-            error_response = json.dumps({"error": str(e), "recordings": []})
-            self.send_response(200)  # Use 200 to ensure client gets the error
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Content-Length', str(len(error_response)))
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(error_response.encode('utf-8'))
+            # Use 200 to ensure client gets the error
+            self._send_json(200, {"error": str(e), "recordings": []})
+            return
+        
+        self._send_json(200, response)
 
     def download_and_serve_recording(self, recording_id):
         """Download recording and serve it with proper headers"""
         try:
             recording_data = self.data_source.download_recording(recording_id)
-            
-            if recording_data:
-                response = json.dumps({
-                    'success': True,
-                    'data': recording_data
-                })
-                
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Content-Length', str(len(response)))
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(response.encode('utf-8'))
-            else:
-                error_response = json.dumps({
-                    'success': False,
-                    'error': 'Recording not found'
-                })
-                self.send_response(404)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Content-Length', str(len(error_response)))
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(error_response.encode('utf-8'))
-                
         except Exception as e:
             console.print(f"[red]Error in download_and_serve_recording: {e}[/red]")
             import traceback
             traceback.print_exc()
-            
-            error_response = json.dumps({
-                'success': False,
-                'error': str(e)
-            })
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Content-Length', str(len(error_response)))
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(error_response.encode('utf-8'))
+            self._send_json(500, {'success': False, 'error': str(e)})
+            return
+        
+        if recording_data:
+            self._send_json(200, {'success': True, 'data': recording_data})
+        else:
+            self._send_json(404, {'success': False, 'error': 'Recording not found'})
+
+    def stream_recording(self, recording_id, offset_ms=None):
+        """
+        Stream a recording as NDJSON: a {"metadata": ...} line followed by one rrweb
+        event per line in time order, written as the batch files are decompressed.
+        With offset_ms the stream starts at the nearest checkpoint before that time
+        and metadata.replaySeek says where the viewer should jump to.
+        """
+        try:
+            if not hasattr(self.data_source, 'open_recording'):
+                # Data sources that only implement download_recording
+                opened = DataSource.open_recording(self.data_source, recording_id, offset_ms)
+            elif offset_ms is not None:
+                opened = self.data_source.open_recording(recording_id, offset_ms)
+            else:
+                opened = self.data_source.open_recording(recording_id)
+        except Exception as e:
+            console.print(f"[red]Error in stream_recording: {e}[/red]")
+            self._send_json(500, {'success': False, 'error': str(e)})
+            return
+
+        if opened is None:
+            self._send_json(404, {'success': False, 'error': 'Recording not found'})
+            return
+
+        metadata, events = opened
+        compressor = StreamCompressor(self._content_encoding())
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        if compressor.encoding:
+            self.send_header('Content-Encoding', compressor.encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+
+        def write(text):
+            self._write_chunk(compressor.compress(text.encode('utf-8')))
+
+        chunk = [json.dumps({'metadata': metadata}) + '\n']
+        chunk_size = len(chunk[0])
+        chunk_limit = STREAM_FIRST_CHUNK_BYTES
+        event_count = 0
+        try:
+            for _, line in events:
+                chunk.append(line + '\n')
+                chunk_size += len(line) + 1
+                event_count += 1
+                if chunk_size >= chunk_limit:
+                    write(''.join(chunk))
+                    chunk = []
+                    chunk_size = 0
+                    chunk_limit = min(chunk_limit * 2, STREAM_CHUNK_BYTES)
+            if chunk:
+                write(''.join(chunk))
+            self._end_chunks(compressor)
+            console.print(f"[green]✓ Streamed {event_count} events for {recording_id}[/green]")
+        except (BrokenPipeError, ConnectionResetError):
+            console.print(f"[dim]Client closed the stream for {recording_id} after {event_count} events[/dim]")
+            self.close_connection = True
+        except Exception as e:
+            console.print(f"[red]Error while streaming {recording_id}: {e}[/red]")
+            try:
+                write(json.dumps({'error': str(e)}) + '\n')
+                self._end_chunks(compressor)
+            except OSError:
+                self.close_connection = True
+
+    def _content_encoding(self):
+        """Pick brotli or gzip from the request's Accept-Encoding, or None"""
+        accepted = {
+            part.split(';')[0].strip().lower()
+            for part in self.headers.get('Accept-Encoding', '').split(',')
+        }
+        if brotli is not None and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+    def _write_chunk(self, data):
+        if data:
+            self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+
+    def _end_chunks(self, compressor):
+        self._write_chunk(compressor.finish())
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_json(self, status, payload):
+        response = json.dumps(payload).encode('utf-8')
+        encoding = self._content_encoding() if len(response) >= COMPRESS_MIN_BYTES else None
+        if encoding == 'br':
+            response = brotli.compress(response)
+        elif encoding == 'gzip':
+            response = gzip.compress(response, compresslevel=6)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(response)
 
     def do_OPTIONS(self):
         """Handle OPTIONS requests for CORS preflight"""
@@ -545,6 +1136,7 @@ class SessionReplayHandler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', '*')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
 
@@ -557,6 +1149,71 @@ class DataSource:
     def download_recording(self, recording_id):
         raise NotImplementedError
 
+    def open_batches(self, recording_id):
+        """
+        Open a recording's batch files for reading in order
+
+        Returns:
+            BatchedRecording, or None if the recording does not exist. This default
+            materializes download_recording as a single batch; sources override it
+            to read batch files lazily, and the recording's archive if it has one.
+        """
+        recording_data = self.download_recording(recording_id)
+        if not recording_data:
+            return None
+        events = ((event, json.dumps(event)) for event in recording_data.get('events', []))
+        return BatchedRecording(
+            recording_data.get('metadata', {}),
+            ['download'],
+            lambda start: iter([('download', events)][start:]),
+            lambda name: None
+        )
+
+    def open_recording(self, recording_id, offset_ms=None):
+        """
+        Open a recording for streaming, from offset_ms after its first event if given
+
+        Returns:
+            tuple: (metadata, events) where events lazily yields (event, raw_json_line)
+            in time order, or None if the recording does not exist. When seeking,
+            metadata has a 'replaySeek' entry and events start at the nearest
+            checkpoint of the replay index (see replay_index.py), or at the last
+            recorded full snapshot if the recording has no index.
+        """
+        # Also used for duck-typed sources that only implement download_recording
+        open_batches = getattr(self, 'open_batches', None) or (lambda recording_id: DataSource.open_batches(self, recording_id))
+        opened = open_batches(recording_id)
+        if opened is None:
+            return None
+        if offset_ms is None:
+            return opened.metadata, skip_items(opened.iter_batches(0), 0)
+
+        index = None
+        index_data = opened.read_file(INDEX_FILE_NAME)
+        if index_data:
+            try:
+                index = json.loads(index_data)
+            except ValueError as e:
+                console.print(f"[yellow]Warning: Ignoring invalid replay index for {recording_id}: {e}[/yellow]")
+
+        def read_checkpoint(name):
+            data = opened.read_file(name)
+            if data is None:
+                raise IOError(f"Checkpoint file {name} is missing")
+            return list(iter_ndjson_events(gzip.decompress(data).decode('utf-8').splitlines(), name))
+
+        events, seek = seek_recording(index, offset_ms, opened.batch_names, opened.iter_batches, read_checkpoint)
+        metadata = dict(opened.metadata, replaySeek=seek) if seek else opened.metadata
+        return metadata, events
+
+    def write_recording_file(self, recording_id, name, data):
+        """Store a file (e.g. the replay index) in a recording's directory"""
+        raise NotImplementedError
+    
+    def delete_recording_file(self, recording_id, name):
+        """Delete a file (e.g. a batch file replaced by an archive) from a recording's directory"""
+        raise NotImplementedError
+
 
 class LocalDataSource(DataSource):
     """Local file system data source"""
@@ -604,14 +1261,13 @@ class LocalDataSource(DataSource):
         recordings.sort(key=lambda x: x['timestamp'], reverse=True)
         return recordings
     
-    def download_recording(self, recording_id):
-        """Load recording from local files"""
+    def open_batches(self, recording_id):
+        """Open a local recording; batch files or archive frames are decompressed lazily in order"""
         recording_dir = self.recordings_dir / recording_id
         
         if not recording_dir.exists():
             return None
         
-        all_events = []
         metadata = {}
         
         # Load metadata if exists
@@ -620,271 +1276,516 @@ class LocalDataSource(DataSource):
             with open(metadata_file, 'r') as f:
                 metadata = json.load(f)
         
-        # Load batch files
-        batch_files = sorted(recording_dir.glob('batch-*.ndjson.gz'))
+        batch_files = sorted(
+            (path for path in recording_dir.iterdir() if is_batch_file(path.name)),
+            key=lambda path: batch_sort_key(path.name)
+        )
+        
+        batch_names = [path.name for path in batch_files]
+        
+        def read_batch(batch_file):
+            with gzip.open(batch_file, 'rt', encoding='utf-8') as f:
+                yield from iter_ndjson_events(f, batch_file.name)
         
-        for batch_file in batch_files:
-            with gzip.open(batch_file, 'rt') as f:
-                for line in f:
-                    if line.strip():
-                        all_events.append(json.loads(line))
+        def iter_batches(start):
+            for batch_file in batch_files[start:]:
+                yield batch_file.name, read_batch(batch_file)
         
+        def read_file(name):
+            path = recording_dir / name
+            return path.read_bytes() if path.is_file() else None
+        
+        archive_path = recording_dir / ARCHIVE_FILE_NAME
+        if archive_path.is_file():
+            archived = open_archive(archive_path, metadata, batch_names, iter_batches, read_file)
+            if archived is not None:
+                return archived
+        
+        return BatchedRecording(metadata, batch_names, iter_batches, read_file)
+    
+    def write_recording_file(self, recording_id, name, data):
+        path = self.recordings_dir / recording_id / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    
+    def delete_recording_file(self, recording_id, name):
+        path = self.recordings_dir / recording_id / name
+        if path.is_file():
+            path.unlink()
+    
+    def download_recording(self, recording_id):
+        """Load recording from local files"""
+        opened = self.open_recording(recording_id)
+        if opened is None:
+            return None
+        metadata, events = opened
         return {
             'metadata': metadata,
-            'events': all_events
+            'events': [event for event, _ in events]
         }
 
 
+class RecordingCache:
+    """
+    On-disk cache of S3 objects keyed by ETag, so an unchanged batch file is never
+    downloaded twice, even across runs. The least recently used files are evicted
+    once the total size exceeds max_bytes, except files pinned while they are read.
+    """
+    
+    def __init__(self, cache_dir=REPLAY_CACHE_DIR, max_bytes=REPLAY_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # filename -> size, least recently used first; file mtimes carry recency across runs
+        self._entries = OrderedDict()
+        # filename -> number of readers holding it
+        self._pins = {}
+        for path in sorted(self.cache_dir.glob('*.obj'), key=lambda path: path.stat().st_mtime):
+            self._entries[path.name] = path.stat().st_size
+    
+    @staticmethod
+    def _filename(etag):
+        return hashlib.sha256(etag.strip('"').encode('utf-8')).hexdigest() + '.obj'
+    
+    def get(self, etag, pin=False):
+        """Return the cached file for an ETag, or None. A pinned file is kept until unpin(etag)."""
+        name = self._filename(etag)
+        path = self.cache_dir / name
+        with self._lock:
+            if name not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+            self.hits += 1
+            if pin:
+                self._pins[name] = self._pins.get(name, 0) + 1
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(name, None)
+            if pin:
+                self.unpin(etag)
+            return None
+        return path
+    
+    def put(self, etag, data, pin=False):
+        """Store an object's bytes under its ETag and evict old entries if over budget"""
+        name = self._filename(etag)
+        path = self.cache_dir / name
+        temp_path = self.cache_dir / f"{name}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        
+        evicted = []
+        with self._lock:
+            self._entries[name] = len(data)
+            self._entries.move_to_end(name)
+            if pin:
+                self._pins[name] = self._pins.get(name, 0) + 1
+            total = sum(self._entries.values())
+            for old_name in list(self._entries):
+                if total <= self.max_bytes:
+                    break
+                if old_name == name or self._pins.get(old_name):
+                    continue
+                total -= self._entries.pop(old_name)
+                evicted.append(old_name)
+        for old_name in evicted:
+            try:
+                (self.cache_dir / old_name).unlink()
+            except FileNotFoundError:
+                pass
+        return path
+    
+    def unpin(self, etag):
+        """Release a file pinned by get or put, so it can be evicted again"""
+        name = self._filename(etag)
+        with self._lock:
+            count = self._pins.get(name, 0) - 1
+            if count > 0:
+                self._pins[name] = count
+            else:
+                self._pins.pop(name, None)
+
+
+class RecordingCatalog:
+    """
+    Index of the recordings under an S3 prefix, kept as a local copy for fast
+    startup. A manifest object in the bucket written by other viewers is read too;
+    with share=True this viewer also writes it, so that every viewer shares it.
+    A refresh lists only the recording directories and fetches metadata.json, in
+    parallel, for directories that are new since the last refresh.
+    """
+    
+    def __init__(self, data_source, cache_dir=REPLAY_CACHE_DIR, refresh_seconds=CATALOG_REFRESH_SECONDS,
+                 share=False):
+        self.data_source = data_source
+        self.refresh_seconds = refresh_seconds
+        self.manifest_key = data_source.recording_key('', CATALOG_MANIFEST_NAME)
+        digest = hashlib.sha256(f"{data_source.bucket}/{self.manifest_key}".encode('utf-8')).hexdigest()[:16]
+        self.local_path = Path(cache_dir) / f"catalog-{digest}.json"
+        self._lock = threading.Lock()
+        # recording id -> {'recording': list entry or None, 'checkedAt': epoch seconds}
+        self._entries = None
+        self._listed_at = 0
+        self._manifest_writable = share
+    
+    def _read_local(self):
+        with open(self.local_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _read_manifest(self):
+        return self.data_source._read_json_object(self.manifest_key)
+    
+    def _load(self):
+        """Merge the local copy with the shared manifest, which may know newer recordings"""
+        entries = {}
+        for source, reader in (('local catalog', self._read_local), ('catalog manifest', self._read_manifest)):
+            try:
+                data = reader()
+            except Exception as e:
+                console.print(f"[dim]No {source} loaded ({str(e)})[/dim]")
+                continue
+            if data.get('version') != CATALOG_VERSION:
+                continue
+            for recording_id, entry in data.get('entries', {}).items():
+                known = entries.get(recording_id)
+                if known is None or (entry.get('recording') and not known.get('recording')):
+                    entries[recording_id] = entry
+        console.print(f"[dim]Catalog loaded with {len(entries)} entries[/dim]")
+        return entries
+    
+    def _save(self):
+        data = json.dumps({'version': CATALOG_VERSION, 'updatedAt': time.time(), 'entries': self._entries})
+        
+        self.local_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.local_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(temp_path, self.local_path)
+        
+        if not self._manifest_writable:
+            return
+        # Last writer wins: entries are derived from the bucket, so a lost update
+        # only means another viewer fetches that metadata again
+        try:
+            self.data_source.s3_client.put_object(
+                Bucket=self.data_source.bucket,
+                Key=self.manifest_key,
+                Body=data.encode('utf-8'),
+                ContentType='application/json'
+            )
+        except Exception as e:
+            self._manifest_writable = False
+            console.print(f"[yellow]Warning: Could not write catalog manifest, using the local copy only: {e}[/yellow]")
+    
+    def _refresh(self):
+        now = time.time()
+        listed = self.data_source.list_recording_ids()
+        removed = [recording_id for recording_id in self._entries if recording_id not in listed]
+        for recording_id in removed:
+            del self._entries[recording_id]
+        
+        stale = [
+            recording_id for recording_id in listed
+            if recording_id not in self._entries
+            or (self._entries[recording_id].get('recording') is None
+                and now - self._entries[recording_id].get('checkedAt', 0) >= CATALOG_PENDING_RECHECK_SECONDS)
+        ]
+        if stale:
+            console.print(f"Fetching metadata for {len(stale)} recordings")
+            for recording_id, recording in zip(stale, self.data_source.map(self.data_source.read_recording_entry, stale)):
+                self._entries[recording_id] = {'recording': recording, 'checkedAt': now}
+        
+        self._listed_at = now
+        if stale or removed:
+            self._save()
+    
+    def recordings(self):
+        """Return the list entries of all recordings, refreshing the catalog if it is stale"""
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            if time.time() - self._listed_at >= self.refresh_seconds:
+                self._refresh()
+            return [entry['recording'] for entry in self._entries.values() if entry.get('recording')]
+    
+    def invalidate(self):
+        """Re-list the prefix and re-read every recording's metadata on the next request"""
+        with self._lock:
+            self._entries = {}
+            self._listed_at = 0
+
+
 class S3DataSource(DataSource):
-    """S3 data source"""
+    """
+    S3 data source. Batch files are downloaded concurrently into a RecordingCache.
+    Pass an s3_client created with endpoint_url to use a local S3 stand-in such as
+    moto or MinIO. With session_ids only those recordings are listed and opened,
+    and the prefix is not listed at all. With share_catalog the recording catalog
+    is also written to the bucket for other viewers.
+    """
     
-    def __init__(self, bucket, prefix=''):
-        self.s3_client = boto3.client('s3')
+    def __init__(self, bucket, prefix='', s3_client=None, cache=None, max_workers=DOWNLOAD_WORKERS,
+                 session_ids=None, share_catalog=False):
+        self.s3_client = s3_client or boto3.client('s3')
         self.bucket = bucket
         self.prefix = prefix.rstrip('/')
-        self.temp_dir = Path(tempfile.mkdtemp(prefix="bedrock_agentcore_replay_"))
+        self.session_ids = list(session_ids) if session_ids else None
+        self.cache = cache or RecordingCache()
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='replay-s3')
+        # Ranged parts get their own pool so object downloads never wait on themselves
+        self._part_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='replay-s3-part')
+        self.catalog = RecordingCatalog(self, cache_dir=self.cache.cache_dir, share=share_catalog)
         
         console.print(f"[cyan]Using S3 location:[/cyan]")
         console.print(f"  Bucket: {bucket}")
         console.print(f"  Prefix: {prefix}")
+        if self.session_ids:
+            console.print(f"  Sessions: {', '.join(self.session_ids)}")
+        console.print(f"  Cache: {self.cache.cache_dir}")
     
     def cleanup(self):
-        """Clean up temp files"""
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
+        """Stop download threads; cached batch files are kept for the next run"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._part_executor.shutdown(wait=False, cancel_futures=True)
     
-    def list_recordings(self):
-        """List recordings from S3"""
-        recordings = []
+    def _download_object(self, key, size):
+        """Fetch an object's bytes, as parallel ranged GETs when it is large"""
+        if size <= RANGE_PART_BYTES:
+            return self.s3_client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+        
+        def fetch_part(start):
+            end = min(start + RANGE_PART_BYTES, size) - 1
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}")
+            return response['Body'].read()
         
+        return b''.join(self._part_executor.map(fetch_part, range(0, size, RANGE_PART_BYTES)))
+    
+    def _cache_key(self, key, etag):
+        return etag or f"{self.bucket}/{key}"
+    
+    def _fetch_object(self, key, etag, size, pin=False):
+        """
+        Return a local path for an object, downloading it only if its ETag is not cached.
+        With pin the file is kept in the cache until cache.unpin(self._cache_key(key, etag)).
+        """
+        cache_key = self._cache_key(key, etag)
+        path = self.cache.get(cache_key, pin=pin)
+        if path is not None:
+            return path
+        data = self._download_object(key, size)
+        if size and len(data) != size:
+            raise IOError(f"Incomplete download of {key}: {len(data)} of {size} bytes")
+        return self.cache.put(cache_key, data, pin=pin)
+    
+    def _fetch_bytes(self, key, etag, size):
+        """Return an object's bytes, from the cache if its ETag is cached"""
+        path = self._fetch_object(key, etag, size, pin=True)
         try:
-            paginator = self.s3_client.get_paginator('list_objects_v2')
-            
-            # Look for any directories (not just rrweb-*)
-            for page in paginator.paginate(
-                Bucket=self.bucket, 
-                Prefix=self.prefix,
-                Delimiter='/'
-            ):
-                if 'CommonPrefixes' in page:
-                    console.print(f"Found {len(page['CommonPrefixes'])} directories in prefix {self.prefix}")
-                    
-                    for prefix_info in page['CommonPrefixes']:
-                        prefix = prefix_info['Prefix']
-                        recording_id = prefix.rstrip('/').split('/')[-1]
-                        
-                        # Check if it's a recording directory by looking for metadata.json
-                        metadata = self._get_metadata(recording_id)
-                        if metadata:
-                            # This is a valid recording directory
-                            session_id = recording_id  # Use the folder name as the session ID
-                            timestamp = int(metadata.get('startTime', time.time() * 1000))
-                            
-                            recordings.append({
-                                'id': recording_id,
-                                'sessionId': session_id,
-                                'timestamp': timestamp,
-                                'date': datetime.fromtimestamp(
-                                    timestamp / 1000
-                                ).strftime('%Y-%m-%d %H:%M:%S'),
-                                'events': metadata.get('eventCount', 0),
-                                'duration': metadata.get('duration', 0)
-                            })
-                            console.print(f"✅ Found recording: {recording_id}")
-                        else:
-                            console.print(f"⚠️ Directory without metadata: {recording_id}")
-                
-                recordings.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
-                console.print(f"[green]Found {len(recordings)} recordings[/green]")
-                
-            # If no recordings found with CommonPrefixes, try a direct list
-            if not recordings:
-                console.print("Trying alternative method to find recordings...")
-                
-                # Get a flat list of all objects
-                all_objects = []
-                for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
-                    if 'Contents' in page:
-                        all_objects.extend(page['Contents'])
-                
-                # Extract unique directory names
-                dirs = set()
-                for obj in all_objects:
-                    key = obj['Key']
-                    if '/' in key[len(self.prefix):]:
-                        dir_name = key.split('/', 1)[0] if not self.prefix else key[len(self.prefix):].split('/', 1)[0]
-                        dirs.add(dir_name)
-                
-                console.print(f"Found directories: {dirs}")
-                
-                # Check each directory for metadata
-                for dir_name in dirs:
-                    metadata = self._get_metadata(dir_name)
-                    if metadata:
-                        session_id = dir_name
-                        timestamp = int(metadata.get('startTime', time.time() * 1000))
-                        
-                        recordings.append({
-                            'id': dir_name,
-                            'sessionId': session_id,
-                            'timestamp': timestamp,
-                            'date': datetime.fromtimestamp(
-                                timestamp / 1000
-                            ).strftime('%Y-%m-%d %H:%M:%S'),
-                            'events': metadata.get('eventCount', 0),
-                            'duration': metadata.get('duration', 0)
-                        })
-                
-                recordings.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
-                console.print(f"[green]Found {len(recordings)} recordings with alternative method[/green]")
-                
+            with open(path, 'rb') as f:
+                return f.read()
+        finally:
+            self.cache.unpin(self._cache_key(key, etag))
+    
+    def _read_json_object(self, key):
+        response = self.s3_client.get_object(Bucket=self.bucket, Key=key)
+        return json.loads(response['Body'].read().decode('utf-8'))
+    
+    def map(self, fn, items):
+        """Run fn over items on the download threads, returning results in order"""
+        return self._executor.map(fn, items)
+    
+    def recording_key(self, recording_id, name=''):
+        """S3 key of a file in a recording directory (or of the directory itself)"""
+        root = f"{self.prefix}/" if self.prefix else ''
+        return f"{root}{recording_id}/{name}" if recording_id else f"{root}{name}"
+    
+    def list_recording_ids(self):
+        """List the recording directories under the prefix, one listing entry per recording"""
+        root = self.recording_key('')
+        recording_ids = set()
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=root, Delimiter='/'):
+            for prefix_info in page.get('CommonPrefixes', []):
+                recording_ids.add(prefix_info['Prefix'][len(root):].rstrip('/'))
+        return recording_ids
+    
+    def read_recording_entry(self, recording_id, synthesize=False):
+        """
+        Build a recordings list entry from metadata.json, or None if there is none yet.
+        With synthesize, a recording without metadata.json (e.g. one still being
+        written) gets an entry timed by its batch files' modification times.
+        """
+        try:
+            metadata = self._read_json_object(self.recording_key(recording_id, 'metadata.json'))
+        except Exception as e:
+            console.print(f"[dim]⚠️ Directory without metadata: {recording_id} ({str(e)})[/dim]")
+            return self._synthesize_recording_entry(recording_id) if synthesize else None
+        
+        timestamp = parse_start_time(metadata.get('startTime'), int(time.time() * 1000))
+        return {
+            'id': recording_id,
+            'sessionId': recording_id,  # Use the folder name as the session ID
+            'timestamp': timestamp,
+            'date': datetime.fromtimestamp(
+                timestamp / 1000
+            ).strftime('%Y-%m-%d %H:%M:%S'),
+            'events': metadata.get('eventCount', metadata.get('totalEvents', 0)),
+            'duration': metadata.get('duration', metadata.get('durationMs', 0))
+        }
+    
+    def _synthesize_recording_entry(self, recording_id):
+        """Build a list entry from the listed batch files, or None if there are none"""
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        modified = [
+            obj['LastModified'].timestamp() * 1000
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=self.recording_key(recording_id))
+            for obj in page.get('Contents', [])
+            if is_batch_file(obj['Key']) and obj.get('LastModified')
+        ]
+        if not modified:
+            return None
+        timestamp = int(min(modified))
+        return {
+            'id': recording_id,
+            'sessionId': recording_id,
+            'timestamp': timestamp,
+            'date': datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d %H:%M:%S'),
+            'events': 0,
+            'duration': int(max(modified)) - timestamp
+        }
+    
+    def latest_recording_id(self):
+        """
+        Return the id of the recording with the newest start time, or None. With
+        session_ids, sessions without metadata.json are timed by their batch files.
+        """
+        recordings = self.list_recordings()
+        return recordings[0]['id'] if recordings else None
+    
+    def list_recordings(self):
+        """List recordings from S3 through the recording catalog, or only session_ids"""
+        try:
+            if self.session_ids:
+                entries = self.map(lambda recording_id: self.read_recording_entry(recording_id, synthesize=True),
+                                   self.session_ids)
+                recordings = [entry for entry in entries if entry]
+            else:
+                recordings = self.catalog.recordings()
         except Exception as e:
             console.print(f"[red]Error listing recordings: {e}[/red]")
             import traceback
             traceback.print_exc()
+            return []
         
+        recordings.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
+        console.print(f"[green]Found {len(recordings)} recordings[/green]")
         return recordings
     
-    def _get_metadata(self, recording_id):
-        """Get metadata for a recording"""
-        try:
-            # Try both possible metadata paths
-            keys_to_try = [
-                f"{self.prefix}/{recording_id}/metadata.json",
-                f"{recording_id}/metadata.json",
-                f"{self.prefix}{recording_id}/metadata.json"
-            ]
+    def open_batches(self, recording_id):
+        """
+        Open a recording in S3 for streaming. Batch files are downloaded ahead in
+        parallel (or taken from the cache) and decoded in order as events are consumed.
+        A recording archive is downloaded whole, as parallel ranged GETs if it is
+        large, and its frames are decoded in order.
+        """
+        if self.session_ids and recording_id not in self.session_ids:
+            return None
+        prefix = self.recording_key(recording_id)
+        console.print(f"[cyan]Opening recording: {recording_id}[/cyan]")
+        
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        listed = {}
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                listed[obj['Key'][len(prefix):]] = (obj['Key'], obj.get('ETag'), obj.get('Size', 0))
+        
+        if not listed:
+            return None
+        
+        def read_file(name):
+            if name not in listed:
+                return None
+            return self._fetch_bytes(*listed[name])
+        
+        metadata_file = read_file('metadata.json')
+        metadata = json.loads(metadata_file) if metadata_file else {}
+        
+        batch_names = sorted((name for name in listed if is_batch_file(name)), key=batch_sort_key)
+        console.print(f"Found {len(batch_names)} batch files")
+        
+        def iter_batches(start):
+            # Keep up to two downloads per worker in flight ahead of the batch being decoded.
+            # Each download reads the batch into memory, so later downloads evicting it
+            # from the cache cannot remove it before it is decoded.
+            remaining = iter(batch_names[start:])
+            in_flight = deque()
+            event_count = 0
+            
+            def fill():
+                while len(in_flight) < self.max_workers * 2:
+                    name = next(remaining, None)
+                    if name is None:
+                        return
+                    in_flight.append((name, self._executor.submit(self._fetch_bytes, *listed[name])))
             
-            for key in keys_to_try:
+            def read_batch(name, future):
+                nonlocal event_count
                 try:
-                    console.print(f"[dim]Trying metadata path: {key}[/dim]")
-                    response = self.s3_client.get_object(Bucket=self.bucket, Key=key)
-                    data = json.loads(response['Body'].read().decode('utf-8'))
-                    console.print(f"[dim]Found metadata at: {key}[/dim]")
-                    return data
+                    lines = gzip.decompress(future.result()).decode('utf-8').splitlines()
+                    for item in iter_ndjson_events(lines, name):
+                        event_count += 1
+                        yield item
                 except Exception as e:
-                    console.print(f"[dim]No metadata at: {key} ({str(e)})[/dim]")
-                    continue
+                    console.print(f"[yellow]Warning: Error processing batch file {name}: {e}[/yellow]")
             
-            return {}
-        except Exception as e:
-            console.print(f"[dim]Error getting metadata: {e}[/dim]")
-            return {}
+            fill()
+            while in_flight:
+                name, future = in_flight.popleft()
+                fill()
+                yield name, read_batch(name, future)
+            
+            console.print(f"[dim]Recording cache: {self.cache.hits} hits, {self.cache.misses} misses[/dim]")
+            if event_count == 0 and start == 0:
+                # Create sample events to prevent viewer from breaking
+                console.print("[yellow]Warning: No events were parsed from the batch files, "
+                              "sending placeholder events[/yellow]")
+                yield 'placeholder', ((event, json.dumps(event)) for event in placeholder_events())
+        
+        if ARCHIVE_FILE_NAME in listed:
+            key, etag, size = listed[ARCHIVE_FILE_NAME]
+            # The archive is read from its cache file while it is streamed
+            archived = open_archive(
+                self._fetch_object(key, etag, size, pin=True), metadata, batch_names, iter_batches, read_file,
+                on_close=lambda: self.cache.unpin(self._cache_key(key, etag))
+            )
+            if archived is not None:
+                return archived
+        
+        return BatchedRecording(metadata, batch_names, iter_batches, read_file)
+    
+    def write_recording_file(self, recording_id, name, data):
+        self.s3_client.put_object(Bucket=self.bucket, Key=self.recording_key(recording_id, name), Body=data)
+    
+    def delete_recording_file(self, recording_id, name):
+        self.s3_client.delete_object(Bucket=self.bucket, Key=self.recording_key(recording_id, name))
     
     def download_recording(self, recording_id):
         """Download recording from S3"""
-        console.print(f"[cyan]Downloading recording: {recording_id}[/cyan]")
-        
-        recording_dir = self.temp_dir / recording_id
-        recording_dir.mkdir(exist_ok=True)
-        
         try:
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                console=console
-            ) as progress:
-                
-                # List files for this recording
-                prefix = f"{self.prefix}/{recording_id}/" if self.prefix else f"{recording_id}/"
-                console.print(f"Looking for files with prefix: {prefix}")
-                
-                paginator = self.s3_client.get_paginator('list_objects_v2')
-                
-                files_to_download = []
-                for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
-                    if 'Contents' in page:
-                        for obj in page['Contents']:
-                            files_to_download.append(obj['Key'])
-                
-                # Download files
-                console.print(f"Downloading {len(files_to_download)} files")
-                task = progress.add_task(f"Downloading {len(files_to_download)} files...", total=len(files_to_download))
-                
-                all_events = []
-                metadata = {}
-                
-                for key in files_to_download:
-                    filename = key.split('/')[-1]
-                    local_path = recording_dir / filename
-                    
-                    self.s3_client.download_file(self.bucket, key, str(local_path))
-                    progress.advance(task)
-                    
-                    # Process file
-                    if filename == 'metadata.json':
-                        with open(local_path, 'r') as f:
-                            metadata = json.load(f)
-                    elif filename.startswith('batch-') and (filename.endswith('.ndjson.gz') or filename.endswith('.jsonl.gz')):
-                        try:
-                            with gzip.open(local_path, 'rt') as f:
-                                for line in f:
-                                    if line.strip():
-                                        try:
-                                            event_data = json.loads(line)
-                                            # Validate event structure for rrweb
-                                            if 'type' in event_data and 'timestamp' in event_data:
-                                                all_events.append(event_data)
-                                            else:
-                                                console.print(f"[yellow]Skipping invalid event: missing required fields[/yellow]")
-                                        except json.JSONDecodeError as e:
-                                            console.print(f"[yellow]Warning: Invalid JSON in line: {line[:50]}...[/yellow]")
-                        except Exception as e:
-                            console.print(f"[yellow]Warning: Error processing batch file {filename}: {e}[/yellow]")
-            
+            opened = self.open_recording(recording_id)
+            if opened is None:
+                return None
+            metadata, events = opened
+            all_events = [event for event, _ in events]
             console.print(f"[green]✓ Downloaded {len(all_events)} events[/green]")
-            
-            # If no events were parsed, check the files
-            if len(all_events) == 0:
-                console.print("[yellow]Warning: No events were parsed from the batch files[/yellow]")
-                
-                # Create sample events to prevent viewer from breaking
-                console.print("[yellow]Creating sample events to allow viewer to function[/yellow]")
-                timestamp = int(time.time() * 1000)
-                
-                # Create a minimal set of events for rrweb
-                all_events = [
-                    {
-                        "type": 2,  # Meta event
-                        "timestamp": timestamp,
-                        "data": {"href": "https://example.com", "width": 1280, "height": 720}
-                    },
-                    {
-                        "type": 4,  # DOM snapshot
-                        "timestamp": timestamp + 100,
-                        "data": {
-                            "node": {
-                                "type": 1,
-                                "childNodes": [
-                                    {
-                                        "type": 2,
-                                        "tagName": "html",
-                                        "attributes": {},
-                                        "childNodes": [
-                                            {
-                                                "type": 2,
-                                                "tagName": "body",
-                                                "attributes": {},
-                                                "childNodes": [
-                                                    {
-                                                        "type": 3,
-                                                        "textContent": "No recording data found - placeholder content"
-                                                    }
-                                                ]
-                                            }
-                                        ]
-                                    }
-                                ]
-                            }
-                        }
-                    }
-                ]
-                
-                # List downloaded files for debugging
-                console.print("Downloaded files:")
-                for path in recording_dir.iterdir():
-                    console.print(f"  - {path.name} ({path.stat().st_size} bytes)")
-            
             return {
                 'metadata': metadata,
                 'events': all_events
@@ -929,8 +1830,9 @@ class SessionReplayViewer:
         def handler_factory(*args, **kwargs):
             return SessionReplayHandler(self.data_source, self.viewer_path, *args, **kwargs)
         
-        # Start server
-        self.server = HTTPServer(('', port), handler_factory)
+        # Start server; each connection gets its own thread so a slow recording
+        # download does not hold up the recordings list or static files
+        self.server = ThreadingHTTPServer(('', port), handler_factory)
         
         # Start in thread
         server_thread = threading.Thread(target=self.server.serve_forever)
@@ -995,6 +1897,20 @@ def main():
         default=8080,
         help='Port to run server on (default: 8080)'
     )
+    parser.add_argument(
+        '--endpoint-url',
+        help='S3 endpoint URL, e.g. a local moto or MinIO server (optional)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=REPLAY_CACHE_DIR,
+        help=f'Directory for cached batch files (default: {REPLAY_CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--share-catalog',
+        action='store_true',
+        help=f'Also write the recording catalog to the bucket as {CATALOG_MANIFEST_NAME} for other viewers'
+    )
     
     args = parser.parse_args()
     
@@ -1011,7 +1927,9 @@ def main():
         bucket = path_parts[0]
         prefix = path_parts[1] if len(path_parts) > 1 else ''
         
-        data_source = S3DataSource(bucket, prefix)
+        s3_client = boto3.client('s3', endpoint_url=args.endpoint_url) if args.endpoint_url else None
+        data_source = S3DataSource(bucket, prefix, s3_client=s3_client, cache=RecordingCache(args.cache_dir),
+                                   share_catalog=args.share_catalog)
     
     # Start viewer
     viewer = SessionReplayViewer(data_source, port=args.port)
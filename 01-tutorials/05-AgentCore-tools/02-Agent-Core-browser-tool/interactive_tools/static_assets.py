@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Build-once static assets for the browser viewers.
+
+The viewers generate their JavaScript and CSS in code. Each file is written to
+static/build/ under a name containing a hash of its content, next to gzip (and,
+with the optional brotli package, brotli) compressed copies. A file that already
+exists is never rewritten, so a viewer starting up only checks that its assets
+exist, and a browser can cache them forever: changed content gets a new name.
+Builds of earlier content are removed once no viewer of this process serves them
+and they were not built or reused for BUILD_RETENTION_SECONDS. A viewer whose build
+was removed by another process builds it again on its next request.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ASSETS_URL_PREFIX = "/assets"
+BUILD_DIR_NAME = "build"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Precompressed variants, in order of preference, as (Content-Encoding, file suffix)
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+BUILD_RETENTION_SECONDS = float(os.environ.get("ASSET_BUILD_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+# Assets already built in this process, by path, so later servers skip the filesystem
+_built = set()
+_built_lock = threading.Lock()
+# Viewers of this process, whose files are never pruned
+_live_assets = weakref.WeakSet()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temp_path.write_bytes(data)
+    os.replace(temp_path, path)
+
+
+class StaticAssets:
+    """Content-hashed assets of one viewer, served from ASSETS_URL_PREFIX."""
+
+    def __init__(self, static_dir: Path):
+        self.build_dir = Path(static_dir) / BUILD_DIR_NAME
+        self.urls: Dict[str, str] = {}
+        # hashed name -> (path, content), so a removed build can be written again
+        self._files: Dict[str, Tuple[Path, bytes]] = {}
+        _live_assets.add(self)
+
+    def add(self, name: str, content: str) -> str:
+        """Build an asset if it does not exist yet; returns its URL."""
+        data = content.encode("utf-8")
+        stem, extension = os.path.splitext(name)
+        hashed_name = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+        path = self.build_dir / hashed_name
+
+        with _built_lock:
+            self._files[hashed_name] = (path, data)
+            if path not in _built:
+                self._ensure_built(path, data)
+                _built.add(path)
+
+        self.urls[name] = f"{ASSETS_URL_PREFIX}/{hashed_name}"
+        return self.urls[name]
+
+    def _ensure_built(self, path: Path, data: bytes) -> None:
+        """Build an asset if its file is missing, or restart its retention if it is reused."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            stem, extension = os.path.splitext(path.name)
+            self._build(os.path.splitext(stem)[0], extension, path, data)
+            return
+        for _, suffix in ENCODINGS:
+            try:
+                os.utime(path.with_name(path.name + suffix))
+            except FileNotFoundError:
+                pass
+
+    def _build(self, stem: str, extension: str, path: Path, data: bytes) -> None:
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        self._prune(stem, extension)
+        # Compressed copies first, so the plain file existing means the build is complete
+        _write_atomic(path.with_name(path.name + ".gz"), gzip.compress(data, 9))
+        if brotli is not None:
+            _write_atomic(path.with_name(path.name + ".br"), brotli.compress(data))
+        _write_atomic(path, data)
+
+    def _prune(self, stem: str, extension: str) -> None:
+        """Remove builds of earlier content of an asset that are unused and past retention."""
+        earlier = re.compile(rf"({re.escape(stem)}\.[0-9a-f]{{12}}{re.escape(extension)})(\.gz|\.br)?")
+        in_use = {name for assets in list(_live_assets) for name in assets._files}
+        cutoff = time.time() - BUILD_RETENTION_SECONDS
+        for old in self.build_dir.iterdir():
+            match = earlier.fullmatch(old.name)
+            if match is None or match.group(1) in in_use:
+                continue
+            try:
+                if old.stat().st_mtime < cutoff:
+                    old.unlink()
+            except FileNotFoundError:
+                pass
+
+    def resolve(self, hashed_name: str, accept_encoding: str = "") -> Optional[Tuple[Path, Optional[str], str]]:
+        """Return (path, content_encoding, media_type) of the best variant the client accepts.
+
+        A build removed by another process is written again; None if the asset is
+        unknown or cannot be built.
+        """
+        entry = self._files.get(hashed_name)
+        if entry is None:
+            return None
+        path, data = entry
+        if not path.exists():
+            try:
+                with _built_lock:
+                    self._ensure_built(path, data)
+            except OSError:
+                return None
+        media_type = mimetypes.guess_type(hashed_name)[0] or "application/octet-stream"
+        accepted = {value.split(";")[0].strip() for value in accept_encoding.split(",")}
+        for encoding, suffix in ENCODINGS:
+            variant = path.with_name(path.name + suffix)
+            if encoding in accepted and variant.exists():
+                return variant, encoding, media_type
+        return path, None, media_type
+
+
+def add_asset_route(app: FastAPI, assets: StaticAssets) -> None:
+    """Serve a viewer's assets, precompressed where the client accepts it, with immutable caching."""
+
+    @app.get(ASSETS_URL_PREFIX + "/{hashed_name}")
+    def asset(hashed_name: str, request: Request):
+        found = assets.resolve(hashed_name, request.headers.get("accept-encoding", ""))
+        if found is None:
+            raise HTTPException(status_code=404, detail="Not found")
+        path, encoding, media_type = found
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return FileResponse(path, media_type=media_type, headers=headers)
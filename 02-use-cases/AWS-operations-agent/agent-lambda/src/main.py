@@ -8,23 +8,24 @@ import json
 import uuid
 import logging
 import asyncio
+import functools
 import requests
 from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
-from typing import Dict, Any, Optional
+from typing import TYPE_CHECKING, Dict, Any, Optional
 
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-# Strands SDK imports
-from strands import Agent, tool
-from strands.models import BedrockModel
-
-# Import Strands MCP client and conversation manager
-from mcp_client import StrandsMCPClient
-from conversation_manager import ConversationManager
+# The Strands SDK, MCP client and conversation manager (boto3) are imported on first use,
+# so the Lambda Web Adapter sees /health respond without waiting for them
+if TYPE_CHECKING:
+    from strands import Agent
+    from strands.models import BedrockModel
+    from mcp_client import StrandsMCPClient
+    from conversation_manager import ConversationManager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -37,25 +38,54 @@ DYNAMODB_TABLE_NAME = os.environ.get("DYNAMODB_TABLE_NAME", "ai-chatbot-conversa
 DEFAULT_TEMPERATURE = 0.7
 DEFAULT_MAX_TOKENS = 4000
 
-# Global variables
+# Global variables, created on first use
 strands_mcp_client = None
 conversation_manager = None
+_strands_mcp_client_lock = asyncio.Lock()
 
 # MCP Tools caching
 _mcp_tools_cache = None
 _mcp_tools_cache_time = None
 MCP_CACHE_DURATION_SECONDS = 900  # 5 minutes
 
-# Define local tools
-@tool(name="get_current_time", description="Get the current date and time")
-def get_current_time() -> str:
-    """Get current timestamp"""
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
+@functools.lru_cache(maxsize=None)
+def get_local_tools() -> list:
+    """Define the local tools on first use"""
+    from strands import tool
+
+    @tool(name="get_current_time", description="Get the current date and time")
+    def get_current_time() -> str:
+        """Get current timestamp"""
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
+
+    @tool(name="echo_message", description="Echo back a message for testing")
+    def echo_message(message: str) -> str:
+        """Echo back the provided message"""
+        return f"Echo: {message}"
+
+    return [get_current_time, echo_message]
+
+def get_conversation_manager() -> "ConversationManager":
+    """Create the DynamoDB conversation manager on first use"""
+    global conversation_manager
+    if conversation_manager is None:
+        from conversation_manager import ConversationManager
+        conversation_manager = ConversationManager(
+            table_name=DYNAMODB_TABLE_NAME,
+            region=BEDROCK_REGION
+        )
+    return conversation_manager
 
-@tool(name="echo_message", description="Echo back a message for testing")
-def echo_message(message: str) -> str:
-    """Echo back the provided message"""
-    return f"Echo: {message}"
+async def get_strands_mcp_client() -> "StrandsMCPClient":
+    """Create and initialize the Strands MCP client on first use"""
+    global strands_mcp_client
+    async with _strands_mcp_client_lock:
+        if strands_mcp_client is None:
+            from mcp_client import StrandsMCPClient
+            client = StrandsMCPClient()
+            await client.initialize()
+            strands_mcp_client = client
+    return strands_mcp_client
 
 def get_cached_mcp_tools():
     """Get MCP tools with caching to improve performance"""
@@ -88,8 +118,10 @@ def get_cached_mcp_tools():
     
     return _mcp_tools_cache or []
 
-def create_bedrock_model(temperature: float = DEFAULT_TEMPERATURE, max_tokens: int = DEFAULT_MAX_TOKENS) -> BedrockModel:
+def create_bedrock_model(temperature: float = DEFAULT_TEMPERATURE, max_tokens: int = DEFAULT_MAX_TOKENS) -> "BedrockModel":
     """Create a BedrockModel with specified parameters"""
+    from strands.models import BedrockModel
+
     return BedrockModel(
         region_name=BEDROCK_REGION,
         model_id=BEDROCK_MODEL_ID,
@@ -103,14 +135,15 @@ def create_agent_for_request(
     use_mcp_tools: bool = False, 
     temperature: float = DEFAULT_TEMPERATURE,
     max_tokens: int = DEFAULT_MAX_TOKENS
-) -> Agent:
+) -> "Agent":
     """Create a fresh agent for each request to avoid state pollution and race conditions"""
+    from strands import Agent
     
     # Create model with request-specific parameters
     model = create_bedrock_model(temperature=temperature, max_tokens=max_tokens)
     
     # Determine tools to use
-    tools = [get_current_time, echo_message]
+    tools = list(get_local_tools())
     if use_mcp_tools:
         mcp_tools = get_cached_mcp_tools()
         
@@ -147,21 +180,7 @@ def create_agent_for_request(
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan event handler for startup and shutdown"""
-    global strands_mcp_client, conversation_manager
-    
-    # Startup
-    logger.info("Starting AI Chatbot API with DynamoDB persistence...")
-    
-    # Initialize conversation manager
-    conversation_manager = ConversationManager(
-        table_name=DYNAMODB_TABLE_NAME,
-        region=BEDROCK_REGION
-    )
-    
-    # Initialize Strands MCP client
-    strands_mcp_client = StrandsMCPClient()
-    await strands_mcp_client.initialize()
-    
+    # Startup: the conversation manager and MCP client are created by the first request that needs them
     logger.info("AI Chatbot API ready with DynamoDB persistence")
     yield
     
@@ -226,10 +245,12 @@ async def stream(request: Request):
             conversation_id = str(uuid.uuid4())
         
         # Load conversation history from DynamoDB
+        conversation_manager = get_conversation_manager()
         conversation_history = await conversation_manager.get_conversation_history(conversation_id)
         
         # Set up MCP client if needed
-        if use_tools and okta_token and strands_mcp_client:
+        if use_tools and okta_token:
+            strands_mcp_client = await get_strands_mcp_client()
             # Update Gateway URL if provided in request
             bedrock_agentcore_gateway_url = body.get("bedrock_agentcore_gateway_url")
             if bedrock_agentcore_gateway_url:
@@ -364,6 +385,7 @@ async def clear_all_conversations():
 async def get_conversation(conversation_id: str):
     """Get conversation history and metadata"""
     try:
+        conversation_manager = get_conversation_manager()
         history = await conversation_manager.get_conversation_history(conversation_id)
         metadata = await conversation_manager.get_conversation_metadata(conversation_id)
         
@@ -381,7 +403,7 @@ async def get_conversation(conversation_id: str):
 async def delete_conversation(conversation_id: str):
     """Delete a conversation"""
     try:
-        success = await conversation_manager.delete_conversation(conversation_id)
+        success = await get_conversation_manager().delete_conversation(conversation_id)
         if success:
             return {"message": f"Conversation {conversation_id} deleted successfully"}
         else:
@@ -394,7 +416,7 @@ async def delete_conversation(conversation_id: str):
 async def clear_conversation(conversation_id: str):
     """Clear conversation history but keep the conversation ID"""
     try:
-        success = await conversation_manager.save_conversation_history(conversation_id, [])
+        success = await get_conversation_manager().save_conversation_history(conversation_id, [])
         if success:
             return {"message": f"Conversation {conversation_id} cleared successfully"}
         else:
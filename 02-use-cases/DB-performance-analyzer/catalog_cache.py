@@ -0,0 +1,271 @@
+import copy
+import json
+import os
+import re
+import threading
+import time
+
+# Upper bound on how long a schema's catalog is served from memory, covering
+# changes the version query does not see (e.g. COMMENT ON, ALTER SEQUENCE)
+CATALOG_CACHE_TTL_SECONDS = int(os.environ.get('CATALOG_CACHE_TTL_SECONDS', '900'))
+CATALOG_CACHE_MAX_SCHEMAS = int(os.environ.get('CATALOG_CACHE_MAX_SCHEMAS', '32'))
+
+OBJECT_TYPES = ('table', 'view', 'function', 'procedure', 'trigger', 'sequence', 'index')
+
+# Loads DDL and descriptions for every supported object in one schema in a single
+# round trip. '%%' is a literal '%' for format() because the query is parameterized.
+SCHEMA_CATALOG_QUERY = r"""
+    WITH target AS (
+        SELECT oid AS nspoid, nspname
+        FROM pg_catalog.pg_namespace
+        WHERE nspname = %s
+        AND nspname NOT IN ('pg_catalog', 'information_schema')
+    )
+    SELECT 'table' as kind,
+           c.relname as name,
+           t.nspname || '.' || c.relname as object_name,
+           'TABLE' as object_type,
+           format(
+               E'CREATE TABLE %%I.%%I (\n%%s\n);',
+               t.nspname,
+               c.relname,
+               (SELECT string_agg(
+                           '    ' || quote_ident(a.attname) || ' ' ||
+                           pg_catalog.format_type(a.atttypid, a.atttypmod) ||
+                           CASE WHEN a.attnotnull THEN ' NOT NULL' ELSE '' END ||
+                           CASE WHEN ad.adbin IS NOT NULL
+                               THEN ' DEFAULT ' || pg_get_expr(ad.adbin, ad.adrelid)
+                               ELSE ''
+                           END,
+                           E',\n' ORDER BY a.attnum
+                       )
+                FROM pg_catalog.pg_attribute a
+                LEFT JOIN pg_catalog.pg_attrdef ad
+                    ON ad.adrelid = a.attrelid
+                    AND ad.adnum = a.attnum
+                WHERE a.attrelid = c.oid
+                AND a.attnum > 0
+                AND NOT a.attisdropped)
+           ) as definition,
+           obj_description(c.oid, 'pg_class') as description,
+           NULL::jsonb as extra
+    FROM pg_catalog.pg_class c
+    JOIN target t ON c.relnamespace = t.nspoid
+    WHERE c.relkind IN ('r', 'p')
+
+    UNION ALL
+
+    SELECT 'view',
+           c.relname,
+           t.nspname || '.' || c.relname,
+           'VIEW',
+           format(E'CREATE OR REPLACE VIEW %%I.%%I AS\n%%s', t.nspname, c.relname, pg_get_viewdef(c.oid, true)),
+           obj_description(c.oid, 'pg_class'),
+           NULL::jsonb
+    FROM pg_catalog.pg_class c
+    JOIN target t ON c.relnamespace = t.nspoid
+    WHERE c.relkind = 'v'
+
+    UNION ALL
+
+    SELECT CASE WHEN p.prokind = 'p' THEN 'procedure' ELSE 'function' END,
+           p.proname,
+           t.nspname || '.' || p.proname,
+           CASE WHEN p.prokind = 'p' THEN 'PROCEDURE' ELSE 'FUNCTION' END,
+           pg_get_functiondef(p.oid),
+           obj_description(p.oid, 'pg_proc'),
+           CASE WHEN p.prokind = 'f' THEN jsonb_build_object(
+               'return_type', p.prorettype::regtype::text,
+               'provolatile', p.provolatile,
+               'proparallel', p.proparallel
+           ) END
+    FROM pg_catalog.pg_proc p
+    JOIN target t ON p.pronamespace = t.nspoid
+    WHERE p.prokind IN ('f', 'p')
+
+    UNION ALL
+
+    SELECT 'trigger',
+           tg.tgname,
+           t.nspname || '.' || tg.tgname,
+           'TRIGGER',
+           pg_get_triggerdef(tg.oid, true),
+           obj_description(tg.oid, 'pg_trigger'),
+           NULL::jsonb
+    FROM pg_catalog.pg_trigger tg
+    JOIN pg_catalog.pg_class c ON tg.tgrelid = c.oid
+    JOIN target t ON c.relnamespace = t.nspoid
+    WHERE NOT tg.tgisinternal
+
+    UNION ALL
+
+    SELECT 'sequence',
+           c.relname,
+           t.nspname || '.' || c.relname,
+           'SEQUENCE',
+           format(
+               E'CREATE SEQUENCE %%I.%%I\n    INCREMENT %%s\n    MINVALUE %%s\n    MAXVALUE %%s\n    START %%s\n    CACHE %%s%%s;',
+               t.nspname,
+               c.relname,
+               s.seqincrement,
+               s.seqmin,
+               s.seqmax,
+               s.seqstart,
+               s.seqcache,
+               CASE WHEN s.seqcycle THEN E'\n    CYCLE' ELSE '' END
+           ),
+           obj_description(c.oid, 'pg_class'),
+           NULL::jsonb
+    FROM pg_catalog.pg_sequence s
+    JOIN pg_catalog.pg_class c ON s.seqrelid = c.oid
+    JOIN target t ON c.relnamespace = t.nspoid
+
+    UNION ALL
+
+    SELECT 'index',
+           c.relname,
+           t.nspname || '.' || c.relname,
+           'INDEX',
+           pg_get_indexdef(i.indexrelid),
+           obj_description(i.indexrelid, 'pg_class'),
+           NULL::jsonb
+    FROM pg_catalog.pg_index i
+    JOIN pg_catalog.pg_class c ON i.indexrelid = c.oid
+    JOIN target t ON c.relnamespace = t.nspoid
+"""
+
+# Cheap signature of a schema's catalog rows. Any DDL rewrites the affected catalog
+# rows (new xmin) and table rewrites change relfilenode, so the signature changes.
+SCHEMA_VERSION_QUERY = """
+    SELECT
+        (SELECT md5(coalesce(string_agg(c.oid::text || ':' || c.xmin::text || ':' || c.relfilenode::text, ',' ORDER BY c.oid), ''))
+         FROM pg_catalog.pg_class c WHERE c.relnamespace = n.oid),
+        (SELECT md5(coalesce(string_agg(a.attrelid::text || ':' || a.attnum::text || ':' || a.xmin::text, ',' ORDER BY a.attrelid, a.attnum), ''))
+         FROM pg_catalog.pg_attribute a
+         JOIN pg_catalog.pg_class c ON c.oid = a.attrelid
+         WHERE c.relnamespace = n.oid AND a.attnum > 0),
+        (SELECT md5(coalesce(string_agg(ad.oid::text || ':' || ad.xmin::text, ',' ORDER BY ad.oid), ''))
+         FROM pg_catalog.pg_attrdef ad
+         JOIN pg_catalog.pg_class c ON c.oid = ad.adrelid
+         WHERE c.relnamespace = n.oid),
+        (SELECT md5(coalesce(string_agg(p.oid::text || ':' || p.xmin::text, ',' ORDER BY p.oid), ''))
+         FROM pg_catalog.pg_proc p WHERE p.pronamespace = n.oid),
+        (SELECT md5(coalesce(string_agg(tg.oid::text || ':' || tg.xmin::text, ',' ORDER BY tg.oid), ''))
+         FROM pg_catalog.pg_trigger tg
+         JOIN pg_catalog.pg_class c ON c.oid = tg.tgrelid
+         WHERE c.relnamespace = n.oid)
+    FROM pg_catalog.pg_namespace n
+    WHERE n.nspname = %s
+"""
+
+
+def like_to_regex(pattern):
+    """Compile an SQL ILIKE pattern ('%', '_' and backslash escapes) into a regex"""
+    parts = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            parts.append(re.escape(char))
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts), re.IGNORECASE | re.DOTALL)
+
+
+class CatalogCache:
+    """
+    In-memory cache of schema catalog metadata keyed by (environment secret, schema).
+    It lives at module level so it survives warm Lambda invocations.
+    """
+
+    def __init__(self, ttl=CATALOG_CACHE_TTL_SECONDS, max_schemas=CATALOG_CACHE_MAX_SCHEMAS):
+        self._ttl = ttl
+        self._max_schemas = max_schemas
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'loads': 0}
+
+    @staticmethod
+    def _schema_version(cur, schema):
+        cur.execute(SCHEMA_VERSION_QUERY, (schema,))
+        row = cur.fetchone()
+        return tuple(row) if row else None
+
+    @staticmethod
+    def _load(cur, schema):
+        cur.execute(SCHEMA_CATALOG_QUERY, (schema,))
+        objects = {object_type: [] for object_type in OBJECT_TYPES}
+        for kind, name, object_name, object_type, definition, description, extra in cur.fetchall():
+            result = {
+                'object_name': object_name,
+                'object_type': object_type,
+                'definition': definition,
+                'description': description,
+            }
+            if extra:
+                result.update(extra if isinstance(extra, dict) else json.loads(extra))
+            objects[kind].append((name, result))
+        return objects
+
+    def get_schema(self, cur, secret_name, schema):
+        """Return the cached catalog for a schema, reloading it if its version changed"""
+        key = (secret_name, schema)
+        version = self._schema_version(cur, schema)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['version'] == version and time.time() - entry['loaded_at'] < self._ttl:
+                self.stats['hits'] += 1
+                return entry['objects']
+
+        objects = self._load(cur, schema)
+        with self._lock:
+            self.stats['loads'] += 1
+            self._entries[key] = {'objects': objects, 'version': version, 'loaded_at': time.time()}
+            if len(self._entries) > self._max_schemas:
+                oldest = min(self._entries, key=lambda k: self._entries[k]['loaded_at'])
+                del self._entries[oldest]
+        return objects
+
+    def find_objects(self, cur, secret_name, schema, object_type, name_patterns, explain=None):
+        """
+        Find objects of one type in a schema whose names match any of the ILIKE patterns
+
+        Args:
+            cur: Database cursor, used for the version check and, on a miss, the bulk load
+            secret_name (str): Environment secret, part of the cache key
+            schema (str): Schema name
+            object_type (str): One of OBJECT_TYPES
+            name_patterns (list): ILIKE patterns matched against object names
+            explain (callable, optional): Called as explain(object_type, definition) to build
+                an explanation; the result is memoized in the cache
+
+        Returns:
+            list: Copies of the matching object dictionaries
+        """
+        objects = self.get_schema(cur, secret_name, schema)
+        matchers = [like_to_regex(pattern) for pattern in name_patterns]
+        results = []
+        for name, result in objects.get(object_type, []):
+            if not any(matcher.fullmatch(name) for matcher in matchers):
+                continue
+            if explain and result.get('definition') and 'explanation' not in result:
+                result['explanation'] = explain(object_type, result['definition'])
+            results.append(copy.copy(result))
+        return results
+
+    def invalidate(self, secret_name=None, schema=None):
+        """Drop cached schemas for one environment/schema, or everything"""
+        with self._lock:
+            for key in list(self._entries):
+                if (secret_name is None or key[0] == secret_name) and (schema is None or key[1] == schema):
+                    del self._entries[key]
+
+
+# Schema catalogs loaded by earlier invocations are served until their version query changes or the TTL runs out
+catalog_cache = CatalogCache()
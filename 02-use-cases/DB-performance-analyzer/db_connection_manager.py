@@ -0,0 +1,269 @@
+import json
+import os
+import time
+import logging
+import threading
+import boto3
+
+logger = logging.getLogger(__name__)
+
+# How long Secrets Manager / Parameter Store values are reused before being fetched again
+SECRET_TTL_SECONDS = int(os.environ.get('SECRET_TTL_SECONDS', '300'))
+# A warm connection idle for longer than this is validated with a round trip before reuse
+VALIDATE_AFTER_SECONDS = int(os.environ.get('CONNECTION_VALIDATE_AFTER_SECONDS', '30'))
+CONNECT_TIMEOUT_SECONDS = int(os.environ.get('DB_CONNECT_TIMEOUT_SECONDS', '10'))
+
+
+class DBConnectionManager:
+    """
+    Keeps credentials and one validated database connection per environment
+    warm across invocations of the same Lambda execution environment.
+
+    Lambda reuses module-level objects between warm invocations, so a single
+    module-level instance of this class avoids a Secrets Manager call, an SSM
+    call and a TCP/TLS/auth handshake on every request.
+
+    Args:
+        connect (callable, optional): DB-API ``connect`` function. Defaults to
+            ``psycopg2.connect``; a fake driver can be passed for local testing.
+        session (boto3.session.Session, optional): Session used to create the
+            Secrets Manager and SSM clients.
+        secret_ttl (int): Seconds a cached secret or parameter stays valid.
+        validate_after (int): Idle seconds after which a warm connection is
+            checked with ``SELECT 1`` before being handed out.
+    """
+
+    def __init__(self, connect=None, session=None, secret_ttl=SECRET_TTL_SECONDS,
+                 validate_after=VALIDATE_AFTER_SECONDS):
+        self._connect = connect
+        self._session = session
+        self._secret_ttl = secret_ttl
+        self._validate_after = validate_after
+        self._lock = threading.RLock()
+        self._clients = {}
+        self._secrets = {}
+        self._parameters = {}
+        # secret_name -> {'conn', 'last_used', 'in_use'}
+        self._connections = {}
+        self._metrics = {
+            'secret_cache_hits': 0,
+            'secret_cache_misses': 0,
+            'parameter_cache_hits': 0,
+            'parameter_cache_misses': 0,
+            'connections_opened': 0,
+            'connections_reused': 0,
+            'connections_validated': 0,
+            'broken_connections': 0,
+            'last_secret_fetch_ms': None,
+            'last_parameter_fetch_ms': None,
+            'last_connect_ms': None,
+            'last_validate_ms': None,
+        }
+
+    def _client(self, service_name):
+        """Create AWS clients once per execution environment"""
+        with self._lock:
+            if service_name not in self._clients:
+                session = self._session or boto3.session.Session()
+                self._clients[service_name] = session.client(
+                    service_name=service_name,
+                    region_name=os.environ.get('REGION') or session.region_name
+                )
+            return self._clients[service_name]
+
+    def _cached(self, cache, key, loader, metric_prefix):
+        with self._lock:
+            entry = cache.get(key)
+            if entry and time.time() - entry[1] < self._secret_ttl:
+                self._metrics[f'{metric_prefix}_cache_hits'] += 1
+                return entry[0]
+        start_time = time.time()
+        value = loader(key)
+        with self._lock:
+            self._metrics[f'{metric_prefix}_cache_misses'] += 1
+            self._metrics[f'last_{metric_prefix}_fetch_ms'] = (time.time() - start_time) * 1000
+            cache[key] = (value, time.time())
+        return value
+
+    def _load_secret(self, secret_name):
+        secret_value = self._client('secretsmanager').get_secret_value(SecretId=secret_name)
+        return json.loads(secret_value['SecretString'])
+
+    def _load_parameter(self, name):
+        response = self._client('ssm').get_parameter(Name=name)
+        return response['Parameter']['Value']
+
+    def get_secret(self, secret_name):
+        """Get a secret from AWS Secrets Manager, reusing it for ``secret_ttl`` seconds"""
+        return self._cached(self._secrets, secret_name, self._load_secret, 'secret')
+
+    def get_parameter(self, name):
+        """Get a Parameter Store value, reusing it for ``secret_ttl`` seconds"""
+        return self._cached(self._parameters, name, self._load_parameter, 'parameter')
+
+    def _open_connection(self, secret_name):
+        connect = self._connect
+        if connect is None:
+            import psycopg2
+            connect = psycopg2.connect
+
+        def attempt():
+            secret = self.get_secret(secret_name)
+            return connect(
+                host=secret['host'],
+                database=secret['dbname'],
+                user=secret['username'],
+                password=secret['password'],
+                port=secret['port'],
+                connect_timeout=CONNECT_TIMEOUT_SECONDS
+            )
+
+        start_time = time.time()
+        try:
+            conn = attempt()
+        except Exception as e:
+            # The cached secret may have been rotated; retry once with fresh credentials
+            logger.warning(f"Connection failed, refreshing credentials and retrying: {str(e)}")
+            self.invalidate(secret_name)
+            conn = attempt()
+        with self._lock:
+            self._metrics['connections_opened'] += 1
+            self._metrics['last_connect_ms'] = (time.time() - start_time) * 1000
+        return conn
+
+    def _is_usable(self, entry):
+        conn = entry['conn']
+        if getattr(conn, 'closed', 0):
+            return False
+        if time.time() - entry['last_used'] < self._validate_after:
+            return True
+        start_time = time.time()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"Warm connection failed validation: {str(e)}")
+            return False
+        finally:
+            with self._lock:
+                self._metrics['connections_validated'] += 1
+                self._metrics['last_validate_ms'] = (time.time() - start_time) * 1000
+
+    def get_connection(self, secret_name):
+        """
+        Return the warm connection for ``secret_name``, opening a new one if it
+        is missing or broken. If the warm connection is already checked out
+        (e.g. a nested call), a separate short-lived connection is returned.
+        Every connection must be handed back with ``release_connection``.
+        """
+        with self._lock:
+            entry = self._connections.get(secret_name)
+            if entry and entry['in_use']:
+                conn = None
+            elif entry:
+                entry['in_use'] = True
+                conn = entry['conn']
+            else:
+                entry = None
+                conn = None
+
+        if entry and conn is not None:
+            if self._is_usable(entry):
+                with self._lock:
+                    self._metrics['connections_reused'] += 1
+                return conn
+            self._discard(secret_name, entry)
+            entry = None
+
+        if entry is None:
+            conn = self._open_connection(secret_name)
+            with self._lock:
+                if secret_name not in self._connections:
+                    self._connections[secret_name] = {
+                        'conn': conn,
+                        'last_used': time.time(),
+                        'in_use': True
+                    }
+            return conn
+
+        # Warm connection is busy, hand out a temporary one
+        return self._open_connection(secret_name)
+
+    def release_connection(self, conn, discard=False):
+        """
+        Hand a connection back. Any open transaction is rolled back so the next
+        invocation starts clean; broken or temporary connections are closed.
+        """
+        if conn is None:
+            return
+        with self._lock:
+            match = next(
+                ((name, entry) for name, entry in self._connections.items() if entry['conn'] is conn),
+                None
+            )
+
+        if match is None:
+            self._close(conn)
+            return
+
+        secret_name, entry = match
+        if not discard and not getattr(conn, 'closed', 0):
+            try:
+                conn.rollback()
+            except Exception as e:
+                logger.warning(f"Failed to reset connection, discarding it: {str(e)}")
+                discard = True
+        else:
+            discard = True
+
+        if discard:
+            self._discard(secret_name, entry)
+        else:
+            with self._lock:
+                entry['last_used'] = time.time()
+                entry['in_use'] = False
+
+    def _discard(self, secret_name, entry):
+        with self._lock:
+            if self._connections.get(secret_name) is entry:
+                del self._connections[secret_name]
+            self._metrics['broken_connections'] += 1
+        self._close(entry['conn'])
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def invalidate(self, secret_name=None):
+        """Drop cached credentials for one secret, or every cached value if no name is given"""
+        with self._lock:
+            if secret_name is None:
+                self._secrets.clear()
+                self._parameters.clear()
+            else:
+                self._secrets.pop(secret_name, None)
+
+    def close_all(self):
+        """Close every warm connection"""
+        with self._lock:
+            entries = list(self._connections.values())
+            self._connections.clear()
+        for entry in entries:
+            self._close(entry['conn'])
+
+    def get_metrics(self):
+        """Return cache and connection timing metrics for this execution environment"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['warm_connections'] = len(self._connections)
+        return metrics
+
+
+# Module-level instance shared by all warm invocations of the Lambda function
+connection_manager = DBConnectionManager()
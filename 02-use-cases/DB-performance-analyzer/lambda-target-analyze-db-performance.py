@@ -34,8 +34,27 @@ lambda_target_config = {
                             }
                         },
                         {
+                        "name": "compare_plan",
+                        "description": "Compares the current estimated execution plan of a query with the plan cached from its previous analysis, node by node, and flags plan regressions without executing the query. Get the environment and query from the user and use the action_type value as compare_plan. ",
+                        "inputSchema": {
+                            "type": "object",
+                            "properties": {
+                                "environment": {
+                                    "type": "string"
+                                },
+                                "action_type": {
+                                    "type": "string"
+                                },
+                                 "query": {
+                                    "type": "string"
+                                }
+                            },
+                            "required": ["environment","action_type","query"]
+                            }
+                        },
+                        {
                         "name": "extract_ddl",
-                        "description": "Extracts the DDL (Data Definition Language) for a given database object. Get the environment, object_type (Type of the object like table, view, function, procedure etc..), object_name (The name of the database object to extract DDL for), object_schema (The schema of the database object to extract DDL for) from the user and use the action_type value as extract_ddl. ",
+                        "description": "Extracts the DDL (Data Definition Language) for a given database object. Get the environment, object_type (Type of the object like table, view, function, procedure etc..), object_name (The name of the database object to extract DDL for; several objects can be given comma-separated), object_schema (The schema of the database object to extract DDL for) from the user and use the action_type value as extract_ddl. ",
                         "inputSchema": {
                             "type": "object",
                             "properties": {
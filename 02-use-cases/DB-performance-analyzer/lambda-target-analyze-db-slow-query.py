@@ -30,6 +30,28 @@ lambda_target_config = {
                             }
                         },
                         {
+                        "name": "slow_query_window",
+                        "description": "Analyzes which queries were slow or got slower in a recent time window (default last 60 minutes) using the difference between pg_stat_statements snapshots, ranked by per-interval time, average time, call rate and I/O. Get the environment, and optionally window_minutes and min_exec_time (minimum average execution time in milliseconds), from the user and use the action_type value as slow_query_window",
+                        "inputSchema": {
+                            "type": "object",
+                            "properties": {
+                                "environment": {
+                                    "type": "string"
+                                },
+                                "action_type": {
+                                    "type": "string"
+                                },
+                                "window_minutes": {
+                                    "type": "integer"
+                                },
+                                "min_exec_time": {
+                                    "type": "number"
+                                }
+                            },
+                            "required": ["environment","action_type"]
+                            }
+                        },
+                        {
                         "name": "connection_management_issues",
                         "description": "Analyzes connection management issues using pg_stat_statements. Get the environment from the user and use the action_type value as connection_management_issues",
                         "inputSchema": {
@@ -112,6 +134,22 @@ lambda_target_config = {
                         {
                         "name": "system_health",
                         "description": "Analyzes systems health using pg_stat_statements. Get the environment from the user and use the action_type value as system_health",
+                        "inputSchema": {
+                            "type": "object",
+                            "properties": {
+                                "environment": {
+                                    "type": "string"
+                                },
+                                "action_type": {
+                                    "type": "string"
+                                }
+                            },
+                            "required": ["environment","action_type"]
+                            }
+                        },
+                        {
+                        "name": "full_health_report",
+                        "description": "Runs the connection, index, autovacuum, IO, replication and system health analyses concurrently and returns a single combined report. Get the environment from the user and use the action_type value as full_health_report",
                         "inputSchema": {
                             "type": "object",
                             "properties": {
@@ -1,5 +1,4 @@
 import json
-import boto3
 import psycopg2
 import os
 import re
@@ -7,11 +6,25 @@ import time
 import logging
 from datetime import datetime
 from botocore.exceptions import ClientError
+from db_connection_manager import connection_manager
+import sql_tokenizer
+from plan_cache import (
+    plan_cache, fingerprint_query, diff_plans, plan_relations,
+    plan_shape_changed, get_schema_version
+)
+from catalog_cache import catalog_cache, OBJECT_TYPES as CATALOG_OBJECT_TYPES
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Rows pulled from the server per round trip when streaming query results
+FETCH_BATCH_SIZE = int(os.environ.get('FETCH_BATCH_SIZE', '100'))
+# Approximate size budget for the rows kept from a single statement
+MAX_RESULT_BYTES = int(os.environ.get('MAX_RESULT_BYTES', str(1024 * 1024)))
+# Size budget for the formatted text returned to the agent
+MAX_OUTPUT_BYTES = int(os.environ.get('MAX_OUTPUT_BYTES', str(100 * 1024)))
+
 class QueryComplexityError(Exception):
     """Custom exception for query complexity violations"""
     pass
@@ -20,12 +33,13 @@ class QueryLimitError(Exception):
     """Custom exception for query limit violations"""
     pass
 
-def analyze_query_complexity(query):
+def analyze_query_complexity(query, tokens=None):
     """
     Analyze query complexity and potential resource impact
     
     Args:
         query (str): SQL query to analyze
+        tokens (list, optional): Tokens of the query from sql_tokenizer, to avoid re-tokenizing
     
     Returns:
         dict: Complexity metrics
@@ -33,39 +47,55 @@ def analyze_query_complexity(query):
     Raises:
         QueryComplexityError: If query is too complex
     """
-    query_lower = query.lower()
+    if tokens is None:
+        tokens = list(sql_tokenizer.tokenize(query))
+    # Only bare words and punctuation count, so keywords inside strings,
+    # quoted identifiers and comments are ignored
+    significant = sql_tokenizer.significant_tokens(tokens)
+    words = [token.value.lower() if token.kind == sql_tokenizer.WORD else None for token in significant]
+    values = [token.value for token in significant]
     complexity_score = 0
     warnings = []
     
     # Check for joins
-    join_count = sum(1 for join_type in ['join', 'inner join', 'left join', 'right join', 'full join'] 
-                    if join_type in query_lower)
+    join_count = words.count('join')
     complexity_score += join_count * 2
     if join_count > 3:
         warnings.append(f"Query contains {join_count} joins - consider simplifying")
     
     # Check for subqueries
-    subquery_count = query_lower.count('(select')
+    subquery_count = sum(
+        1 for i in range(1, len(words))
+        if words[i] == 'select' and values[i - 1] == '('
+    )
     complexity_score += subquery_count * 3
     if subquery_count > 2:
         warnings.append(f"Query contains {subquery_count} subqueries - consider restructuring")
     
     # Check for aggregations
-    agg_functions = ['count(', 'sum(', 'avg(', 'max(', 'min(']
-    agg_count = sum(query_lower.count(func) for func in agg_functions)
+    agg_functions = {'count', 'sum', 'avg', 'max', 'min'}
+    agg_count = sum(
+        1 for i in range(len(words) - 1)
+        if words[i] in agg_functions and values[i + 1] == '('
+    )
     complexity_score += agg_count
     
     # Check for window functions
-    if 'over(' in query_lower or 'partition by' in query_lower:
+    uses_over = any(
+        words[i] == 'over' and values[i + 1] == '(' for i in range(len(words) - 1)
+    )
+    uses_partition_by = any(
+        words[i] == 'partition' and words[i + 1] == 'by' for i in range(len(words) - 1)
+    )
+    if uses_over or uses_partition_by:
         complexity_score += 3
         warnings.append("Query uses window functions - monitor performance")
     
     # Check for complex WHERE conditions
-    where_pos = query_lower.find('where')
-    if where_pos != -1:
-        where_clause = query_lower[where_pos:]
-        and_count = where_clause.count(' and ')
-        or_count = where_clause.count(' or ')
+    if 'where' in words:
+        where_words = words[words.index('where'):]
+        and_count = where_words.count('and')
+        or_count = where_words.count('or')
         complexity_score += (and_count + or_count)
         if (and_count + or_count) > 5:
             warnings.append(f"Complex WHERE clause with {and_count + or_count} conditions")
@@ -78,6 +108,54 @@ def analyze_query_complexity(query):
         'aggregation_count': agg_count
     }
 
+def fetch_limited_rows(conn, query, max_rows, cursor_name=None, max_bytes=MAX_RESULT_BYTES,
+                       batch_size=FETCH_BATCH_SIZE):
+    """
+    Execute a query and fetch at most max_rows rows in batches, stopping as soon
+    as the row or byte budget is reached so large results never reach Lambda memory
+    
+    Args:
+        conn: Open database connection inside a transaction
+        query (str): Statement to execute
+        max_rows (int): Maximum number of rows to keep
+        cursor_name (str, optional): If given, a named server-side cursor is used
+            (only valid for SELECT/VALUES statements)
+        max_bytes (int): Approximate budget for the string size of the kept rows
+        batch_size (int): Rows fetched per round trip
+    
+    Returns:
+        tuple: (columns, rows, truncation message or None)
+    """
+    rows = []
+    size = 0
+    truncated = None
+    cur = conn.cursor(name=cursor_name) if cursor_name else conn.cursor()
+    try:
+        if cursor_name:
+            cur.itersize = batch_size
+        cur.execute(query)
+        
+        # Fetch one row beyond the limit to detect whether the result was truncated
+        while truncated is None:
+            batch = cur.fetchmany(min(batch_size, max_rows + 1 - len(rows)))
+            if not batch:
+                break
+            for row in batch:
+                if len(rows) >= max_rows:
+                    truncated = f"Results truncated to {max_rows} rows"
+                    break
+                size += sum(len(str(value)) for value in row)
+                if rows and size > max_bytes:
+                    truncated = f"Results truncated to {len(rows)} rows ({max_bytes} byte limit reached)"
+                    break
+                rows.append(row)
+        
+        # Named cursors only expose the description after the first fetch
+        columns = [desc[0] for desc in cur.description] if cur.description else []
+        return columns, rows, truncated
+    finally:
+        cur.close()
+
 def validate_and_execute_queries(secret_name, query, max_rows=20, 
                                max_statements=5, max_total_rows=1000, 
                                max_complexity=15):
@@ -97,7 +175,7 @@ def validate_and_execute_queries(secret_name, query, max_rows=20,
     
     try:
         # Validate and split queries
-        statements = validate_query(query)
+        statements = validate_statements(query)
         
         # Check number of statements
         if len(statements) > max_statements:
@@ -115,9 +193,12 @@ def validate_and_execute_queries(secret_name, query, max_rows=20,
             cur.execute("SET idle_in_transaction_session_timeout = '60s'")
             
             # Execute each statement
-            for stmt_index, stmt in enumerate(statements, 1):
+            for stmt_index, statement in enumerate(statements, 1):
+                stmt = statement.text
+                stmt_words = sql_tokenizer.keywords(statement.tokens)
+                
                 # Analyze query complexity
-                complexity_metrics = analyze_query_complexity(stmt)
+                complexity_metrics = analyze_query_complexity(stmt, statement.tokens)
                 if complexity_metrics['complexity_score'] > max_complexity:
                     raise QueryComplexityError(
                         f"Statement {stmt_index} is too complex (score: {complexity_metrics['complexity_score']})"
@@ -139,55 +220,46 @@ def validate_and_execute_queries(secret_name, query, max_rows=20,
                     'complexity_metrics': complexity_metrics
                 }
                 
-                stmt_lower = stmt.lower().strip()
+                is_select_query = stmt_words[:1] == ['select']
                 
-                # Only add LIMIT for SELECT queries
-                if stmt_lower.startswith('select') and 'limit' not in stmt_lower:
+                # Only add LIMIT for SELECT queries; the newline keeps it out of a trailing line comment
+                if is_select_query and 'limit' not in stmt_words:
                     remaining_rows = max_total_rows - total_rows
                     limit_rows = min(max_rows, remaining_rows)
-                    stmt = f"{stmt} LIMIT {limit_rows + 1}"
+                    stmt = f"{stmt}\nLIMIT {limit_rows + 1}"
                 
                 # Execute with explain plan first for SELECT queries
-                if stmt_lower.startswith('select'):
+                if is_select_query:
                     #cur.execute(f"EXPLAIN (FORMAT JSON) {stmt}")
                     #explain_plan = cur.fetchone()[0]
                     
                     # Analyze plan for potential issues
-                    optimization_suggestions = analyze_query_performance(secret_name, stmt)
+                    optimization_suggestions = analyze_query_performance(secret_name, stmt, conn=conn)
                     if optimization_suggestions:
                         response['optimization_suggestions'].extend(
                             f"Statement {stmt_index}: {suggestion}"
                             for suggestion in optimization_suggestions
                         )
                 
-                # Execute actual query
-                cur.execute(stmt)
-                
-                # Get column names
-                stmt_response['columns'] = [desc[0] for desc in cur.description]
-                
-                # Fetch results
-                rows = cur.fetchall()
-                row_count = len(rows)
-                
-                # Check total row limit
-                total_rows += row_count
-                if total_rows > max_total_rows:
-                    stmt_response['truncated'] = True
-                    excess_rows = total_rows - max_total_rows
-                    rows = rows[:-excess_rows]
-                    stmt_response['message'] = (
-                        f"Results truncated. Maximum total rows ({max_total_rows}) reached"
-                    )
-                    total_rows = max_total_rows
+                # Execute actual query, streaming SELECT results through a server-side cursor
+                remaining_rows = max_total_rows - total_rows
+                columns, rows, truncated = fetch_limited_rows(
+                    conn,
+                    stmt,
+                    min(max_rows, remaining_rows),
+                    cursor_name=f"stmt_cursor_{stmt_index}" if is_select_query else None
+                )
+                stmt_response['columns'] = columns
+                total_rows += len(rows)
                 
-                # Check individual statement limit
-                elif row_count > max_rows:
+                if truncated:
                     stmt_response['truncated'] = True
-                    rows = rows[:max_rows]
-                    stmt_response['message'] = (
-                        f"Results truncated to {max_rows} rows"
-                    )
+                    if remaining_rows <= max_rows and total_rows >= max_total_rows:
+                        stmt_response['message'] = (
+                            f"Results truncated. Maximum total rows ({max_total_rows}) reached"
+                        )
+                    else:
+                        stmt_response['message'] = truncated
                 
                 stmt_response['row_count'] = len(rows)
                 stmt_response['rows'] = [
@@ -235,247 +307,76 @@ def validate_and_execute_queries(secret_name, query, max_rows=20,
     
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
 
 def get_secret(secret_name):
-    """Get secret from AWS Secrets Manager """
-    secret_name = secret_name
-    region_name = os.environ['REGION']
-    session = boto3.session.Session()
-    client = session.client(
-        service_name='secretsmanager',
-        region_name=region_name
-    )
-    
+    """Get secret from AWS Secrets Manager, reusing it across warm invocations"""
     try:
-        secret_value = client.get_secret_value(SecretId=secret_name)
-        secret = json.loads(secret_value['SecretString'])
-        return secret
+        return connection_manager.get_secret(secret_name)
     except ClientError as e:
         raise Exception(f"Failed to get secret: {str(e)}")
 
 def get_env_secret(environment):
-    ssm_client = boto3.client('ssm')
     """Retrieve the secret name for the specified environment"""
-    if environment == 'prod':
-        try:
-            # Get the secret name from Parameter Store
-            response = ssm_client.get_parameter(
-                Name=f'/AuroraOps/{environment}'
-            )
-            print(response['Parameter']['Value'])
-            return response['Parameter']['Value']
-        except ssm_client.exceptions.ParameterNotFound:
+    if environment not in ('prod', 'dev'):
+        print("environement does not exist")
+        raise ValueError(f"Unknown environment: {environment}")
+    parameter_name = f'/AuroraOps/{environment}'
+    try:
+        # Get the secret name from Parameter Store (cached across warm invocations)
+        return connection_manager.get_parameter(parameter_name)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ParameterNotFound':
             error_message = f"Parameter not found: {parameter_name}"
             print(error_message)
             raise Exception(error_message)
-    elif environment == 'dev':
-        try:
-            # Get the secret name from Parameter Store
-            response = ssm_client.get_parameter(
-                Name=f'/AuroraOps/{environment}'
-            )
-            return response['Parameter']['Value']
-        except Exception as e:
-            raise Exception(f"Failed to get dev secret name from Parameter Store: {str(e)}")
-    else:
-        print("environement does not exist")
-        raise ValueError(f"Unknown environment: {environment}")
+        raise Exception(f"Failed to get {environment} secret name from Parameter Store: {str(e)}")
 
 def connect_to_db(secret_name):
-    """Establish database connection"""
-    cur_secret = secret_name
-    secret = get_secret(cur_secret)
+    """
+    Get the warm database connection for this environment.
+    Connections must be handed back with release_db_connection instead of being closed.
+    """
     try:
-        conn = psycopg2.connect(
-            host=secret['host'],
-            database=secret['dbname'],
-            user=secret['username'],
-            password=secret['password'],
-            port=secret['port']
-        )
-        return conn
+        return connection_manager.get_connection(secret_name)
     except Exception as e:
         raise Exception(f"Failed to connect to the database: {str(e)}")
 
-# Define the queries dictionary for different object types
-queries = {
-    'table': """
-        WITH RECURSIVE columns AS (
-            SELECT 
-                t.schemaname,
-                t.tablename,
-                array_to_string(
-                    array_agg(
-                        '    ' || quote_ident(a.attname) || ' ' || 
-                        pg_catalog.format_type(a.atttypid, a.atttypmod) ||
-                        CASE WHEN a.attnotnull THEN ' NOT NULL' ELSE '' END ||
-                        CASE WHEN ad.adbin IS NOT NULL 
-                            THEN ' DEFAULT ' || pg_get_expr(ad.adbin, ad.adrelid) 
-                            ELSE '' 
-                        END
-                        ORDER BY a.attnum
-                    ),
-                    E',\n'
-                ) as column_definitions
-            FROM pg_catalog.pg_tables t
-            JOIN pg_catalog.pg_class c 
-                ON c.relname = t.tablename 
-                AND c.relnamespace = (
-                    SELECT oid 
-                    FROM pg_catalog.pg_namespace 
-                    WHERE nspname = t.schemaname
-                )
-            JOIN pg_catalog.pg_attribute a 
-                ON a.attrelid = c.oid 
-                AND a.attnum > 0 
-                AND NOT a.attisdropped
-            LEFT JOIN pg_catalog.pg_attrdef ad 
-                ON ad.adrelid = c.oid 
-                AND ad.adnum = a.attnum
-            WHERE t.schemaname NOT IN ('pg_catalog', 'information_schema')
-            GROUP BY t.schemaname, t.tablename
-        )
-        SELECT 
-            col.schemaname || '.' || col.tablename as object_name,
-            'TABLE' as object_type,
-            CASE 
-                WHEN col.column_definitions IS NOT NULL THEN
-                    format(
-                        'CREATE TABLE %I.%I (\n%s\n);',
-                        col.schemaname,
-                        col.tablename,
-                        col.column_definitions
-                    )
-                ELSE 'ERROR: No columns found for this table'
-            END as definition,
-            obj_description(
-                (col.schemaname || '.' || col.tablename)::regclass, 
-                'pg_class'
-            ) as description
-        FROM columns col
-        WHERE col.tablename ILIKE %s AND col.schemaname = %s
-    """,
-
-    'view': """
-        SELECT 
-            schemaname || '.' || viewname as object_name,
-            'VIEW' as object_type,
-            format(
-                'CREATE OR REPLACE VIEW %I.%I AS\n%s',
-                schemaname,
-                viewname,
-                pg_get_viewdef(format('%I.%I', schemaname, viewname)::regclass, true)
-            ) as definition,
-            obj_description(
-                (schemaname || '.' || viewname)::regclass, 
-                'pg_class'
-            ) as description
-        FROM pg_catalog.pg_views
-        WHERE viewname ILIKE %s 
-        AND schemaname = %s
-        AND schemaname NOT IN ('pg_catalog', 'information_schema')
-    """,
-
-    'function': """
-        SELECT 
-            n.nspname || '.' || p.proname as object_name,
-            'FUNCTION' as object_type,
-            pg_get_functiondef(p.oid) as definition,
-            obj_description(p.oid, 'pg_proc') as description,
-            p.prorettype::regtype as return_type,
-            p.provolatile,
-            p.proparallel
-        FROM pg_catalog.pg_proc p
-        JOIN pg_catalog.pg_namespace n ON n.oid = p.pronamespace
-        WHERE p.proname ILIKE %s
-        AND n.nspname = %s
-        AND n.nspname NOT IN ('pg_catalog', 'information_schema')
-        AND p.prokind = 'f'  -- 'f' for function
-    """,
-
-    'procedure': """
-        SELECT 
-            n.nspname || '.' || p.proname as object_name,
-            'PROCEDURE' as object_type,
-            pg_get_functiondef(p.oid) as definition,
-            obj_description(p.oid, 'pg_proc') as description
-        FROM pg_catalog.pg_proc p
-        JOIN pg_catalog.pg_namespace n ON n.oid = p.pronamespace
-        WHERE p.proname ILIKE %s
-        AND n.nspname = %s
-        AND n.nspname NOT IN ('pg_catalog', 'information_schema')
-        AND p.prokind = 'p'  -- 'p' for procedure
-    """,
-
-    'trigger': """
-        SELECT 
-            n.nspname || '.' || t.tgname as object_name,
-            'TRIGGER' as object_type,
-            pg_get_triggerdef(t.oid, true) as definition,
-            obj_description(t.oid, 'pg_trigger') as description
-        FROM pg_catalog.pg_trigger t
-        JOIN pg_catalog.pg_class c ON t.tgrelid = c.oid
-        JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
-        WHERE t.tgname ILIKE %s
-        AND n.nspname = %s
-        AND n.nspname NOT IN ('pg_catalog', 'information_schema')
-        AND NOT t.tgisinternal
-    """,
-
-    'sequence': """
-        SELECT 
-            n.nspname || '.' || c.relname as object_name,
-            'SEQUENCE' as object_type,
-            format(
-                'CREATE SEQUENCE %I.%I\n    INCREMENT %s\n    MINVALUE %s\n    MAXVALUE %s\n    START %s\n    CACHE %s%s;',
-                n.nspname,
-                c.relname,
-                s.seqincrement,
-                s.seqmin,
-                s.seqmax,
-                s.seqstart,
-                s.seqcache,
-                CASE WHEN s.seqcycle THEN '\n    CYCLE' ELSE '' END
-            ) as definition,
-            obj_description(c.oid, 'pg_class') as description
-        FROM pg_catalog.pg_sequence s
-        JOIN pg_catalog.pg_class c ON s.seqrelid = c.oid
-        JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
-        WHERE c.relname ILIKE %s
-        AND n.nspname = %s
-        AND n.nspname NOT IN ('pg_catalog', 'information_schema')
-    """,
-
-    'index': """
-        SELECT 
-            n.nspname || '.' || c.relname as object_name,
-            'INDEX' as object_type,
-            pg_get_indexdef(i.indexrelid) as definition,
-            obj_description(i.indexrelid, 'pg_class') as description
-        FROM pg_catalog.pg_index i
-        JOIN pg_catalog.pg_class c ON i.indexrelid = c.oid
-        JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
-        WHERE c.relname ILIKE %s
-        AND n.nspname = %s
-        AND n.nspname NOT IN ('pg_catalog', 'information_schema')
-    """
-}
+def release_db_connection(conn):
+    """Return a connection to the connection manager so it stays warm for the next invocation"""
+    connection_manager.release_connection(conn)
+
+def explain_object_definition(object_type, definition):
+    """Build the explanatory notes for an object's DDL based on its type"""
+    if object_type == 'table':
+        return analyze_table_definition(definition)
+    elif object_type == 'view':
+        return analyze_view_definition(definition)
+    elif object_type in ('function', 'procedure'):
+        return analyze_routine_definition(definition)
+    elif object_type == 'trigger':
+        return analyze_trigger_definition(definition)
+    return f"DDL for {object_type}"
 
 def extract_database_object_ddl(secret_name, object_type, object_name=None, object_schema=None):
     """
     Extract DDL and description for database objects
     
+    The schema's catalog is loaded in one round trip and cached per environment;
+    later lookups only run a cheap catalog version check and are served from memory.
+    
     Args:
         secret_name (str): The name of the secret containing database credentials
         object_type (str): Type of database object ('table', 'view', 'function', 'procedure', etc.)
-        object_name (str, optional): Name of the object to search for
+        object_name (str or list, optional): Name (ILIKE pattern) of the object to search for;
+            several objects can be requested as a list or a comma-separated string
         object_schema (str, optional): Schema name to filter objects
     
     Returns:
         list: List of dictionaries containing object information
         str: Error message if no objects found
     """
+    conn = None
     try:
         # Input validation
         if not object_name or not object_schema:
@@ -483,83 +384,37 @@ def extract_database_object_ddl(secret_name, object_type, object_name=None, obje
 
         # Validate object_type
         object_type_lower = object_type.lower()
-        if object_type_lower not in queries:
-            valid_types = ', '.join(queries.keys())
+        if object_type_lower not in CATALOG_OBJECT_TYPES:
+            valid_types = ', '.join(CATALOG_OBJECT_TYPES)
             raise ValueError(f"Invalid object_type: {object_type}. Valid types are: {valid_types}")
 
+        if isinstance(object_name, str):
+            object_names = [name.strip() for name in object_name.split(',') if name.strip()]
+        else:
+            object_names = list(object_name)
+
         # Connect to database
         conn = connect_to_db(secret_name)
         if not conn:
             raise Exception("Failed to establish database connection")
 
-        results = []
+        print(f"Looking up {object_type_lower} {object_names} in schema {object_schema}")
         with conn.cursor() as cur:
-            try:
-                # Debug information
-                print(f"\nExecuting query for {object_type_lower}")
-                print(f"Object name: {object_name}")
-                print(f"Schema: {object_schema}")
-
-                # Get query and execute
-                query = queries[object_type_lower]
-                params = [object_name, object_schema]
-                
-                print("\nExecuting query with parameters:")
-                print(f"Query: {query}")
-                print(f"Parameters: {params}")
-
-                cur.execute(query, params)
-                
-                # Fetch results
-                rows = cur.fetchall()
-                if not rows:
-                    print("No rows returned from query")
-                    return "No matching objects found"
-
-                # Get column names
-                columns = [desc[0] for desc in cur.description]
-                print(f"\nColumns returned: {columns}")
-                print(f"Number of rows: {len(rows)}")
-
-                # Process results
-                for row in rows:
-                    if not row:
-                        continue
-
-                    # Create result dictionary
-                    result = {}
-                    for i, column in enumerate(columns):
-                        result[column] = row[i] if i < len(row) else None
-
-                    # Add explanation based on object type
-                    if result.get('definition'):
-                        if object_type_lower == 'table':
-                            result['explanation'] = analyze_table_definition(result['definition'])
-                        elif object_type_lower == 'view':
-                            result['explanation'] = analyze_view_definition(result['definition'])
-                        elif object_type_lower in ('function', 'procedure'):
-                            result['explanation'] = analyze_routine_definition(result['definition'])
-                        elif object_type_lower == 'trigger':
-                            result['explanation'] = analyze_trigger_definition(result['definition'])
-                        else:
-                            result['explanation'] = f"DDL for {object_type_lower}"
-
-                    results.append(result)
-                    print(f"\nProcessed {object_type_lower}: {result.get('object_name', 'unknown')}")
-
-            except Exception as e:
-                error_msg = f"Error executing query: {str(e)}"
-                print(f"\nError details:")
-                print(f"Query: {query}")
-                print(f"Parameters: {params}")
-                print(f"Error message: {error_msg}")
-                raise
+            results = catalog_cache.find_objects(
+                cur,
+                secret_name,
+                object_schema,
+                object_type_lower,
+                object_names,
+                explain=explain_object_definition
+            )
+        print(f"Catalog cache stats: {catalog_cache.stats}")
 
         # Return results
         if not results:
             return "No matching objects found"
 
-        print(f"\nSuccessfully retrieved {len(results)} objects")
+        print(f"Successfully retrieved {len(results)} objects")
         return results
 
     except Exception as e:
@@ -570,10 +425,9 @@ def extract_database_object_ddl(secret_name, object_type, object_name=None, obje
     finally:
         if conn:
             try:
-                conn.close()
-                print("\nDatabase connection closed")
+                release_db_connection(conn)
             except Exception as e:
-                print(f"\nError closing connection: {str(e)}")
+                print(f"\nError releasing connection: {str(e)}")
 
 
 def analyze_table_definition(definition):
@@ -754,7 +608,7 @@ def clean_query_for_explain(query):
     
     return cleaned_query.strip()
 
-def analyze_query_performance(secret_name, query_or_object_name, parameters=None, object_type=None):
+def analyze_query_performance(secret_name, query_or_object_name, parameters=None, object_type=None, conn=None):
     """
     Analyze query performance and provide optimization recommendations
     
@@ -763,8 +617,11 @@ def analyze_query_performance(secret_name, query_or_object_name, parameters=None
     - query_or_object_name: SQL query string or object name to analyze
     - parameters: Optional. List of parameter values for parameterized queries
     - object_type: Optional. If provided, will fetch definition from database object
+    - conn: Optional. Connection already held by the caller; reused instead of opening another one
     """
-    conn = connect_to_db(secret_name)
+    owns_connection = conn is None
+    if owns_connection:
+        conn = connect_to_db(secret_name)
     try:
         with conn.cursor() as cur:
             # If object_type is provided, fetch the query definition
@@ -775,46 +632,146 @@ def analyze_query_performance(secret_name, query_or_object_name, parameters=None
 
             # Clean the query before analysis
             query_to_analyze = clean_query_for_explain(query_to_analyze)
+            explain_query, is_generic_plan = prepare_query_for_explain(query_to_analyze)
+
+            # Reuse a cached analysis while the planner inputs of the referenced tables are unchanged
+            cache_key = (secret_name, fingerprint_query(query_to_analyze))
+            entry = plan_cache.get(cache_key)
+            if entry and entry['analysis'] is not None and not entry['expired']:
+                if get_schema_version(cur, entry['relations']) == entry['schema_version']:
+                    return cached_plan_analysis(entry, 'hit')
+
+            estimated_plan = None
+            plan_changes = []
+            if entry:
+                # Statistics, indexes or the TTL moved on: a plan-only EXPLAIN is enough
+                # to tell whether the plan shape changed, without re-running ANALYZE
+                cur.execute(f"EXPLAIN (FORMAT JSON) {explain_query}")
+                estimated_plan = cur.fetchone()[0]
+                plan_changes = diff_plans(entry['estimated_plan']['Plan'], estimated_plan[0]['Plan'])
+                schema_version = get_schema_version(cur, plan_relations(estimated_plan[0]['Plan']))
+                if entry['analysis'] is not None and not plan_shape_changed(plan_changes):
+                    plan_cache.touch(cache_key, schema_version)
+                    return cached_plan_analysis(entry, 'revalidated', plan_changes)
 
-            # Check if the query contains parameter placeholders
-            has_parameters = any(f'${i}' in query_to_analyze for i in range(1, 21))
-
-            if has_parameters:
-                # Replace $n parameters with dummy placeholders
-                modified_query = query_to_analyze
-                param_count = 0
-                for i in range(1, 21):
-                    if f'${i}' in modified_query:
-                        param_count = max(param_count, i)
-                        modified_query = modified_query.replace(f'${i}', 'NULL')
-
+            if is_generic_plan:
                 # Use GENERIC_PLAN for parameterized queries
-                cur.execute(f"EXPLAIN (GENERIC_PLAN, BUFFERS, FORMAT JSON) {modified_query}")
-                plan = cur.fetchone()[0]
-
-                cur.execute(f"EXPLAIN (FORMAT JSON) {modified_query}")
-                estimated_plan = cur.fetchone()[0]
-                
-                # Pass True for is_generic_plan
-                analysis = analyze_execution_plan(plan[0], estimated_plan[0], True)
+                cur.execute(f"EXPLAIN (GENERIC_PLAN, BUFFERS, FORMAT JSON) {explain_query}")
             else:
                 # For non-parameterized queries, use ANALYZE
-                cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query_to_analyze}")
-                plan = cur.fetchone()[0]
-                
-                cur.execute(f"EXPLAIN (FORMAT JSON) {query_to_analyze}")
+                cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {explain_query}")
+            plan = cur.fetchone()[0]
+
+            if estimated_plan is None:
+                cur.execute(f"EXPLAIN (FORMAT JSON) {explain_query}")
                 estimated_plan = cur.fetchone()[0]
-                
-                # Pass False for is_generic_plan
-                analysis = analyze_execution_plan(plan[0], estimated_plan[0], False)
+
+            analysis = analyze_execution_plan(plan[0], estimated_plan[0], is_generic_plan)
+            if plan_changes:
+                analysis['plan_changes'] = plan_changes
+
+            schema_version = get_schema_version(cur, plan_relations(estimated_plan[0]['Plan']))
+            plan_cache.put(cache_key, estimated_plan[0], schema_version, analysis)
+            analysis['plan_cache'] = 'miss'
 
             return analysis
 
     except Exception as e:
         raise Exception(f"Failed to analyze query performance: {str(e)}")
+    finally:
+        if conn and owns_connection:
+            release_db_connection(conn)
+
+def prepare_query_for_explain(query):
+    """
+    Replace $n parameter placeholders so the query can be explained
+
+    Returns:
+    - Tuple of (query to explain, whether a generic plan is required)
+    """
+    # Check if the query contains parameter placeholders
+    has_parameters = any(f'${i}' in query for i in range(1, 21))
+    if not has_parameters:
+        return query, False
+
+    # Replace $n parameters with dummy placeholders
+    modified_query = query
+    for i in range(20, 0, -1):
+        modified_query = modified_query.replace(f'${i}', 'NULL')
+    return modified_query, True
+
+def cached_plan_analysis(entry, status, plan_changes=None):
+    """Build an analysis result from a plan cache entry"""
+    analysis = entry['analysis']
+    analysis['plan_cache'] = status
+    analysis['plan_cache_age_seconds'] = round(time.time() - entry['cached_at'], 1)
+    if plan_changes:
+        analysis['plan_changes'] = plan_changes
+    return analysis
+
+def compare_query_plan(secret_name, query):
+    """
+    Compare the current estimated plan of a query with its cached plan, node by node,
+    without executing the query
+
+    Parameters:
+    - secret_name: Secret containing database credentials
+    - query: SQL query string
+
+    Returns:
+    - dict with 'baseline_created', 'plan_changes' and 'regressions'
+    """
+    conn = connect_to_db(secret_name)
+    try:
+        with conn.cursor() as cur:
+            query_to_compare = clean_query_for_explain(query)
+            explain_query, _ = prepare_query_for_explain(query_to_compare)
+            cache_key = (secret_name, fingerprint_query(query_to_compare))
+
+            cur.execute(f"EXPLAIN (FORMAT JSON) {explain_query}")
+            estimated_plan = cur.fetchone()[0][0]
+            schema_version = get_schema_version(cur, plan_relations(estimated_plan['Plan']))
+
+            entry = plan_cache.get(cache_key)
+            if entry is None:
+                # Nothing to compare against yet; remember this plan as the baseline
+                plan_cache.put(cache_key, estimated_plan, schema_version)
+                return {'baseline_created': True, 'plan_changes': [], 'regressions': []}
+
+            plan_changes = diff_plans(entry['estimated_plan']['Plan'], estimated_plan['Plan'])
+            return {
+                'baseline_created': False,
+                'baseline_age_seconds': round(time.time() - entry['cached_at'], 1),
+                'plan_changes': plan_changes,
+                'regressions': [change for change in plan_changes if change['regression']]
+            }
+
+    except Exception as e:
+        raise Exception(f"Failed to compare query plan: {str(e)}")
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
+
+def format_plan_comparison(comparison):
+    """
+    Format the plan comparison results into human-readable text
+    """
+    if comparison['baseline_created']:
+        return ("No cached plan was found for this query. The current plan has been stored "
+                "as the baseline for future comparisons.")
+
+    output = [f"Plan Comparison (baseline cached {comparison['baseline_age_seconds']} seconds ago):"]
+    if not comparison['plan_changes']:
+        output.append("- The current plan matches the cached plan")
+        return "\n".join(output)
+
+    output.append(f"- {len(comparison['plan_changes'])} change(s), "
+                  f"{len(comparison['regressions'])} potential regression(s)")
+    output.append("")
+    for change in comparison['plan_changes']:
+        marker = "⚠️ " if change['regression'] else ""
+        output.append(f"- {marker}[node {change['path']}] {change['description']} (Severity: {change['severity']})")
+    return "\n".join(output)
 
 def analyze_execution_plan(actual_plan, estimated_plan, is_generic_plan):
     """
@@ -1027,8 +984,18 @@ def format_analysis_output(analysis):
         output.append(f"- Actual Rows: {analysis['performance_stats'].get('actual_rows', 'N/A')}")
         output.append(f"- Estimated Rows: {analysis['performance_stats'].get('estimated_rows', 'N/A')}")
     
+    if analysis.get('plan_cache') in ('hit', 'revalidated'):
+        output.append(f"- Plan Cache: {analysis['plan_cache']} (cached {analysis['plan_cache_age_seconds']} seconds ago)")
+    
     output.append("")
 
+    # Changes against the previously cached plan
+    if analysis.get('plan_changes'):
+        output.append("Plan Changes Since Last Analysis:")
+        for change in analysis['plan_changes']:
+            output.append(f"- {change['description']} (Severity: {change['severity']})")
+        output.append("")
+
     # Issues
     if analysis['issues']:
         output.append("Identified Issues:")
@@ -1096,15 +1063,16 @@ def monitor_query_performance(query, start_time, rows_returned):
     
     return metrics
 
-def validate_query(query):
+def validate_statements(query):
     """
-    Validate query for security concerns and split into statements
+    Validate query for security concerns and split it into statements in a single pass
     
     Args:
         query (str): SQL query to validate
     
     Returns:
-        list: List of validated statements
+        list: sql_tokenizer.Statement tuples (statement text without the trailing
+        semicolon, and its tokens)
         
     Raises:
         ValueError: If query contains prohibited operations
@@ -1112,113 +1080,47 @@ def validate_query(query):
     if not query or not isinstance(query, str):
         raise ValueError("Query must be a non-empty string")
 
-    def is_within_quotes(text, position):
-        """Check if a position in text is within quotes"""
-        single_quotes = False
-        double_quotes = False
-        for i in range(position):
-            if text[i] == "'" and not double_quotes:
-                single_quotes = not single_quotes
-            elif text[i] == '"' and not single_quotes:
-                double_quotes = not double_quotes
-        return single_quotes or double_quotes
-
-    def split_statements(query_text):
-        """Split query into individual statements, respecting quotes and comments"""
-        statements = []
-        current_stmt = []
-        i = 0
-        comment_block = False
-        line_comment = False
-        
-        while i < len(query_text):
-            char = query_text[i]
-            
-            # Handle comment blocks
-            if query_text[i:i+2] == '/*' and not line_comment:
-                comment_block = True
-                current_stmt.append(char)
-                i += 1
-            elif query_text[i:i+2] == '*/' and comment_block:
-                comment_block = False
-                current_stmt.append(char)
-                i += 1
-            # Handle line comments
-            elif query_text[i:i+2] == '--' and not comment_block:
-                line_comment = True
-                current_stmt.append(char)
-                i += 1
-            elif char == '\n' and line_comment:
-                line_comment = False
-                current_stmt.append(char)
-            # Handle semicolons
-            elif char == ';' and not comment_block and not line_comment and not is_within_quotes(query_text, i):
-                current_stmt.append(char)
-                stmt = ''.join(current_stmt).strip()
-                if stmt:
-                    statements.append(stmt)
-                current_stmt = []
-            else:
-                current_stmt.append(char)
-            i += 1
-        
-        # Add the last statement if exists
-        last_stmt = ''.join(current_stmt).strip()
-        if last_stmt:
-            statements.append(last_stmt)
-        
-        return [stmt for stmt in statements if stmt]
+    dangerous_operations = {
+        'insert', 'update', 'delete', 'drop', 'truncate', 'alter',
+        'create', 'grant', 'revoke', 'execute', 'copy'
+    }
 
-    # Split into statements
-    statements = split_statements(query)
-    validated_statements = []
+    # Split into statements; quotes, dollar-quoting and comments are handled by the tokenizer
+    statements = sql_tokenizer.split_statements(query)
 
     # Validate each statement
     for stmt in statements:
-        stmt = stmt.strip()
-        if stmt.endswith(';'):
-            stmt = stmt[:-1]
-        
-        stmt_lower = stmt.lower().strip()
+        significant = sql_tokenizer.significant_tokens(stmt.tokens)
         
         # Get the command type
-        first_word = stmt_lower.split()[0] if stmt_lower.split() else ''
+        first_word = significant[0].value.lower() if significant else ''
         
         if first_word not in ['select', 'show']:
             raise ValueError(f"Prohibited operation detected: {first_word}")
         
-        # For SELECT statements, check for dangerous operations
+        # For SELECT statements, check for dangerous operations outside strings,
+        # quoted identifiers and comments
         if first_word == 'select':
-            dangerous_operations = [
-                r'\binsert\b', r'\bupdate\b', r'\bdelete\b', r'\bdrop\b', 
-                r'\btruncate\b', r'\balter\b', r'\bcreate\b', r'\bgrant\b', 
-                r'\brevoke\b', r'\bexecute\b', r'\bcopy\b'
-            ]
-            
-            # Remove content within quotes for checking
-            query_for_check = ''
-            in_quote = False
-            quote_char = None
-            
-            for char in stmt:
-                if char in ["'", '"'] and (not quote_char or char == quote_char):
-                    if not in_quote:
-                        quote_char = char
-                        in_quote = True
-                    else:
-                        quote_char = None
-                        in_quote = False
-                elif not in_quote:
-                    query_for_check += char
-            
-            # Check for dangerous operations
-            for operation in dangerous_operations:
-                if re.search(operation, query_for_check.lower()):
-                    raise ValueError(f"Statement contains prohibited operation: {operation}")
-        
-        validated_statements.append(stmt)
+            for word in sql_tokenizer.keywords(significant):
+                if word in dangerous_operations:
+                    raise ValueError(f"Statement contains prohibited operation: {word}")
     
-    return validated_statements
+    return statements
+
+def validate_query(query):
+    """
+    Validate query for security concerns and split into statements
+    
+    Args:
+        query (str): SQL query to validate
+    
+    Returns:
+        list: List of validated statements
+        
+    Raises:
+        ValueError: If query contains prohibited operations
+    """
+    return [stmt.text for stmt in validate_statements(query)]
 
 def execute_read_query(secret_name, query, max_rows=20):
     """
@@ -1245,7 +1147,7 @@ def execute_read_query(secret_name, query, max_rows=20):
     
     try:
         # Validate and split queries
-        statements = validate_query(query)
+        statements = validate_statements(query)
         
         # Connect to database
         conn = connect_to_db(secret_name)
@@ -1256,7 +1158,8 @@ def execute_read_query(secret_name, query, max_rows=20):
             cur.execute("SET statement_timeout = '30s'")
             
             # Execute each statement
-            for stmt_index, stmt in enumerate(statements, 1):
+            for stmt_index, statement in enumerate(statements, 1):
+                stmt = statement.text
                 stmt_response = {
                     'columns': [],
                     'rows': [],
@@ -1267,40 +1170,34 @@ def execute_read_query(secret_name, query, max_rows=20):
                 }
                 
                 # Determine if it's a SELECT query
-                stmt_lower = stmt.lower().strip()
-                is_select_query = stmt_lower.lstrip('(').startswith('select')
+                stmt_words = sql_tokenizer.keywords(statement.tokens)
+                is_select_query = stmt_words[:1] == ['select']
                 
-                # Prepare the final query
+                # Prepare the final query; the newline keeps LIMIT out of a trailing line comment
                 final_query = stmt
-                if is_select_query and 'limit' not in stmt_lower:
-                    final_query = f"{stmt} LIMIT {max_rows + 1}"
+                if is_select_query and 'limit' not in stmt_words:
+                    final_query = f"{stmt}\nLIMIT {max_rows + 1}"
                 
-                # Execute query
+                # Execute query, streaming SELECT results through a server-side cursor
                 try:
-                    cur.execute(final_query)
+                    columns, rows, truncated = fetch_limited_rows(
+                        conn,
+                        final_query,
+                        max_rows,
+                        cursor_name=f"read_cursor_{stmt_index}" if is_select_query else None
+                    )
                 except psycopg2.Error as pe:
                     logger.error(f"Error executing query: {final_query}")
                     logger.error(f"Error details: {str(pe)}")
                     raise
                 
-                # Get column names
-                stmt_response['columns'] = [desc[0] for desc in cur.description]
+                stmt_response['columns'] = columns
                 
-                # Fetch results
-                rows = cur.fetchall()
-                total_rows = len(rows)
-                
-                # Handle row limiting only for SELECT queries
-                if is_select_query and total_rows > max_rows:
+                # Handle row limiting
+                if truncated:
                     stmt_response['truncated'] = True
-                    rows = rows[:max_rows]
-                    stmt_response['message'] = (
-                        f"Results truncated to {max_rows} rows for performance reasons. "
-                        f"Total rows available: {total_rows}"
-                    )
-                    stmt_response['row_count'] = max_rows
-                else:
-                    stmt_response['row_count'] = total_rows
+                    stmt_response['message'] = f"{truncated} for performance reasons."
+                stmt_response['row_count'] = len(rows)
                 
                 # Convert rows to list of dictionaries
                 stmt_response['rows'] = [
@@ -1310,7 +1207,7 @@ def execute_read_query(secret_name, query, max_rows=20):
                 
                 # Add performance monitoring only for SELECT queries
                 if is_select_query:
-                    complexity_metrics = analyze_query_complexity(stmt)
+                    complexity_metrics = analyze_query_complexity(stmt, statement.tokens)
                     stmt_response['complexity_metrics'] = complexity_metrics
                     
                     # Add complexity warnings if any
@@ -1355,13 +1252,14 @@ def execute_read_query(secret_name, query, max_rows=20):
     
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
 
-def format_enhanced_results(results):
+def format_enhanced_results(results, max_output_bytes=MAX_OUTPUT_BYTES):
     """
-    Format results with enhanced information
+    Format results with enhanced information, keeping table rows within max_output_bytes
     """
     formatted_output = []
+    output_size = 0
     
     # Add performance summary
     metrics = results['performance_metrics']
@@ -1405,7 +1303,7 @@ def format_enhanced_results(results):
             # Calculate column widths
             widths = {
                 col: max(len(str(col)), 
-                        max(len(str(row[col])) for row in result['rows']))
+                        max((len(str(row[col])) for row in result['rows']), default=0))
                 for col in result['columns']
             }
             
@@ -1417,12 +1315,20 @@ def format_enhanced_results(results):
             formatted_output.append(header)
             formatted_output.append("-" * len(header))
             
-            # Add rows
-            for row in result['rows']:
-                formatted_output.append(" | ".join(
+            # Add rows until the output size budget is used up
+            for row_index, row in enumerate(result['rows']):
+                line = " | ".join(
                     str(row[col]).ljust(widths[col])
                     for col in result['columns']
-                ))
+                )
+                output_size += len(line) + 1
+                if output_size > max_output_bytes:
+                    formatted_output.append(
+                        f"... {len(result['rows']) - row_index} more rows omitted "
+                        f"(output limited to {max_output_bytes} bytes)"
+                    )
+                    break
+                formatted_output.append(line)
             
         formatted_output.append(f"Rows returned: {result['row_count']}")
         formatted_output.append("")
@@ -1482,9 +1388,10 @@ def format_query_results(results):
     
     return "\n".join(formatted_output)
 
-def format_multi_query_results(results):
-    """Format results from multiple statements"""
+def format_multi_query_results(results, max_output_bytes=MAX_OUTPUT_BYTES):
+    """Format results from multiple statements, keeping table rows within max_output_bytes"""
     formatted_output = []
+    output_size = 0
     
     # Add performance summary
     metrics = results['performance_metrics']
@@ -1503,7 +1410,7 @@ def format_multi_query_results(results):
             # Calculate column widths
             widths = {
                 col: max(len(str(col)), 
-                        max(len(str(row[col])) for row in result['rows']))
+                        max((len(str(row[col])) for row in result['rows']), default=0))
                 for col in result['columns']
             }
             
@@ -1515,12 +1422,20 @@ def format_multi_query_results(results):
             formatted_output.append(header)
             formatted_output.append("-" * len(header))
             
-            # Add rows
-            for row in result['rows']:
-                formatted_output.append(" | ".join(
+            # Add rows until the output size budget is used up
+            for row_index, row in enumerate(result['rows']):
+                line = " | ".join(
                     str(row[col]).ljust(widths[col])
                     for col in result['columns']
-                ))
+                )
+                output_size += len(line) + 1
+                if output_size > max_output_bytes:
+                    formatted_output.append(
+                        f"... {len(result['rows']) - row_index} more rows omitted "
+                        f"(output limited to {max_output_bytes} bytes)"
+                    )
+                    break
+                formatted_output.append(line)
             
         formatted_output.append(f"Rows returned: {result['row_count']}")
         formatted_output.append("")
@@ -1540,6 +1455,11 @@ def lambda_handler(event, context):
             print("Executing explain query scripts")
             results = analyze_query_performance(secret_name, query)
             formatted_results = format_analysis_output(results)
+        elif action_type == 'compare_plan':
+            query = event['query']
+            print("Comparing the current plan with the cached plan")
+            results = compare_query_plan(secret_name, query)
+            formatted_results = format_plan_comparison(results)
         elif action_type == 'extract_ddl':
             object_type = event['object_type']
             object_name = event['object_name']
@@ -1581,6 +1501,7 @@ def lambda_handler(event, context):
             }
         }
         
+        print(f"Connection metrics: {json.dumps(connection_manager.get_metrics())}")
         return function_response
 
     except Exception as e:
@@ -1,113 +1,107 @@
 
 import json
-import boto3
-import psycopg2
-import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from psycopg2.pool import ThreadedConnectionPool
 from botocore.exceptions import ClientError
+from db_connection_manager import connection_manager
+from statement_snapshots import record_snapshot, get_snapshot_store, compute_deltas, rank_deltas
+from report_model import Report, CRITICAL, REPORT_TOKEN_BUDGET, render_report
 
 def get_secret(secret_name):
-    """Get secret from AWS Secrets Manager """
-    #secret_name = os.environ['SECRET_NAME']
-    region_name = os.environ['REGION']
-    
-    session = boto3.session.Session()
-    client = session.client(
-        service_name='secretsmanager',
-        region_name=region_name
-    )
-    
+    """Get secret from AWS Secrets Manager, reusing it across warm invocations"""
     try:
-        secret_value = client.get_secret_value(SecretId=secret_name)
-        secret = json.loads(secret_value['SecretString'])
-        return secret
+        return connection_manager.get_secret(secret_name)
     except ClientError as e:
         raise Exception(f"Failed to get secret: {str(e)}")
 
+SLOW_QUERY_QUERIES = {
+    "slow_queries": """
+        SELECT 
+            CASE 
+                WHEN rolname IS NULL THEN 'unknown'
+                ELSE rolname 
+            END as username,
+            CASE 
+                WHEN datname IS NULL THEN 'unknown'
+                ELSE datname 
+            END as database,
+            query,
+            calls,
+            total_exec_time/1000 as total_time_sec,
+            min_exec_time/1000 as min_time_sec,
+            max_exec_time/1000 as max_time_sec,
+            mean_exec_time/1000 as avg_time_sec,
+            stddev_exec_time/1000 as stddev_time_sec,
+            rows
+        FROM pg_stat_statements s
+        LEFT JOIN pg_roles r ON r.oid = s.userid
+        LEFT JOIN pg_database d ON d.oid = s.dbid
+        ORDER BY total_exec_time DESC
+        LIMIT 10;
+    """,
+    "high_io_queries": """
+        SELECT 
+            CASE 
+                WHEN rolname IS NULL THEN 'unknown'
+                ELSE rolname 
+            END as username,
+            CASE 
+                WHEN datname IS NULL THEN 'unknown'
+                ELSE datname 
+            END as database,
+            query,
+            shared_blks_hit,
+            shared_blks_read,
+            shared_blks_dirtied,
+            shared_blks_written,
+            local_blks_hit,
+            local_blks_read,
+            temp_blks_read,
+            temp_blks_written
+        FROM pg_stat_statements s
+        LEFT JOIN pg_roles r ON r.oid = s.userid
+        LEFT JOIN pg_database d ON d.oid = s.dbid
+        ORDER BY shared_blks_read + shared_blks_written DESC
+        LIMIT 5;
+    """,
+    "high_temp_queries": """
+        SELECT 
+            CASE 
+                WHEN rolname IS NULL THEN 'unknown'
+                ELSE rolname 
+            END as username,
+            CASE 
+                WHEN datname IS NULL THEN 'unknown'
+                ELSE datname 
+            END as database,
+            query,
+            temp_blks_read,
+            temp_blks_written
+        FROM pg_stat_statements s
+        LEFT JOIN pg_roles r ON r.oid = s.userid
+        LEFT JOIN pg_database d ON d.oid = s.dbid
+        ORDER BY temp_blks_written + temp_blks_read DESC
+        LIMIT 5;
+    """,
+    "blocking_queries": """
+        SELECT 
+            blocked.pid AS blocked_pid,
+            blocked.usename AS blocked_user,
+            blocking.pid AS blocking_pid,
+            blocking.usename AS blocking_user,
+            blocked.query AS blocked_query,
+            blocking.query AS blocking_query
+        FROM pg_stat_activity blocked
+        JOIN pg_stat_activity blocking ON blocking.pid = ANY(pg_blocking_pids(blocked.pid))
+        WHERE NOT blocked.pid = blocking.pid
+        LIMIT 3;;
+    """
+}
+
 def execute_slow_query(secret_name, min_exec_time):
     """Execute multiple performance-related queries"""
-    queries = {
-        "slow_queries": """
-            SELECT 
-                CASE 
-                    WHEN rolname IS NULL THEN 'unknown'
-                    ELSE rolname 
-                END as username,
-                CASE 
-                    WHEN datname IS NULL THEN 'unknown'
-                    ELSE datname 
-                END as database,
-                query,
-                calls,
-                total_exec_time/1000 as total_time_sec,
-                min_exec_time/1000 as min_time_sec,
-                max_exec_time/1000 as max_time_sec,
-                mean_exec_time/1000 as avg_time_sec,
-                stddev_exec_time/1000 as stddev_time_sec,
-                rows
-            FROM pg_stat_statements s
-            LEFT JOIN pg_roles r ON r.oid = s.userid
-            LEFT JOIN pg_database d ON d.oid = s.dbid
-            ORDER BY total_exec_time DESC
-            LIMIT 10;
-        """,
-        "high_io_queries": """
-            SELECT 
-                CASE 
-                    WHEN rolname IS NULL THEN 'unknown'
-                    ELSE rolname 
-                END as username,
-                CASE 
-                    WHEN datname IS NULL THEN 'unknown'
-                    ELSE datname 
-                END as database,
-                query,
-                shared_blks_hit,
-                shared_blks_read,
-                shared_blks_dirtied,
-                shared_blks_written,
-                local_blks_hit,
-                local_blks_read,
-                temp_blks_read,
-                temp_blks_written
-            FROM pg_stat_statements s
-            LEFT JOIN pg_roles r ON r.oid = s.userid
-            LEFT JOIN pg_database d ON d.oid = s.dbid
-            ORDER BY shared_blks_read + shared_blks_written DESC
-            LIMIT 5;
-        """,
-        "high_temp_queries": """
-            SELECT 
-                CASE 
-                    WHEN rolname IS NULL THEN 'unknown'
-                    ELSE rolname 
-                END as username,
-                CASE 
-                    WHEN datname IS NULL THEN 'unknown'
-                    ELSE datname 
-                END as database,
-                query,
-                temp_blks_read,
-                temp_blks_written
-            FROM pg_stat_statements s
-            LEFT JOIN pg_roles r ON r.oid = s.userid
-            LEFT JOIN pg_database d ON d.oid = s.dbid
-            ORDER BY temp_blks_written + temp_blks_read DESC
-            LIMIT 5;
-        """,
-        "blocking_queries": """
-            SELECT 
-                blocked.pid AS blocked_pid,
-                blocked.usename AS blocked_user,
-                blocking.pid AS blocking_pid,
-                blocking.usename AS blocking_user,
-                blocked.query AS blocked_query,
-                blocking.query AS blocking_query
-            FROM pg_stat_activity blocked
-            JOIN pg_stat_activity blocking ON blocking.pid = ANY(pg_blocking_pids(blocked.pid))
-            WHERE NOT blocked.pid = blocking.pid
-            LIMIT 3;;
-        """
-    }
+    queries = SLOW_QUERY_QUERIES
     
     print("Connecting to the database...")
     conn = connect_to_db(secret_name)
@@ -143,144 +137,239 @@ def execute_slow_query(secret_name, min_exec_time):
         raise Exception(f"Failed to retrieve slow queries: {str(e)}")
     finally:
         if conn:
-            conn.close()
-
-def format_results_for_slow_query(results):
-    """Format results in a human-readable string"""
-    output = "Database Performance Analysis Report\n\n"
-    # Format slow queries
-    output += "=== TOP 20 SLOW QUERIES ===\n"
-    if results.get("slow_queries"):
-        for idx, query in enumerate(results["slow_queries"], 1):
-            output += f"\nQuery #{idx}:\n"
-            output += f"• Username: {query['username']}\n"
-            output += f"• Database: {query['database']}\n"
-            output += f"• Calls: {query['calls']}\n"
-            output += f"• Total Time: {round(query['total_time_sec'], 2)} sec\n"
-            output += f"• Avg Time: {round(query['avg_time_sec'], 2)} sec\n"
-            output += f"• Min Time: {round(query['min_time_sec'], 2)} sec\n"
-            output += f"• Max Time: {round(query['max_time_sec'], 2)} sec\n"
-            output += f"• Rows: {query['rows']}\n"
-            output += f"• Query: {query['query']}\n"
-    else:
-        output += "No slow queries found.\n"
-    
-    # Format high IO queries
-    output += "\n=== TOP 10 HIGH I/O QUERIES ===\n"
-    if results.get("high_io_queries"):
-        for idx, query in enumerate(results["high_io_queries"], 1):
-            output += f"\nQuery #{idx}:\n"
-            output += f"• Username: {query['username']}\n"
-            output += f"• Database: {query['database']}\n"
-            output += f"• Shared Blocks Hit: {query['shared_blks_hit']}\n"
-            output += f"• Shared Blocks Read: {query['shared_blks_read']}\n"
-            output += f"• Shared Blocks Written: {query['shared_blks_written']}\n"
-            output += f"• Temp Blocks Read: {query['temp_blks_read']}\n"
-            output += f"• Temp Blocks Written: {query['temp_blks_written']}\n"
-            output += f"• Query: {query['query']}\n"
-    else:
-        output += "No high I/O queries found.\n"
-    
-    # Format high temp usage queries
-    output += "\n=== TOP 10 HIGH TEMP USAGE QUERIES ===\n"
-    if results.get("high_temp_queries"):
-        for idx, query in enumerate(results["high_temp_queries"], 1):
-            output += f"\nQuery #{idx}:\n"
-            output += f"• Username: {query['username']}\n"
-            output += f"• Database: {query['database']}\n"
-            output += f"• Temp Blocks Read: {query['temp_blks_read']}\n"
-            output += f"• Temp Blocks Written: {query['temp_blks_written']}\n"
-            output += f"• Query: {query['query']}\n"
-    else:
-        output += "No high temp usage queries found.\n"
-    
-    # Format blocking queries
-    output += "\n=== BLOCKING QUERIES ===\n"
-    if results.get("blocking_queries"):
-        for idx, query in enumerate(results["blocking_queries"], 1):
-            output += f"\nBlocking Situation #{idx}:\n"
-            output += f"• Blocked PID: {query['blocked_pid']}\n"
-            output += f"• Blocked User: {query['blocked_user']}\n"
-            output += f"• Blocked Query: {query['blocked_query']}\n"
-            output += f"• Blocking PID: {query['blocking_pid']}\n"
-            output += f"• Blocking User: {query['blocking_user']}\n"
-            output += f"• Blocking Query: {query['blocking_query']}\n"
-    else:
-        output += "No blocking queries found.\n"
-    return output
+            release_db_connection(conn)
+
+def build_slow_query_report(results):
+    """Build the slow query report"""
+    report = Report("Database Performance Analysis Report")
+
+    section = report.add_section("TOP 20 SLOW QUERIES", "No slow queries found.")
+    for idx, query in enumerate(results.get("slow_queries") or [], 1):
+        (section.add_row(f"Query #{idx}")
+            .add("Username", query['username'])
+            .add("Database", query['database'])
+            .add("Calls", query['calls'])
+            .add("Total Time", round(query['total_time_sec'], 2), "sec")
+            .add("Avg Time", round(query['avg_time_sec'], 2), "sec")
+            .add("Min Time", round(query['min_time_sec'], 2), "sec")
+            .add("Max Time", round(query['max_time_sec'], 2), "sec")
+            .add("Rows", query['rows'])
+            .add("Query", query['query']))
+
+    section = report.add_section("TOP 10 HIGH I/O QUERIES", "No high I/O queries found.")
+    for idx, query in enumerate(results.get("high_io_queries") or [], 1):
+        (section.add_row(f"Query #{idx}")
+            .add("Username", query['username'])
+            .add("Database", query['database'])
+            .add("Shared Blocks Hit", query['shared_blks_hit'])
+            .add("Shared Blocks Read", query['shared_blks_read'])
+            .add("Shared Blocks Written", query['shared_blks_written'])
+            .add("Temp Blocks Read", query['temp_blks_read'])
+            .add("Temp Blocks Written", query['temp_blks_written'])
+            .add("Query", query['query']))
+
+    section = report.add_section("TOP 10 HIGH TEMP USAGE QUERIES", "No high temp usage queries found.")
+    for idx, query in enumerate(results.get("high_temp_queries") or [], 1):
+        (section.add_row(f"Query #{idx}")
+            .add("Username", query['username'])
+            .add("Database", query['database'])
+            .add("Temp Blocks Read", query['temp_blks_read'])
+            .add("Temp Blocks Written", query['temp_blks_written'])
+            .add("Query", query['query']))
+
+    section = report.add_section("BLOCKING QUERIES", "No blocking queries found.")
+    for idx, query in enumerate(results.get("blocking_queries") or [], 1):
+        (section.add_row(f"Blocking Situation #{idx}")
+            .add("Blocked PID", query['blocked_pid'])
+            .add("Blocked User", query['blocked_user'])
+            .add("Blocked Query", query['blocked_query'])
+            .add("Blocking PID", query['blocking_pid'])
+            .add("Blocking User", query['blocking_user'])
+            .add("Blocking Query", query['blocking_query'])
+            .warn("Session is blocked by another session"))
+    return report
+
+CONNECTION_QUERIES = {
+    "current_connections": """
+        SELECT 
+            datname as database,
+            usename as username,
+            application_name,
+            client_addr,
+            backend_start,
+            state,
+            wait_event_type,
+            wait_event,
+            query
+        FROM pg_stat_activity
+        WHERE state IS NOT NULL
+        ORDER BY backend_start DESC;
+    """,
+    "connection_stats": """
+        SELECT 
+            datname as database,
+            numbackends as current_connections,
+            xact_commit as commits,
+            xact_rollback as rollbacks,
+            blks_read,
+            blks_hit,
+            tup_returned,
+            tup_fetched,
+            tup_inserted,
+            tup_updated,
+            tup_deleted
+        FROM pg_stat_database
+        WHERE datname IS NOT NULL;
+    """,
+    "idle_connections": """
+        SELECT 
+            datname as database,
+            usename as username,
+            application_name,
+            client_addr,
+            backend_start,
+            state,
+            state_change,
+            query
+        FROM pg_stat_activity
+        WHERE state = 'idle'
+        ORDER BY backend_start DESC;
+    """,
+    "locked_queries": """
+        SELECT DISTINCT ON (pid)
+            pid,
+            usename as username,
+            datname as database,
+            mode,
+            CASE locktype
+                WHEN 'relation' THEN rel.relname
+                WHEN 'virtualxid' THEN 'virtual transaction'
+                WHEN 'transactionid' THEN 'transaction'
+                WHEN 'tuple' THEN 'tuple'
+                ELSE locktype
+            END as lock_type,
+            application_name,
+            state,
+            query,
+            age(now(), query_start) as query_duration
+        FROM pg_stat_activity sa
+        JOIN pg_locks locks ON sa.pid = locks.pid
+        LEFT JOIN pg_class rel ON rel.oid = locks.relation
+        WHERE NOT granted
+        ORDER BY pid, query_start;
+    """
+}
+
+def execute_slow_query_window(secret_name, environment, window_minutes=60, min_exec_time=0):
+    """Rank statements by the work they did in the last window_minutes using pg_stat_statements snapshots"""
+    conn = connect_to_db(secret_name)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                CREATE EXTENSION IF NOT EXISTS pg_stat_statements;
+            """)
+            conn.commit()
+        captured_at, current_rows = record_snapshot(conn, environment)
+    except Exception as e:
+        raise Exception(f"Failed to capture pg_stat_statements snapshot: {str(e)}")
+    finally:
+        if conn:
+            release_db_connection(conn)
+
+    # Compare against the newest snapshot taken before the window started, or the
+    # oldest one available if snapshots do not go back that far yet
+    store = get_snapshot_store()
+    baseline = store.latest_at_or_before(environment, captured_at - window_minutes * 60)
+    if baseline is None:
+        baseline = store.oldest(environment)
+    if baseline is None or baseline[0] >= captured_at:
+        return {'baseline_found': False, 'requested_window_minutes': window_minutes}
+
+    baseline_at, baseline_rows = baseline
+    interval_seconds = captured_at - baseline_at
+    deltas = compute_deltas(baseline_rows, current_rows, interval_seconds)
+
+    # Statements whose mean time in the window is at least twice their earlier mean
+    regressed = [
+        delta for delta in deltas
+        if delta.get('previous_mean_exec_time_ms')
+        and delta['mean_exec_time_ms'] >= max(min_exec_time, 2 * delta['previous_mean_exec_time_ms'])
+    ]
+    regressed.sort(key=lambda delta: delta['mean_exec_time_ms'] / delta['previous_mean_exec_time_ms'], reverse=True)
+
+    return {
+        'baseline_found': True,
+        'requested_window_minutes': window_minutes,
+        'interval_seconds': interval_seconds,
+        'statements_active': len(deltas),
+        'top_total_time': rank_deltas(deltas, 'total_exec_time', min_exec_time),
+        'top_mean_time': rank_deltas(deltas, 'mean_exec_time_ms', min_exec_time),
+        'top_call_rate': rank_deltas(deltas, 'calls_per_second', min_exec_time),
+        'top_blocks_read': rank_deltas(deltas, 'shared_blks_read', min_exec_time, limit=5),
+        'top_temp_blocks': rank_deltas(deltas, 'temp_blks_written', min_exec_time, limit=5),
+        'regressed_queries': regressed[:10],
+    }
+
+def execute_capture_statement_snapshot(secret_name, environment):
+    """Store a pg_stat_statements snapshot; intended to run on a schedule"""
+    conn = connect_to_db(secret_name)
+    try:
+        captured_at, rows = record_snapshot(conn, environment)
+        return {'captured_at': captured_at, 'statement_count': len(rows)}
+    except Exception as e:
+        raise Exception(f"Failed to capture pg_stat_statements snapshot: {str(e)}")
+    finally:
+        if conn:
+            release_db_connection(conn)
+
+def build_slow_query_window_report(results):
+    """Build the windowed slow query report"""
+    report = Report(f"Slow Query Analysis for the Last {results['requested_window_minutes']} Minutes")
+    if not results['baseline_found']:
+        report.notes.append(
+            "No earlier pg_stat_statements snapshot is available yet. A snapshot has been "
+            "stored now; ask again later or schedule the capture_statement_snapshot action "
+            "to collect snapshots periodically."
+        )
+        return report
+
+    interval_minutes = results['interval_seconds'] / 60
+    report.notes.append(f"Compared interval: {interval_minutes:.1f} minutes")
+    if interval_minutes < results['requested_window_minutes'] * 0.9:
+        report.notes.append("Note: snapshots do not cover the full requested window yet.")
+    report.notes.append(f"Statements executed in the interval: {results['statements_active']}")
+
+    sections = [
+        ("REGRESSED QUERIES (AVG TIME AT LEAST 2X EARLIER AVG)", 'regressed_queries', "No regressed queries found."),
+        ("TOP QUERIES BY TOTAL TIME IN INTERVAL", 'top_total_time', "No queries found."),
+        ("TOP QUERIES BY AVG TIME IN INTERVAL", 'top_mean_time', "No queries found."),
+        ("TOP QUERIES BY CALL RATE", 'top_call_rate', "No queries found."),
+        ("TOP QUERIES BY SHARED BLOCKS READ", 'top_blocks_read', "No queries found."),
+        ("TOP QUERIES BY TEMP BLOCKS WRITTEN", 'top_temp_blocks', "No queries found."),
+    ]
+    for title, key, empty_message in sections:
+        section = report.add_section(title, empty_message)
+        for idx, query in enumerate(results.get(key) or [], 1):
+            row = (section.add_row(f"Query #{idx}")
+                .add("Username", query['username'])
+                .add("Database", query['database'])
+                .add("Calls", f"{int(query['calls'])} ({query['calls_per_second']:.2f}/sec)")
+                .add("Total Time", f"{query['total_exec_time'] / 1000:.2f}", "sec")
+                .add("Avg Time", f"{query['mean_exec_time_ms']:.2f}", "ms"))
+            if query.get('previous_mean_exec_time_ms'):
+                row.add("Avg Time Before Interval", f"{query['previous_mean_exec_time_ms']:.2f}", "ms")
+            row.add("Shared Blocks Read", int(query['shared_blks_read']))
+            row.add("Temp Blocks Written", int(query['temp_blks_written']))
+            if query['new_statement']:
+                row.add("New statement", "not in the earlier snapshot")
+            row.add("Query", query['query'])
+            if key == 'regressed_queries':
+                row.warn("Average execution time at least doubled in this interval")
+    return report
 
 def execute_connect_issues(secret_name, min_exec_time):
     """Execute connection management related queries"""
-    queries = {
-        "current_connections": """
-            SELECT 
-                datname as database,
-                usename as username,
-                application_name,
-                client_addr,
-                backend_start,
-                state,
-                wait_event_type,
-                wait_event,
-                query
-            FROM pg_stat_activity
-            WHERE state IS NOT NULL
-            ORDER BY backend_start DESC;
-        """,
-        "connection_stats": """
-            SELECT 
-                datname as database,
-                numbackends as current_connections,
-                xact_commit as commits,
-                xact_rollback as rollbacks,
-                blks_read,
-                blks_hit,
-                tup_returned,
-                tup_fetched,
-                tup_inserted,
-                tup_updated,
-                tup_deleted
-            FROM pg_stat_database
-            WHERE datname IS NOT NULL;
-        """,
-        "idle_connections": """
-            SELECT 
-                datname as database,
-                usename as username,
-                application_name,
-                client_addr,
-                backend_start,
-                state,
-                state_change,
-                query
-            FROM pg_stat_activity
-            WHERE state = 'idle'
-            ORDER BY backend_start DESC;
-        """,
-        "locked_queries": """
-            SELECT DISTINCT ON (pid)
-                pid,
-                usename as username,
-                datname as database,
-                mode,
-                CASE locktype
-                    WHEN 'relation' THEN rel.relname
-                    WHEN 'virtualxid' THEN 'virtual transaction'
-                    WHEN 'transactionid' THEN 'transaction'
-                    WHEN 'tuple' THEN 'tuple'
-                    ELSE locktype
-                END as lock_type,
-                application_name,
-                state,
-                query,
-                age(now(), query_start) as query_duration
-            FROM pg_stat_activity sa
-            JOIN pg_locks locks ON sa.pid = locks.pid
-            LEFT JOIN pg_class rel ON rel.oid = locks.relation
-            WHERE NOT granted
-            ORDER BY pid, query_start;
-        """
-    }
+    queries = CONNECTION_QUERIES
     
     conn = connect_to_db(secret_name)
     try:
@@ -318,121 +407,108 @@ def execute_connect_issues(secret_name, min_exec_time):
         raise Exception(f"Failed to retrieve connection metrics: {str(e)}")
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
 
-def format_results_for_conn_issues(results):
-    """Format connection management results in a human-readable string"""
-    output = "Database Connection Management Analysis Report\n\n"
-    
-    # Format current connections
-    output += "=== CURRENT CONNECTIONS ===\n"
-    if results.get("current_connections"):
-        for idx, conn in enumerate(results["current_connections"], 1):
-            output += f"\nConnection #{idx}:\n"
-            output += f"• Database: {conn['database']}\n"
-            output += f"• Username: {conn['username']}\n"
-            output += f"• Application: {conn['application_name']}\n"
-            output += f"• Client Address: {conn['client_addr']}\n"
-            output += f"• State: {conn['state']}\n"
-            output += f"• Wait Event Type: {conn['wait_event_type']}\n"
-            output += f"• Wait Event: {conn['wait_event']}\n"
-            output += f"• Current Query: {conn['query']}\n"
-    else:
-        output += "No current connections found.\n"
-    
-    # Format connection stats
-    output += "\n=== DATABASE CONNECTION STATISTICS ===\n"
-    if results.get("connection_stats"):
-        for idx, stat in enumerate(results["connection_stats"], 1):
-            output += f"\nDatabase: {stat['database']}\n"
-            output += f"• Current Connections: {stat['current_connections']}\n"
-            output += f"• Commits: {stat['commits']}\n"
-            output += f"• Rollbacks: {stat['rollbacks']}\n"
-            output += f"• Blocks Read: {stat['blks_read']}\n"
-            output += f"• Blocks Hit: {stat['blks_hit']}\n"
-            output += f"• Tuples Returned: {stat['tup_returned']}\n"
-            output += f"• Tuples Fetched: {stat['tup_fetched']}\n"
-            output += f"• Tuples Inserted: {stat['tup_inserted']}\n"
-            output += f"• Tuples Updated: {stat['tup_updated']}\n"
-            output += f"• Tuples Deleted: {stat['tup_deleted']}\n"
-    else:
-        output += "No connection statistics available.\n"
-    
-    # Format idle connections
-    output += "\n=== IDLE CONNECTIONS ===\n"
-    if results.get("idle_connections"):
-        for idx, idle in enumerate(results["idle_connections"], 1):
-            output += f"\nIdle Connection #{idx}:\n"
-            output += f"• Database: {idle['database']}\n"
-            output += f"• Username: {idle['username']}\n"
-            output += f"• Application: {idle['application_name']}\n"
-            output += f"• Client Address: {idle['client_addr']}\n"
-            output += f"• Backend Start: {idle['backend_start']}\n"
-            output += f"• State Change: {idle['state_change']}\n"
-            output += f"• Last Query: {idle['query']}\n"
-    else:
-        output += "No idle connections found.\n"
-    
-    # Format locked queries
-    output += "\n=== LOCKED QUERIES ===\n"
-    if results.get("locked_queries"):
-        for idx, lock in enumerate(results["locked_queries"], 1):
-            output += f"\nLocked Query #{idx}:\n"
-            output += f"• PID: {lock['pid']}\n"
-            output += f"• Username: {lock['username']}\n"
-            output += f"• Database: {lock['database']}\n"
-            output += f"• Lock Type: {lock['lock_type']}\n"
-            output += f"• Lock Mode: {lock['mode']}\n"
-            output += f"• Application: {lock['application_name']}\n"
-            output += f"• State: {lock['state']}\n"
-            output += f"• Query Duration: {lock['query_duration']}\n"
-            output += f"• Query: {lock['query']}\n"
-    else:
-        output += "No locked queries found.\n"
-    
-    return output
+def build_conn_issues_report(results):
+    """Build the connection management report"""
+    report = Report("Database Connection Management Analysis Report")
+
+    section = report.add_section("CURRENT CONNECTIONS", "No current connections found.")
+    for idx, conn in enumerate(results.get("current_connections") or [], 1):
+        (section.add_row(f"Connection #{idx}")
+            .add("Database", conn['database'])
+            .add("Username", conn['username'])
+            .add("Application", conn['application_name'])
+            .add("Client Address", conn['client_addr'])
+            .add("State", conn['state'])
+            .add("Wait Event Type", conn['wait_event_type'])
+            .add("Wait Event", conn['wait_event'])
+            .add("Current Query", conn['query']))
+
+    section = report.add_section("DATABASE CONNECTION STATISTICS", "No connection statistics available.")
+    for stat in results.get("connection_stats") or []:
+        (section.add_row(f"Database {stat['database']}")
+            .add("Current Connections", stat['current_connections'])
+            .add("Commits", stat['commits'])
+            .add("Rollbacks", stat['rollbacks'])
+            .add("Blocks Read", stat['blks_read'])
+            .add("Blocks Hit", stat['blks_hit'])
+            .add("Tuples Returned", stat['tup_returned'])
+            .add("Tuples Fetched", stat['tup_fetched'])
+            .add("Tuples Inserted", stat['tup_inserted'])
+            .add("Tuples Updated", stat['tup_updated'])
+            .add("Tuples Deleted", stat['tup_deleted']))
+
+    section = report.add_section("IDLE CONNECTIONS", "No idle connections found.")
+    for idx, idle in enumerate(results.get("idle_connections") or [], 1):
+        (section.add_row(f"Idle Connection #{idx}")
+            .add("Database", idle['database'])
+            .add("Username", idle['username'])
+            .add("Application", idle['application_name'])
+            .add("Client Address", idle['client_addr'])
+            .add("Backend Start", idle['backend_start'])
+            .add("State Change", idle['state_change'])
+            .add("Last Query", idle['query']))
+
+    section = report.add_section("LOCKED QUERIES", "No locked queries found.")
+    for idx, lock in enumerate(results.get("locked_queries") or [], 1):
+        (section.add_row(f"Locked Query #{idx}")
+            .add("PID", lock['pid'])
+            .add("Username", lock['username'])
+            .add("Database", lock['database'])
+            .add("Lock Type", lock['lock_type'])
+            .add("Lock Mode", lock['mode'])
+            .add("Application", lock['application_name'])
+            .add("State", lock['state'])
+            .add("Query Duration", lock['query_duration'])
+            .add("Query", lock['query'])
+            .warn("Query is waiting on a lock"))
+
+    return report
+
+INDEX_QUERIES = {
+    "unused_indexes": """
+        SELECT s.schemaname, 
+               s.relname as table_name, 
+               s.indexrelname as index_name, 
+               s.idx_scan, 
+               pg_size_pretty(pg_relation_size(s.indexrelid::regclass)) as index_size,
+               pg_relation_size(s.indexrelid) as index_size_bytes
+        FROM pg_stat_user_indexes s
+        JOIN pg_index i ON s.indexrelid = i.indexrelid
+        WHERE s.idx_scan = 0 AND NOT i.indisprimary
+        ORDER BY pg_relation_size(s.indexrelid) DESC;
+    """,
+    "missing_indexes": """
+        SELECT schemaname, 
+               relname as table_name, 
+               seq_scan, 
+               seq_tup_read,
+               idx_scan, 
+               idx_tup_fetch,
+               pg_size_pretty(pg_relation_size(relid)) as table_size,
+               ROUND(seq_scan::float/(seq_scan+idx_scan+1)::float, 2) as seq_scan_ratio
+        FROM pg_stat_user_tables
+        WHERE seq_scan > 0
+        ORDER BY seq_tup_read DESC;
+    """,
+    "index_efficiency": """
+        SELECT s.relname as table_name,
+               i.indexrelname as index_name,
+               i.idx_scan as times_used,
+               pg_size_pretty(pg_relation_size(i.indexrelid::regclass)) as index_size,
+               ROUND(i.idx_scan::float / NULLIF(pg_relation_size(i.indexrelid), 0)::float, 6) as scans_per_byte
+        FROM pg_stat_user_tables s
+        JOIN pg_stat_user_indexes i ON s.relid = i.relid
+        WHERE i.idx_scan > 0
+        ORDER BY i.idx_scan::float / NULLIF(pg_relation_size(i.indexrelid), 0)::float ASC
+        LIMIT 20;
+    """
+}
 
 def execute_index_analysis(secret_name):
     """Execute index-related analysis queries"""
-    queries = {
-        "unused_indexes": """
-            SELECT s.schemaname, 
-                   s.relname as table_name, 
-                   s.indexrelname as index_name, 
-                   s.idx_scan, 
-                   pg_size_pretty(pg_relation_size(s.indexrelid::regclass)) as index_size,
-                   pg_relation_size(s.indexrelid) as index_size_bytes
-            FROM pg_stat_user_indexes s
-            JOIN pg_index i ON s.indexrelid = i.indexrelid
-            WHERE s.idx_scan = 0 AND NOT i.indisprimary
-            ORDER BY pg_relation_size(s.indexrelid) DESC;
-        """,
-        "missing_indexes": """
-            SELECT schemaname, 
-                   relname as table_name, 
-                   seq_scan, 
-                   seq_tup_read,
-                   idx_scan, 
-                   idx_tup_fetch,
-                   pg_size_pretty(pg_relation_size(relid)) as table_size,
-                   ROUND(seq_scan::float/(seq_scan+idx_scan+1)::float, 2) as seq_scan_ratio
-            FROM pg_stat_user_tables
-            WHERE seq_scan > 0
-            ORDER BY seq_tup_read DESC;
-        """,
-        "index_efficiency": """
-            SELECT s.relname as table_name,
-                   i.indexrelname as index_name,
-                   i.idx_scan as times_used,
-                   pg_size_pretty(pg_relation_size(i.indexrelid::regclass)) as index_size,
-                   ROUND(i.idx_scan::float / NULLIF(pg_relation_size(i.indexrelid), 0)::float, 6) as scans_per_byte
-            FROM pg_stat_user_tables s
-            JOIN pg_stat_user_indexes i ON s.relid = i.relid
-            WHERE i.idx_scan > 0
-            ORDER BY i.idx_scan::float / NULLIF(pg_relation_size(i.indexrelid), 0)::float ASC
-            LIMIT 20;
-        """
-    }
+    queries = INDEX_QUERIES
     
     conn = connect_to_db(secret_name)
     try:
@@ -465,109 +541,108 @@ def execute_index_analysis(secret_name):
         raise Exception(f"Failed to retrieve index metrics: {str(e)}")
     finally:
         if conn:
-            conn.close()
-    
-def format_results_for_index_analysis(results):
-    """Format index analysis results in a human-readable string"""
-    output = "Database Index Analysis Report\n\n"
-    
-    # Format unused indexes
-    output += "=== UNUSED INDEXES ===\n"
-    if results.get("unused_indexes"):
-        for idx, index in enumerate(results["unused_indexes"], 1):
-            output += f"\nUnused Index #{idx}:\n"
-            output += f"• Schema: {index['schemaname']}\n"
-            output += f"• Table: {index['table_name']}\n"
-            output += f"• Index: {index['index_name']}\n"
-            output += f"• Scan Count: {index['idx_scan']}\n"
-            output += f"• Index Size: {index['index_size']}\n"
-        output += "\nRecommendation: Consider removing these unused indexes to reduce maintenance overhead and storage space.\n"
-    else:
-        output += "No unused indexes found.\n"
+            release_db_connection(conn)
     
-    # Format missing indexes
-    output += "\n=== POTENTIAL MISSING INDEXES (High Sequential Scans) ===\n"
-    if results.get("missing_indexes"):
-        for idx, table in enumerate(results["missing_indexes"], 1):
-            output += f"\nTable #{idx}:\n"
-            output += f"• Schema: {table['schemaname']}\n"
-            output += f"• Table: {table['table_name']}\n"
-            output += f"• Sequential Scans: {table['seq_scan']}\n"
-            output += f"• Sequential Tuples Read: {table['seq_tup_read']}\n"
-            output += f"• Index Scans: {table['idx_scan']}\n"
-            output += f"• Index Tuples Fetched: {table['idx_tup_fetch']}\n"
-            output += f"• Table Size: {table['table_size']}\n"
-            output += f"• Sequential Scan Ratio: {table['seq_scan_ratio']}\n"
-        output += "\nRecommendation: Tables with high sequential scan ratios might benefit from additional indexes.\n"
-    else:
-        output += "No tables with significant sequential scans found.\n"
-    
-    # Format index efficiency
-    output += "\n=== INDEX USAGE EFFICIENCY ===\n"
-    if results.get("index_efficiency"):
-        for idx, index in enumerate(results["index_efficiency"], 1):
-            output += f"\nIndex #{idx}:\n"
-            output += f"• Table: {index['table_name']}\n"
-            output += f"• Index: {index['index_name']}\n"
-            output += f"• Times Used: {index['times_used']}\n"
-            output += f"• Index Size: {index['index_size']}\n"
-            output += f"• Scans per Byte: {index['scans_per_byte']}\n"
-        output += "\nRecommendation: Indexes with very low scans per byte might be candidates for removal or restructuring.\n"
-    else:
-        output += "No index usage statistics found.\n"
-    
-    return output
+def build_index_analysis_report(results):
+    """Build the index analysis report"""
+    report = Report("Database Index Analysis Report")
+
+    section = report.add_section(
+        "UNUSED INDEXES",
+        "No unused indexes found.",
+        "Consider removing these unused indexes to reduce maintenance overhead and storage space."
+    )
+    for idx, index in enumerate(results.get("unused_indexes") or [], 1):
+        (section.add_row(f"Unused Index #{idx}")
+            .add("Schema", index['schemaname'])
+            .add("Table", index['table_name'])
+            .add("Index", index['index_name'])
+            .add("Scan Count", index['idx_scan'])
+            .add("Index Size", index['index_size']))
+
+    section = report.add_section(
+        "POTENTIAL MISSING INDEXES (High Sequential Scans)",
+        "No tables with significant sequential scans found.",
+        "Tables with high sequential scan ratios might benefit from additional indexes."
+    )
+    for idx, table in enumerate(results.get("missing_indexes") or [], 1):
+        (section.add_row(f"Table #{idx}")
+            .add("Schema", table['schemaname'])
+            .add("Table", table['table_name'])
+            .add("Sequential Scans", table['seq_scan'])
+            .add("Sequential Tuples Read", table['seq_tup_read'])
+            .add("Index Scans", table['idx_scan'])
+            .add("Index Tuples Fetched", table['idx_tup_fetch'])
+            .add("Table Size", table['table_size'])
+            .add("Sequential Scan Ratio", table['seq_scan_ratio']))
+
+    section = report.add_section(
+        "INDEX USAGE EFFICIENCY",
+        "No index usage statistics found.",
+        "Indexes with very low scans per byte might be candidates for removal or restructuring."
+    )
+    for idx, index in enumerate(results.get("index_efficiency") or [], 1):
+        (section.add_row(f"Index #{idx}")
+            .add("Table", index['table_name'])
+            .add("Index", index['index_name'])
+            .add("Times Used", index['times_used'])
+            .add("Index Size", index['index_size'])
+            .add("Scans per Byte", index['scans_per_byte']))
+
+    return report
+
+AUTOVACUUM_QUERIES = {
+    "tables_needing_vacuum": """
+        SELECT relname as table_name, 
+               n_dead_tup as dead_tuples, 
+               n_live_tup as live_tuples, 
+               (n_dead_tup::float / NULLIF(n_live_tup + n_dead_tup, 0) * 100)::numeric(10,2) as dead_percentage,
+               last_vacuum,
+               last_autovacuum,
+               last_analyze,
+               last_autoanalyze
+        FROM pg_stat_user_tables
+        WHERE n_dead_tup > 0
+        ORDER BY dead_percentage DESC;
+    """,
+    "autovacuum_activity": """
+        SELECT pid, 
+               datname, 
+               usename, 
+               query, 
+               state, 
+               wait_event_type, 
+               wait_event, 
+               age(now(), xact_start) as xact_age,
+               age(now(), query_start) as query_age
+        FROM pg_stat_activity
+        WHERE query LIKE '%autovacuum%' 
+        AND state != 'idle';
+    """,
+    "table_bloat": """
+        SELECT schemaname, 
+               relname, 
+               n_live_tup, 
+               n_dead_tup, 
+               pg_size_pretty(pg_total_relation_size(schemaname || '.' || relname::text)) as total_size
+        FROM pg_stat_user_tables
+        ORDER BY n_dead_tup DESC
+        LIMIT 20;
+    """,
+    "wraparound_status": """
+        SELECT datname, 
+               age(datfrozenxid) as xid_age,
+               current_setting('autovacuum_freeze_max_age')::int as max_age,
+               round(100 * age(datfrozenxid)::float / 
+               current_setting('autovacuum_freeze_max_age')::int) as percent_towards_wraparound
+        FROM pg_database
+        ORDER BY age(datfrozenxid) DESC;
+    """
+}
 
 def execute_autovacuum_analysis(secret_name):
     """Execute autovacuum-related analysis queries"""
-    queries = {
-        "tables_needing_vacuum": """
-            SELECT relname as table_name, 
-                   n_dead_tup as dead_tuples, 
-                   n_live_tup as live_tuples, 
-                   (n_dead_tup::float / NULLIF(n_live_tup + n_dead_tup, 0) * 100)::numeric(10,2) as dead_percentage,
-                   last_vacuum,
-                   last_autovacuum,
-                   last_analyze,
-                   last_autoanalyze
-            FROM pg_stat_user_tables
-            WHERE n_dead_tup > 0
-            ORDER BY dead_percentage DESC;
-        """,
-        "autovacuum_activity": """
-            SELECT pid, 
-                   datname, 
-                   usename, 
-                   query, 
-                   state, 
-                   wait_event_type, 
-                   wait_event, 
-                   age(now(), xact_start) as xact_age,
-                   age(now(), query_start) as query_age
-            FROM pg_stat_activity
-            WHERE query LIKE '%autovacuum%' 
-            AND state != 'idle';
-        """,
-        "table_bloat": """
-            SELECT schemaname, 
-                   relname, 
-                   n_live_tup, 
-                   n_dead_tup, 
-                   pg_size_pretty(pg_total_relation_size(schemaname || '.' || relname::text)) as total_size
-            FROM pg_stat_user_tables
-            ORDER BY n_dead_tup DESC
-            LIMIT 20;
-        """,
-        "wraparound_status": """
-            SELECT datname, 
-                   age(datfrozenxid) as xid_age,
-                   current_setting('autovacuum_freeze_max_age')::int as max_age,
-                   round(100 * age(datfrozenxid)::float / 
-                   current_setting('autovacuum_freeze_max_age')::int) as percent_towards_wraparound
-            FROM pg_database
-            ORDER BY age(datfrozenxid) DESC;
-        """
-    }
+    queries = AUTOVACUUM_QUERIES
     
     conn = connect_to_db(secret_name)
     try:
@@ -600,121 +675,108 @@ def execute_autovacuum_analysis(secret_name):
         raise Exception(f"Failed to retrieve autovacuum metrics: {str(e)}")
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
 
-def format_results_for_autovacuum_analysis(results):
-    """Format autovacuum analysis results in a human-readable string"""
-    output = "Database Autovacuum Analysis Report\n\n"
-    
-    # Format tables needing vacuum
-    output += "=== TABLES NEEDING VACUUM ===\n"
-    if results.get("tables_needing_vacuum"):
-        for idx, table in enumerate(results["tables_needing_vacuum"], 1):
-            output += f"\nTable #{idx}:\n"
-            output += f"• Table Name: {table['table_name']}\n"
-            output += f"• Dead Tuples: {table['dead_tuples']}\n"
-            output += f"• Live Tuples: {table['live_tuples']}\n"
-            output += f"• Dead Percentage: {table['dead_percentage']}%\n"
-            output += f"• Last Vacuum: {table['last_vacuum'] or 'Never'}\n"
-            output += f"• Last Autovacuum: {table['last_autovacuum'] or 'Never'}\n"
-            output += f"• Last Analyze: {table['last_analyze'] or 'Never'}\n"
-            output += f"• Last Autoanalyze: {table['last_autoanalyze'] or 'Never'}\n"
-        output += "\nRecommendation: Consider running VACUUM on tables with high dead tuple percentages.\n"
-    else:
-        output += "No tables with dead tuples found.\n"
-    
-    # Format current autovacuum activity
-    output += "\n=== CURRENT AUTOVACUUM ACTIVITY ===\n"
-    if results.get("autovacuum_activity"):
-        for idx, activity in enumerate(results["autovacuum_activity"], 1):
-            output += f"\nAutovacuum Process #{idx}:\n"
-            output += f"• PID: {activity['pid']}\n"
-            output += f"• Database: {activity['datname']}\n"
-            output += f"• User: {activity['usename']}\n"
-            output += f"• State: {activity['state']}\n"
-            output += f"• Wait Event Type: {activity['wait_event_type']}\n"
-            output += f"• Wait Event: {activity['wait_event']}\n"
-            output += f"• Transaction Age: {activity['xact_age']}\n"
-            output += f"• Query Age: {activity['query_age']}\n"
-            output += f"• Query: {activity['query']}\n"
-    else:
-        output += "No active autovacuum processes found.\n"
-    
-    # Format table bloat information
-    output += "\n=== TABLE BLOAT INFORMATION ===\n"
-    if results.get("table_bloat"):
-        for idx, bloat in enumerate(results["table_bloat"], 1):
-            output += f"\nTable #{idx}:\n"
-            output += f"• Schema: {bloat['schemaname']}\n"
-            output += f"• Table: {bloat['relname']}\n"
-            output += f"• Live Tuples: {bloat['n_live_tup']}\n"
-            output += f"• Dead Tuples: {bloat['n_dead_tup']}\n"
-            output += f"• Total Size: {bloat['total_size']}\n"
-    else:
-        output += "No table bloat information available.\n"
-    
-    # Format transaction wraparound status
-    output += "\n=== TRANSACTION WRAPAROUND STATUS ===\n"
-    if results.get("wraparound_status"):
-        for idx, status in enumerate(results["wraparound_status"], 1):
-            output += f"\nDatabase: {status['datname']}\n"
-            output += f"• XID Age: {status['xid_age']}\n"
-            output += f"• Max Age: {status['max_age']}\n"
-            output += f"• Percent Towards Wraparound: {status['percent_towards_wraparound']}%\n"
-            
-            # Add warning if approaching wraparound
-            if status['percent_towards_wraparound'] > 75:
-                output += "⚠️ WARNING: Database is approaching transaction wraparound limit!\n"
-    else:
-        output += "No wraparound status information available.\n"
-    
-    return output
+def build_autovacuum_analysis_report(results):
+    """Build the autovacuum analysis report"""
+    report = Report("Database Autovacuum Analysis Report")
+
+    section = report.add_section(
+        "TABLES NEEDING VACUUM",
+        "No tables with dead tuples found.",
+        "Consider running VACUUM on tables with high dead tuple percentages."
+    )
+    for idx, table in enumerate(results.get("tables_needing_vacuum") or [], 1):
+        (section.add_row(f"Table #{idx}")
+            .add("Table Name", table['table_name'])
+            .add("Dead Tuples", table['dead_tuples'])
+            .add("Live Tuples", table['live_tuples'])
+            .add("Dead Percentage", table['dead_percentage'], "%")
+            .add("Last Vacuum", table['last_vacuum'] or 'Never')
+            .add("Last Autovacuum", table['last_autovacuum'] or 'Never')
+            .add("Last Analyze", table['last_analyze'] or 'Never')
+            .add("Last Autoanalyze", table['last_autoanalyze'] or 'Never'))
+
+    section = report.add_section("CURRENT AUTOVACUUM ACTIVITY", "No active autovacuum processes found.")
+    for idx, activity in enumerate(results.get("autovacuum_activity") or [], 1):
+        (section.add_row(f"Autovacuum Process #{idx}")
+            .add("PID", activity['pid'])
+            .add("Database", activity['datname'])
+            .add("User", activity['usename'])
+            .add("State", activity['state'])
+            .add("Wait Event Type", activity['wait_event_type'])
+            .add("Wait Event", activity['wait_event'])
+            .add("Transaction Age", activity['xact_age'])
+            .add("Query Age", activity['query_age'])
+            .add("Query", activity['query']))
+
+    section = report.add_section("TABLE BLOAT INFORMATION", "No table bloat information available.")
+    for idx, bloat in enumerate(results.get("table_bloat") or [], 1):
+        (section.add_row(f"Table #{idx}")
+            .add("Schema", bloat['schemaname'])
+            .add("Table", bloat['relname'])
+            .add("Live Tuples", bloat['n_live_tup'])
+            .add("Dead Tuples", bloat['n_dead_tup'])
+            .add("Total Size", bloat['total_size']))
+
+    section = report.add_section("TRANSACTION WRAPAROUND STATUS", "No wraparound status information available.")
+    for status in results.get("wraparound_status") or []:
+        row = (section.add_row(f"Database {status['datname']}")
+            .add("XID Age", status['xid_age'])
+            .add("Max Age", status['max_age'])
+            .add("Percent Towards Wraparound", status['percent_towards_wraparound'], "%"))
+        if status['percent_towards_wraparound'] > 75:
+            row.warn("Database is approaching transaction wraparound limit!", CRITICAL)
+
+    return report
+
+IO_QUERIES = {
+    "buffer_usage": """
+        SELECT relname as table_name, 
+               heap_blks_read, 
+               heap_blks_hit,
+               CASE WHEN heap_blks_read + heap_blks_hit > 0 
+                    THEN (heap_blks_hit::float / (heap_blks_read + heap_blks_hit) * 100)::numeric(10,2) 
+                    ELSE 0 
+               END as hit_percentage
+        FROM pg_statio_user_tables
+        ORDER BY heap_blks_read DESC;
+    """,
+    "checkpoint_activity": """
+        SELECT checkpoints_timed, 
+               checkpoints_req, 
+               checkpoint_write_time, 
+               checkpoint_sync_time,
+               buffers_checkpoint, 
+               buffers_clean, 
+               buffers_backend, 
+               buffers_backend_fsync,
+               buffers_alloc, 
+               stats_reset
+        FROM pg_stat_bgwriter;
+    """,
+    "io_statistics": """
+        SELECT s.relname as table_name,
+               pg_size_pretty(pg_relation_size(s.relid)) as table_size,
+               io.heap_blks_read, 
+               io.heap_blks_hit,
+               io.idx_blks_read, 
+               io.idx_blks_hit,
+               io.toast_blks_read, 
+               io.toast_blks_hit,
+               io.tidx_blks_read, 
+               io.tidx_blks_hit
+        FROM pg_statio_user_tables io
+        JOIN pg_stat_user_tables s ON io.relid = s.relid
+        ORDER BY (io.heap_blks_read + io.idx_blks_read + 
+                 io.toast_blks_read + io.tidx_blks_read) DESC
+        LIMIT 20;
+    """
+}
 
 def execute_io_analysis(secret_name):
     """Execute I/O-related analysis queries"""
-    queries = {
-        "buffer_usage": """
-            SELECT relname as table_name, 
-                   heap_blks_read, 
-                   heap_blks_hit,
-                   CASE WHEN heap_blks_read + heap_blks_hit > 0 
-                        THEN (heap_blks_hit::float / (heap_blks_read + heap_blks_hit) * 100)::numeric(10,2) 
-                        ELSE 0 
-                   END as hit_percentage
-            FROM pg_statio_user_tables
-            ORDER BY heap_blks_read DESC;
-        """,
-        "checkpoint_activity": """
-            SELECT checkpoints_timed, 
-                   checkpoints_req, 
-                   checkpoint_write_time, 
-                   checkpoint_sync_time,
-                   buffers_checkpoint, 
-                   buffers_clean, 
-                   buffers_backend, 
-                   buffers_backend_fsync,
-                   buffers_alloc, 
-                   stats_reset
-            FROM pg_stat_bgwriter;
-        """,
-        "io_statistics": """
-            SELECT s.relname as table_name,
-                   pg_size_pretty(pg_relation_size(s.relid)) as table_size,
-                   io.heap_blks_read, 
-                   io.heap_blks_hit,
-                   io.idx_blks_read, 
-                   io.idx_blks_hit,
-                   io.toast_blks_read, 
-                   io.toast_blks_hit,
-                   io.tidx_blks_read, 
-                   io.tidx_blks_hit
-            FROM pg_statio_user_tables io
-            JOIN pg_stat_user_tables s ON io.relid = s.relid
-            ORDER BY (io.heap_blks_read + io.idx_blks_read + 
-                     io.toast_blks_read + io.tidx_blks_read) DESC
-            LIMIT 20;
-        """
-    }
+    queries = IO_QUERIES
     
     conn = connect_to_db(secret_name)
     try:
@@ -746,116 +808,104 @@ def execute_io_analysis(secret_name):
         raise Exception(f"Failed to retrieve I/O metrics: {str(e)}")
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
 
-def format_results_for_io_analysis(results):
-    """Format I/O analysis results in a human-readable string"""
-    output = "Database I/O Analysis Report\n\n"
-    
-    # Format buffer usage
-    output += "=== BUFFER USAGE BY TABLE ===\n"
-    if results.get("buffer_usage"):
-        for idx, table in enumerate(results["buffer_usage"], 1):
-            output += f"\nTable #{idx}:\n"
-            output += f"• Table Name: {table['table_name']}\n"
-            output += f"• Blocks Read from Disk: {table['heap_blks_read']}\n"
-            output += f"• Blocks Hit in Buffer: {table['heap_blks_hit']}\n"
-            output += f"• Buffer Hit Percentage: {table['hit_percentage']}%\n"
-            
-            # Add recommendations based on hit percentage
-            if table['hit_percentage'] < 90:
-                output += "⚠️ Warning: Low buffer hit ratio. Consider increasing shared_buffers.\n"
-    else:
-        output += "No buffer usage statistics available.\n"
-    
-    # Format checkpoint activity
-    output += "\n=== CHECKPOINT ACTIVITY ===\n"
-    if results.get("checkpoint_activity") and results["checkpoint_activity"]:
+def build_io_analysis_report(results):
+    """Build the I/O analysis report"""
+    report = Report("Database I/O Analysis Report")
+
+    section = report.add_section("BUFFER USAGE BY TABLE", "No buffer usage statistics available.")
+    for idx, table in enumerate(results.get("buffer_usage") or [], 1):
+        row = (section.add_row(f"Table #{idx}")
+            .add("Table Name", table['table_name'])
+            .add("Blocks Read from Disk", table['heap_blks_read'])
+            .add("Blocks Hit in Buffer", table['heap_blks_hit'])
+            .add("Buffer Hit Percentage", table['hit_percentage'], "%"))
+        if table['hit_percentage'] < 90:
+            row.warn("Low buffer hit ratio. Consider increasing shared_buffers.")
+
+    section = report.add_section("CHECKPOINT ACTIVITY", "No checkpoint activity information available.")
+    if results.get("checkpoint_activity"):
         checkpoint = results["checkpoint_activity"][0]  # Should only be one row
-        output += f"• Scheduled Checkpoints: {checkpoint['checkpoints_timed']}\n"
-        output += f"• Requested Checkpoints: {checkpoint['checkpoints_req']}\n"
-        output += f"• Checkpoint Write Time: {checkpoint['checkpoint_write_time']} ms\n"
-        output += f"• Checkpoint Sync Time: {checkpoint['checkpoint_sync_time']} ms\n"
-        output += f"• Buffers Written During Checkpoints: {checkpoint['buffers_checkpoint']}\n"
-        output += f"• Buffers Written by Background Writer: {checkpoint['buffers_clean']}\n"
-        output += f"• Buffers Written by Backend Processes: {checkpoint['buffers_backend']}\n"
-        output += f"• Backend fsync Calls: {checkpoint['buffers_backend_fsync']}\n"
-        output += f"• Buffers Allocated: {checkpoint['buffers_alloc']}\n"
-        output += f"• Statistics Reset Time: {checkpoint['stats_reset']}\n"
-        
-        # Add recommendations based on checkpoint activity
+        row = (section.add_row()
+            .add("Scheduled Checkpoints", checkpoint['checkpoints_timed'])
+            .add("Requested Checkpoints", checkpoint['checkpoints_req'])
+            .add("Checkpoint Write Time", checkpoint['checkpoint_write_time'], "ms")
+            .add("Checkpoint Sync Time", checkpoint['checkpoint_sync_time'], "ms")
+            .add("Buffers Written During Checkpoints", checkpoint['buffers_checkpoint'])
+            .add("Buffers Written by Background Writer", checkpoint['buffers_clean'])
+            .add("Buffers Written by Backend Processes", checkpoint['buffers_backend'])
+            .add("Backend fsync Calls", checkpoint['buffers_backend_fsync'])
+            .add("Buffers Allocated", checkpoint['buffers_alloc'])
+            .add("Statistics Reset Time", checkpoint['stats_reset']))
         if checkpoint['checkpoints_req'] > checkpoint['checkpoints_timed']:
-            output += "\n⚠️ Warning: High number of requested checkpoints. Consider increasing checkpoint_timeout or max_wal_size.\n"
-    else:
-        output += "No checkpoint activity information available.\n"
-    
-    # Format I/O statistics
-    output += "\n=== DETAILED I/O STATISTICS (TOP 20 TABLES) ===\n"
-    if results.get("io_statistics"):
-        for idx, stat in enumerate(results["io_statistics"], 1):
-            output += f"\nTable #{idx}:\n"
-            output += f"• Table Name: {stat['table_name']}\n"
-            output += f"• Table Size: {stat['table_size']}\n"
-            output += f"• Heap Blocks Read: {stat['heap_blks_read']}\n"
-            output += f"• Heap Blocks Hit: {stat['heap_blks_hit']}\n"
-            output += f"• Index Blocks Read: {stat['idx_blks_read']}\n"
-            output += f"• Index Blocks Hit: {stat['idx_blks_hit']}\n"
-            output += f"• Toast Blocks Read: {stat['toast_blks_read']}\n"
-            output += f"• Toast Blocks Hit: {stat['toast_blks_hit']}\n"
-            output += f"• Toast Index Blocks Read: {stat['tidx_blks_read']}\n"
-            output += f"• Toast Index Blocks Hit: {stat['tidx_blks_hit']}\n"
-            
-            # Calculate and show hit ratios
-            total_reads = stat['heap_blks_read'] + stat['idx_blks_read']
-            total_hits = stat['heap_blks_hit'] + stat['idx_blks_hit']
-            if total_reads + total_hits > 0:
-                hit_ratio = (total_hits / (total_reads + total_hits)) * 100
-                output += f"• Overall Buffer Hit Ratio: {hit_ratio:.2f}%\n"
-                if hit_ratio < 90:
-                    output += "⚠️ Warning: Low buffer hit ratio for this table.\n"
-    else:
-        output += "No I/O statistics available.\n"
-    
-    return output
+            row.warn("High number of requested checkpoints. Consider increasing checkpoint_timeout or max_wal_size.")
+
+    section = report.add_section("DETAILED I/O STATISTICS (TOP 20 TABLES)", "No I/O statistics available.")
+    for idx, stat in enumerate(results.get("io_statistics") or [], 1):
+        row = (section.add_row(f"Table #{idx}")
+            .add("Table Name", stat['table_name'])
+            .add("Table Size", stat['table_size'])
+            .add("Heap Blocks Read", stat['heap_blks_read'])
+            .add("Heap Blocks Hit", stat['heap_blks_hit'])
+            .add("Index Blocks Read", stat['idx_blks_read'])
+            .add("Index Blocks Hit", stat['idx_blks_hit'])
+            .add("Toast Blocks Read", stat['toast_blks_read'])
+            .add("Toast Blocks Hit", stat['toast_blks_hit'])
+            .add("Toast Index Blocks Read", stat['tidx_blks_read'])
+            .add("Toast Index Blocks Hit", stat['tidx_blks_hit']))
+
+        # Calculate and show hit ratios
+        total_reads = (stat['heap_blks_read'] or 0) + (stat['idx_blks_read'] or 0)
+        total_hits = (stat['heap_blks_hit'] or 0) + (stat['idx_blks_hit'] or 0)
+        if total_reads + total_hits > 0:
+            hit_ratio = (total_hits / (total_reads + total_hits)) * 100
+            row.add("Overall Buffer Hit Ratio", f"{hit_ratio:.2f}", "%")
+            if hit_ratio < 90:
+                row.warn("Low buffer hit ratio for this table.")
+
+    return report
+
+REPLICATION_QUERIES = {
+    "aurora_replica_status": """
+        SELECT server_id, 
+               EXTRACT(EPOCH FROM (now() - last_update_timestamp)) AS lag_seconds,
+               durable_lsn,
+               highest_lsn_rcvd,
+               current_read_lsn,
+               last_update_timestamp
+        FROM aurora_replica_status;
+    """,
+    "replication_slots": """
+        SELECT slot_name, 
+               slot_type, 
+               active, 
+               confirmed_flush_lsn, 
+               pg_size_pretty(pg_wal_lsn_diff(pg_current_wal_lsn(), confirmed_flush_lsn)) as lag_size
+        FROM pg_replication_slots;
+    """,
+    "replication_connections": """
+        SELECT pid, 
+               usesysid, 
+               usename, 
+               application_name, 
+               client_addr, 
+               client_hostname, 
+               client_port, 
+               backend_start, 
+               state, 
+               sent_lsn, 
+               write_lsn, 
+               flush_lsn, 
+               replay_lsn,
+               pg_wal_lsn_diff(sent_lsn, replay_lsn) as lag_bytes
+        FROM pg_stat_replication;
+    """
+}
 
 def execute_replication_analysis(secret_name):
     """Execute replication-related analysis queries"""
-    queries = {
-        "aurora_replica_status": """
-            SELECT server_id, 
-                   EXTRACT(EPOCH FROM (now() - last_update_timestamp)) AS lag_seconds,
-                   durable_lsn,
-                   highest_lsn_rcvd,
-                   current_read_lsn,
-                   last_update_timestamp
-            FROM aurora_replica_status;
-        """,
-        "replication_slots": """
-            SELECT slot_name, 
-                   slot_type, 
-                   active, 
-                   confirmed_flush_lsn, 
-                   pg_size_pretty(pg_wal_lsn_diff(pg_current_wal_lsn(), confirmed_flush_lsn)) as lag_size
-            FROM pg_replication_slots;
-        """,
-        "replication_connections": """
-            SELECT pid, 
-                   usesysid, 
-                   usename, 
-                   application_name, 
-                   client_addr, 
-                   client_hostname, 
-                   client_port, 
-                   backend_start, 
-                   state, 
-                   sent_lsn, 
-                   write_lsn, 
-                   flush_lsn, 
-                   replay_lsn,
-                   pg_wal_lsn_diff(sent_lsn, replay_lsn) as lag_bytes
-            FROM pg_stat_replication;
-        """
-    }
+    queries = REPLICATION_QUERIES
     
     conn = connect_to_db(secret_name)
     try:
@@ -886,126 +936,111 @@ def execute_replication_analysis(secret_name):
         raise Exception(f"Failed to retrieve replication metrics: {str(e)}")
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
 
-def format_results_for_replication_analysis(results):
-    """Format replication analysis results in a human-readable string"""
-    output = "Database Replication Analysis Report\n\n"
-    
-    # Format Aurora replica status
-    output += "=== AURORA REPLICA STATUS ===\n"
-    if results.get("aurora_replica_status"):
-        for idx, replica in enumerate(results["aurora_replica_status"], 1):
-            output += f"\nReplica #{idx}:\n"
-            output += f"• Server ID: {replica['server_id']}\n"
-            output += f"• Replication Lag: {round(float(replica['lag_seconds']), 2)} seconds\n"
-            output += f"• Durable LSN: {replica['durable_lsn']}\n"
-            output += f"• Highest Received LSN: {replica['highest_lsn_rcvd']}\n"
-            output += f"• Current Read LSN: {replica['current_read_lsn']}\n"
-            output += f"• Last Update: {replica['last_update_timestamp']}\n"
-            
-            # Add warnings for high lag
-            if float(replica['lag_seconds']) > 30:
-                output += "⚠️ Warning: High replication lag detected!\n"
-    else:
-        output += "No Aurora replica status information available.\n"
-    
-    # Format replication slots
-    output += "\n=== REPLICATION SLOTS ===\n"
-    if results.get("replication_slots"):
-        for idx, slot in enumerate(results["replication_slots"], 1):
-            output += f"\nSlot #{idx}:\n"
-            output += f"• Slot Name: {slot['slot_name']}\n"
-            output += f"• Slot Type: {slot['slot_type']}\n"
-            output += f"• Active: {slot['active']}\n"
-            output += f"• Confirmed Flush LSN: {slot['confirmed_flush_lsn']}\n"
-            output += f"• Lag Size: {slot['lag_size']}\n"
-            
-            # Add warnings for inactive slots
-            if not slot['active']:
-                output += "⚠️ Warning: Inactive replication slot detected!\n"
-    else:
-        output += "No replication slots found.\n"
-    
-    # Format replication connections
-    output += "\n=== REPLICATION CONNECTIONS ===\n"
-    if results.get("replication_connections"):
-        for idx, conn in enumerate(results["replication_connections"], 1):
-            output += f"\nConnection #{idx}:\n"
-            output += f"• PID: {conn['pid']}\n"
-            output += f"• Username: {conn['usename']}\n"
-            output += f"• Application: {conn['application_name']}\n"
-            output += f"• Client Address: {conn['client_addr']}\n"
-            output += f"• Client Hostname: {conn['client_hostname']}\n"
-            output += f"• Client Port: {conn['client_port']}\n"
-            output += f"• Backend Start: {conn['backend_start']}\n"
-            output += f"• State: {conn['state']}\n"
-            output += f"• Sent LSN: {conn['sent_lsn']}\n"
-            output += f"• Write LSN: {conn['write_lsn']}\n"
-            output += f"• Flush LSN: {conn['flush_lsn']}\n"
-            output += f"• Replay LSN: {conn['replay_lsn']}\n"
-            output += f"• Lag Size: {conn['lag_bytes']} bytes\n"
-            
-            # Add warnings for large lag
-            if conn['lag_bytes'] > 100000000:  # 100MB
-                output += "⚠️ Warning: Large replication lag detected!\n"
-    else:
-        output += "No replication connections found.\n"
-    
-    return output
+def build_replication_analysis_report(results):
+    """Build the replication analysis report"""
+    report = Report("Database Replication Analysis Report")
+
+    section = report.add_section("AURORA REPLICA STATUS", "No Aurora replica status information available.")
+    for idx, replica in enumerate(results.get("aurora_replica_status") or [], 1):
+        lag_seconds = float(replica['lag_seconds'])
+        row = (section.add_row(f"Replica #{idx}")
+            .add("Server ID", replica['server_id'])
+            .add("Replication Lag", round(lag_seconds, 2), "seconds")
+            .add("Durable LSN", replica['durable_lsn'])
+            .add("Highest Received LSN", replica['highest_lsn_rcvd'])
+            .add("Current Read LSN", replica['current_read_lsn'])
+            .add("Last Update", replica['last_update_timestamp']))
+        if lag_seconds > 30:
+            row.warn("High replication lag detected!")
+
+    section = report.add_section("REPLICATION SLOTS", "No replication slots found.")
+    for idx, slot in enumerate(results.get("replication_slots") or [], 1):
+        row = (section.add_row(f"Slot #{idx}")
+            .add("Slot Name", slot['slot_name'])
+            .add("Slot Type", slot['slot_type'])
+            .add("Active", slot['active'])
+            .add("Confirmed Flush LSN", slot['confirmed_flush_lsn'])
+            .add("Lag Size", slot['lag_size']))
+        if not slot['active']:
+            row.warn("Inactive replication slot detected!")
+
+    section = report.add_section("REPLICATION CONNECTIONS", "No replication connections found.")
+    for idx, conn in enumerate(results.get("replication_connections") or [], 1):
+        row = (section.add_row(f"Connection #{idx}")
+            .add("PID", conn['pid'])
+            .add("Username", conn['usename'])
+            .add("Application", conn['application_name'])
+            .add("Client Address", conn['client_addr'])
+            .add("Client Hostname", conn['client_hostname'])
+            .add("Client Port", conn['client_port'])
+            .add("Backend Start", conn['backend_start'])
+            .add("State", conn['state'])
+            .add("Sent LSN", conn['sent_lsn'])
+            .add("Write LSN", conn['write_lsn'])
+            .add("Flush LSN", conn['flush_lsn'])
+            .add("Replay LSN", conn['replay_lsn'])
+            .add("Lag Size", conn['lag_bytes'], "bytes"))
+        if (conn['lag_bytes'] or 0) > 100000000:  # 100MB
+            row.warn("Large replication lag detected!")
+
+    return report
+
+SYSTEM_HEALTH_QUERIES = {
+    "database_statistics": """
+        SELECT datname, 
+               numbackends, 
+               xact_commit, 
+               xact_rollback, 
+               blks_read, 
+               blks_hit, 
+               tup_returned, 
+               tup_fetched, 
+               tup_inserted, 
+               tup_updated, 
+               tup_deleted,
+               conflicts, 
+               temp_files, 
+               temp_bytes, 
+               deadlocks, 
+               blk_read_time, 
+               blk_write_time,
+               stats_reset
+        FROM pg_stat_database
+        WHERE datname = current_database();
+    """,
+    "lock_contention": """
+        SELECT locktype, 
+               CASE 
+                   WHEN relation IS NOT NULL THEN relation::regclass::text 
+                   ELSE 'NULL'
+               END as relation,
+               mode, 
+               transactionid as tid,
+               virtualtransaction as vtid, 
+               pid, 
+               granted
+        FROM pg_locks
+        ORDER BY relation;
+    """,
+    "long_running_transactions": """
+        SELECT pid, 
+               usename, 
+               datname, 
+               age(now(), xact_start) as xact_age, 
+               state, 
+               query
+        FROM pg_stat_activity 
+        WHERE state != 'idle' 
+        AND xact_start < now() - interval '5 minutes'
+        ORDER BY xact_start;
+    """
+}
 
 def execute_system_health(secret_name):
     """Execute system health-related analysis queries"""
-    queries = {
-        "database_statistics": """
-            SELECT datname, 
-                   numbackends, 
-                   xact_commit, 
-                   xact_rollback, 
-                   blks_read, 
-                   blks_hit, 
-                   tup_returned, 
-                   tup_fetched, 
-                   tup_inserted, 
-                   tup_updated, 
-                   tup_deleted,
-                   conflicts, 
-                   temp_files, 
-                   temp_bytes, 
-                   deadlocks, 
-                   blk_read_time, 
-                   blk_write_time,
-                   stats_reset
-            FROM pg_stat_database
-            WHERE datname = current_database();
-        """,
-        "lock_contention": """
-            SELECT locktype, 
-                   CASE 
-                       WHEN relation IS NOT NULL THEN relation::regclass::text 
-                       ELSE 'NULL'
-                   END as relation,
-                   mode, 
-                   transactionid as tid,
-                   virtualtransaction as vtid, 
-                   pid, 
-                   granted
-            FROM pg_locks
-            ORDER BY relation;
-        """,
-        "long_running_transactions": """
-            SELECT pid, 
-                   usename, 
-                   datname, 
-                   age(now(), xact_start) as xact_age, 
-                   state, 
-                   query
-            FROM pg_stat_activity 
-            WHERE state != 'idle' 
-            AND xact_start < now() - interval '5 minutes'
-            ORDER BY xact_start;
-        """
-    }
+    queries = SYSTEM_HEALTH_QUERIES
     
     conn = connect_to_db(secret_name)
     try:
@@ -1037,148 +1072,186 @@ def execute_system_health(secret_name):
         raise Exception(f"Failed to retrieve system health metrics: {str(e)}")
     finally:
         if conn:
-            conn.close()
+            release_db_connection(conn)
 
-def format_results_for_system_health(results):
-    """Format system health analysis results in a human-readable string"""
-    output = "Database System Health Report\n\n"
-    
-    # Format database statistics
-    output += "=== DATABASE STATISTICS ===\n"
-    if results.get("database_statistics"):
-        for stat in results["database_statistics"]:
-            output += f"Database: {stat['datname']}\n"
-            output += f"• Active Connections: {stat['numbackends']}\n"
-            output += f"• Transactions Committed: {stat['xact_commit']}\n"
-            output += f"• Transactions Rolled Back: {stat['xact_rollback']}\n"
-            output += f"• Blocks Read: {stat['blks_read']}\n"
-            output += f"• Blocks Hit (Cache): {stat['blks_hit']}\n"
-            
-            # Calculate cache hit ratio
-            total_blocks = stat['blks_read'] + stat['blks_hit']
-            if total_blocks > 0:
-                cache_hit_ratio = (stat['blks_hit'] / total_blocks) * 100
-                output += f"• Cache Hit Ratio: {cache_hit_ratio:.2f}%\n"
-                if cache_hit_ratio < 90:
-                    output += "⚠️ Warning: Low cache hit ratio. Consider increasing shared_buffers.\n"
-            
-            output += f"• Tuples Returned: {stat['tup_returned']}\n"
-            output += f"• Tuples Fetched: {stat['tup_fetched']}\n"
-            output += f"• Tuples Inserted: {stat['tup_inserted']}\n"
-            output += f"• Tuples Updated: {stat['tup_updated']}\n"
-            output += f"• Tuples Deleted: {stat['tup_deleted']}\n"
-            output += f"• Conflicts: {stat['conflicts']}\n"
-            output += f"• Temporary Files Created: {stat['temp_files']}\n"
-            output += f"• Temporary Bytes Written: {stat['temp_bytes']}\n"
-            output += f"• Deadlocks: {stat['deadlocks']}\n"
-            output += f"• Block Read Time: {stat['blk_read_time']} ms\n"
-            output += f"• Block Write Time: {stat['blk_write_time']} ms\n"
-            output += f"• Statistics Reset: {stat['stats_reset']}\n"
-            
-            # Add warnings for concerning metrics
-            if stat['deadlocks'] > 0:
-                output += "⚠️ Warning: Deadlocks detected!\n"
-            if stat['conflicts'] > 0:
-                output += "⚠️ Warning: Conflicts detected!\n"
-            if stat['temp_files'] > 1000:
-                output += "⚠️ Warning: High number of temporary files created!\n"
-    else:
-        output += "No database statistics available.\n"
-    
-    # Format lock contention
-    output += "\n=== LOCK CONTENTION ===\n"
-    if results.get("lock_contention"):
-        lock_groups = {}
-        for lock in results["lock_contention"]:
-            relation = lock['relation']
-            if relation not in lock_groups:
-                lock_groups[relation] = []
-            lock_groups[relation].append(lock)
-        
-        for relation, locks in lock_groups.items():
-            output += f"\nRelation: {relation}\n"
-            for idx, lock in enumerate(locks, 1):
-                output += f"Lock #{idx}:\n"
-                output += f"• Type: {lock['locktype']}\n"
-                output += f"• Mode: {lock['mode']}\n"
-                output += f"• Transaction ID: {lock['tid']}\n"
-                output += f"• Virtual Transaction ID: {lock['vtid']}\n"
-                output += f"• PID: {lock['pid']}\n"
-                output += f"• Granted: {lock['granted']}\n"
-                
-                if not lock['granted']:
-                    output += "⚠️ Warning: Lock waiting to be granted!\n"
-    else:
-        output += "No lock contention found.\n"
-    
-    # Format long-running transactions
-    output += "\n=== LONG-RUNNING TRANSACTIONS (> 5 minutes) ===\n"
-    if results.get("long_running_transactions"):
-        for idx, txn in enumerate(results["long_running_transactions"], 1):
-            output += f"\nTransaction #{idx}:\n"
-            output += f"• PID: {txn['pid']}\n"
-            output += f"• Username: {txn['usename']}\n"
-            output += f"• Database: {txn['datname']}\n"
-            output += f"• Age: {txn['xact_age']}\n"
-            output += f"• State: {txn['state']}\n"
-            output += f"• Query: {txn['query']}\n"
-            
-            # Add warning for very long-running transactions
-            if 'hours' in str(txn['xact_age']) or 'days' in str(txn['xact_age']):
-                output += "⚠️ Warning: Transaction running for an extended period!\n"
-    else:
-        output += "No long-running transactions found.\n"
-    
-    return output
+def build_system_health_report(results):
+    """Build the system health report"""
+    report = Report("Database System Health Report")
 
-def connect_to_db(secret_name):
-    """Establish database connection"""
-    cur_secret = secret_name
-    secret = get_secret(cur_secret)
-    print(secret)
+    section = report.add_section("DATABASE STATISTICS", "No database statistics available.")
+    for stat in results.get("database_statistics") or []:
+        row = (section.add_row(f"Database {stat['datname']}")
+            .add("Active Connections", stat['numbackends'])
+            .add("Transactions Committed", stat['xact_commit'])
+            .add("Transactions Rolled Back", stat['xact_rollback'])
+            .add("Blocks Read", stat['blks_read'])
+            .add("Blocks Hit (Cache)", stat['blks_hit']))
+
+        # Calculate cache hit ratio
+        total_blocks = stat['blks_read'] + stat['blks_hit']
+        if total_blocks > 0:
+            cache_hit_ratio = (stat['blks_hit'] / total_blocks) * 100
+            row.add("Cache Hit Ratio", f"{cache_hit_ratio:.2f}", "%")
+            if cache_hit_ratio < 90:
+                row.warn("Low cache hit ratio. Consider increasing shared_buffers.")
+
+        (row.add("Tuples Returned", stat['tup_returned'])
+            .add("Tuples Fetched", stat['tup_fetched'])
+            .add("Tuples Inserted", stat['tup_inserted'])
+            .add("Tuples Updated", stat['tup_updated'])
+            .add("Tuples Deleted", stat['tup_deleted'])
+            .add("Conflicts", stat['conflicts'])
+            .add("Temporary Files Created", stat['temp_files'])
+            .add("Temporary Bytes Written", stat['temp_bytes'])
+            .add("Deadlocks", stat['deadlocks'])
+            .add("Block Read Time", stat['blk_read_time'], "ms")
+            .add("Block Write Time", stat['blk_write_time'], "ms")
+            .add("Statistics Reset", stat['stats_reset']))
+
+        # Add warnings for concerning metrics
+        if stat['deadlocks'] > 0:
+            row.warn("Deadlocks detected!")
+        if stat['conflicts'] > 0:
+            row.warn("Conflicts detected!")
+        if stat['temp_files'] > 1000:
+            row.warn("High number of temporary files created!")
+
+    # Locks are grouped by relation so contention on one table reads as one block
+    section = report.add_section("LOCK CONTENTION", "No lock contention found.")
+    lock_groups = {}
+    for lock in results.get("lock_contention") or []:
+        lock_groups.setdefault(lock['relation'], []).append(lock)
+    for relation, locks in lock_groups.items():
+        for idx, lock in enumerate(locks, 1):
+            row = (section.add_row(f"Relation {relation}, Lock #{idx}")
+                .add("Type", lock['locktype'])
+                .add("Mode", lock['mode'])
+                .add("Transaction ID", lock['tid'])
+                .add("Virtual Transaction ID", lock['vtid'])
+                .add("PID", lock['pid'])
+                .add("Granted", lock['granted']))
+            if not lock['granted']:
+                row.warn("Lock waiting to be granted!")
+
+    section = report.add_section("LONG-RUNNING TRANSACTIONS (> 5 minutes)", "No long-running transactions found.")
+    for idx, txn in enumerate(results.get("long_running_transactions") or [], 1):
+        row = (section.add_row(f"Transaction #{idx}")
+            .add("PID", txn['pid'])
+            .add("Username", txn['usename'])
+            .add("Database", txn['datname'])
+            .add("Age", txn['xact_age'])
+            .add("State", txn['state'])
+            .add("Query", txn['query']))
+
+        # Add warning for very long-running transactions
+        if 'hours' in str(txn['xact_age']) or 'days' in str(txn['xact_age']):
+            row.warn("Transaction running for an extended period!")
+
+    return report
+
+# Query groups included in the full health report, with the builder used for each group's sections
+FULL_HEALTH_REPORT_GROUPS = {
+    "connection_management_issues": (CONNECTION_QUERIES, build_conn_issues_report),
+    "index_analysis": (INDEX_QUERIES, build_index_analysis_report),
+    "autovacuum_analysis": (AUTOVACUUM_QUERIES, build_autovacuum_analysis_report),
+    "io_analysis": (IO_QUERIES, build_io_analysis_report),
+    "replication_analysis": (REPLICATION_QUERIES, build_replication_analysis_report),
+    "system_health": (SYSTEM_HEALTH_QUERIES, build_system_health_report),
+}
+
+def execute_full_health_report(secret_name, max_connections=4, statement_timeout_ms=15000):
+    """Execute every analysis query group concurrently over a small connection pool"""
+    secret = get_secret(secret_name)
     try:
-        print("in connect_to_db")
-        conn = psycopg2.connect(
+        # statement_timeout is set at connection start-up so each query is bounded
+        # without an extra round trip per statement
+        pool = ThreadedConnectionPool(
+            1,
+            max_connections,
             host=secret['host'],
             database=secret['dbname'],
             user=secret['username'],
             password=secret['password'],
-            port=secret['port']
+            port=secret['port'],
+            options=f"-c statement_timeout={int(statement_timeout_ms)}"
         )
-        return conn
     except Exception as e:
         raise Exception(f"Failed to connect to the database: {str(e)}")
 
+    def run_query(group_name, query_name, query):
+        start_time = time.time()
+        conn = pool.getconn()
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(query)
+                columns = [desc[0] for desc in cur.description]
+                rows = cur.fetchall()
+                return group_name, query_name, [dict(zip(columns, row)) for row in rows]
+        except Exception as e:
+            print(f"Error executing {group_name}.{query_name}: {str(e)}")
+            return group_name, query_name, []
+        finally:
+            pool.putconn(conn)
+            print(f"{group_name}.{query_name} finished in {time.time() - start_time:.3f}s")
+
+    tasks = [
+        (group_name, query_name, query)
+        for group_name, (queries, _) in FULL_HEALTH_REPORT_GROUPS.items()
+        for query_name, query in queries.items()
+    ]
+
+    try:
+        results = {group_name: {} for group_name in FULL_HEALTH_REPORT_GROUPS}
+        with ThreadPoolExecutor(max_workers=max_connections) as executor:
+            for group_name, query_name, rows in executor.map(lambda task: run_query(*task), tasks):
+                results[group_name][query_name] = rows
+        return results
+    except Exception as e:
+        raise Exception(f"Failed to retrieve full health report: {str(e)}")
+    finally:
+        pool.closeall()
+
+def build_full_health_report(results):
+    """Build the full health report from every group's sections"""
+    report = Report("Database Full Health Report")
+    for group_name, (_, builder) in FULL_HEALTH_REPORT_GROUPS.items():
+        group_report = builder(results.get(group_name, {}))
+        for section in group_report.sections:
+            group_title = group_report.title.removeprefix("Database ").removesuffix(" Report")
+            section.title = f"{group_title.upper()}: {section.title}"
+            report.sections.append(section)
+    return report
+
+def connect_to_db(secret_name):
+    """
+    Get the warm database connection for this environment.
+    Connections must be handed back with release_db_connection instead of being closed.
+    """
+    try:
+        return connection_manager.get_connection(secret_name)
+    except Exception as e:
+        raise Exception(f"Failed to connect to the database: {str(e)}")
+
+def release_db_connection(conn):
+    """Return a connection to the connection manager so it stays warm for the next invocation"""
+    connection_manager.release_connection(conn)
+
 def get_env_secret(environment):
-    ssm_client = boto3.client('ssm')
-    print("in get_env_secret")
     """Retrieve the secret name for the specified environment"""
-    if environment == 'prod':
-        print("in get_env_secret1")
-        try:
-            # Get the secret name from Parameter Store
-            print("in get_env_secret-try")
-            response = ssm_client.get_parameter(
-                Name=f'/AuroraOpsGPT/{environment}'
-            )
-            print(response['Parameter']['Value'])
-            return response['Parameter']['Value']
-        except ssm_client.exceptions.ParameterNotFound:
+    if environment not in ('prod', 'dev'):
+        print("environement does not exist")
+        raise ValueError(f"Unknown environment: {environment}")
+    parameter_name = f'/AuroraOpsGPT/{environment}'
+    try:
+        # Get the secret name from Parameter Store (cached across warm invocations)
+        return connection_manager.get_parameter(parameter_name)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ParameterNotFound':
             error_message = f"Parameter not found: {parameter_name}"
             print(error_message)
             raise Exception(error_message)
-    elif environment == 'dev':
-        try:
-            # Get the secret name from Parameter Store
-            response = ssm_client.get_parameter(
-                Name=f'/AuroraOpsGPT/{environment}'
-            )
-            return response['Parameter']['Value']
-        except Exception as e:
-            raise Exception(f"Failed to get dev secret name from Parameter Store: {str(e)}")
-    else:
-        print("environement does not exist")
-        raise ValueError(f"Unknown environment: {environment}")
+        raise Exception(f"Failed to get {environment} secret name from Parameter Store: {str(e)}")
 
 def lambda_handler(event, context):
     try:
@@ -1188,6 +1261,9 @@ def lambda_handler(event, context):
         print("Environment: {}".format(environment))
         secret_name = get_env_secret(environment)
         min_exec_time = 1000
+        # 'text' (default, compact for the agent), 'markdown' or 'json'
+        output_format = event.get('output_format', 'text')
+        max_tokens = int(event.get('max_tokens', REPORT_TOKEN_BUDGET))
         print(event)
         # Get slow queries
         #if tool_name == 'slow_query':
@@ -1195,33 +1271,51 @@ def lambda_handler(event, context):
             print("Executing slow query scripts")
             results = execute_slow_query(secret_name, min_exec_time)
             # Format results for Bedrock Agent
-            formatted_output = format_results_for_slow_query(results)
-            print(formatted_output)
+            report = build_slow_query_report(results)
+        elif action_type == 'slow_query_window':
+            print("Executing slow_query_window")
+            window_minutes = int(event.get('window_minutes', 60))
+            results = execute_slow_query_window(
+                secret_name,
+                environment,
+                window_minutes=window_minutes,
+                min_exec_time=float(event.get('min_exec_time', 0))
+            )
+            report = build_slow_query_window_report(results)
+        elif action_type == 'capture_statement_snapshot':
+            print("Executing capture_statement_snapshot")
+            results = execute_capture_statement_snapshot(secret_name, environment)
+            report = Report("pg_stat_statements Snapshot")
+            report.notes.append(f"Stored pg_stat_statements snapshot with {results['statement_count']} statements.")
         elif action_type == 'connection_management_issues':
             print("Executing connection_management_issues")
             results = execute_connect_issues(secret_name, min_exec_time)
             # Format results for Bedrock Agent
-            formatted_output = format_results_for_conn_issues(results)
+            report = build_conn_issues_report(results)
         elif action_type == 'index_analysis':
             print("Executing index_analysis")
             results = execute_index_analysis(secret_name)
-            formatted_output = format_results_for_index_analysis(results)
+            report = build_index_analysis_report(results)
         elif action_type == 'autovacuum_analysis':
             print("Executing autovacuum_analysis")
             results = execute_autovacuum_analysis(secret_name)
-            formatted_output = format_results_for_autovacuum_analysis(results)
+            report = build_autovacuum_analysis_report(results)
         elif action_type == 'io_analysis':
             print("Executing io_analysis")
             results = execute_io_analysis(secret_name)
-            formatted_output = format_results_for_io_analysis(results)
+            report = build_io_analysis_report(results)
         elif action_type == 'replication_analysis':
             print("Executing replication_analysis")
             results = execute_replication_analysis(secret_name)
-            formatted_output = format_results_for_replication_analysis(results)
+            report = build_replication_analysis_report(results)
         elif action_type == 'system_health':
             print("Executing system_health")
             results = execute_system_health(secret_name)
-            formatted_output = format_results_for_system_health(results)
+            report = build_system_health_report(results)
+        elif action_type == 'full_health_report':
+            print("Executing full_health_report")
+            results = execute_full_health_report(secret_name)
+            report = build_full_health_report(results)
         else:
             return {
                 "functionResponse": {
@@ -1229,6 +1323,9 @@ def lambda_handler(event, context):
                 }
             }
 
+        formatted_output = render_report(report, output_format, max_tokens)
+        print(f"Report: {len(formatted_output)} characters, severity {report.severity}")
+
         response_body = {
         'TEXT': {
             'body': formatted_output
@@ -1242,6 +1339,7 @@ def lambda_handler(event, context):
         }
        
         
+        print(f"Connection metrics: {json.dumps(connection_manager.get_metrics())}")
         return function_response
 
     except Exception as e:
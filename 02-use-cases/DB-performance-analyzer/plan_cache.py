@@ -0,0 +1,227 @@
+import copy
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import sql_tokenizer
+
+# How long a cached plan is trusted before it is re-validated against the database
+PLAN_CACHE_TTL_SECONDS = int(os.environ.get('PLAN_CACHE_TTL_SECONDS', '3600'))
+PLAN_CACHE_MAX_ENTRIES = int(os.environ.get('PLAN_CACHE_MAX_ENTRIES', '256'))
+# Relative change in estimated cost reported by the plan diff
+COST_CHANGE_THRESHOLD = float(os.environ.get('PLAN_COST_CHANGE_THRESHOLD', '1.5'))
+
+INDEX_SCAN_TYPES = ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan', 'Bitmap Heap Scan')
+
+# Counters that change when the planner's inputs for a table change: the table
+# was re-created (relid), re-analyzed (analyze counts) or gained/lost indexes
+SCHEMA_VERSION_QUERY = """
+    SELECT s.relname,
+           s.relid,
+           s.analyze_count + s.autoanalyze_count as analyze_count,
+           (SELECT count(*) FROM pg_catalog.pg_index i WHERE i.indrelid = s.relid) as index_count
+    FROM pg_stat_user_tables s
+    WHERE s.relname = ANY(%s)
+    ORDER BY s.relname, s.relid
+"""
+
+
+def fingerprint_query(query):
+    """
+    Fingerprint a query so that queries differing only in literals, parameter
+    numbers, comments, whitespace or keyword case share a cache entry
+
+    Args:
+        query (str): SQL query
+
+    Returns:
+        str: Hex digest of the normalized query
+    """
+    parts = []
+    for token in sql_tokenizer.tokenize(query):
+        if token.kind in sql_tokenizer.INSIGNIFICANT:
+            continue
+        if token.kind in (sql_tokenizer.STRING, sql_tokenizer.NUMBER, sql_tokenizer.PARAM):
+            parts.append('?')
+        elif token.kind == sql_tokenizer.WORD:
+            parts.append(token.value.lower())
+        else:
+            parts.append(token.value)
+    return hashlib.sha256(' '.join(parts).encode('utf-8')).hexdigest()
+
+
+def iter_plan_nodes(plan, path='0'):
+    """Yield (path, node) for every node of an EXPLAIN JSON plan tree, depth first"""
+    stack = [(path, plan)]
+    while stack:
+        node_path, node = stack.pop()
+        yield node_path, node
+        children = node.get('Plans', [])
+        for index in range(len(children) - 1, -1, -1):
+            stack.append((f"{node_path}.{index}", children[index]))
+
+
+def plan_relations(plan):
+    """Return the sorted table names referenced by a plan tree"""
+    return sorted({
+        node['Relation Name']
+        for _, node in iter_plan_nodes(plan)
+        if node.get('Relation Name')
+    })
+
+
+def get_schema_version(cur, relations):
+    """Read the statistics/DDL counters for the given tables as a comparable tuple"""
+    if not relations:
+        return ()
+    cur.execute(SCHEMA_VERSION_QUERY, (list(relations),))
+    return tuple(tuple(row) for row in cur.fetchall())
+
+
+def _describe(node):
+    name = node.get('Node Type')
+    if node.get('Relation Name'):
+        name += f" on {node['Relation Name']}"
+    if node.get('Index Name'):
+        name += f" using {node['Index Name']}"
+    return name
+
+
+def diff_plans(old_plan, new_plan):
+    """
+    Compare two EXPLAIN JSON plan trees node by node
+
+    Args:
+        old_plan (dict): Previous (cached) plan root, i.e. ``explain[0]['Plan']``
+        new_plan (dict): Current plan root
+
+    Returns:
+        list: Changes as dicts with 'path', 'type', 'description', 'severity'
+        and 'regression' keys, in plan order
+    """
+    old_nodes = dict(iter_plan_nodes(old_plan))
+    new_nodes = dict(iter_plan_nodes(new_plan))
+    changes = []
+
+    for path, new_node in new_nodes.items():
+        old_node = old_nodes.get(path)
+        if old_node is None:
+            changes.append({
+                'path': path,
+                'type': 'node_added',
+                'description': f"New plan node: {_describe(new_node)}",
+                'severity': 'medium',
+                'regression': True
+            })
+            continue
+
+        if (old_node.get('Node Type'), old_node.get('Relation Name'), old_node.get('Index Name')) != \
+                (new_node.get('Node Type'), new_node.get('Relation Name'), new_node.get('Index Name')):
+            lost_index = (old_node.get('Node Type') in INDEX_SCAN_TYPES
+                          and new_node.get('Node Type') == 'Seq Scan')
+            changes.append({
+                'path': path,
+                'type': 'node_changed',
+                'description': f"{_describe(old_node)} changed to {_describe(new_node)}",
+                'severity': 'high' if lost_index else 'medium',
+                'regression': True
+            })
+
+        old_cost = old_node.get('Total Cost') or 0
+        new_cost = new_node.get('Total Cost') or 0
+        if old_cost and new_cost >= old_cost * COST_CHANGE_THRESHOLD:
+            changes.append({
+                'path': path,
+                'type': 'cost_regression',
+                'description': f"Estimated cost of {_describe(new_node)} rose from {old_cost} to {new_cost}",
+                'severity': 'high' if path == '0' else 'medium',
+                'regression': True
+            })
+        elif new_cost and old_cost >= new_cost * COST_CHANGE_THRESHOLD:
+            changes.append({
+                'path': path,
+                'type': 'cost_improvement',
+                'description': f"Estimated cost of {_describe(new_node)} fell from {old_cost} to {new_cost}",
+                'severity': 'low',
+                'regression': False
+            })
+
+    for path, old_node in old_nodes.items():
+        if path not in new_nodes:
+            changes.append({
+                'path': path,
+                'type': 'node_removed',
+                'description': f"Plan node no longer used: {_describe(old_node)}",
+                'severity': 'low',
+                'regression': False
+            })
+
+    return changes
+
+
+def plan_shape_changed(changes):
+    """True if a diff contains changes that make a cached analysis stale"""
+    return any(change['type'] in ('node_added', 'node_changed', 'node_removed', 'cost_regression')
+               for change in changes)
+
+
+class PlanCache:
+    """
+    In-memory LRU cache of EXPLAIN results keyed by (environment secret, query
+    fingerprint). It lives at module level so entries survive warm Lambda
+    invocations.
+    """
+
+    def __init__(self, ttl=PLAN_CACHE_TTL_SECONDS, max_entries=PLAN_CACHE_MAX_ENTRIES):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return a copy of the entry for ``key`` (with an 'expired' flag), or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            entry = copy.deepcopy(entry)
+        entry['expired'] = time.time() - entry['cached_at'] > self._ttl
+        return entry
+
+    def put(self, key, estimated_plan, schema_version, analysis=None):
+        """Store the estimated plan (and the full analysis if one was run) for ``key``"""
+        with self._lock:
+            self._entries[key] = {
+                'estimated_plan': copy.deepcopy(estimated_plan),
+                'relations': plan_relations(estimated_plan['Plan']),
+                'schema_version': schema_version,
+                'analysis': copy.deepcopy(analysis),
+                'cached_at': time.time()
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def touch(self, key, schema_version):
+        """Mark an entry as re-validated against ``schema_version``"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['schema_version'] = schema_version
+                entry['cached_at'] = time.time()
+
+    def invalidate(self, key=None):
+        """Drop one entry, or the whole cache if no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+# Plans explained by earlier invocations are reused while their tables are unchanged,
+# and re-validated against the database once older than the TTL
+plan_cache = PlanCache()
@@ -0,0 +1,292 @@
+import json
+import os
+
+# Size budget for a rendered report, in tokens. Tokens are estimated as
+# CHARS_PER_TOKEN characters each, which is close enough for English and SQL text.
+REPORT_TOKEN_BUDGET = int(os.environ.get('REPORT_TOKEN_BUDGET', '6000'))
+CHARS_PER_TOKEN = 4
+
+# Severities, lowest first
+INFO = 'info'
+WARNING = 'warning'
+CRITICAL = 'critical'
+SEVERITY_RANK = {INFO: 0, WARNING: 1, CRITICAL: 2}
+
+
+def _max_severity(severities):
+    return max(severities, key=SEVERITY_RANK.get, default=INFO)
+
+
+class Row:
+    """One item of a report section: an optional heading, labelled fields and warnings"""
+
+    def __init__(self, heading=None):
+        self.heading = heading
+        self.fields = []
+        self.warnings = []
+
+    @property
+    def severity(self):
+        return _max_severity(severity for _, severity in self.warnings)
+
+    def add(self, label, value, unit=None):
+        """Add a field; the unit is kept separate so JSON output keeps the raw value"""
+        self.fields.append((label, value, unit))
+        return self
+
+    def warn(self, message, severity=WARNING):
+        self.warnings.append((message, severity))
+        return self
+
+    def to_dict(self):
+        return {
+            'heading': self.heading,
+            'severity': self.severity,
+            'fields': [
+                {'label': label, 'value': value, 'unit': unit} if unit else {'label': label, 'value': value}
+                for label, value, unit in self.fields
+            ],
+            'warnings': [{'message': message, 'severity': severity} for message, severity in self.warnings],
+        }
+
+
+class Section:
+    """A titled group of rows with an optional recommendation shown when it has rows"""
+
+    def __init__(self, title, empty_message=None, recommendation=None):
+        self.title = title
+        self.empty_message = empty_message or "No data available."
+        self.recommendation = recommendation
+        self.notes = []
+        self.rows = []
+        self.omitted_rows = 0
+
+    @property
+    def severity(self):
+        return _max_severity(row.severity for row in self.rows)
+
+    def add_row(self, heading=None):
+        row = Row(heading)
+        self.rows.append(row)
+        return row
+
+    def to_dict(self):
+        return {
+            'title': self.title,
+            'severity': self.severity,
+            'notes': self.notes,
+            'recommendation': self.recommendation if self.rows else None,
+            'rows': [row.to_dict() for row in self.rows],
+            'omitted_rows': self.omitted_rows,
+        }
+
+
+class Report:
+    """A titled list of sections, rendered by one of the RENDERERS"""
+
+    def __init__(self, title):
+        self.title = title
+        self.notes = []
+        self.sections = []
+
+    @property
+    def severity(self):
+        return _max_severity(section.severity for section in self.sections)
+
+    def add_section(self, title, empty_message=None, recommendation=None):
+        section = Section(title, empty_message, recommendation)
+        self.sections.append(section)
+        return section
+
+    def to_dict(self):
+        return {
+            'title': self.title,
+            'severity': self.severity,
+            'notes': self.notes,
+            'sections': [section.to_dict() for section in self.sections],
+        }
+
+
+def _format_value(value, unit):
+    if unit is None:
+        return f"{value}"
+    if unit == '%':
+        return f"{value}%"
+    return f"{value} {unit}"
+
+
+class TextRenderer:
+    """Compact plain text, the format the agent has always received"""
+
+    WARNING_PREFIX = {INFO: "Note: ", WARNING: "⚠️ Warning: ", CRITICAL: "⚠️ CRITICAL: "}
+
+    def header(self, report):
+        yield f"{report.title}\n"
+        if report.notes:
+            yield "\n"
+        for note in report.notes:
+            yield f"{note}\n"
+
+    def section_header(self, section):
+        yield f"\n=== {section.title} ===\n"
+        for note in section.notes:
+            yield f"{note}\n"
+
+    def row(self, row):
+        if row.heading:
+            yield f"\n{row.heading}:\n"
+        for label, value, unit in row.fields:
+            yield f"• {label}: {_format_value(value, unit)}\n"
+        for message, severity in row.warnings:
+            yield f"{self.WARNING_PREFIX[severity]}{message}\n"
+
+    def section_footer(self, section):
+        if not section.rows and not section.omitted_rows:
+            yield f"{section.empty_message}\n"
+        if section.omitted_rows:
+            yield f"\n... {section.omitted_rows} more rows omitted to fit the response size limit\n"
+        if section.recommendation and (section.rows or section.omitted_rows):
+            yield f"\nRecommendation: {section.recommendation}\n"
+
+    def render_row(self, row):
+        return ''.join(self.row(row))
+
+    def iter_render(self, report):
+        """Yield the rendered report in chunks so callers can stream or join it once"""
+        yield from self.header(report)
+        for section in report.sections:
+            yield from self.section_header(section)
+            for row in section.rows:
+                yield from self.row(row)
+            yield from self.section_footer(section)
+
+    def render(self, report):
+        return ''.join(self.iter_render(report))
+
+
+class MarkdownRenderer(TextRenderer):
+    """Markdown for humans reading the report directly"""
+
+    WARNING_PREFIX = {INFO: "> ℹ️ ", WARNING: "> ⚠️ **Warning:** ", CRITICAL: "> 🛑 **Critical:** "}
+
+    def header(self, report):
+        yield f"# {report.title}\n\n"
+        for note in report.notes:
+            yield f"{note}\n\n"
+
+    def section_header(self, section):
+        yield f"\n## {section.title}\n\n"
+        for note in section.notes:
+            yield f"{note}\n\n"
+
+    def row(self, row):
+        if row.heading:
+            yield f"\n### {row.heading}\n\n"
+        for label, value, unit in row.fields:
+            text = _format_value(value, unit)
+            if '\n' in text or label in ('Query', 'Current Query', 'Last Query', 'Blocked Query', 'Blocking Query'):
+                yield f"- **{label}**:\n\n```sql\n{text}\n```\n\n"
+            else:
+                yield f"- **{label}**: {text}\n"
+        for message, severity in row.warnings:
+            yield f"\n{self.WARNING_PREFIX[severity]}{message}\n"
+
+    def section_footer(self, section):
+        if not section.rows and not section.omitted_rows:
+            yield f"_{section.empty_message}_\n"
+        if section.omitted_rows:
+            yield f"\n_{section.omitted_rows} more rows omitted to fit the response size limit._\n"
+        if section.recommendation and (section.rows or section.omitted_rows):
+            yield f"\n**Recommendation:** {section.recommendation}\n"
+
+
+class JsonRenderer:
+    """JSON for machine consumers"""
+
+    def render_row(self, row):
+        return json.dumps(row.to_dict(), default=str)
+
+    def iter_render(self, report):
+        yield json.dumps(report.to_dict(), default=str)
+
+    def render(self, report):
+        return ''.join(self.iter_render(report))
+
+
+RENDERERS = {
+    'text': TextRenderer(),
+    'markdown': MarkdownRenderer(),
+    'json': JsonRenderer(),
+}
+
+
+def truncate_report(report, max_tokens, renderer=None):
+    """
+    Return a copy of the report that fits in roughly max_tokens when rendered
+
+    Rows are kept in priority order: higher severity first, then earlier rows
+    of each section (sections are already ordered by relevance), round-robin
+    across sections so that every section keeps its top rows. Dropped rows are
+    counted in each section's omitted_rows and the original order is preserved.
+    """
+    renderer = renderer or RENDERERS['text']
+    budget = max_tokens * CHARS_PER_TOKEN
+
+    row_sizes = {}
+    for section in report.sections:
+        for row in section.rows:
+            row_sizes[id(row)] = len(renderer.render_row(row))
+    if not row_sizes:
+        return report
+
+    skeleton = Report(report.title)
+    skeleton.notes = report.notes
+    for section in report.sections:
+        trimmed = skeleton.add_section(section.title, section.empty_message, section.recommendation)
+        trimmed.notes = section.notes
+        # Reserve room for an omission note in every section
+        trimmed.omitted_rows = len(section.rows)
+    remaining = budget - len(renderer.render(skeleton))
+
+    if sum(row_sizes.values()) <= remaining:
+        return report
+
+    candidates = sorted(
+        (
+            (-SEVERITY_RANK[row.severity], position, section_index, row)
+            for section_index, section in enumerate(report.sections)
+            for position, row in enumerate(section.rows)
+        ),
+        key=lambda candidate: candidate[:3]
+    )
+    kept = set()
+    for _, _, _, row in candidates:
+        size = row_sizes[id(row)]
+        if size <= remaining:
+            kept.add(id(row))
+            remaining -= size
+
+    for section, trimmed in zip(report.sections, skeleton.sections):
+        trimmed.rows = [row for row in section.rows if id(row) in kept]
+        trimmed.omitted_rows = len(section.rows) - len(trimmed.rows) + section.omitted_rows
+    return skeleton
+
+
+def render_report(report, output_format='text', max_tokens=REPORT_TOKEN_BUDGET):
+    """
+    Render a report as 'text', 'markdown' or 'json', truncated to max_tokens
+
+    Args:
+        report (Report): Report to render
+        output_format (str): One of RENDERERS
+        max_tokens (int, optional): Token budget; None or 0 disables truncation
+
+    Returns:
+        str: The rendered report
+    """
+    if output_format not in RENDERERS:
+        raise ValueError(f"Unknown output_format: {output_format}. Valid formats are: {', '.join(RENDERERS)}")
+    renderer = RENDERERS[output_format]
+    if max_tokens:
+        report = truncate_report(report, max_tokens, renderer)
+    return renderer.render(report)
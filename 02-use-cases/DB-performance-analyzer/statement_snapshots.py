@@ -0,0 +1,318 @@
+import base64
+import gzip
+import json
+import os
+import sqlite3
+import time
+from decimal import Decimal
+
+# Where snapshots are kept. With SNAPSHOT_TABLE set, snapshots go to that DynamoDB
+# table (DYNAMODB_ENDPOINT_URL can point at DynamoDB Local); otherwise a SQLite file is used.
+SNAPSHOT_TABLE = os.environ.get('SNAPSHOT_TABLE')
+SNAPSHOT_DB_PATH = os.environ.get('SNAPSHOT_DB_PATH', '/tmp/pg_stat_snapshots.db')
+SNAPSHOT_RETENTION_HOURS = int(os.environ.get('SNAPSHOT_RETENTION_HOURS', '48'))
+# Query text is truncated so a snapshot of every statement stays small
+MAX_QUERY_TEXT_LENGTH = 2000
+
+COUNTER_COLUMNS = [
+    'calls',
+    'total_exec_time',
+    'rows',
+    'shared_blks_hit',
+    'shared_blks_read',
+    'temp_blks_read',
+    'temp_blks_written',
+]
+
+SNAPSHOT_QUERY = """
+    SELECT s.queryid,
+           s.userid,
+           s.dbid,
+           CASE WHEN r.rolname IS NULL THEN 'unknown' ELSE r.rolname END as username,
+           CASE WHEN d.datname IS NULL THEN 'unknown' ELSE d.datname END as database,
+           left(s.query, %s) as query,
+           s.calls,
+           s.total_exec_time,
+           s.rows,
+           s.shared_blks_hit,
+           s.shared_blks_read,
+           s.temp_blks_read,
+           s.temp_blks_written
+    FROM pg_stat_statements s
+    LEFT JOIN pg_roles r ON r.oid = s.userid
+    LEFT JOIN pg_database d ON d.oid = s.dbid
+    WHERE s.queryid IS NOT NULL;
+"""
+
+
+def statement_key(row):
+    """pg_stat_statements entries are unique per (queryid, userid, dbid)"""
+    return f"{row['queryid']}:{row['userid']}:{row['dbid']}"
+
+
+def capture_snapshot(conn):
+    """
+    Read the current pg_stat_statements counters
+
+    Returns:
+        list: One dict per statement with identity, query text and counters
+    """
+    with conn.cursor() as cur:
+        cur.execute(SNAPSHOT_QUERY, (MAX_QUERY_TEXT_LENGTH,))
+        columns = [desc[0] for desc in cur.description]
+        rows = []
+        for row in cur.fetchall():
+            entry = dict(zip(columns, row))
+            for column in COUNTER_COLUMNS:
+                entry[column] = float(entry[column] or 0)
+            rows.append(entry)
+    return rows
+
+
+def compute_deltas(older_rows, newer_rows, interval_seconds):
+    """
+    Compute per-statement counter deltas between two snapshots
+
+    A statement whose call count went down was reset (pg_stat_statements_reset or
+    eviction), so its newer counters are taken as the delta. Statements with no
+    new calls in the interval are dropped.
+
+    Returns:
+        list: Dicts with identity, query text, per-interval deltas, the mean
+        execution time in the interval and per-second rates
+    """
+    older_by_key = {statement_key(row): row for row in older_rows}
+    interval_seconds = max(interval_seconds, 1)
+    deltas = []
+
+    for row in newer_rows:
+        older = older_by_key.get(statement_key(row))
+        if older is None or row['calls'] < older['calls']:
+            delta = {column: row[column] for column in COUNTER_COLUMNS}
+        else:
+            delta = {column: row[column] - older[column] for column in COUNTER_COLUMNS}
+        if delta['calls'] <= 0:
+            continue
+
+        delta.update({
+            'queryid': row['queryid'],
+            'username': row['username'],
+            'database': row['database'],
+            'query': row['query'],
+            'mean_exec_time_ms': delta['total_exec_time'] / delta['calls'],
+            'calls_per_second': delta['calls'] / interval_seconds,
+            'exec_time_ms_per_second': delta['total_exec_time'] / interval_seconds,
+            'new_statement': older is None,
+        })
+        if older is not None and older['calls'] > 0 and row['calls'] >= older['calls']:
+            delta['previous_mean_exec_time_ms'] = older['total_exec_time'] / older['calls']
+        deltas.append(delta)
+
+    return deltas
+
+
+def rank_deltas(deltas, order_by='total_exec_time', min_mean_exec_time_ms=0, limit=10):
+    """Return the top statements of an interval, optionally ignoring fast statements"""
+    filtered = [delta for delta in deltas if delta['mean_exec_time_ms'] >= min_mean_exec_time_ms]
+    return sorted(filtered, key=lambda delta: delta[order_by], reverse=True)[:limit]
+
+
+class SQLiteSnapshotStore:
+    """Keeps snapshots in a local SQLite file"""
+
+    def __init__(self, path=SNAPSHOT_DB_PATH):
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                environment TEXT NOT NULL,
+                captured_at REAL NOT NULL,
+                rows BLOB NOT NULL,
+                PRIMARY KEY (environment, captured_at)
+            );
+        """)
+
+    def save(self, environment, captured_at, rows):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)",
+                (environment, captured_at, gzip.compress(json.dumps(rows, default=str).encode('utf-8')))
+            )
+
+    def latest_at_or_before(self, environment, timestamp):
+        """Return (captured_at, rows) of the newest snapshot not newer than timestamp"""
+        row = self._conn.execute(
+            "SELECT captured_at, rows FROM snapshots WHERE environment = ? AND captured_at <= ? "
+            "ORDER BY captured_at DESC LIMIT 1",
+            (environment, timestamp)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(gzip.decompress(row[1]))
+
+    def oldest(self, environment):
+        row = self._conn.execute(
+            "SELECT captured_at, rows FROM snapshots WHERE environment = ? ORDER BY captured_at LIMIT 1",
+            (environment,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(gzip.decompress(row[1]))
+
+    def prune(self, environment, before):
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM snapshots WHERE environment = ? AND captured_at < ?",
+                (environment, before)
+            )
+
+
+class DynamoDBSnapshotStore:
+    """
+    Keeps snapshots in a DynamoDB table with partition key 'environment' (S)
+    and sort key 'captured_at' (N); rows are stored gzip-compressed.
+
+    DynamoDB items are limited to 400 KB, so a snapshot is split across items of
+    DYNAMODB_CHUNK_SIZE characters. Chunk i is stored at sort key captured_at +
+    i microseconds; every chunk carries the snapshot's 'snapshot_at' and its
+    number of 'chunks', so a snapshot is read back with one range query.
+    """
+
+    # Base64 characters per item, leaving room for the key and other attributes
+    DYNAMODB_CHUNK_SIZE = 350 * 1024
+    # Chunk sort keys stay within the millisecond captured_at is rounded to
+    MAX_CHUNKS = 999
+    CHUNK_STEP = Decimal('0.000001')
+
+    def __init__(self, table_name=SNAPSHOT_TABLE, endpoint_url=None):
+        import boto3
+        resource = boto3.resource(
+            'dynamodb',
+            region_name=os.environ.get('REGION'),
+            endpoint_url=endpoint_url or os.environ.get('DYNAMODB_ENDPOINT_URL')
+        )
+        self._table = resource.Table(table_name)
+
+    @staticmethod
+    def _decode(captured_at, encoded):
+        rows = gzip.decompress(base64.b64decode(encoded))
+        return float(captured_at), json.loads(rows)
+
+    def save(self, environment, captured_at, rows):
+        payload = gzip.compress(json.dumps(rows, default=str).encode('utf-8'))
+        encoded = base64.b64encode(payload).decode('ascii')
+        chunks = [
+            encoded[i:i + self.DYNAMODB_CHUNK_SIZE]
+            for i in range(0, len(encoded), self.DYNAMODB_CHUNK_SIZE)
+        ]
+        if len(chunks) > self.MAX_CHUNKS:
+            raise ValueError(
+                f"Snapshot of {len(rows)} statements is {len(payload)} bytes compressed, more than "
+                f"{self.MAX_CHUNKS} DynamoDB items of {self.DYNAMODB_CHUNK_SIZE} characters; "
+                f"lower MAX_QUERY_TEXT_LENGTH or pg_stat_statements.max"
+            )
+
+        snapshot_at = Decimal(str(round(captured_at, 3)))
+        expires_at = int(captured_at + SNAPSHOT_RETENTION_HOURS * 3600)
+        with self._table.batch_writer() as batch:
+            for index, chunk in enumerate(chunks):
+                batch.put_item(Item={
+                    'environment': environment,
+                    'captured_at': snapshot_at + index * self.CHUNK_STEP,
+                    'snapshot_at': snapshot_at,
+                    'chunk': index,
+                    'chunks': len(chunks),
+                    'rows': chunk,
+                    'expires_at': expires_at,
+                })
+
+    def _query(self, key_condition, values, ascending, limit=None):
+        kwargs = {
+            'KeyConditionExpression': key_condition,
+            'ExpressionAttributeNames': {'#e': 'environment', '#t': 'captured_at'},
+            'ExpressionAttributeValues': values,
+            'ScanIndexForward': ascending,
+        }
+        if limit:
+            kwargs['Limit'] = limit
+        items = []
+        while True:
+            response = self._table.query(**kwargs)
+            items.extend(response.get('Items', []))
+            if limit or 'LastEvaluatedKey' not in response:
+                return items
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def _read_snapshot(self, environment, item):
+        """Return (captured_at, rows) of the snapshot item belongs to, or None if it is incomplete"""
+        if 'chunks' not in item:
+            # Written as a single item before snapshots were chunked
+            return self._decode(item['captured_at'], item['rows'])
+
+        snapshot_at = item['snapshot_at']
+        chunks = int(item['chunks'])
+        if chunks == 1 and int(item['chunk']) == 0:
+            return self._decode(snapshot_at, item['rows'])
+        items = self._query(
+            '#e = :e AND #t BETWEEN :first AND :last',
+            {
+                ':e': environment,
+                ':first': snapshot_at,
+                ':last': snapshot_at + (chunks - 1) * self.CHUNK_STEP,
+            },
+            ascending=True
+        )
+        # Still being written, or partly expired by the table's TTL
+        if len(items) != chunks:
+            return None
+        return self._decode(snapshot_at, ''.join(chunk['rows'] for chunk in items))
+
+    def latest_at_or_before(self, environment, timestamp):
+        bound, condition = Decimal(str(round(timestamp, 3))), '#e = :e AND #t <= :t'
+        while True:
+            items = self._query(condition, {':e': environment, ':t': bound}, ascending=False, limit=1)
+            if not items:
+                return None
+            snapshot = self._read_snapshot(environment, items[0])
+            if snapshot is not None:
+                return snapshot
+            bound, condition = items[0].get('snapshot_at', items[0]['captured_at']), '#e = :e AND #t < :t'
+
+    def oldest(self, environment):
+        bound, condition = Decimal(0), '#e = :e AND #t >= :t'
+        while True:
+            items = self._query(condition, {':e': environment, ':t': bound}, ascending=True, limit=1)
+            if not items:
+                return None
+            snapshot = self._read_snapshot(environment, items[0])
+            if snapshot is not None:
+                return snapshot
+            item = items[0]
+            bound = item['captured_at']
+            if 'chunks' in item:
+                bound = item['snapshot_at'] + (int(item['chunks']) - 1) * self.CHUNK_STEP
+            condition = '#e = :e AND #t > :t'
+
+    def prune(self, environment, before):
+        # Expired snapshots are removed by the table's TTL on 'expires_at'
+        pass
+
+
+_store = None
+
+
+def get_snapshot_store():
+    """Create the configured snapshot store once per execution environment"""
+    global _store
+    if _store is None:
+        _store = DynamoDBSnapshotStore() if SNAPSHOT_TABLE else SQLiteSnapshotStore()
+    return _store
+
+
+def record_snapshot(conn, environment, store=None):
+    """Capture the current counters, save them and prune snapshots past retention"""
+    store = store or get_snapshot_store()
+    captured_at = time.time()
+    rows = capture_snapshot(conn)
+    store.save(environment, captured_at, rows)
+    store.prune(environment, captured_at - SNAPSHOT_RETENTION_HOURS * 3600)
+    return captured_at, rows
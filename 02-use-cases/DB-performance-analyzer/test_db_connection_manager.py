@@ -0,0 +1,193 @@
+"""
+Tests for DBConnectionManager with a fake database driver and fake AWS clients
+
+Run with: python -m pytest test_db_connection_manager.py (or python test_db_connection_manager.py)
+"""
+import json
+
+import db_connection_manager
+from db_connection_manager import DBConnectionManager
+
+
+class FakeSecretsManager:
+    """Secrets Manager holding one secret whose password can be rotated"""
+
+    def __init__(self, password='first'):
+        self.password = password
+        self.calls = 0
+
+    def get_secret_value(self, SecretId):
+        self.calls += 1
+        return {'SecretString': json.dumps({
+            'host': 'db.local',
+            'dbname': 'postgres',
+            'username': 'analyzer',
+            'password': self.password,
+            'port': 5432,
+        })}
+
+
+class FakeSession:
+    def __init__(self, secrets):
+        self.secrets = secrets
+        self.region_name = 'us-west-2'
+
+    def client(self, service_name, region_name=None):
+        assert service_name == 'secretsmanager'
+        return self.secrets
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.conn.executed.append(query)
+
+    def fetchone(self):
+        return (1,)
+
+
+class FakeConnection:
+    def __init__(self, password):
+        self.password = password
+        self.closed = 0
+        self.rollbacks = 0
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeDriver:
+    """DB-API connect() that only accepts the current password"""
+
+    def __init__(self, secrets):
+        self.secrets = secrets
+        self.attempts = []
+        self.connections = []
+
+    def connect(self, host, database, user, password, port, connect_timeout):
+        self.attempts.append(password)
+        if password != self.secrets.password:
+            raise Exception('password authentication failed for user "analyzer"')
+        conn = FakeConnection(password)
+        self.connections.append(conn)
+        return conn
+
+
+def make_manager(secret_ttl=300, validate_after=30):
+    secrets = FakeSecretsManager()
+    driver = FakeDriver(secrets)
+    manager = DBConnectionManager(
+        connect=driver.connect,
+        session=FakeSession(secrets),
+        secret_ttl=secret_ttl,
+        validate_after=validate_after
+    )
+    return manager, secrets, driver
+
+
+def test_secret_cached_for_ttl(monkeypatch):
+    """A secret is fetched once and reused until secret_ttl runs out"""
+    now = [1000.0]
+    monkeypatch.setattr(db_connection_manager.time, 'time', lambda: now[0])
+    manager, secrets, _ = make_manager(secret_ttl=300)
+
+    assert manager.get_secret('db-secret')['password'] == 'first'
+    now[0] += 299
+    manager.get_secret('db-secret')
+    assert secrets.calls == 1
+
+    now[0] += 2
+    manager.get_secret('db-secret')
+    assert secrets.calls == 2
+
+    metrics = manager.get_metrics()
+    assert metrics['secret_cache_hits'] == 1
+    assert metrics['secret_cache_misses'] == 2
+
+
+def test_connect_retries_with_fresh_credentials_after_rotation():
+    """A failed connect with a cached, rotated secret is retried once with a refetched secret"""
+    manager, secrets, driver = make_manager()
+    manager.get_secret('db-secret')
+    secrets.password = 'rotated'
+
+    conn = manager.get_connection('db-secret')
+
+    assert driver.attempts == ['first', 'rotated']
+    assert conn.password == 'rotated'
+    assert secrets.calls == 2
+    manager.release_connection(conn)
+
+
+def test_release_rolls_back_and_reuses_connection():
+    """A released connection is rolled back and handed out again to the next invocation"""
+    manager, _, driver = make_manager()
+
+    conn = manager.get_connection('db-secret')
+    manager.release_connection(conn)
+    assert conn.rollbacks == 1
+    assert not conn.closed
+
+    again = manager.get_connection('db-secret')
+    assert again is conn
+    assert len(driver.connections) == 1
+    assert manager.get_metrics()['connections_reused'] == 1
+    manager.release_connection(again)
+
+
+def test_busy_connection_gets_temporary_connection():
+    """A nested checkout gets its own connection, which is closed on release"""
+    manager, _, driver = make_manager()
+
+    warm = manager.get_connection('db-secret')
+    nested = manager.get_connection('db-secret')
+    assert nested is not warm
+
+    manager.release_connection(nested)
+    assert nested.closed
+    manager.release_connection(warm)
+    assert not warm.closed
+    assert len(driver.connections) == 2
+
+
+def test_broken_connection_replaced(monkeypatch):
+    """A warm connection that fails validation after being idle is closed and replaced"""
+    now = [1000.0]
+    monkeypatch.setattr(db_connection_manager.time, 'time', lambda: now[0])
+    manager, _, driver = make_manager(validate_after=30)
+
+    conn = manager.get_connection('db-secret')
+    manager.release_connection(conn)
+
+    def broken_cursor():
+        raise Exception('server closed the connection unexpectedly')
+
+    conn.cursor = broken_cursor
+    now[0] += 31
+    replacement = manager.get_connection('db-secret')
+
+    assert replacement is not conn
+    assert conn.closed
+    assert len(driver.connections) == 2
+    assert manager.get_metrics()['broken_connections'] == 1
+    manager.release_connection(replacement)
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
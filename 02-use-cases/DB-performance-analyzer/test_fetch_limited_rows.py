@@ -0,0 +1,124 @@
+"""
+Tests for fetch_limited_rows in pg-analyze-performance.py with a fake named cursor
+
+Run with: python -m pytest test_fetch_limited_rows.py (or python test_fetch_limited_rows.py)
+"""
+import importlib.util
+import os
+import tracemalloc
+
+import pytest
+
+# The Lambda module imports psycopg2 at load time
+pytest.importorskip('psycopg2')
+
+_spec = importlib.util.spec_from_file_location(
+    'pg_analyze_performance', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pg-analyze-performance.py')
+)
+pg_analyze_performance = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(pg_analyze_performance)
+fetch_limited_rows = pg_analyze_performance.fetch_limited_rows
+
+
+class FakeNamedCursor:
+    """Server-side cursor over total_rows generated rows, produced only as they are fetched"""
+
+    def __init__(self, total_rows, value_size):
+        self.total_rows = total_rows
+        self.value_size = value_size
+        self.itersize = None
+        self.description = None
+        self.fetch_sizes = []
+        self.fetched = 0
+        self.closed = False
+
+    def execute(self, query):
+        self.query = query
+
+    def fetchmany(self, size):
+        self.fetch_sizes.append(size)
+        # Like psycopg2, a named cursor only has a description after the first fetch
+        self.description = [('id',), ('payload',)]
+        count = max(min(size, self.total_rows - self.fetched), 0)
+        batch = [(self.fetched + i, 'x' * self.value_size) for i in range(count)]
+        self.fetched += count
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, total_rows, value_size=10):
+        self.total_rows = total_rows
+        self.value_size = value_size
+        self.cursors = []
+
+    def cursor(self, name=None):
+        assert name is not None, "fetch_limited_rows should use a named cursor"
+        cursor = FakeNamedCursor(self.total_rows, self.value_size)
+        self.cursors.append(cursor)
+        return cursor
+
+
+def test_fetches_in_batches_of_batch_size():
+    conn = FakeConnection(total_rows=1000)
+    columns, rows, truncated = fetch_limited_rows(
+        conn, 'SELECT * FROM t', max_rows=250, cursor_name='c', max_bytes=10 ** 9, batch_size=50
+    )
+    cursor = conn.cursors[0]
+    assert columns == ['id', 'payload']
+    assert len(rows) == 250
+    assert truncated == "Results truncated to 250 rows"
+    assert cursor.itersize == 50
+    # Full batches, then only the one extra row that shows the result was truncated
+    assert cursor.fetch_sizes == [50] * 5 + [1]
+    assert cursor.closed
+
+
+def test_stops_at_max_rows_without_reading_the_rest():
+    conn = FakeConnection(total_rows=1000000)
+    _, rows, truncated = fetch_limited_rows(
+        conn, 'SELECT * FROM t', max_rows=20, cursor_name='c', batch_size=100
+    )
+    assert len(rows) == 20
+    assert truncated == "Results truncated to 20 rows"
+    assert conn.cursors[0].fetched == 21
+
+
+def test_stops_at_max_bytes():
+    conn = FakeConnection(total_rows=1000, value_size=100)
+    _, rows, truncated = fetch_limited_rows(
+        conn, 'SELECT * FROM t', max_rows=1000, cursor_name='c', max_bytes=1000, batch_size=10
+    )
+    assert len(rows) == 9
+    assert truncated == "Results truncated to 9 rows (1000 byte limit reached)"
+    assert conn.cursors[0].fetched == 10
+
+
+def test_small_result_is_not_truncated():
+    conn = FakeConnection(total_rows=7)
+    _, rows, truncated = fetch_limited_rows(conn, 'SELECT * FROM t', max_rows=20, cursor_name='c')
+    assert len(rows) == 7
+    assert truncated is None
+
+
+def _peak_memory(total_rows):
+    conn = FakeConnection(total_rows=total_rows, value_size=1000)
+    tracemalloc.start()
+    try:
+        fetch_limited_rows(conn, 'SELECT * FROM t', max_rows=100, cursor_name='c', batch_size=100)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_peak_memory_does_not_grow_with_result_size():
+    small = _peak_memory(1000)
+    large = _peak_memory(1000000)
+    # Only max_rows rows and one batch are ever held, however large the result
+    assert large < small * 1.5, (small, large)
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,145 @@
+"""
+Fuzz tests for sql_tokenizer: random SQL with quotes, E'' escapes, dollar-quoted
+bodies and nested comments must round-trip through tokenize and split_statements
+
+Run with: python -m pytest test_sql_tokenizer.py (or python test_sql_tokenizer.py)
+SQL_FUZZ_SEED and SQL_FUZZ_ITERATIONS change the generated inputs.
+"""
+import os
+import random
+
+from sql_tokenizer import SEMICOLON, STRING, COMMENT, tokenize, split_statements
+
+SEED = int(os.environ.get('SQL_FUZZ_SEED', '20240611'))
+ITERATIONS = int(os.environ.get('SQL_FUZZ_ITERATIONS', '500'))
+
+# Characters that are special to the tokenizer, so every quoting rule gets exercised
+TRICKY = ";'\"$-/*\\\nEe0 "
+PLAIN = 'abcxyz_9.,()=<>+'
+
+
+def random_text(rng, alphabet, max_length=12):
+    return ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+
+
+def standard_string(rng):
+    body = random_text(rng, PLAIN + ";\"$-/*\\\n ").replace("\\", '')
+    # A doubled quote is a quote inside the string
+    return "'" + body.replace(';', rng.choice([';', "'';"])) + "'"
+
+
+def escape_string(rng):
+    parts = [rng.choice(["\\'", '\\\\', "''", ';', '/*', '--', '$$', random_text(rng, PLAIN)])
+             for _ in range(rng.randint(0, 5))]
+    return rng.choice('eE') + "'" + ''.join(parts) + "'"
+
+
+def dollar_string(rng):
+    tag = f"${rng.choice(['', 'body', 'fn_1', 'x'])}$"
+    body = random_text(rng, TRICKY + PLAIN, 30)
+    # The body may contain other tags, but its own tag must first appear at the end
+    while (body + tag).find(tag) != len(body):
+        body = body.replace(tag, '')[:-1]
+    return tag + body + tag
+
+
+def block_comment(rng, depth=0):
+    parts = []
+    for _ in range(rng.randint(0, 4)):
+        if depth < 3 and rng.random() < 0.3:
+            parts.append(block_comment(rng, depth + 1))
+        else:
+            text = random_text(rng, TRICKY + PLAIN)
+            # Keep delimiters only where they are generated on purpose, also where
+            # the text meets the neighbouring ones
+            while '/*' in text or '*/' in text:
+                text = text.replace('/*', '/').replace('*/', '*')
+            parts.append(text.strip('/*'))
+    return '/*' + ''.join(parts) + '*/'
+
+
+def line_comment(rng):
+    return '--' + random_text(rng, TRICKY.replace('\n', '') + PLAIN) + '\n'
+
+
+def quoted_identifier(rng):
+    return '"' + random_text(rng, PLAIN + ";'$- ").replace(';', rng.choice([';', '"";'])) + '"'
+
+
+def plain_token(rng):
+    return rng.choice(['SELECT', 'from', 'Orders', 'o.id', '42', '3.5e10', '$1', '=', '(', ')', ',', '<>'])
+
+
+FRAGMENTS = [standard_string, escape_string, dollar_string, block_comment, line_comment,
+             quoted_identifier, plain_token, plain_token]
+
+
+def random_statement(rng):
+    """
+    A statement whose only top-level semicolons are the ones between statements,
+    and whether it has anything but comments (split_statements drops it if not)
+    """
+    makers = [rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 8))]
+    significant = any(make not in (block_comment, line_comment) for make in makers)
+    return ' '.join(make(rng) for make in makers), significant
+
+
+def random_script(rng):
+    """Return the expected statement texts and the script joining them"""
+    statements = [random_statement(rng) for _ in range(rng.randint(1, 5))]
+    sql = rng.choice([';\n', ' ; ', ';']).join(text for text, _ in statements) + rng.choice(['', ';', ';\n'])
+    return [text.strip() for text, significant in statements if significant], sql
+
+
+def assert_contiguous(sql, tokens):
+    position = 0
+    for token in tokens:
+        assert token.start == position and token.end > token.start, token
+        assert sql[token.start:token.end] == token.value
+        position = token.end
+    assert position == len(sql)
+
+
+def test_tokenize_round_trips_generated_sql():
+    rng = random.Random(SEED)
+    for _ in range(ITERATIONS):
+        _, sql = random_script(rng)
+        tokens = list(tokenize(sql))
+        assert ''.join(token.value for token in tokens) == sql
+        assert_contiguous(sql, tokens)
+
+
+def test_tokenize_round_trips_arbitrary_text():
+    """Unterminated strings and comments must still cover the whole input"""
+    rng = random.Random(SEED + 1)
+    for _ in range(ITERATIONS):
+        sql = random_text(rng, TRICKY + PLAIN + '\té', 60)
+        tokens = list(tokenize(sql))
+        assert ''.join(token.value for token in tokens) == sql
+        assert_contiguous(sql, tokens)
+
+
+def test_quoted_fragments_are_single_tokens():
+    rng = random.Random(SEED + 2)
+    for _ in range(ITERATIONS):
+        for make, kind in ((standard_string, STRING), (escape_string, STRING),
+                           (dollar_string, STRING), (block_comment, COMMENT)):
+            fragment = make(rng)
+            tokens = list(tokenize(fragment))
+            assert [(token.kind, token.value) for token in tokens] == [(kind, fragment)], fragment
+
+
+def test_split_statements_round_trips_generated_sql():
+    rng = random.Random(SEED + 3)
+    for _ in range(ITERATIONS):
+        statements, sql = random_script(rng)
+        split = split_statements(sql)
+        assert [statement.text for statement in split] == statements, sql
+        for statement in split:
+            assert ''.join(token.value for token in statement.tokens).strip() == statement.text
+            assert all(token.kind != SEMICOLON for token in statement.tokens)
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
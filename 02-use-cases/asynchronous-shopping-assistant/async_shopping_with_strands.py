@@ -18,23 +18,11 @@ logging.basicConfig(
 
 import logging
 from strands import Agent, tool
-from strands.multiagent import GraphBuilder
-from strands_tools import file_write, file_read, shell, use_aws
-from strands.models import BedrockModel
-
-sonnet = BedrockModel(
-    model_id="us.anthropic.claude-3-5-sonnet-20240620-v1:0"
-)
-
-haiku = BedrockModel(
-    model_id="us.anthropic.claude-3-5-haiku-20241022-v1:0"
-)
 
 import os
 import glob
 
 os.environ["BYPASS_TOOL_CONSENT"] = "true"
-from nova_act import NovaAct
 import asyncio
 
 print("Starting up...")
@@ -96,6 +84,8 @@ def _run_browser_task(request: str):
         print("Starting Nova act ...")
 
         try:
+            from nova_act import NovaAct
+
             with NovaAct(
                 cdp_endpoint_url=ws_url,
                 cdp_headers=headers,
@@ -167,8 +157,22 @@ def get_tasks_info():
     logging.debug(f"Nova Act logs found: {nova_act_logs}")
     return tasks_result
 
-reporting_agent = Agent(name="reporting_assistant", 
-                        system_prompt="""You are a report generation agent. Once the shopping session is completed, you can read
+def build_graph():
+    """Create the models, agents and graph; done on the first prompt so startup does not wait for them"""
+    from strands.multiagent import GraphBuilder
+    from strands_tools import file_write, file_read, shell
+    from strands.models import BedrockModel
+
+    sonnet = BedrockModel(
+        model_id="us.anthropic.claude-3-5-sonnet-20240620-v1:0"
+    )
+
+    haiku = BedrockModel(
+        model_id="us.anthropic.claude-3-5-haiku-20241022-v1:0"
+    )
+
+    reporting_agent = Agent(name="reporting_assistant", 
+                            system_prompt="""You are a report generation agent. Once the shopping session is completed, you can read
                          one or more results_<sessionid>.txt files and respond to the user with the content you see.
                          
                          If no result files are available but Nova Act log files are found, you can read those HTML log files
@@ -176,22 +180,22 @@ reporting_agent = Agent(name="reporting_assistant",
                          are typically located at paths like /tmp/tmp*_nova_act_logs/*/act_*.html and contain detailed
                          information about the browser session. These log files are very large, so do not try to read the 
                          entire file, all at once.""",
-                        tools=[file_read, get_tasks_info, shell, file_write],
-                        model = haiku)
+                            tools=[file_read, get_tasks_info, shell, file_write],
+                            model = haiku)
 
-fronting_agent = Agent(name="fronting_assistant", 
-                    system_prompt="""You are a shopping assistant for amazon.com. You receive a request from the user, and answer immediately
+    fronting_agent = Agent(name="fronting_assistant", 
+                        system_prompt="""You are a shopping assistant for amazon.com. You receive a request from the user, and answer immediately
                      if it is a generic question, or route to a background shopping agent. If you decide to go on with background 
                      shopping you must return `shop_background.start` in your text response. You may also read any reports or results
                      generated by other agents; this will be in the format `/tmp/result_<session_id>`. 
                      You also have a tool to check the status of running tasks. 
                      
                      DO NOT use the reporting agent tool right after creating a browser session. Ask the user to wait for results. """,
-                    tools = [get_tasks_info, file_read],
-                    model = sonnet)
+                        tools = [get_tasks_info, file_read],
+                        model = sonnet)
 
-shopping_agent = Agent(name="shopping_assistant", 
-                    system_prompt="""You are a background shopping assistant. You receive a request from the user, and
+    shopping_agent = Agent(name="shopping_assistant", 
+                        system_prompt="""You are a background shopping assistant. You receive a request from the user, and
                      asynchronously search amazon.com and report back to the customer. Once you start a shopping session, 
                      recognize that this will take a long time to complete. After starting one or more sessions in parallel,
                      return immediately to the user with an appropriate message. 
@@ -207,8 +211,20 @@ shopping_agent = Agent(name="shopping_assistant",
                      NOTE 4: DO NOT ask follow up questions, start analyzing the task immediately using the web search tool.
                     
                     Lastly, if the user asks for the status of the search or for a report, use the appropriate tools to assist.""",
-                    tools = [call_browser_tool],
-                    model = sonnet)
+                        tools = [call_browser_tool],
+                        model = sonnet)
+
+    builder = GraphBuilder()
+
+    builder.add_node(fronting_agent, "start")
+    builder.add_node(shopping_agent, "shop")
+    builder.add_node(reporting_agent, "report")
+
+    builder.add_edge("start", "shop", condition=only_if_shopping_needed)
+    builder.add_edge("start", "report", condition=only_if_background_task_is_done)
+    builder.set_entry_point("start")
+
+    return builder.build()
 
 
 
@@ -258,17 +274,16 @@ def only_if_background_task_is_done(state):
     else:
         return False
 
-builder = GraphBuilder()
-
-builder.add_node(fronting_agent, "start")
-builder.add_node(shopping_agent, "shop")
-builder.add_node(reporting_agent, "report")
+_graph = None
+_graph_lock = threading.Lock()
 
-builder.add_edge("start", "shop", condition=only_if_shopping_needed)
-builder.add_edge("start", "report", condition=only_if_background_task_is_done)
-builder.set_entry_point("start")
 
-graph = builder.build()
+def get_graph():
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            _graph = build_graph()
+        return _graph
 
 @app.entrypoint
 def handler(payload, context):
@@ -277,11 +292,12 @@ def handler(payload, context):
         result = _run_browser_task(request=payload.get("test"))
         return result
     elif "prompt" in payload:
-        result = graph(payload.get("prompt"))
+        result = get_graph()(payload.get("prompt"))
         # print(result) # GraphResults object
         return {"result": result.results['start'].result.message}
     else:
         return {"result": "You must provide a `prompt` or `test` key to proceed. ✋"}
 
-app.run()
+if __name__ == "__main__":
+    app.run()
 
@@ -1,11 +1,21 @@
 from .utils import get_ssm_parameter
 from bedrock_agentcore.identity.auth import requires_access_token
+import functools
 
 
-@requires_access_token(
-    provider_name=get_ssm_parameter("/app/customersupport/agentcore/cognito_provider"),
-    scopes=[],  # Optional unless required
-    auth_flow="M2M",
-)
-async def get_gateway_access_token(access_token: str):
-    return access_token
+@functools.lru_cache(maxsize=None)
+def _gateway_access_token_getter():
+    # The provider name is read from SSM, so the decorated function is built on first use
+    @requires_access_token(
+        provider_name=get_ssm_parameter("/app/customersupport/agentcore/cognito_provider"),
+        scopes=[],  # Optional unless required
+        auth_flow="M2M",
+    )
+    async def get_access_token(access_token: str):
+        return access_token
+
+    return get_access_token
+
+
+async def get_gateway_access_token():
+    return await _gateway_access_token_getter()()
@@ -1,11 +1,10 @@
-from .utils import get_ssm_parameter
+from .gateway import gateway_connections
 from agent_config.memory_hook_provider import MemoryHook
-from mcp.client.streamable_http import streamablehttp_client
 from strands import Agent
 from strands_tools import current_time, retrieve
 from strands.models import BedrockModel
-from strands.tools.mcp import MCPClient
 from typing import List
+import asyncio
 
 
 class CustomerSupport:
@@ -41,58 +40,56 @@ class CustomerSupport:
     """
         )
 
-        gateway_url = get_ssm_parameter("/app/customersupport/agentcore/gateway_url")
-        print(f"Gateway Endpoint - MCP URL: {gateway_url}")
+        self.bearer_token = bearer_token
+        self.custom_tools = tools or []
+        # The gateway session and its tool list are shared by all agents of the process
+        self.gateway_tools = gateway_connections.get_tools(bearer_token)
 
-        try:
-            self.gateway_client = MCPClient(
-                lambda: streamablehttp_client(
-                    gateway_url,
-                    headers={"Authorization": f"Bearer {bearer_token}"},
-                )
-            )
-
-            self.gateway_client.start()
-        except Exception as e:
-            raise f"Error initializing agent: {str(e)}"
+        self.memory_hook = memory_hook
+        self.agent = None
 
-        self.tools = (
-            [
-                retrieve,
-                current_time,
-            ]
-            + self.gateway_client.list_tools_sync()
-            + tools
-        )
+    @property
+    def tools(self) -> List:
+        return [retrieve, current_time] + self.gateway_tools + self.custom_tools
 
-        self.memory_hook = memory_hook
+    def _get_agent(self, bearer_token: str = None) -> Agent:
+        """The agent of this conversation, built again when the gateway tools change."""
+        if bearer_token:
+            self.bearer_token = bearer_token
+        gateway_tools = gateway_connections.get_tools(self.bearer_token)
+        if gateway_tools is not self.gateway_tools:
+            # The token rotated or the tools changed; the new agent reloads the conversation from memory
+            self.gateway_tools = gateway_tools
+            self.agent = None
 
-    def invoke(self, user_query: str, session_id: str):
-        try:
-            agent = Agent(
+        if self.agent is None:
+            self.agent = Agent(
                 model=self.model,
                 system_prompt=self.system_prompt,
                 tools=self.tools,
                 hooks=[self.memory_hook],
             )
+        return self.agent
 
-            response = str(agent(user_query))
+    def invoke(self, user_query: str, session_id: str, bearer_token: str = None):
+        try:
+            response = str(self._get_agent(bearer_token)(user_query))
         except Exception as e:
+            # Start the next turn from memory rather than a half-finished conversation
+            self.agent = None
             return f"Error invoking agent: {e}"
         return response
 
-    async def stream(self, user_query: str, session_id: str):
+    async def stream(self, user_query: str, session_id: str, bearer_token: str = None):
         try:
-            agent = Agent(
-                model=self.model,
-                system_prompt=self.system_prompt,
-                tools=self.tools,
-                hooks=[self.memory_hook],
-            )
+            # Connecting to the gateway or listing its tools blocks; keep it off the event loop
+            agent = await asyncio.to_thread(self._get_agent, bearer_token)
             async for event in agent.stream_async(user_query):
                 if "data" in event:
                     # Only stream text chunks to the client
                     yield event["data"]
 
         except Exception as e:
+            # Start the next turn from memory rather than a half-finished conversation
+            self.agent = None
             yield f"We are unable to process your request at the moment. Error: {e}"
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Hashable
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+AGENT_POOL_MAX_SIZE = int(os.environ.get("AGENT_POOL_MAX_SIZE", "100"))
+AGENT_POOL_IDLE_TTL_SECONDS = float(os.environ.get("AGENT_POOL_IDLE_TTL_SECONDS", "900"))
+
+
+class _PoolEntry:
+    def __init__(self):
+        self.agent = None
+        # Turns of one session run one at a time, so they never share an agent concurrently
+        self.lock = asyncio.Lock()
+        self.leases = 0
+        self.last_used = time.monotonic()
+
+
+class AgentPool:
+    """
+    Agents kept per key, e.g. (actor_id, session_id), so each session reuses its own
+    agent and memory hook and never another session's.
+
+    Agents idle for longer than idle_ttl seconds are evicted, and the least recently
+    used ones when there are more than max_size. An agent in use is never evicted.
+    """
+
+    def __init__(
+        self,
+        max_size: int = AGENT_POOL_MAX_SIZE,
+        idle_ttl: float = AGENT_POOL_IDLE_TTL_SECONDS,
+    ):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self._entries: "OrderedDict[Hashable, _PoolEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    @asynccontextmanager
+    async def lease(self, key: Hashable, factory: Callable[[], Any]):
+        """Hold the agent of key for one turn, creating it with factory in a thread if needed."""
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _PoolEntry()
+        self._entries.move_to_end(key)
+
+        entry.leases += 1
+        try:
+            async with entry.lock:
+                if entry.agent is None:
+                    entry.agent = await asyncio.to_thread(factory)
+                yield entry.agent
+        finally:
+            entry.leases -= 1
+            entry.last_used = time.monotonic()
+            self.evict()
+
+    def evict(self) -> None:
+        """Drop idle and least recently used agents that are not in use."""
+        now = time.monotonic()
+        for key, entry in list(self._entries.items()):
+            if entry.leases:
+                continue
+            if now - entry.last_used > self.idle_ttl or len(self._entries) > self.max_size:
+                del self._entries[key]
+                self._close(key, entry.agent)
+
+    def _close(self, key: Hashable, agent: Any) -> None:
+        close = getattr(agent, "close", None)
+        if close is None:
+            return
+        logger.info(f"Closing pooled agent {key}")
+
+        def close_quietly():
+            try:
+                close()
+            except Exception:
+                logger.exception(f"Failed to close pooled agent {key}")
+
+        # Closing may block on network calls
+        asyncio.get_running_loop().run_in_executor(None, close_quietly)
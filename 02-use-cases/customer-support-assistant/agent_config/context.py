@@ -1,4 +1,3 @@
-from .agent import CustomerSupport
 from contextvars import ContextVar
 from typing import Optional
 import asyncio
@@ -9,7 +8,6 @@ gateway_token_ctx: ContextVar[Optional[str]] = ContextVar("gateway_token", defau
 response_queue_ctx: ContextVar[Optional[asyncio.Queue]] = ContextVar(
     "response_queue", default=None
 )
-agent_ctx: ContextVar[Optional[CustomerSupport]] = ContextVar("agent", default=None)
 
 
 # Helper functions
@@ -35,11 +33,3 @@ def get_gateway_token_ctx() -> Optional[str]:
 
 def set_gateway_token_ctx(token: str) -> None:
     gateway_token_ctx.set(token)
-
-
-def get_agent_ctx() -> Optional[CustomerSupport]:
-    return agent_ctx.get()
-
-
-def set_agent_ctx(agent: CustomerSupport) -> None:
-    agent_ctx.set(agent)
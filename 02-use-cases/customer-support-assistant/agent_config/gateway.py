@@ -0,0 +1,221 @@
+from .utils import get_ssm_parameter
+from mcp.client.streamable_http import streamablehttp_client
+from strands.tools.mcp import MCPClient
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+import base64
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_TOOLS_TTL_SECONDS = float(os.environ.get("GATEWAY_TOOLS_TTL_SECONDS", "300"))
+# A session replaced after a token rotation is stopped this much later, so tool
+# calls already running on it can finish
+GATEWAY_RETIRE_GRACE_SECONDS = float(os.environ.get("GATEWAY_RETIRE_GRACE_SECONDS", "60"))
+
+
+@functools.lru_cache(maxsize=None)
+def get_gateway_url() -> str:
+    gateway_url = get_ssm_parameter("/app/customersupport/agentcore/gateway_url")
+    print(f"Gateway Endpoint - MCP URL: {gateway_url}")
+    return gateway_url
+
+
+def _issued_at(bearer_token: str) -> Optional[float]:
+    """The iat claim of a JWT access token, or None if the token is not a JWT."""
+    try:
+        payload = bearer_token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["iat"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _is_newer_token(bearer_token: str, current_token: str) -> bool:
+    if bearer_token == current_token:
+        return False
+    issued_at, current_issued_at = _issued_at(bearer_token), _issued_at(current_token)
+    if issued_at is None or current_issued_at is None:
+        # Opaque tokens cannot be ordered; the last one seen wins
+        return True
+    return issued_at > current_issued_at
+
+
+class _GatewayConnection:
+    def __init__(self, bearer_token: str, client: MCPClient):
+        self.bearer_token = bearer_token
+        self.client = client
+        self.tools: List = []
+        self.tool_names: List[str] = []
+        self.tools_loaded_at = 0.0
+
+
+class GatewayConnectionManager:
+    """
+    Process-wide MCP sessions to the AgentCore Gateway, one per bearer token scope.
+
+    Every CustomerSupport agent of a scope shares the scope's warm session and its
+    tool list. The tool list is fetched again after tools_ttl seconds, and the
+    session is replaced when a token issued later than the session's arrives, so
+    turns still holding the previous token do not replace it back.
+    """
+
+    def __init__(
+        self,
+        tools_ttl: float = GATEWAY_TOOLS_TTL_SECONDS,
+        retire_grace: float = GATEWAY_RETIRE_GRACE_SECONDS,
+    ):
+        self.tools_ttl = tools_ttl
+        self.retire_grace = retire_grace
+        self._connections: Dict[str, _GatewayConnection] = {}
+        self._refreshes: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._metrics = {
+            "connections": 0,
+            "connect_seconds": 0.0,
+            "token_rotations": 0,
+            "reconnects": 0,
+            "tool_list_fetches": 0,
+            "tool_list_seconds": 0.0,
+            "tool_list_cache_hits": 0,
+        }
+
+    def get_tools(self, bearer_token: str, scope: str = "default") -> List:
+        """Gateway tools for scope, connecting or refreshing the cached list if needed.
+
+        The same list object is returned for as long as the session and its tool
+        names stay the same, so callers can tell when to rebuild their agent. One
+        caller per scope connects or lists the tools, outside the lock; the others
+        keep serving the scope's cached list meanwhile, or wait for it if there is
+        none yet. Blocks on network calls, so call it off the event loop.
+        """
+        while True:
+            with self._lock:
+                connection = self._connections.get(scope)
+                rotated = connection is not None and _is_newer_token(bearer_token, connection.bearer_token)
+                refresh = self._refreshes.get(scope)
+
+                if refresh is None:
+                    if rotated:
+                        logger.info(f"Gateway token rotated for scope {scope}, replacing its MCP session")
+                        self._metrics["token_rotations"] += 1
+                        del self._connections[scope]
+                        self._retire(connection)
+                        connection = None
+                    elif connection is not None and time.monotonic() - connection.tools_loaded_at < self.tools_ttl:
+                        self._metrics["tool_list_cache_hits"] += 1
+                        return connection.tools
+                    refresh = self._refreshes[scope] = Future()
+                    break
+
+                if connection is not None and not rotated:
+                    # Another caller is listing the tools again; the cached list is still usable
+                    self._metrics["tool_list_cache_hits"] += 1
+                    return connection.tools
+
+            # Another caller is connecting the scope; check again once it is done
+            refresh.exception()
+
+        try:
+            connection = self._refresh(scope, connection, bearer_token)
+        except BaseException as e:
+            with self._lock:
+                del self._refreshes[scope]
+            refresh.set_exception(e)
+            raise
+
+        with self._lock:
+            self._connections[scope] = connection
+            del self._refreshes[scope]
+        refresh.set_result(connection.tools)
+        return connection.tools
+
+    def metrics(self) -> Dict:
+        """Connection and tool list counters and latencies, for logs or health checks."""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["sessions"] = len(self._connections)
+        metrics["connect_avg_seconds"] = metrics["connect_seconds"] / max(metrics["connections"], 1)
+        metrics["tool_list_avg_seconds"] = metrics["tool_list_seconds"] / max(
+            metrics["tool_list_fetches"], 1
+        )
+        return metrics
+
+    def close(self) -> None:
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for connection in connections:
+            self._stop(connection)
+
+    def _refresh(self, scope: str, connection: Optional[_GatewayConnection], bearer_token: str) -> _GatewayConnection:
+        if connection is None:
+            connection = self._connect(bearer_token)
+        try:
+            self._load_tools(connection)
+        except Exception:
+            # The session may have been closed by the gateway; start a new one once
+            logger.exception(f"Listing gateway tools failed for scope {scope}, reconnecting")
+            with self._lock:
+                self._metrics["reconnects"] += 1
+            self._retire(connection)
+            connection = self._connect(bearer_token)
+            self._load_tools(connection)
+        return connection
+
+    def _connect(self, bearer_token: str) -> _GatewayConnection:
+        gateway_url = get_gateway_url()
+        start = time.perf_counter()
+        try:
+            client = MCPClient(
+                lambda: streamablehttp_client(
+                    gateway_url,
+                    headers={"Authorization": f"Bearer {bearer_token}"},
+                )
+            )
+            client.start()
+        except Exception as e:
+            raise RuntimeError(f"Error initializing agent: {str(e)}") from e
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._metrics["connections"] += 1
+            self._metrics["connect_seconds"] += elapsed
+        logger.info(f"Gateway MCP session started in {elapsed:.2f}s")
+        return _GatewayConnection(bearer_token, client)
+
+    def _load_tools(self, connection: _GatewayConnection) -> None:
+        start = time.perf_counter()
+        tools = connection.client.list_tools_sync()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._metrics["tool_list_fetches"] += 1
+            self._metrics["tool_list_seconds"] += elapsed
+        logger.info(f"Listed {len(tools)} gateway tools in {elapsed:.2f}s")
+
+        tool_names = sorted(tool.tool_name for tool in tools)
+        if tool_names != connection.tool_names:
+            connection.tools = tools
+            connection.tool_names = tool_names
+        connection.tools_loaded_at = time.monotonic()
+
+    def _retire(self, connection: _GatewayConnection) -> None:
+        timer = threading.Timer(self.retire_grace, self._stop, args=(connection,))
+        timer.daemon = True
+        timer.start()
+
+    @staticmethod
+    def _stop(connection: _GatewayConnection) -> None:
+        try:
+            connection.client.stop(None, None, None)
+        except Exception:
+            logger.exception("Failed to stop gateway MCP session")
+
+
+# Shared by every agent in the process
+gateway_connections = GatewayConnectionManager()
@@ -0,0 +1,117 @@
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+import math
+import os
+import re
+import threading
+import time
+
+MEMORY_CACHE_TTL_SECONDS = float(os.environ.get("MEMORY_CACHE_TTL_SECONDS", "300"))
+MEMORY_CACHE_MAX_ENTRIES = int(os.environ.get("MEMORY_CACHE_MAX_ENTRIES", "1000"))
+# Reuse results of a different query of the same namespace when the queries' trigram
+# cosine similarity is at least this; 0 matches normalized queries exactly only
+MEMORY_CACHE_SIMILARITY = float(os.environ.get("MEMORY_CACHE_SIMILARITY", "0"))
+# Long-term memories are extracted from a saved conversation asynchronously, so
+# results cached before a save stay current for about this long after it
+MEMORY_EXTRACTION_DELAY_SECONDS = float(os.environ.get("MEMORY_EXTRACTION_DELAY_SECONDS", "30"))
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+
+def _trigrams(text: str) -> Counter:
+    padded = f"  {text} "
+    return Counter(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    dot = sum(count * b[gram] for gram, count in a.items() if gram in b)
+    norm = math.sqrt(sum(c * c for c in a.values())) * math.sqrt(sum(c * c for c in b.values()))
+    return dot / norm if norm else 0.0
+
+
+class _CacheEntry:
+    def __init__(self, namespace: str, query: str, memories: List, expires_at: float):
+        self.namespace = namespace
+        self.query = query
+        self.trigrams = _trigrams(query)
+        self.memories = memories
+        self.expires_at = expires_at
+
+
+class MemoryQueryCache:
+    """
+    Results of retrieve_memories by (memory_id, namespace, normalized query), so an
+    actor's repeated or near-identical questions skip the memory service.
+
+    Entries expire after ttl seconds, and extraction_delay seconds after a
+    conversation is saved for their namespace, when new memories may show up.
+    """
+
+    def __init__(
+        self,
+        ttl: float = MEMORY_CACHE_TTL_SECONDS,
+        max_entries: int = MEMORY_CACHE_MAX_ENTRIES,
+        similarity: float = MEMORY_CACHE_SIMILARITY,
+        extraction_delay: float = MEMORY_EXTRACTION_DELAY_SECONDS,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.extraction_delay = extraction_delay
+        self._entries: "OrderedDict[tuple, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, memory_id: str, namespace: str, query: str) -> Optional[List]:
+        query = normalize_query(query)
+        now = time.monotonic()
+        with self._lock:
+            key = (memory_id, namespace, query)
+            entry = self._entries.get(key)
+            if entry is None and self.similarity > 0:
+                entry = self._most_similar(memory_id, namespace, query)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end((memory_id, entry.namespace, entry.query))
+                self.hits += 1
+                return entry.memories
+            self.misses += 1
+            return None
+
+    def put(self, memory_id: str, namespace: str, query: str, memories: List) -> None:
+        query = normalize_query(query)
+        with self._lock:
+            key = (memory_id, namespace, query)
+            self._entries[key] = _CacheEntry(namespace, query, memories, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, memory_id: str, namespace_prefix: str, delay: float = None) -> None:
+        """Expire the entries of namespaces starting with namespace_prefix after delay seconds."""
+        expires_at = time.monotonic() + (self.extraction_delay if delay is None else delay)
+        with self._lock:
+            for (entry_memory_id, _, _), entry in self._entries.items():
+                if entry_memory_id == memory_id and entry.namespace.startswith(namespace_prefix):
+                    entry.expires_at = min(entry.expires_at, expires_at)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _most_similar(self, memory_id: str, namespace: str, query: str) -> Optional[_CacheEntry]:
+        trigrams = _trigrams(query)
+        best, best_score = None, self.similarity
+        for (entry_memory_id, entry_namespace, _), entry in self._entries.items():
+            if entry_memory_id != memory_id or entry_namespace != namespace:
+                continue
+            score = _cosine(trigrams, entry.trigrams)
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+
+# Shared by every memory hook in the process
+memory_query_cache = MemoryQueryCache()
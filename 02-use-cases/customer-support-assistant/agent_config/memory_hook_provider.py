@@ -1,7 +1,16 @@
+from .memory_cache import memory_query_cache
+from .memory_writer import conversation_writer
 from bedrock_agentcore.memory import MemoryClient
+from concurrent.futures import ThreadPoolExecutor
 from strands.hooks.events import AgentInitializedEvent, MessageAddedEvent
 from strands.hooks.registry import HookProvider, HookRegistry
-import copy
+import os
+
+# Memory retrievals of all sessions run here, several namespaces of a turn at once
+retrieval_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("MEMORY_RETRIEVAL_WORKERS", "16")),
+    thread_name_prefix="memory-retrieval",
+)
 
 
 class MemoryHook(HookProvider):
@@ -20,6 +29,9 @@ class MemoryHook(HookProvider):
     def on_agent_initialized(self, event: AgentInitializedEvent):
         """Load recent conversation history when agent starts"""
         try:
+            # Messages still queued for saving belong to the history being loaded
+            conversation_writer.flush(timeout=5)
+
             # Load the last 5 conversation turns from memory
             recent_turns = self.memory_client.get_last_k_turns(
                 memory_id=self.memory_id,
@@ -50,56 +62,64 @@ class MemoryHook(HookProvider):
         except Exception as e:
             print(f"Memory load error: {e}")
 
-    def _add_context_user_query(
-        self, namespace: str, query: str, init_content: str, event: MessageAddedEvent
-    ):
-        content = None
-        memories = self.memory_client.retrieve_memories(
-            memory_id=self.memory_id, namespace=namespace, query=query, top_k=3
-        )
+    def _add_context_user_query(self, query: str, event: MessageAddedEvent):
+        # (namespace, heading) of the long-term memories added to the user's message
+        namespaces = [
+            (f"support/user/{self.actor_id}/preferences", "These are user preferences:"),
+            (f"support/user/{self.actor_id}/facts", "These are user facts:"),
+        ]
+        # Cached results where there are any, the others retrieved at once
+        cached, retrievals = {}, {}
+        for namespace, _ in namespaces:
+            cached[namespace] = memory_query_cache.get(self.memory_id, namespace, query)
+            if cached[namespace] is None:
+                retrievals[namespace] = retrieval_executor.submit(
+                    self.memory_client.retrieve_memories,
+                    memory_id=self.memory_id,
+                    namespace=namespace,
+                    query=query,
+                    top_k=3,
+                )
 
-        for memory in memories:
-            if not content:
+        for namespace, init_content in namespaces:
+            if namespace in retrievals:
+                memories = retrievals[namespace].result()
+                memory_query_cache.put(self.memory_id, namespace, query, memories)
+            else:
+                memories = cached[namespace]
+            if memories:
                 content = "\n\n" + init_content + "\n\n"
-
-            content += memory["content"]["text"]
-
-            if content:
+                content += "".join(memory["content"]["text"] for memory in memories)
                 event.agent.messages[-1]["content"][0]["text"] += content + "\n\n"
 
     def on_message_added(self, event: MessageAddedEvent):
         """Store messages in memory"""
-        messages = copy.deepcopy(event.agent.messages)
+        # Only the last message is read; its text is taken before memories are added to it
+        message = event.agent.messages[-1]
         try:
-            if messages[-1]["role"] == "user" or messages[-1]["role"] == "assistant":
-                if "text" not in messages[-1]["content"][0]:
+            if message["role"] == "user" or message["role"] == "assistant":
+                if "text" not in message["content"][0]:
                     return
 
-                if messages[-1]["role"] == "user":
-                    self._add_context_user_query(
-                        namespace=f"support/user/{self.actor_id}/preferences",
-                        query=messages[-1]["content"][0]["text"],
-                        init_content="These are user preferences:",
-                        event=event,
-                    )
-
-                    self._add_context_user_query(
-                        namespace=f"support/user/{self.actor_id}/facts",
-                        query=messages[-1]["content"][0]["text"],
-                        init_content="These are user facts:",
-                        event=event,
-                    )
-                self.memory_client.save_conversation(
-                    memory_id=self.memory_id,
-                    actor_id=self.actor_id,
-                    session_id=self.session_id,
-                    messages=[
-                        (messages[-1]["content"][0]["text"], messages[-1]["role"])
-                    ],
+                role = message["role"]
+                text = message["content"][0]["text"]
+
+                if role == "user":
+                    self._add_context_user_query(query=text, event=event)
+
+                conversation_writer.put(
+                    self.memory_client,
+                    self.memory_id,
+                    self.actor_id,
+                    self.session_id,
+                    text,
+                    role,
                 )
+                # Memories extracted from this message will change what the actor's namespaces return
+                memory_query_cache.invalidate(self.memory_id, f"support/user/{self.actor_id}/")
 
         except Exception as e:
-            print(messages[-1])
+            print(message)
             raise RuntimeError(f"Memory save error: {e}")
 
     def register_hooks(self, registry: HookRegistry):
@@ -0,0 +1,92 @@
+from typing import Dict, List, Tuple
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MEMORY_SAVE_MAX_BATCH = int(os.environ.get("MEMORY_SAVE_MAX_BATCH", "20"))
+MEMORY_SAVE_LINGER_SECONDS = float(os.environ.get("MEMORY_SAVE_LINGER_SECONDS", "0.05"))
+
+
+class ConversationWriter:
+    """
+    Saves conversation messages to AgentCore Memory on a background thread, so the
+    agent does not wait for the save before it responds.
+
+    Messages queued within linger seconds of each other are written together: one
+    save_conversation call per session, with that session's messages in order.
+    """
+
+    def __init__(
+        self,
+        max_batch: int = MEMORY_SAVE_MAX_BATCH,
+        linger: float = MEMORY_SAVE_LINGER_SECONDS,
+    ):
+        self.max_batch = max_batch
+        self.linger = linger
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._thread = None
+        self.saves = 0
+        self.saved_messages = 0
+        self.failures = 0
+
+    def put(self, memory_client, memory_id: str, actor_id: str, session_id: str, text: str, role: str) -> None:
+        with self._idle:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+                self._thread.start()
+            self._pending += 1
+        self._queue.put((memory_client, memory_id, actor_id, session_id, (text, role)))
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every queued message is saved; False if timeout ran out first."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+
+            try:
+                self._save(batch)
+            finally:
+                with self._idle:
+                    self._pending -= len(batch)
+                    self._idle.notify_all()
+
+    def _save(self, batch: List[Tuple]) -> None:
+        sessions: Dict[Tuple, List] = {}
+        for memory_client, memory_id, actor_id, session_id, message in batch:
+            key = (id(memory_client), memory_id, actor_id, session_id)
+            sessions.setdefault(key, [memory_client]).append(message)
+
+        for (_, memory_id, actor_id, session_id), (memory_client, *messages) in sessions.items():
+            try:
+                memory_client.save_conversation(
+                    memory_id=memory_id,
+                    actor_id=actor_id,
+                    session_id=session_id,
+                    messages=messages,
+                )
+                self.saves += 1
+                self.saved_messages += len(messages)
+            except Exception:
+                self.failures += 1
+                logger.exception(f"Memory save error for session {session_id}")
+
+
+# Shared by every memory hook in the process
+conversation_writer = ConversationWriter()
+atexit.register(conversation_writer.flush, 5)
@@ -6,6 +6,7 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from scripts.utils import get_ssm_parameter
 from strands import tool
+import functools
 import json
 
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
@@ -17,17 +18,26 @@ async def on_auth_url(url: str):
     await response_queue.put(f"Authorization url: {url}")
 
 
-# This annotation helps agent developer to obtain access tokens from external applications
-@requires_access_token(
-    provider_name=get_ssm_parameter("/app/customersupport/agentcore/google_provider"),
-    scopes=SCOPES,  # Google OAuth2 scopes
-    auth_flow="USER_FEDERATION",  # On-behalf-of user (3LO) flow
-    on_auth_url=on_auth_url,  # prints authorization URL to console
-    force_authentication=True,
-    into="access_token",
-)
+@functools.lru_cache(maxsize=None)
+def _google_access_token_getter():
+    # The provider name is read from SSM, so the decorated function is built on first use
+    # This annotation helps agent developer to obtain access tokens from external applications
+    @requires_access_token(
+        provider_name=get_ssm_parameter("/app/customersupport/agentcore/google_provider"),
+        scopes=SCOPES,  # Google OAuth2 scopes
+        auth_flow="USER_FEDERATION",  # On-behalf-of user (3LO) flow
+        on_auth_url=on_auth_url,  # prints authorization URL to console
+        force_authentication=True,
+        into="access_token",
+    )
+    async def get_access_token(access_token: str):
+        return access_token
+
+    return get_access_token
+
+
 async def get_google_access_token(access_token: str):
-    return access_token
+    return await _google_access_token_getter()(access_token=access_token)
 
 
 @tool(
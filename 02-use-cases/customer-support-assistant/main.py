@@ -1,14 +1,12 @@
 from agent_config.context import (
-    get_response_queue_ctx,
     set_gateway_token_ctx,
     set_response_queue_ctx,
 )
 from agent_config.access_token import get_gateway_access_token
-from agent_config.agent_task import agent_task
 from agent_config.streaming_queue import StreamingQueue
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
-from scripts.utils import get_ssm_parameter
 import asyncio
+import functools
 import logging
 import os
 import uuid
@@ -17,23 +15,40 @@ import uuid
 os.environ["STRANDS_OTEL_ENABLE_CONSOLE_EXPORT"] = "true"
 os.environ["STRANDS_TOOL_CONSOLE_MODE"] = "enabled"
 
-os.environ["KNOWLEDGE_BASE_ID"] = get_ssm_parameter(
-    "/app/customersupport/knowledge_base/knowledge_base_id"
-)
-
 # Logging setup
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Bedrock app and global agent instance
+# Bedrock app; agents are pooled per (actor_id, session_id) in agent_task
 app = BedrockAgentCoreApp()
 
-set_response_queue_ctx(StreamingQueue())
+
+@functools.lru_cache(maxsize=None)
+def load_agent_task():
+    """
+    Look up the knowledge base and import the agent on the first request.
+
+    Doing this at startup would make the runtime wait for SSM and the agent SDK
+    imports before it can answer /ping.
+    """
+    from scripts.utils import get_ssm_parameter
+
+    os.environ["KNOWLEDGE_BASE_ID"] = get_ssm_parameter(
+        "/app/customersupport/knowledge_base/knowledge_base_id"
+    )
+
+    from agent_config.agent_task import agent_task
+
+    return agent_task
 
 
 @app.entrypoint
 async def invoke(payload, context):
-    response_queue = get_response_queue_ctx()
+    # A queue per invocation, so concurrent invocations never read each other's output.
+    # The agent task and its tools find it in the context copied by create_task.
+    response_queue = StreamingQueue()
+    set_response_queue_ctx(response_queue)
+    agent_task = await asyncio.to_thread(load_agent_task)
     set_gateway_token_ctx(await get_gateway_access_token())
 
     user_message = payload["prompt"]
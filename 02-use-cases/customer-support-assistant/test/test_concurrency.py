@@ -0,0 +1,113 @@
+#!/usr/bin/python
+
+import asyncio
+import os
+import random
+import sys
+import time
+import types
+import uuid
+
+import click
+
+# Ensure we can import the agent entrypoint
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+import main  # noqa: E402
+from agent_config import agent_task as agent_task_module  # noqa: E402
+
+
+class StubAgent:
+    """Stands in for CustomerSupport: streams chunks naming its own session, with model-like delays"""
+
+    def __init__(self, actor_id: str, session_id: str, chunks: int, delay: float):
+        self.actor_id = actor_id
+        self.session_id = session_id
+        self.chunks = chunks
+        self.delay = delay
+        self.turns = 0
+        self.closed = False
+
+    async def stream(self, user_query: str, session_id: str, bearer_token: str = None):
+        self.turns += 1
+        for i in range(self.chunks):
+            await asyncio.sleep(random.uniform(0, self.delay))
+            yield f"{self.actor_id}/{self.session_id}/{user_query}/{i} "
+
+    def close(self):
+        self.closed = True
+
+
+async def invoke(actor_id: str, session_id: str, prompt: str) -> str:
+    payload = {"prompt": prompt, "actor_id": actor_id}
+    context = types.SimpleNamespace(session_id=session_id)
+    output = []
+    async for chunk in await main.invoke(payload, context):
+        output.append(chunk)
+    return "".join(output)
+
+
+def expected(actor_id: str, session_id: str, prompt: str, chunks: int) -> str:
+    return "".join(f"{actor_id}/{session_id}/{prompt}/{i} " for i in range(chunks))
+
+
+async def run(sessions: int, turns: int, chunks: int, delay: float, pool_size: int):
+    created = []
+
+    def create_agent(actor_id, session_id, gateway_access_token):
+        agent = StubAgent(actor_id, session_id, chunks, delay)
+        created.append(agent)
+        return agent
+
+    async def get_gateway_access_token():
+        return "stub-token"
+
+    # Stub the model and AWS: no SSM lookup, token or gateway
+    agent_task_module.create_agent = create_agent
+    main.load_agent_task = lambda: agent_task_module.agent_task
+    main.get_gateway_access_token = get_gateway_access_token
+    agent_task_module.agent_pool.max_size = pool_size
+
+    keys = [(f"actor-{i % 10}", str(uuid.uuid4())) for i in range(sessions)]
+    failures = 0
+    start = time.perf_counter()
+    for turn in range(turns):
+        prompt = f"turn{turn}"
+        outputs = await asyncio.gather(*(invoke(actor_id, session_id, prompt) for actor_id, session_id in keys))
+        for (actor_id, session_id), output in zip(keys, outputs):
+            if output != expected(actor_id, session_id, prompt, chunks):
+                failures += 1
+                print(f"❌ {actor_id}/{session_id} {prompt}: {output[:200]!r}")
+    elapsed = time.perf_counter() - start
+
+    pool = agent_task_module.agent_pool
+    print(f"{sessions} sessions x {turns} turns in {elapsed:.2f}s")
+    print(f"Agents created: {len(created)}, pooled: {len(pool)}, closed: {sum(agent.closed for agent in created)}")
+    if failures:
+        print(f"❌ {failures} invocations received output of another session or incomplete output")
+    if sessions <= pool_size and len(created) != sessions:
+        failures += 1
+        print(f"❌ Expected one agent per session, created {len(created)}")
+    if len(pool) > pool_size:
+        failures += 1
+        print(f"❌ Pool holds {len(pool)} agents, above its size of {pool_size}")
+    return failures
+
+
+@click.command()
+@click.option("--sessions", default=100, help="Parallel sessions")
+@click.option("--turns", default=3, help="Turns per session")
+@click.option("--chunks", default=5, help="Chunks streamed per turn")
+@click.option("--delay", default=0.02, help="Maximum delay between chunks, in seconds")
+@click.option("--pool-size", default=100, help="Agent pool size")
+def main_cli(sessions: int, turns: int, chunks: int, delay: float, pool_size: int):
+    """Drive parallel sessions through the entrypoint with a stub agent and check they stay isolated."""
+    failures = asyncio.run(run(sessions, turns, chunks, delay, pool_size))
+    if failures:
+        sys.exit(1)
+    print("✅ Every session received only its own output")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,98 @@
+#!/usr/bin/python
+
+import statistics
+import sys
+import os
+import threading
+import time
+import types
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+
+# Ensure we can import the memory hook
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from agent_config.memory_hook_provider import MemoryHook  # noqa: E402
+from agent_config.memory_writer import conversation_writer  # noqa: E402
+
+
+class LocalMemoryService:
+    """Stands in for AgentCore Memory: every call takes `latency` seconds"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.saved = []
+        self.save_calls = 0
+        self.retrieve_calls = 0
+
+    def retrieve_memories(self, memory_id, namespace, query, top_k=3):
+        time.sleep(self.latency)
+        with self.lock:
+            self.retrieve_calls += 1
+        return [{"content": {"text": f"{namespace.rsplit('/', 1)[-1]} about {query}"}}]
+
+    def save_conversation(self, memory_id, actor_id, session_id, messages):
+        time.sleep(self.latency)
+        with self.lock:
+            self.save_calls += 1
+            self.saved.extend((session_id, text, role) for text, role in messages)
+
+
+def add_message(hook: MemoryHook, messages: list, role: str, text: str) -> float:
+    """Append a message the way the agent does and time the hook"""
+    messages.append({"role": role, "content": [{"text": text}]})
+    event = types.SimpleNamespace(agent=types.SimpleNamespace(messages=messages))
+    start = time.perf_counter()
+    hook.on_message_added(event)
+    return time.perf_counter() - start
+
+
+def run_session(memory: LocalMemoryService, turns: int, history: int, results: dict):
+    session_id = str(uuid.uuid4())
+    hook = MemoryHook(memory_client=memory, memory_id="local", actor_id="actor", session_id=session_id)
+    # A long conversation, which the hook no longer copies on every message
+    messages = [{"role": "user", "content": [{"text": "earlier message " * 50}]} for _ in range(history)]
+    for turn in range(turns):
+        user_latency = add_message(hook, messages, "user", f"question {turn}")
+        assistant_latency = add_message(hook, messages, "assistant", f"answer {turn}")
+        with memory.lock:
+            results["user"].append(user_latency)
+            results["assistant"].append(assistant_latency)
+        if "preferences about" not in messages[-2]["content"][0]["text"]:
+            results["errors"] += 1
+
+
+@click.command()
+@click.option("--sessions", default=10, help="Parallel sessions")
+@click.option("--turns", default=10, help="Turns per session")
+@click.option("--latency", default=0.05, help="Latency of each memory call, in seconds")
+@click.option("--history", default=200, help="Messages already in each conversation")
+def main(sessions: int, turns: int, latency: float, history: int):
+    """Measure the memory hook's latency on the agent's hot path against a local memory service."""
+    memory = LocalMemoryService(latency)
+    results = {"user": [], "assistant": [], "errors": 0}
+
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        for _ in range(sessions):
+            executor.submit(run_session, memory, turns, history, results)
+
+    conversation_writer.flush(timeout=60)
+    messages = sessions * turns * 2
+
+    print(f"Memory call latency: {latency * 1000:.0f} ms")
+    print(f"User message:      p50 {statistics.median(results['user']) * 1000:.0f} ms "
+          f"(sequential retrieve, retrieve, save: {latency * 3000:.0f} ms)")
+    print(f"Assistant message: p50 {statistics.median(results['assistant']) * 1000:.0f} ms "
+          f"(synchronous save: {latency * 1000:.0f} ms)")
+    print(f"Retrievals: {memory.retrieve_calls}, saves: {memory.save_calls} for {len(memory.saved)} messages")
+
+    if results["errors"] or len(memory.saved) != messages:
+        print(f"❌ {results['errors']} user messages without memories, {len(memory.saved)} of {messages} messages saved")
+        sys.exit(1)
+    print("✅ Every message saved and every user message given its memories")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the use case entry points
+
+Starts an agent runtime entry point as a fresh process and measures the time
+until its health check first answers, which is what AgentCore Runtime (or the
+Lambda Web Adapter) waits for before sending traffic. AWS is replaced by a
+local stub endpoint that answers SSM GetParameter and counts every call, so
+the benchmark runs in CI without credentials and shows which calls a runtime
+still makes before it is ready.
+
+With --imports, reports the import cost per top-level package instead, from
+`python -X importtime`.
+
+The entry point's own dependencies must be installed in the Python used
+(--python, default: this interpreter).
+
+Usage:
+    python startup_benchmark.py [--runs 5] [--max-seconds 10] [TARGET ...]
+    python startup_benchmark.py --imports [--top 15] [TARGET ...]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import statistics
+import subprocess
+import urllib.error
+import urllib.request
+from pathlib import Path
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+USE_CASES_DIR = Path(__file__).resolve().parent
+
+# name: (directory, module, health check path)
+TARGETS = {
+    "customer-support-assistant": ("customer-support-assistant", "main", "/ping"),
+    "asynchronous-shopping-assistant": (
+        "asynchronous-shopping-assistant", "async_shopping_with_strands", "/ping"
+    ),
+    "aws-operations-agent-lambda": ("AWS-operations-agent/agent-lambda/src", "main", "/health"),
+    "video-games-sales-assistant": (
+        "video-games-sales-assistant/agentcore-strands-data-analyst-assistant", "app", "/ping"
+    ),
+}
+
+
+class StubAWSHandler(BaseHTTPRequestHandler):
+    """Answers every AWS JSON protocol call; SSM GetParameter returns a stub value"""
+
+    calls = Counter()
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        target = self.headers.get("X-Amz-Target", "") or self.path
+        with self.lock:
+            self.calls[target] += 1
+
+        response = {}
+        if target.endswith(".GetParameter"):
+            name = json.loads(body or b"{}").get("Name", "")
+            response = {"Parameter": {"Name": name, "Type": "String", "Value": f"stub{name.replace('/', '-')}"}}
+
+        data = json.dumps(response).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-amz-json-1.1")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST
+
+    def log_message(self, format, *args):
+        pass
+
+    @classmethod
+    def snapshot(cls):
+        with cls.lock:
+            return Counter(cls.calls)
+
+
+def start_stub_aws():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAWSHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stub_environment(aws_endpoint, port):
+    """Environment pointing every AWS SDK call at the stub, with fake credentials"""
+    env = dict(os.environ)
+    env.update({
+        "AWS_ENDPOINT_URL": aws_endpoint,
+        "AWS_ACCESS_KEY_ID": "stub",
+        "AWS_SECRET_ACCESS_KEY": "stub",
+        "AWS_SESSION_TOKEN": "stub",
+        "AWS_REGION": env.get("AWS_REGION", "us-east-1"),
+        "AWS_DEFAULT_REGION": env.get("AWS_REGION", "us-east-1"),
+        "AWS_EC2_METADATA_DISABLED": "true",
+        "PORT": str(port),
+        "PYTHONUNBUFFERED": "1",
+    })
+    env.pop("AWS_PROFILE", None)
+    return env
+
+
+def wait_until_ready(process, url, timeout):
+    """Poll url until it answers 200; returns the elapsed seconds or None"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            return None
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.02)
+    return None
+
+
+def measure_cold_start(python, name, port, aws_endpoint, timeout):
+    """One cold start: returns (seconds or None, AWS calls before ready, output tail on failure)"""
+    directory, module, health_path = TARGETS[name]
+    before = StubAWSHandler.snapshot()
+    process = subprocess.Popen(
+        [python, f"{module}.py"],
+        cwd=USE_CASES_DIR / directory,
+        env=stub_environment(aws_endpoint, port),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    try:
+        elapsed = wait_until_ready(process, f"http://127.0.0.1:{port}{health_path}", timeout)
+        calls = StubAWSHandler.snapshot() - before
+    finally:
+        process.terminate()
+        try:
+            output, _ = process.communicate(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            output, _ = process.communicate()
+    tail = "" if elapsed is not None else "\n".join(output.decode("utf-8", "replace").splitlines()[-10:])
+    return elapsed, calls, tail
+
+
+def run_benchmark(args, names):
+    server = start_stub_aws()
+    aws_endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+    failed = False
+
+    print(f"{'Target':<34} {'Median (s)':>10} {'Max (s)':>8} {'AWS calls':>10}")
+    for name in names:
+        times, calls, tail = [], Counter(), ""
+        for _ in range(args.runs):
+            elapsed, run_calls, tail = measure_cold_start(args.python, name, args.port, aws_endpoint, args.timeout)
+            if elapsed is None:
+                break
+            times.append(elapsed)
+            calls = run_calls
+
+        if len(times) < args.runs:
+            failed = True
+            print(f"{name:<34} {'not ready':>10}")
+            print("    " + tail.replace("\n", "\n    "))
+            continue
+
+        median = statistics.median(times)
+        print(f"{name:<34} {median:>10.2f} {max(times):>8.2f} {sum(calls.values()):>10}")
+        for target, count in sorted(calls.items()):
+            print(f"    {target}: {count}")
+        if args.max_seconds is not None and median > args.max_seconds:
+            failed = True
+            print(f"    median cold start above {args.max_seconds}s")
+
+    server.shutdown()
+    return 1 if failed else 0
+
+
+def import_costs(python, name, aws_endpoint):
+    """Self and cumulative import time per top-level package, in microseconds, from -X importtime"""
+    directory, module, _ = TARGETS[name]
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=USE_CASES_DIR / directory,
+        env=stub_environment(aws_endpoint, 0),
+        capture_output=True,
+        text=True,
+    )
+    costs = Counter()
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, package = line[len("import time:"):].split("|")
+        costs[package.strip().split(".")[0]] += int(self_us)
+        if not package.startswith("  "):
+            total += int(cumulative_us)
+    error = "" if result.returncode == 0 else result.stderr.strip().splitlines()[-1]
+    return costs, total, error
+
+
+def run_imports(args, names):
+    server = start_stub_aws()
+    aws_endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+    failed = False
+    for name in names:
+        costs, total, error = import_costs(args.python, name, aws_endpoint)
+        print(f"{name}: {total / 1e6:.2f}s to import")
+        if error:
+            failed = True
+            print(f"    import failed: {error}")
+        for package, self_us in costs.most_common(args.top):
+            print(f"    {package:<30} {self_us / 1e3:>9.1f} ms")
+
+    server.shutdown()
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start of the use case entry points against stubbed AWS")
+    parser.add_argument("targets", nargs="*", metavar="TARGET",
+                        help=f"Entry points to measure (default: all of {', '.join(TARGETS)})")
+    parser.add_argument("--imports", action="store_true", help="Report import time per package instead")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per target (default: 5)")
+    parser.add_argument("--port", type=int, default=8080, help="Port the entry points listen on (default: 8080)")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for a health check (default: 60)")
+    parser.add_argument("--max-seconds", type=float, help="Exit 1 if a median cold start is above this")
+    parser.add_argument("--top", type=int, default=15, help="Packages listed per target with --imports (default: 15)")
+    parser.add_argument("--python", default=sys.executable, help="Python to run the entry points with")
+    args = parser.parse_args()
+
+    names = args.targets or list(TARGETS)
+    unknown = [name for name in names if name not in TARGETS]
+    if unknown:
+        parser.error(f"unknown target {', '.join(unknown)}; choose from {', '.join(TARGETS)}")
+    return run_imports(args, names) if args.imports else run_benchmark(args, names)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ the Amazon RDS Data API to execute SQL queries against an Aurora Serverless Post
 It leverages Bedrock Agent Core for agent functionality and memory management.
 """
 
+import functools
 import logging
 import json
 from uuid import uuid4
@@ -13,46 +14,58 @@ import os
 
 # Bedrock Agent Core imports
 from bedrock_agentcore import BedrockAgentCoreApp
-from bedrock_agentcore.memory import MemoryClient
-from strands import Agent, tool
-from strands_tools import current_time
-from strands.models import BedrockModel
-
-# Custom module imports
-from src.MemoryHookProvider import MemoryHookProvider
-from src.tools import get_tables_information, load_file_content
+
+# Custom module imports (the Strands SDK and the memory client are imported on first request)
 from src.rds_data_api_utils import run_sql_query
 from src.utils import save_raw_query_result, read_messages_by_session, save_agent_interactions
-from src.ssm_utils import get_ssm_parameter
+from src.ssm_utils import get_config
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("personal-agent")
 
-# Read memory ID from SSM Parameter Store
-try:
-    # Read memory ID from SSM
-    memory_id = get_ssm_parameter("MEMORY_ID")
+
+@functools.lru_cache(maxsize=None)
+def get_memory():
+    """
+    Read the memory ID from SSM and create the memory client, on first use.
     
-    # Check if memory ID is empty
-    if not memory_id or memory_id.strip() == "":
-        error_msg = "Memory ID from SSM is empty. Memory has not been created yet."
-        logger.error(error_msg)
-        raise ValueError(error_msg)
-        
-    logger.info(f"Retrieved memory ID from SSM: {memory_id}")
+    Nothing is cached if this fails, so the next request tries again.
     
-    # Initialize Memory Client
-    client = MemoryClient(region_name='us-west-2', environment="prod")
+    Returns:
+        tuple: The MemoryClient and the memory ID
+        
+    Raises:
+        ValueError: If the memory ID from SSM is empty
+    """
+    from bedrock_agentcore.memory import MemoryClient
+
+    try:
+        # Read memory ID from the configuration loaded from SSM
+        memory_id = get_config().get("MEMORY_ID")
+        
+        # Check if memory ID is empty
+        if not memory_id or memory_id.strip() == "":
+            error_msg = "Memory ID from SSM is empty. Memory has not been created yet."
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+            
+        logger.info(f"Retrieved memory ID from SSM: {memory_id}")
+        
+        # Initialize Memory Client
+        client = MemoryClient(region_name='us-west-2', environment="prod")
+        
+    except Exception as e:
+        logger.error(f"Error retrieving memory ID from SSM: {e}")
+        raise
     
-except Exception as e:
-    logger.error(f"Error retrieving memory ID from SSM: {e}")
-    raise  # Re-raise the exception to stop execution
+    return client, memory_id
 
 
 # Initialize the Bedrock Agent Core app
 app = BedrockAgentCoreApp()
 
+@functools.lru_cache(maxsize=None)
 def load_system_prompt():
     """
     Load the system prompt from the instructions.txt file.
@@ -63,13 +76,12 @@ def load_system_prompt():
     Returns:
         str: The system prompt to use for the data analyst assistant
     """
+    from src.tools import load_file_content
+
     fallback_prompt = """You are a helpful Data Analyst Assistant who can help with data analysis tasks.
                 You can process data, interpret statistics, and provide insights based on data."""
     return load_file_content("instructions.txt", default_content=fallback_prompt)
 
-# Load the system prompt
-DATA_ANALYST_SYSTEM_PROMPT = load_system_prompt()
-
 def create_execute_sql_query_tool(user_prompt: str, prompt_uuid: str):
     """
     Create a dynamic SQL query execution tool with session context.
@@ -84,6 +96,8 @@ def create_execute_sql_query_tool(user_prompt: str, prompt_uuid: str):
     Returns:
         function: The configured SQL query execution tool
     """
+    from strands import tool
+
     @tool
     def execute_sql_query(sql_query: str, description: str) -> str:
         """
@@ -163,6 +177,12 @@ async def agent_invocation(payload):
         Generator: Yields response chunks for streaming
     """
     try:
+        from strands import Agent
+        from strands.models import BedrockModel
+        from strands_tools import current_time
+        from src.MemoryHookProvider import MemoryHookProvider
+        from src.tools import get_tables_information
+
         # Extract parameters from payload
         user_message = payload.get("prompt", "No prompt found in input, please guide customer to create a json payload with prompt key")
         bedrock_model_id = payload.get("bedrock_model_id", "us.anthropic.claude-3-7-sonnet-20250219-v1:0")
@@ -190,7 +210,10 @@ async def agent_invocation(payload):
         bedrock_model = BedrockModel(model_id=bedrock_model_id)
         
         # Prepare system prompt with user's timezone
-        system_prompt = DATA_ANALYST_SYSTEM_PROMPT.replace("{timezone}", user_timezone)
+        system_prompt = load_system_prompt().replace("{timezone}", user_timezone)
+        
+        # Read the memory ID and create the memory client on the first request
+        client, memory_id = get_memory()
         
         # Create the agent with conversation history, memory hooks, and tools
         agent = Agent(
@@ -15,6 +15,8 @@ from strands.hooks.events import AgentInitializedEvent, MessageAddedEvent
 from strands.hooks.registry import HookProvider, HookRegistry
 from bedrock_agentcore.memory import MemoryClient
 
+from .memory_cache import history_cache
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("personal-agent")
@@ -55,8 +57,9 @@ class MemoryHookProvider(HookProvider):
         """
         Load recent conversation history when agent starts.
         
-        This method retrieves the specified number of conversation turns from memory
-        and adds them to the agent's system prompt as context.
+        This method retrieves the specified number of conversation turns from memory,
+        or from the history cache when the session was loaded recently, and adds them
+        to the agent's system prompt as context.
         
         Args:
             event: Agent initialization event
@@ -65,12 +68,17 @@ class MemoryHookProvider(HookProvider):
             # Load the specified number of conversation turns from memory
             print("************ last_k_turns *********")
             print(self.last_k_turns)
-            recent_turns = self.memory_client.get_last_k_turns(
-                memory_id=self.memory_id,
-                actor_id=self.actor_id,
-                session_id=self.session_id,
-                k=self.last_k_turns
-            )
+            recent_turns = history_cache.get(self.memory_id, self.actor_id, self.session_id, self.last_k_turns)
+            if recent_turns is None:
+                recent_turns = self.memory_client.get_last_k_turns(
+                    memory_id=self.memory_id,
+                    actor_id=self.actor_id,
+                    session_id=self.session_id,
+                    k=self.last_k_turns
+                )
+                history_cache.put(self.memory_id, self.actor_id, self.session_id, self.last_k_turns, recent_turns)
+            else:
+                logger.info("Loaded conversation turns from the history cache")
             
             if recent_turns:
                 # Format conversation history for context
@@ -97,7 +105,7 @@ class MemoryHookProvider(HookProvider):
         Store messages in memory as they are added to the conversation.
         
         This method saves each new message to the Bedrock Agent Core memory system
-        for future reference.
+        for future reference, and to the session's entry in the history cache.
         
         Args:
             event: Message added event
@@ -148,6 +156,7 @@ class MemoryHookProvider(HookProvider):
                         session_id=self.session_id,
                         messages=[(content_to_save, role)]
                     )
+                    history_cache.record_saved(self.memory_id, self.actor_id, self.session_id, content_to_save, role)
                     print("------------||||||||||||| SAVED")
                 else:
                     print("------------||||||||||||| NOT SAVED")
@@ -0,0 +1,129 @@
+"""
+Conversation History Cache
+
+This module caches the conversation turns that the MemoryHookProvider loads from
+Bedrock Agent Core memory when an agent starts. Each request of a session creates a
+new agent, so without the cache every request reads the session history from the
+memory service again.
+
+Messages the assistant saves to memory are appended to the cached turns of their
+session as they are saved, so the cache stays current without reading them back.
+An entry is dropped after MEMORY_CACHE_TTL_SECONDS, or once more turns have been
+appended than were requested, and read again on the next request.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds a session's history is served from the cache
+MEMORY_CACHE_TTL_SECONDS = float(os.environ.get("MEMORY_CACHE_TTL_SECONDS", "300"))
+
+# Sessions kept in the cache
+MEMORY_CACHE_MAX_SESSIONS = int(os.environ.get("MEMORY_CACHE_MAX_SESSIONS", "500"))
+
+
+class ConversationHistoryCache:
+    """
+    Cache of the last conversation turns per session.
+
+    Attributes:
+        ttl: Seconds an entry is served before it is read from memory again
+        max_sessions: Number of sessions kept, least recently used dropped first
+        hits: Number of lookups served from the cache
+        misses: Number of lookups that had to read from memory
+    """
+
+    def __init__(self, ttl: float = MEMORY_CACHE_TTL_SECONDS, max_sessions: int = MEMORY_CACHE_MAX_SESSIONS):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds an entry is served before it is read from memory again
+            max_sessions: Number of sessions kept
+        """
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, memory_id: str, actor_id: str, session_id: str, k: int):
+        """
+        Get the last k turns of a session.
+
+        Args:
+            memory_id: ID of the memory resource
+            actor_id: ID of the user/actor
+            session_id: ID of the conversation session
+            k: Number of conversation turns requested
+
+        Returns:
+            list: The last k cached turns, or None if they must be read from memory
+        """
+        key = (memory_id, actor_id, session_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["k"] != k or entry["expires_at"] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return (entry["turns"] + entry["saved_turns"])[-k:]
+
+    def put(self, memory_id: str, actor_id: str, session_id: str, k: int, turns: list):
+        """
+        Cache the turns read from memory for a session.
+
+        Args:
+            memory_id: ID of the memory resource
+            actor_id: ID of the user/actor
+            session_id: ID of the conversation session
+            k: Number of conversation turns requested
+            turns: Turns returned by get_last_k_turns
+        """
+        key = (memory_id, actor_id, session_id)
+        with self._lock:
+            self._entries[key] = {
+                "k": k,
+                "turns": list(turns),
+                "saved_turns": [],
+                "expires_at": time.monotonic() + self.ttl,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+
+    def record_saved(self, memory_id: str, actor_id: str, session_id: str, text: str, role: str):
+        """
+        Append a message just saved to memory to its session's cached turns.
+
+        A user message starts a new turn, like in get_last_k_turns.
+
+        Args:
+            memory_id: ID of the memory resource
+            actor_id: ID of the user/actor
+            session_id: ID of the conversation session
+            text: Text of the saved message
+            role: Role of the saved message
+        """
+        key = (memory_id, actor_id, session_id)
+        message = {"role": role.upper(), "content": {"text": text}}
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            saved_turns = entry["saved_turns"]
+            if message["role"] == "USER" or not saved_turns:
+                saved_turns.append([message])
+            else:
+                saved_turns[-1].append(message)
+            # Past k new turns none of the turns read from memory are served; read them again
+            if len(saved_turns) > entry["k"]:
+                del self._entries[key]
+
+
+# Shared by all agents in the process
+history_cache = ConversationHistoryCache()
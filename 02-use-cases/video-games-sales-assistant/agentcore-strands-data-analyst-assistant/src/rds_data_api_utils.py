@@ -19,25 +19,21 @@ import boto3
 import json
 from botocore.exceptions import ClientError
 from decimal import Decimal
-from .ssm_utils import load_config
+from .ssm_utils import get_config
 
-# Load configuration from SSM parameters
-try:
-    CONFIG = load_config()
-except Exception as e:
-    print(f"Error loading configuration from SSM: {e}")
-    CONFIG = {}
 
-
-def validate_configuration():
+def validate_configuration(config):
     """
     Validates that all required configuration parameters are present.
     
+    Args:
+        config: Configuration dictionary from get_config()
+        
     Raises:
         ValueError: If any required configuration parameters are missing
     """
     required_params = ["SECRET_ARN", "AURORA_RESOURCE_ARN", "DATABASE_NAME", "AWS_REGION"]
-    missing_params = [param for param in required_params if param not in CONFIG or not CONFIG[param]]
+    missing_params = [param for param in required_params if param not in config or not config[param]]
     
     if missing_params:
         raise ValueError(f"Missing required configuration parameters: {', '.join(missing_params)}")
@@ -118,14 +114,15 @@ def run_sql_query(sql_query: str) -> str:
     print(sql_query)
     try:
         # Validate configuration parameters before proceeding
-        validate_configuration()
+        config = get_config()
+        validate_configuration(config)
         
         response = execute_statement(
             sql_query,
-            CONFIG["AWS_REGION"],
-            CONFIG["AURORA_RESOURCE_ARN"],
-            CONFIG["SECRET_ARN"],
-            CONFIG["DATABASE_NAME"]
+            config["AWS_REGION"],
+            config["AURORA_RESOURCE_ARN"],
+            config["SECRET_ARN"],
+            config["DATABASE_NAME"]
         )
 
         if "error" in response:
@@ -158,7 +155,7 @@ def run_sql_query(sql_query: str) -> str:
                             record[column_names[i]] = actual_value
                 records.append(record)
                 
-            max_response_size = CONFIG.get("MAX_RESPONSE_SIZE_BYTES", 25600)
+            max_response_size = config.get("MAX_RESPONSE_SIZE_BYTES", 25600)
             if get_size(json.dumps(records)) > max_response_size:
                 for item in records:
                     if get_size(json.dumps(records_to_return)) <= max_response_size:
@@ -18,6 +18,7 @@ Optional SSM Parameters:
 
 import boto3
 import os
+import threading
 from botocore.exceptions import ClientError
 
 # Project ID for SSM parameter path prefix
@@ -26,6 +27,10 @@ PROJECT_ID = "agentcore-data-analyst-assistant"
 # Default AWS region
 DEFAULT_REGION = "us-east-1"
 
+# Configuration loaded from SSM by get_config(), shared by all modules
+_config = None
+_config_lock = threading.Lock()
+
 def get_ssm_client(region_name=None):
     """
     Creates and returns an SSM client.
@@ -124,4 +129,26 @@ def load_config(region_name=None):
         except ValueError:
             config["MAX_RESPONSE_SIZE_BYTES"] = 25600
     
-    return config
\ No newline at end of file
+    return config
+
+def get_config():
+    """
+    Returns the configuration, loading it from SSM on first use.
+    
+    The configuration is loaded once per process and shared, so importing the
+    modules that use it makes no AWS calls. If loading fails the error is printed
+    and an empty dictionary is returned; the next call tries again.
+    
+    Returns:
+        dict: Configuration dictionary with all parameters
+    """
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                try:
+                    _config = load_config()
+                except Exception as e:
+                    print(f"Error loading configuration from SSM: {e}")
+                    return {}
+    return _config
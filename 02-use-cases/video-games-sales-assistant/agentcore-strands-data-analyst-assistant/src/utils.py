@@ -15,14 +15,7 @@ import json
 from boto3.dynamodb.conditions import Key
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from .ssm_utils import load_config
-
-# Load configuration from SSM parameters
-try:
-    CONFIG = load_config()
-except Exception as e:
-    print(f"Error loading configuration from SSM: {e}")
-    CONFIG = {}
+from .ssm_utils import get_config
 
 def save_raw_query_result(user_prompt_uuid, user_prompt, sql_query, sql_query_description, result, message):
     """
@@ -40,12 +33,14 @@ def save_raw_query_result(user_prompt_uuid, user_prompt, sql_query, sql_query_de
         dict: Response with success status and DynamoDB response or error details
     """
     try:
+        config = get_config()
+
         # Check if the table name is available
-        question_answers_table = CONFIG.get("QUESTION_ANSWERS_TABLE")
+        question_answers_table = config.get("QUESTION_ANSWERS_TABLE")
         if not question_answers_table:
             return {"success": False, "error": "QUESTION_ANSWERS_TABLE not configured"}
             
-        dynamodb_client = boto3.client('dynamodb', region_name=CONFIG["AWS_REGION"])
+        dynamodb_client = boto3.client('dynamodb', region_name=config["AWS_REGION"])
         
         response = dynamodb_client.put_item(
             TableName=question_answers_table,
@@ -84,13 +79,15 @@ def read_messages_by_session(
     Note:
         Uses AGENT_INTERACTIONS_TABLE_NAME parameter from SSM for data retrieval.
     """
+    config = get_config()
+
     # Check if the table name is available
-    conversation_table = CONFIG.get("AGENT_INTERACTIONS_TABLE_NAME")
+    conversation_table = config.get("AGENT_INTERACTIONS_TABLE_NAME")
     if not conversation_table:
         print("AGENT_INTERACTIONS_TABLE_NAME not configured")
         return []
         
-    dynamodb_resource = boto3.resource('dynamodb', region_name=CONFIG["AWS_REGION"])
+    dynamodb_resource = boto3.resource('dynamodb', region_name=config["AWS_REGION"])
     table = dynamodb_resource.Table(conversation_table)
     
     messages = []
@@ -196,13 +193,15 @@ def save_agent_interactions(session_id: str, prompt_uuid: str, starting_message_
 
     print("Final messages length: " + str(len(messages_to_save)))
 
+    config = get_config()
+
     # Check if the table name is available
-    conversation_table = CONFIG.get("AGENT_INTERACTIONS_TABLE_NAME")
+    conversation_table = config.get("AGENT_INTERACTIONS_TABLE_NAME")
     if not conversation_table:
         print("AGENT_INTERACTIONS_TABLE_NAME not configured")
         return False
         
-    dynamodb = boto3.resource('dynamodb', region_name=CONFIG["AWS_REGION"])
+    dynamodb = boto3.resource('dynamodb', region_name=config["AWS_REGION"])
     table = dynamodb.Table(conversation_table)
     try:
         with table.batch_writer() as batch: